@@ -13,6 +13,11 @@ import logging
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 
+import numpy as np
+
+from brain.agents.quant.arbitrage_graph import ArbitrageGraph
+from brain.agents.quant.spatial_scanner import SpatialArbScanner, net_spread_matrix
+
 class ArbitrageAgent:
     """
     وكيل المراجحة (Arbitrageur).
@@ -39,6 +44,21 @@ class ArbitrageAgent:
         
         self.min_profit = min_profit_threshold
 
+        # مصفوفة (رموز × بورصات) للمراقبة المستمرة بين البورصات
+        self.spatial = SpatialArbScanner(self.exchange_fees, min_profit=self.min_profit)
+
+        # رسم العملات لكل بورصة (المراجحة المثلثية تتم داخل نفس البورصة)
+        self.graphs: Dict[str, ArbitrageGraph] = {}
+
+    def get_graph(self, exchange: str = "BINANCE") -> ArbitrageGraph:
+        """رسم عملات البورصة (ينشأ عند أول استخدام برسومها)."""
+        graph = self.graphs.get(exchange)
+        if graph is None:
+            graph = self.graphs[exchange] = ArbitrageGraph(
+                fee=self.exchange_fees.get(exchange, 0.001), min_profit=self.min_profit
+            )
+        return graph
+
     def scan_spatial_arbitrage(self, market_snapshot: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         البحث عن المراجحة المكانية (Spatial Arbitrage).
@@ -54,64 +74,104 @@ class ArbitrageAgent:
         Returns:
             قائمة بالفرص المتاحة.
         """
+        exchanges = [ex for ex, quote in market_snapshot.items() if self._is_valid_quote(quote)]
+        if len(exchanges) < 2:
+            return []
+
+        # صف واحد من مصفوفة الهوامش: كل أزواج (شراء، بيع) دفعة واحدة
+        bid = np.array([[market_snapshot[ex]['bid'] for ex in exchanges]], dtype=np.float64)
+        ask = np.array([[market_snapshot[ex]['ask'] for ex in exchanges]], dtype=np.float64)
+        fees = np.array([self.exchange_fees.get(ex, 0.001) for ex in exchanges])
+        net = net_spread_matrix(bid, ask, fees)[0]
+
         opportunities = []
-        exchanges = list(market_snapshot.keys())
-        
-        # مقارنة كل بورصة بالأخرى (Pairwise Comparison)
-        for i in range(len(exchanges)):
-            for j in range(len(exchanges)):
-                if i == j: continue
-                
-                ex_buy = exchanges[i]
-                ex_sell = exchanges[j]
-                
-                data_buy = market_snapshot[ex_buy]
-                data_sell = market_snapshot[ex_sell]
-                
-                # التحقق من صحة البيانات
-                if not self._is_valid_quote(data_buy) or not self._is_valid_quote(data_sell):
-                    continue
-
-                # المعادلة: نشتري من Ask (المعروض) ونبيع للـ Bid (المطلوب)
-                buy_price = data_buy['ask']
-                sell_price = data_sell['bid']
-                
-                # حساب هامش الربح الخام (Gross Spread)
-                if sell_price > buy_price:
-                    gross_spread = (sell_price - buy_price) / buy_price
-                    
-                    # حساب صافي الربح بعد الرسوم (Net Profit)
-                    net_profit = self._calculate_net_profit(gross_spread, ex_buy, ex_sell)
-                    
-                    if net_profit >= self.min_profit:
-                        # تم العثور على فرصة ذهبية!
-                        opp = {
-                            "type": "SPATIAL_ARB",
-                            "timestamp": datetime.utcnow().isoformat(),
-                            "asset": data_buy.get('symbol', 'UNKNOWN'),
-                            "buy_exchange": ex_buy,
-                            "sell_exchange": ex_sell,
-                            "buy_price": buy_price,
-                            "sell_price": sell_price,
-                            "gross_spread_pct": round(gross_spread * 100, 4),
-                            "net_profit_pct": round(net_profit * 100, 4),
-                            "estimated_fees": round((gross_spread - net_profit) * 100, 4)
-                        }
-                        opportunities.append(opp)
-                        
-                        # تسجيل جنائي للتوثيق
-                        self.logger.info(f"ARB_FOUND: {ex_buy}->{ex_sell} | Net: {opp['net_profit_pct']}%")
+        timestamp = datetime.utcnow().isoformat()
+        for i, j in zip(*np.nonzero(net >= self.min_profit)):
+            ex_buy, ex_sell = exchanges[i], exchanges[j]
+            buy_price = market_snapshot[ex_buy]['ask']
+            sell_price = market_snapshot[ex_sell]['bid']
+            gross_spread = (sell_price - buy_price) / buy_price
+            net_profit = float(net[i, j])
+            opp = {
+                "type": "SPATIAL_ARB",
+                "timestamp": timestamp,
+                "asset": market_snapshot[ex_buy].get('symbol', 'UNKNOWN'),
+                "buy_exchange": ex_buy,
+                "sell_exchange": ex_sell,
+                "buy_price": buy_price,
+                "sell_price": sell_price,
+                "gross_spread_pct": round(gross_spread * 100, 4),
+                "net_profit_pct": round(net_profit * 100, 4),
+                "estimated_fees": round((gross_spread - net_profit) * 100, 4)
+            }
+            opportunities.append(opp)
+
+            # تسجيل جنائي للتوثيق
+            self.logger.info(f"ARB_FOUND: {ex_buy}->{ex_sell} | Net: {opp['net_profit_pct']}%")
 
         return opportunities
 
-    def scan_triangular_arbitrage(self, rates: Dict[str, float]) -> Optional[Dict[str, Any]]:
+    def on_exchange_quote(self, symbol: str, exchange: str, bid: float, ask: float,
+                          bid_qty: float = 0.0, ask_qty: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        تحديث لحظي لسعر رمز في بورصة (في مكانه)، ثم مسح صف هذا الرمز فقط.
+        """
+        self.spatial.update(symbol, exchange, bid, ask, bid_qty, ask_qty)
+        return self.spatial.scan(symbol=symbol)
+
+    def scan_all_spatial(self, top_n: int = 20) -> List[Dict[str, Any]]:
+        """مسح كل الرموز المراقبة على كل البورصات دفعة واحدة (أفضل top_n فرصة)."""
+        return self.spatial.scan(top_n=top_n)
+
+    def scan_triangular_arbitrage(self, rates: Dict[str, Any], exchange: str = "BINANCE") -> Optional[Dict[str, Any]]:
         """
         البحث عن المراجحة المثلثية (Triangular Arbitrage) داخل نفس البورصة.
         مثال: BTC -> ETH -> USDT -> BTC.
+
+        Args:
+            rates: {"BASE/QUOTE": سعر} أو {"BASE/QUOTE": {"bid", "ask", "bid_qty"?, "ask_qty"?}}.
+            exchange: البورصة (تحدد الرسوم والرسم المستخدم).
+
+        Returns:
+            أفضل دورة مربحة (3-4 أرجل من أي أصل أساس) أو None.
+            rates لقطة كاملة: الأزواج الغائبة عنها تحذف من الرسم مع دوراتها.
         """
-        # (يتطلب منطقاً خاصاً بالرسم البياني للأزواج، نضعه هنا كإطار عمل)
-        # TODO: Implement graph cycle detection for triangular arb
-        return None
+        graph = self.get_graph(exchange)
+        current = set()
+        for pair, quote in rates.items():
+            base, _, quote_asset = pair.partition("/")
+            if not quote_asset:
+                continue
+            current.add((base, quote_asset))
+            # كل حافة تعيد تقييم دوراتها فقط (الجدول التزايدي شامل، فلا حاجة لمسح كامل)
+            if isinstance(quote, dict):
+                graph.set_quote(base, quote_asset, quote.get("bid", 0), quote.get("ask", 0),
+                                quote.get("bid_qty", float("inf")), quote.get("ask_qty", float("inf")))
+            else:
+                graph.set_quote(base, quote_asset, quote, quote)
+
+        for base, quote_asset in graph.pairs - current:
+            graph.remove_pair(base, quote_asset)
+
+        found = graph.opportunities(limit=1)
+        if not found:
+            return None
+        best = self._stamp(found[0], exchange)
+        self.logger.info(f"ARB_FOUND: {' -> '.join(best['path'])} @ {exchange} | Net: {best['net_profit_pct']}%")
+        return best
+
+    def on_quote(self, exchange: str, base: str, quote: str, bid: float, ask: float,
+                 bid_qty: float = float("inf"), ask_qty: float = float("inf")) -> List[Dict[str, Any]]:
+        """
+        تحديث لحظي لزوج واحد: يعاد تقييم الدورات المارة بحافتي الزوج فقط.
+        """
+        found = self.get_graph(exchange).set_quote(base, quote, bid, ask, bid_qty, ask_qty)
+        return [self._stamp(opp, exchange) for opp in found]
+
+    def _stamp(self, opportunity: Dict[str, Any], exchange: str) -> Dict[str, Any]:
+        opportunity["exchange"] = exchange
+        opportunity["timestamp"] = datetime.utcnow().isoformat()
+        return opportunity
 
     def _calculate_net_profit(self, gross_spread: float, ex_buy: str, ex_sell: str) -> float:
         """
@@ -0,0 +1,373 @@
+# Currency Graph Cycle Detector
+
+# -*- coding: utf-8 -*-
+# ALPHA SOVEREIGN - ARBITRAGE CYCLE GRAPH
+# =================================================================
+# Component Name: brain/agents/quant/arbitrage_graph.py
+# Core Responsibility: كشف دورات المراجحة (3-4 أرجل) على كامل رسم العملات ومن أي أصل أساس.
+# Design Pattern: Weighted Graph (−log rate) + Exhaustive Cycle Enumeration + Incremental Edge Re-evaluation
+# Forensic Impact: الربح يحسب على أسعار بعد الرسوم وبعد عمق الدفتر؛ كل فرصة تحمل الحجم الأقصى
+#                  الذي يسمح به أضعف رجل فيها، فلا توثق "فرصة" لا يمكن تنفيذها.
+# =================================================================
+#
+# وزن الحافة u -> v هو −log(rate_uv)، حيث rate_uv = كمية v المستلمة مقابل وحدة u بعد الرسوم.
+# الدورة مربحة إذا كان مجموع أوزانها < −log(1 + min_profit).
+#
+#   - المسح الكامل: تعداد شامل لكل الدورات من أصغر عقدة فيها (بالتوازي عبر العقد).
+#   - التحديث التزايدي: تغير سعر حافة واحدة يعيد تقييم الدورات التي تمر بها فقط:
+#     O(N) لدورات 3 أرجل + O(N²) لدورات 4 أرجل، بدلاً من إعادة مسح الرسم.
+
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+# محاولة استيراد Numba مع fallback آمن
+try:
+    from numba import jit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def jit(*args, **kwargs):
+        def decorator(func):
+            return func
+        return decorator
+
+logger = logging.getLogger("Alpha.Brain.Quant.ArbitrageGraph")
+
+MAX_LEGS = 4
+
+# =================================================================
+# 1. JIT KERNELS
+# =================================================================
+
+@jit(nopython=True, nogil=True, parallel=True, cache=True)
+def _jit_enumerate_cycles(weights, max_legs, threshold, counts, offsets, out_w, out_nodes, fill):
+    """
+    تعداد شامل لكل الدورات البسيطة المربحة (3-4 أرجل).
+    كل دورة تعد مرة واحدة من أصغر عقدة فيها s (بقية العقد > s)، بالتوازي عبر s.
+    fill=False: عد فقط في counts[s]؛ fill=True: كتابة الدورات ابتداءً من offsets[s].
+    """
+    n = weights.shape[0]
+    inf = np.inf
+
+    for s in prange(n):
+        c = 0
+        pos = offsets[s]
+        for a in range(s + 1, n):
+            w1 = weights[s, a]
+            if w1 == inf:
+                continue
+            for b in range(s + 1, n):
+                if b == a:
+                    continue
+                w2 = w1 + weights[a, b]
+                if w2 == inf:
+                    continue
+                # s -> a -> b -> s
+                w3 = w2 + weights[b, s]
+                if w3 < threshold:
+                    if fill:
+                        out_w[pos + c] = w3
+                        out_nodes[pos + c, 0] = s
+                        out_nodes[pos + c, 1] = a
+                        out_nodes[pos + c, 2] = b
+                        out_nodes[pos + c, 3] = -1
+                    c += 1
+                if max_legs < 4:
+                    continue
+                # s -> a -> b -> d -> s
+                for d in range(s + 1, n):
+                    if d == a or d == b:
+                        continue
+                    w4 = w2 + weights[b, d] + weights[d, s]
+                    if w4 < threshold:
+                        if fill:
+                            out_w[pos + c] = w4
+                            out_nodes[pos + c, 0] = s
+                            out_nodes[pos + c, 1] = a
+                            out_nodes[pos + c, 2] = b
+                            out_nodes[pos + c, 3] = d
+                        c += 1
+        counts[s] = c
+
+
+@jit(nopython=True, nogil=True, cache=True)
+def _jit_cycles_through_edge(weights, n, u, v, max_legs, threshold, out_w, out_nodes):
+    """
+    كل الدورات المربحة (3 أو 4 أرجل) التي تمر بالحافة u -> v بين أول n أصل.
+    تعيد عدد الدورات المخزنة (محدود بطول out_w).
+    """
+    inf = np.inf
+    cap = out_w.shape[0]
+    count = 0
+    w_uv = weights[u, v]
+    if w_uv == inf:
+        return 0
+
+    # عمود العودة إلى u كمصفوفة متصلة (الوصول العمودي يكسر الكاش في الحلقة الداخلية)
+    back = np.empty(n)
+    for k in range(n):
+        back[k] = weights[k, u]
+
+    # u -> v -> k -> u
+    for k in range(n):
+        if k == u or k == v:
+            continue
+        w = w_uv + weights[v, k] + back[k]
+        if w < threshold and count < cap:
+            out_w[count] = w
+            out_nodes[count, 0] = u
+            out_nodes[count, 1] = v
+            out_nodes[count, 2] = k
+            out_nodes[count, 3] = -1
+            count += 1
+
+    if max_legs < 4:
+        return count
+
+    # u -> v -> a -> b -> u
+    for a in range(n):
+        if a == u or a == v:
+            continue
+        head = w_uv + weights[v, a]
+        if head == inf:
+            continue
+        for b in range(n):
+            w = head + weights[a, b] + back[b]
+            if w < threshold and b != u and b != v and b != a and count < cap:
+                out_w[count] = w
+                out_nodes[count, 0] = u
+                out_nodes[count, 1] = v
+                out_nodes[count, 2] = a
+                out_nodes[count, 3] = b
+                count += 1
+    return count
+
+# =================================================================
+# 2. GRAPH (الرسم البياني)
+# =================================================================
+
+def _canonical(nodes: Sequence[int]) -> Tuple[int, ...]:
+    """تدوير الدورة لتبدأ بأصغر فهرس (نفس الدورة من أي أساس = مفتاح واحد)."""
+    i = int(np.argmin(nodes))
+    return tuple(int(x) for x in nodes[i:]) + tuple(int(x) for x in nodes[:i])
+
+
+def book_vwap(prices: np.ndarray, qtys: np.ndarray, size: float) -> float:
+    """متوسط سعر تنفيذ `size` على مستويات الدفتر (NaN إذا لم يكف العمق)."""
+    cum = np.cumsum(qtys)
+    if not len(cum) or cum[-1] < size:
+        return float("nan")
+    k = int(np.searchsorted(cum, size))
+    filled = cum[k - 1] if k else 0.0
+    notional = float(np.dot(prices[:k], qtys[:k])) + (size - filled) * prices[k]
+    return notional / size
+
+
+class ArbitrageGraph:
+    """
+    رسم عملات موجه بأوزان −log(rate).
+    آمن للاستخدام من خيط واحد (خيط تدفق الأسعار)؛ القراءة عبر opportunities() تعيد نسخاً.
+    """
+
+    def __init__(self,
+                 fee: float = 0.00075,
+                 min_profit: float = 0.0005,
+                 max_legs: int = MAX_LEGS,
+                 max_cycles_per_edge: int = 256,
+                 capacity: int = 64):
+        """
+        Args:
+            fee: رسوم الأخذ الافتراضية لكل رجل.
+            min_profit: أدنى ربح صافٍ للدورة (بعد الرسوم).
+            max_legs: أطول دورة (3 أو 4).
+            max_cycles_per_edge: حد الدورات المعادة من تحديث حافة واحدة.
+            capacity: السعة الابتدائية للأصول (تتضاعف تلقائياً).
+        """
+        self.fee = fee
+        self.min_profit = min_profit
+        self.max_legs = min(max(max_legs, 3), MAX_LEGS)
+        self.threshold = -np.log1p(min_profit)
+
+        self._index: Dict[str, int] = {}
+        self.assets: List[str] = []
+        self.weights = np.full((capacity, capacity), np.inf)
+        # سعة كل حافة بوحدات الأصل المصدر (inf = غير معروفة)
+        self.depth = np.full((capacity, capacity), np.inf)
+
+        # الأزواج الحية (base, quote) حتى يمكن حذف ما غاب عن لقطة لاحقة
+        self.pairs: Set[Tuple[str, str]] = set()
+        self._cycles: Dict[Tuple[int, ...], float] = {}
+        self._edge_cycles: Dict[Tuple[int, int], Set[Tuple[int, ...]]] = {}
+        self._out_w = np.empty(max_cycles_per_edge)
+        self._out_nodes = np.empty((max_cycles_per_edge, MAX_LEGS), dtype=np.int64)
+        self.stats: Dict[str, int] = {"edge_updates": 0, "full_scans": 0, "cycles_found": 0}
+
+    # --- Assets ---
+
+    def asset_id(self, asset: str) -> int:
+        idx = self._index.get(asset)
+        if idx is None:
+            idx = self._index[asset] = len(self.assets)
+            self.assets.append(asset)
+            cap = self.weights.shape[0]
+            if idx >= cap:
+                weights = np.full((2 * cap, 2 * cap), np.inf)
+                depth = np.full((2 * cap, 2 * cap), np.inf)
+                weights[:cap, :cap] = self.weights
+                depth[:cap, :cap] = self.depth
+                self.weights, self.depth = weights, depth
+        return idx
+
+    @property
+    def n(self) -> int:
+        return len(self.assets)
+
+    # --- Edge Updates ---
+
+    def set_rate(self, src: str, dst: str, rate: float, depth: float = np.inf,
+                 fee: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        تحديث حافة واحدة: rate = كمية dst مقابل وحدة src قبل الرسوم؛ depth بوحدات src.
+        تعيد الفرص المربحة التي تمر بهذه الحافة بعد التحديث.
+        """
+        u, v = self.asset_id(src), self.asset_id(dst)
+        fee = self.fee if fee is None else fee
+        net = rate * (1.0 - fee)
+        self.weights[u, v] = -np.log(net) if net > 0 and np.isfinite(net) and depth > 0 else np.inf
+        self.depth[u, v] = depth
+        return self._on_edge(u, v)
+
+    def set_quote(self, base: str, quote: str, bid: float, ask: float,
+                  bid_qty: float = np.inf, ask_qty: float = np.inf,
+                  fee: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        تحديث زوج base/quote من أفضل سعرين:
+          base -> quote بيع عند bid، و quote -> base شراء عند ask.
+        """
+        valid = bid > 0 and ask > 0
+        if valid:
+            self.pairs.add((base, quote))
+        else:
+            self.pairs.discard((base, quote))
+        out = self.set_rate(base, quote, bid if valid else np.nan, bid_qty, fee)
+        out += self.set_rate(quote, base, 1.0 / ask if valid else np.nan, ask * ask_qty, fee)
+        return out
+
+    def remove_pair(self, base: str, quote: str):
+        """حذف حافتي الزوج (اختفى من البورصة أو من اللقطة) وإسقاط دوراته."""
+        self.set_quote(base, quote, np.nan, np.nan)
+
+    def set_book(self, base: str, quote: str, book: Any, size: float,
+                 fee: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        تحديث زوج من L2OrderBook بأسعار معدلة بالعمق: متوسط سعر تنفيذ `size` من base على كل جانب.
+        إذا لم يكف العمق تحذف الحافة.
+        """
+        bid = book_vwap(*book.top("BID"), size)
+        ask = book_vwap(*book.top("ASK"), size)
+        if np.isnan(bid) or np.isnan(ask):
+            bid = ask = np.nan
+        return self.set_quote(base, quote, bid, ask, size, size, fee)
+
+    def _on_edge(self, u: int, v: int) -> List[Dict[str, Any]]:
+        """إعادة تقييم الدورات المتأثرة بالحافة u -> v فقط."""
+        self.stats["edge_updates"] += 1
+
+        # 1. الدورات المعروفة التي تمر بالحافة: تحديث الوزن أو الإسقاط
+        for key in list(self._edge_cycles.get((u, v), ())):
+            w = self._cycle_weight(key)
+            if w < self.threshold:
+                self._cycles[key] = w
+            else:
+                self._drop(key)
+
+        # 2. البحث عن دورات جديدة عبر الحافة
+        count = _jit_cycles_through_edge(self.weights, self.n, u, v, self.max_legs, self.threshold,
+                                         self._out_w, self._out_nodes)
+        found = []
+        for i in range(count):
+            nodes = self._out_nodes[i]
+            legs = 3 if nodes[3] < 0 else 4
+            key = self._add(nodes[:legs], float(self._out_w[i]))
+            found.append(key)
+        return [self._describe(key) for key in found]
+
+    # --- Full Scan ---
+
+    def full_scan(self) -> List[Dict[str, Any]]:
+        """
+        مسح كامل للرسم (تحقق دوري أو بعد تحميل أوزان خارج set_rate)؛ يعيد بناء جدول الدورات.
+        التعداد شامل (كل الدورات لا أفضلها لكل مصدر)، فالجدول بعده مطابق لما يبنيه التحديث التزايدي.
+        """
+        n = self.n
+        weights = np.ascontiguousarray(self.weights[:n, :n])
+        counts = np.zeros(n, dtype=np.int64)
+        offsets = np.zeros(n, dtype=np.int64)
+        # تمريرتان: عد ثم كتابة في مواضع محجوزة (لا حد ثابت لعدد الدورات)
+        _jit_enumerate_cycles(weights, self.max_legs, self.threshold, counts, offsets,
+                              self._out_w, self._out_nodes, False)
+        offsets[1:] = np.cumsum(counts)[:-1]
+        total = int(counts.sum())
+        out_w = np.empty(total)
+        out_nodes = np.empty((total, MAX_LEGS), dtype=np.int64)
+        _jit_enumerate_cycles(weights, self.max_legs, self.threshold, counts, offsets,
+                              out_w, out_nodes, True)
+
+        self._cycles.clear()
+        self._edge_cycles.clear()
+        for i in range(total):
+            legs = 3 if out_nodes[i, 3] < 0 else 4
+            self._add(out_nodes[i, :legs], float(out_w[i]))
+        self.stats["full_scans"] += 1
+        return self.opportunities()
+
+    # --- Cycle Table ---
+
+    def _cycle_weight(self, key: Tuple[int, ...]) -> float:
+        return float(sum(self.weights[key[i], key[(i + 1) % len(key)]] for i in range(len(key))))
+
+    def _add(self, nodes: Sequence[int], weight: float) -> Tuple[int, ...]:
+        key = _canonical(nodes)
+        if key not in self._cycles:
+            self.stats["cycles_found"] += 1
+            for i in range(len(key)):
+                self._edge_cycles.setdefault((key[i], key[(i + 1) % len(key)]), set()).add(key)
+        self._cycles[key] = weight
+        return key
+
+    def _drop(self, key: Tuple[int, ...]):
+        self._cycles.pop(key, None)
+        for i in range(len(key)):
+            edge = (key[i], key[(i + 1) % len(key)])
+            linked = self._edge_cycles.get(edge)
+            if linked is not None:
+                linked.discard(key)
+                if not linked:
+                    del self._edge_cycles[edge]
+
+    def _describe(self, key: Tuple[int, ...]) -> Dict[str, Any]:
+        """وصف الدورة: المسار، الربح الصافي، والحجم الأقصى بوحدات أصل البداية."""
+        w = self._cycles.get(key, self._cycle_weight(key))
+        legs = len(key)
+        max_size = np.inf
+        growth = 1.0
+        for i in range(legs):
+            a, b = key[i], key[(i + 1) % legs]
+            max_size = min(max_size, self.depth[a, b] / growth)
+            growth *= float(np.exp(-self.weights[a, b]))
+        return {
+            "type": "TRIANGULAR_ARB" if legs == 3 else "CYCLE_ARB",
+            "path": [self.assets[i] for i in key] + [self.assets[key[0]]],
+            "legs": legs,
+            "net_profit_pct": round(float(np.expm1(-w)) * 100, 4),
+            "max_size": float(max_size),
+        }
+
+    def opportunities(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """الفرص الحالية مرتبة من الأعلى ربحاً."""
+        ranked = sorted(self._cycles, key=self._cycles.get)
+        return [self._describe(key) for key in ranked[:limit]]
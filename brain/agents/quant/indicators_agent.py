@@ -7,12 +7,17 @@
 # Core Responsibility: تشغيل محرك المؤشرات الفنية المتقدمة والبحث عن الارتباطات والأنماط (Intelligence Pillar).
 # Design Pattern: Agent / Computable Function
 # Forensic Impact: يوفر "السياق الفني" للحركة. إذا تحرك السعر عكس المؤشرات (Divergence)، فهذا دليل محتمل على التلاعب.
+# Streaming Mode: مع تمرير symbol تحدث المؤشرات تزايدياً (O(1) لكل شمعة جديدة) عبر StreamingIndicators.
+# Panel Mode: analyze_panel يحسب مؤشرات كل رموز الكون دفعة واحدة على مصفوفات (رموز × زمن).
 # =================================================================
 
 import logging
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Sequence
+
+from brain.agents.quant.streaming_indicators import StreamingIndicators
+from brain.agents.quant.panel_indicators import PanelIndicators, compute_panel
 
 class IndicatorsAgent:
     """
@@ -31,21 +36,34 @@ class IndicatorsAgent:
         self.macd_signal = 9
         self.bb_period = 20
         self.bb_std = 2.0
+        self.atr_period = 14
+        self.divergence_window = 10
+        self.min_candles = 50
+
+        # محركات تزايدية لكل رمز (وضع البث)
+        self._engines: Dict[str, StreamingIndicators] = {}
 
-    def analyze_market_state(self, candles_df: pd.DataFrame) -> Dict[str, Any]:
+    def analyze_market_state(self, candles_df: pd.DataFrame, symbol: Optional[str] = None) -> Dict[str, Any]:
         """
         تحليل حالة السوق بناءً على الشموع التاريخية.
         
         Args:
             candles_df: DataFrame يحتوي على [open, high, low, close, volume]
+            symbol: عند تمريره يستخدم المحرك التزايدي للرمز: يبذر من التاريخ أول مرة،
+                    ثم يغذى بالشموع الجديدة فقط (الشموع المغلقة لا تراجع).
             
         Returns:
             تقرير فني شامل (Technical Report).
         """
-        if candles_df.empty or len(candles_df) < 50:
+        if candles_df.empty or len(candles_df) < self.min_candles:
             return {"status": "INSUFFICIENT_DATA"}
 
         try:
+            if symbol is not None:
+                engine = self._sync_engine(symbol, candles_df)
+                return self._build_report(engine.values, engine.previous,
+                                          list(engine.recent_close), list(engine.recent_rsi), engine.last_ts)
+
             # 1. حساب المؤشرات الأساسية
             df = candles_df.copy()
             self._add_rsi(df)
@@ -57,65 +75,154 @@ class IndicatorsAgent:
             # 2. استخراج القيم الحالية (آخر شمعة)
             latest = df.iloc[-1]
             prev = df.iloc[-2]
+            window = self.divergence_window
+            return self._build_report(latest, prev, df['close'].iloc[-window:].tolist(),
+                                      df['rsi'].iloc[-window:].tolist(), latest.name)
 
-            # 3. الكشف عن الأنماط المتقدمة (Signals Detection)
-            signals = []
-            
-            # A. فحص تشبع الشراء/البيع (RSI Extremes)
-            rsi_state = "NEUTRAL"
-            if latest['rsi'] > 70: rsi_state = "OVERBOUGHT"
-            elif latest['rsi'] < 30: rsi_state = "OVERSOLD"
-
-            # B. تقاطع الماكد (MACD Crossover)
-            # إذا كان الخط السريع تحت البطيع في الشمعة السابقة، وأصبح فوقه الآن -> تقاطع إيجابي
-            if prev['macd'] < prev['macd_signal'] and latest['macd'] > latest['macd_signal']:
-                signals.append("MACD_GOLDEN_CROSS")
-            elif prev['macd'] > prev['macd_signal'] and latest['macd'] < latest['macd_signal']:
-                signals.append("MACD_DEATH_CROSS")
-
-            # C. الكشف عن التباعد (Regular Divergence)
-            # مثال: السعر يحقق قمة جديدة، لكن RSI يحقق قمة أدنى (ضعف الاتجاه الصاعد)
-            divergence = self._detect_rsi_divergence(df)
-            if divergence:
-                signals.append(divergence)
-
-            # D. اختراق البولنجر (Bollinger Breakout)
-            bb_status = "INSIDE"
-            if latest['close'] > latest['bb_upper']: bb_status = "BREAKOUT_UPPER"
-            elif latest['close'] < latest['bb_lower']: bb_status = "BREAKOUT_LOWER"
-
-            # 4. تجميع التقرير
-            return {
-                "agent": "IndicatorsAgent",
-                "timestamp": str(latest.name) if isinstance(latest.name, (str, pd.Timestamp)) else None,
-                "indicators": {
-                    "rsi": round(latest['rsi'], 2),
-                    "macd_hist": round(latest['macd_hist'], 4),
-                    "bb_width": round((latest['bb_upper'] - latest['bb_lower']) / latest['bb_lower'], 4),
-                    "atr": round(latest['atr'], 2),
-                    "vwap": round(latest['vwap'], 2)
-                },
-                "state": {
-                    "rsi_status": rsi_state,
-                    "bb_status": bb_status,
-                    "trend_strength": self._calculate_adx_proxy(df) # مؤشر تقريبي لقوة الاتجاه
-                },
-                "detected_patterns": signals
-            }
+        except Exception as e:
+            self.logger.error(f"INDICATOR_FAIL: خطأ أثناء الحساب: {e}")
+            return {"status": "ERROR", "msg": str(e)}
 
+    def update_candle(self, symbol: str, high: float, low: float, close: float, volume: float,
+                      ts: Any = None) -> Dict[str, Any]:
+        """
+        تغذية شمعة مغلقة واحدة للمحرك التزايدي للرمز وإرجاع التقرير (O(1)).
+        """
+        engine = self._engines.get(symbol)
+        if engine is None:
+            engine = self._engines[symbol] = self._new_engine()
+        try:
+            engine.update(high, low, close, volume, ts)
+            if engine.bars < self.min_candles:
+                return {"status": "INSUFFICIENT_DATA"}
+            return self._build_report(engine.values, engine.previous,
+                                      list(engine.recent_close), list(engine.recent_rsi), engine.last_ts)
         except Exception as e:
             self.logger.error(f"INDICATOR_FAIL: خطأ أثناء الحساب: {e}")
             return {"status": "ERROR", "msg": str(e)}
 
+    def analyze_panel(self,
+                      symbols: Sequence[str],
+                      high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray,
+                      session_ids: Optional[np.ndarray] = None,
+                      timestamp: Any = None) -> PanelIndicators:
+        """
+        مسح الكون: كل حقل مصفوفة (رموز × زمن) على محور زمني مشترك.
+        النتيجة تمرر كما هي إلى HypothesisGenerator.scan_panel و WeightedVoter.cast_votes_batch،
+        و panel.report(i) يعيد نفس بنية analyze_market_state لرمز واحد.
+        """
+        return compute_panel(symbols, high, low, close, volume, session_ids=session_ids,
+                             rsi_period=self.rsi_period, macd_fast=self.macd_fast,
+                             macd_slow=self.macd_slow, macd_signal=self.macd_signal,
+                             bb_period=self.bb_period, bb_std=self.bb_std, atr_period=self.atr_period,
+                             div_window=self.divergence_window, min_candles=self.min_candles,
+                             timestamp=timestamp)
+
+    # ------------------------------------------------------------------
+    # المحرك التزايدي (Streaming Engine)
+    # ------------------------------------------------------------------
+
+    def _new_engine(self) -> StreamingIndicators:
+        return StreamingIndicators(rsi_period=self.rsi_period, macd_fast=self.macd_fast,
+                                   macd_slow=self.macd_slow, macd_signal=self.macd_signal,
+                                   bb_period=self.bb_period, bb_std=self.bb_std,
+                                   atr_period=self.atr_period, history=self.divergence_window)
+
+    def _sync_engine(self, symbol: str, candles_df: pd.DataFrame) -> StreamingIndicators:
+        """
+        مواءمة محرك الرمز مع الإطار المستلم: تغذية الشموع بعد آخر طابع زمني معروف فقط.
+        إذا تعذرت المواءمة (تاريخ مختلف/فجوة) يعاد البذر من الإطار كاملاً.
+        """
+        engine = self._engines.get(symbol)
+        if engine is not None and engine.bars:
+            index = candles_df.index
+            pos = index.searchsorted(engine.last_ts, side="right")
+            # الشمعة الأخيرة المعروفة يجب أن تكون هي نفسها في الإطار الجديد
+            if 0 < pos and index[pos - 1] == engine.last_ts and candles_df['close'].iat[pos - 1] == engine._prev_close:
+                if pos < len(candles_df):
+                    fresh = candles_df.iloc[pos:]
+                    engine.seed_rows(zip(fresh.index, fresh['high'].to_numpy(), fresh['low'].to_numpy(),
+                                         fresh['close'].to_numpy(), fresh['volume'].to_numpy()))
+                return engine
+            self.logger.info(f"INDICATOR_RESEED: {symbol} التاريخ لا يتصل بحالة المحرك؛ إعادة البذر.")
+
+        engine = self._engines[symbol] = self._new_engine()
+        engine.seed(candles_df)
+        return engine
+
+    def snapshot_engines(self) -> Dict[str, Dict[str, Any]]:
+        """لقطات حالة المحركات لكل رمز (للحفظ قبل الإيقاف)."""
+        return {symbol: engine.snapshot() for symbol, engine in self._engines.items()}
+
+    def restore_engines(self, snapshots: Dict[str, Dict[str, Any]]):
+        """استعادة المحركات من لقطات محفوظة (بدون إعادة البذر من التاريخ)."""
+        for symbol, snap in snapshots.items():
+            try:
+                self._engines[symbol] = StreamingIndicators.from_snapshot(snap)
+            except (ValueError, KeyError) as e:
+                self.logger.warning(f"INDICATOR_RESTORE_FAIL: {symbol}: {e}")
+
+    # ------------------------------------------------------------------
+    # بناء التقرير (مشترك بين الوضعين)
+    # ------------------------------------------------------------------
+
+    def _build_report(self, latest, prev, closes: Sequence[float], rsis: Sequence[float], ts: Any) -> Dict[str, Any]:
+        """تحويل قيم آخر شمعتين إلى التقرير الفني."""
+        # 3. الكشف عن الأنماط المتقدمة (Signals Detection)
+        signals = []
+        
+        # A. فحص تشبع الشراء/البيع (RSI Extremes)
+        rsi_state = "NEUTRAL"
+        if latest['rsi'] > 70: rsi_state = "OVERBOUGHT"
+        elif latest['rsi'] < 30: rsi_state = "OVERSOLD"
+
+        # B. تقاطع الماكد (MACD Crossover)
+        # إذا كان الخط السريع تحت البطيع في الشمعة السابقة، وأصبح فوقه الآن -> تقاطع إيجابي
+        if prev['macd'] < prev['macd_signal'] and latest['macd'] > latest['macd_signal']:
+            signals.append("MACD_GOLDEN_CROSS")
+        elif prev['macd'] > prev['macd_signal'] and latest['macd'] < latest['macd_signal']:
+            signals.append("MACD_DEATH_CROSS")
+
+        # C. الكشف عن التباعد (Regular Divergence)
+        # مثال: السعر يحقق قمة جديدة، لكن RSI يحقق قمة أدنى (ضعف الاتجاه الصاعد)
+        divergence = self._detect_rsi_divergence(closes, rsis)
+        if divergence:
+            signals.append(divergence)
+
+        # D. اختراق البولنجر (Bollinger Breakout)
+        bb_status = "INSIDE"
+        if latest['close'] > latest['bb_upper']: bb_status = "BREAKOUT_UPPER"
+        elif latest['close'] < latest['bb_lower']: bb_status = "BREAKOUT_LOWER"
+
+        # 4. تجميع التقرير
+        return {
+            "agent": "IndicatorsAgent",
+            "timestamp": str(ts) if isinstance(ts, (str, pd.Timestamp)) else None,
+            "indicators": {
+                "rsi": round(latest['rsi'], 2),
+                "macd_hist": round(latest['macd_hist'], 4),
+                "bb_width": round((latest['bb_upper'] - latest['bb_lower']) / latest['bb_lower'], 4),
+                "atr": round(latest['atr'], 2),
+                "vwap": round(latest['vwap'], 2)
+            },
+            "state": {
+                "rsi_status": rsi_state,
+                "bb_status": bb_status,
+                "trend_strength": self._calculate_adx_proxy(latest['macd_hist'], latest['close']) # مؤشر تقريبي لقوة الاتجاه
+            },
+            "detected_patterns": signals
+        }
+
     # ------------------------------------------------------------------
     # محرك الحسابات (Calculation Engine - Vectorized)
     # ------------------------------------------------------------------
 
     def _add_rsi(self, df: pd.DataFrame):
-        """Relative Strength Index"""
+        """Relative Strength Index (Wilder Smoothing)"""
         delta = df['close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=self.rsi_period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=self.rsi_period).mean()
+        alpha = 1.0 / self.rsi_period
+        gain = delta.clip(lower=0).ewm(alpha=alpha, adjust=False, min_periods=self.rsi_period).mean()
+        loss = (-delta).clip(lower=0).ewm(alpha=alpha, adjust=False, min_periods=self.rsi_period).mean()
         
         rs = gain / loss
         df['rsi'] = 100 - (100 / (1 + rs))
@@ -145,16 +252,22 @@ class IndicatorsAgent:
         
         ranges = pd.concat([high_low, high_close, low_close], axis=1)
         true_range = np.max(ranges, axis=1)
-        df['atr'] = true_range.rolling(window=14).mean()
+        df['atr'] = true_range.rolling(window=self.atr_period).mean()
 
     def _add_vwap(self, df: pd.DataFrame):
-        """Volume Weighted Average Price"""
-        # حساب تراكمي بسيط (Cumulative)
-        v = df['volume'].values
+        """Session Volume Weighted Average Price"""
         tp = (df['high'] + df['low'] + df['close']) / 3
-        df['vwap'] = (tp * v).cumsum() / v.cumsum()
+        pv = tp * df['volume']
+        if isinstance(df.index, pd.DatetimeIndex):
+            # تصفير مع كل يوم UTC جديد (نفس حدود الجلسة في StreamingIndicators)
+            index = df.index.tz_convert("UTC") if df.index.tz is not None else df.index
+            session = index.date
+            df['vwap'] = pv.groupby(session).cumsum() / df['volume'].groupby(session).cumsum()
+        else:
+            # بدون طوابع زمنية: حساب تراكمي بسيط (Cumulative)
+            df['vwap'] = pv.cumsum() / df['volume'].cumsum()
 
-    def _detect_rsi_divergence(self, df: pd.DataFrame, window=10) -> Optional[str]:
+    def _detect_rsi_divergence(self, closes: Sequence[float], rsis: Sequence[float]) -> Optional[str]:
         """
         كشف التباعد بين السعر ومؤشر RSI.
         منطق معقد يتطلب مقارنة القمم (Peaks) والقيعان (Troughs).
@@ -163,25 +276,34 @@ class IndicatorsAgent:
         # (يتطلب خوارزمية Peak Detection كاملة، هنا نضع نسخة مبسطة فعالة)
         
         # Bearish Divergence: Price Up, RSI Down
-        price_trend = df['close'].iloc[-window:].is_monotonic_increasing
-        rsi_trend = df['rsi'].iloc[-window:].is_monotonic_decreasing
+        price_trend = self._is_monotonic(closes, increasing=True)
+        rsi_trend = self._is_monotonic(rsis, increasing=False)
         
         if price_trend and rsi_trend:
             return "BEARISH_DIVERGENCE"
 
         # Bullish Divergence: Price Down, RSI Up
-        price_down = df['close'].iloc[-window:].is_monotonic_decreasing
-        rsi_up = df['rsi'].iloc[-window:].is_monotonic_increasing
+        price_down = self._is_monotonic(closes, increasing=False)
+        rsi_up = self._is_monotonic(rsis, increasing=True)
         
         if price_down and rsi_up:
             return "BULLISH_DIVERGENCE"
             
         return None
 
-    def _calculate_adx_proxy(self, df: pd.DataFrame) -> str:
+    @staticmethod
+    def _is_monotonic(values: Sequence[float], increasing: bool) -> bool:
+        """رتابة غير صارمة (مثل Pandas is_monotonic_*)؛ أي NaN يلغيها."""
+        if any(v != v for v in values):
+            return False
+        if increasing:
+            return all(a <= b for a, b in zip(values, values[1:]))
+        return all(a >= b for a, b in zip(values, values[1:]))
+
+    def _calculate_adx_proxy(self, macd_hist: float, close: float) -> str:
         """تقدير قوة الاتجاه بناءً على عرض البولنجر أو ميل المتوسطات."""
         # إذا كان الماكد يبتعد عن الإشارة بقوة، فالاتجاه قوي
-        hist_strength = abs(df['macd_hist'].iloc[-1])
-        if hist_strength > df['close'].iloc[-1] * 0.0005: # نسبة تقريبية
+        hist_strength = abs(macd_hist)
+        if hist_strength > close * 0.0005: # نسبة تقريبية
             return "STRONG"
         return "WEAK"
\ No newline at end of file
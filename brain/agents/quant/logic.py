@@ -8,16 +8,32 @@ Forensic Features:
   - Zero-Copy Execution (تنفيذ بدون نسخ بيانات الذاكرة).
   - JIT Compilation (ترجمة فورية لكود الآلة).
   - Pre-Flight Warmup (تسخين مسبق لتلافي تأخير أول إشارة).
+  - Persisted JIT Cache (كاش مترجم يبنى مع الإصدار: ops/build_tools/jit_cache_builder.py، ويفعل بـ ALPHA_JIT_CACHE_DIR).
+  - Background Warmup (التسخين في الخلفية مع مسار بايثون احتياطي حتى تسخن النوى).
 Technique: LLVM-based Compilation via Numba.
 =================================================================
 """
 
 import numpy as np
 import logging
+import os
+import threading
 import time
+from concurrent.futures import Future
+
+# مجلد الكاش المترجم المشحون مع الإصدار. يفعل فقط عند تحديده صراحة بـ ALPHA_JIT_CACHE_DIR
+# (NUMBA_CACHE_DIR إن وجد له الأولوية)؛ وإلا يبقى سلوك Numba الافتراضي دون تعديل إعداداته العامة.
+# الاستيراد لا ينشئ مجلدات ولا يكتب داخل الحزمة.
+JIT_CACHE_DIR = os.environ.get("ALPHA_JIT_CACHE_DIR")
+
 # محاولة استيراد Numba مع fallback آمن
 try:
-    from numba import jit, float64, int64, boolean, prange
+    import numba
+    from numba import jit, float64, int64, boolean, prange, types
+
+    # يجب ضبط مجلد الكاش قبل تعريف النوى (Numba يحدد موقع الكاش عند التزيين)
+    if JIT_CACHE_DIR and not os.environ.get("NUMBA_CACHE_DIR"):
+        numba.config.CACHE_DIR = JIT_CACHE_DIR
     NUMBA_AVAILABLE = True
 except ImportError:
     NUMBA_AVAILABLE = False
@@ -144,52 +160,111 @@ def _jit_ewma_volatility(prices: np.ndarray, alpha: float) -> float:
 # 2. LOGIC CONTROLLER (المتحكم المنطقي)
 # =================================================================
 
+def _warmup_signatures() -> dict:
+    """
+    قائمة التواقيع الصريحة لكل نواة: float32/float64 × متصلة (C) / غير متصلة (A).
+    المصفوفات غير المتصلة شائعة هنا (أعمدة من [[price, qty], ...] في calculate_ofi).
+    """
+    sigs = {"triangular_arb": [], "order_flow_imbalance": [], "ewma_volatility": []}
+    for ft in (types.float64, types.float32):
+        for layout in ("C", "A"):
+            vec = types.Array(ft, 1, layout)
+            mat = types.Array(ft, 2, layout)
+            sigs["triangular_arb"].append((mat, types.float64))
+            sigs["order_flow_imbalance"].append((vec, vec, vec, vec, types.float64))
+            sigs["ewma_volatility"].append((vec, types.float64))
+    return sigs
+
+
+KERNELS = {
+    "triangular_arb": _jit_triangular_arb,
+    "order_flow_imbalance": _jit_order_flow_imbalance,
+    "ewma_volatility": _jit_ewma_volatility,
+}
+
+
+def compile_kernels() -> int:
+    """
+    ترجمة كل النوى لكل التواقيع (أو تحميلها من الكاش إن وجدت).
+    تستدعى من التسخين ومن أداة بناء الكاش. تعيد عدد التواقيع المترجمة.
+    """
+    if not NUMBA_AVAILABLE:
+        return 0
+    count = 0
+    for name, signatures in _warmup_signatures().items():
+        kernel = KERNELS[name]
+        for sig in signatures:
+            kernel.compile(sig)
+            count += 1
+    return count
+
+
 class QuantLogicCore:
     """
     واجهة التحكم في العمليات الرياضية.
     تقوم بتجهيز البيانات (Numpy Arrays) وتمريرها للنواة المترجمة.
     """
     
-    def __init__(self):
-        self.is_ready = False
+    def __init__(self, warmup: str = "background"):
+        """
+        Args:
+            warmup: "sync" (يحجب حتى تسخن النوى)، "background" (خيط خلفي + مسار احتياطي)،
+                    أو "off" (ترجمة كسولة عند أول استدعاء).
+        """
+        # يكتمل عندما تصبح النوى المترجمة جاهزة (asyncio.wrap_future للانتظار من حلقة الأحداث)
+        self.is_ready: Future = Future()
         if not NUMBA_AVAILABLE:
             logger.warning("⚠️ Numba not installed. Running in Slow (Interpreted) Mode.")
-        
-        # تنفيذ التسخين فور الإنشاء
-        self._warmup_compiler()
+
+        if warmup == "background" and NUMBA_AVAILABLE:
+            threading.Thread(target=self._warmup_compiler, name="QuantJitWarmup", daemon=True).start()
+        elif warmup == "sync":
+            self._warmup_compiler()
+        else:
+            self.is_ready.set_result(True)
+
+    @property
+    def hot(self) -> bool:
+        """هل النوى المترجمة جاهزة للاستخدام؟"""
+        return self.is_ready.done() and self.is_ready.exception() is None
+
+    def _kernel(self, name: str):
+        """
+        النواة المترجمة إذا اكتمل التسخين، وإلا نسختها البايثونية الأصلية
+        (أبطأ لكنها لا تحجب المستدعي خلف قفل المترجم أثناء التسخين).
+        """
+        kernel = KERNELS[name]
+        return kernel if self.hot else getattr(kernel, "py_func", kernel)
 
     def _warmup_compiler(self):
         """
-        تشغيل الدوال ببيانات وهمية لإجبار المترجم (LLVM) على العمل الآن
+        ترجمة النوى لكل التواقيع المعلنة الآن (أو تحميلها من الكاش المشحون)
         وليس أثناء التداول الحقيقي.
         """
-        if not NUMBA_AVAILABLE: return
+        if not NUMBA_AVAILABLE:
+            self.is_ready.set_result(True)
+            return
         
         t0 = time.time()
         logger.info("[Quant] Warming up JIT Kernels...")
-        
-        # 1. Arb Warmup
-        dummy_matrix = np.ones((5, 5), dtype=np.float64)
-        _jit_triangular_arb(dummy_matrix, 0.001)
-        
-        # 2. OFI Warmup
-        dummy_arr = np.array([100.0, 99.0], dtype=np.float64)
-        _jit_order_flow_imbalance(dummy_arr, dummy_arr, dummy_arr, dummy_arr, 0.5)
-        
-        # 3. Volatility Warmup
-        _jit_ewma_volatility(np.random.rand(100), 0.1)
+        try:
+            count = compile_kernels()
+        except Exception as e:
+            logger.error(f"[Quant] JIT Warmup Failed ({e}). Staying on interpreted fallback.")
+            self.is_ready.set_exception(e)
+            return
         
         dt = (time.time() - t0) * 1000
-        logger.info(f"[Quant] JIT Compilation Complete in {dt:.2f}ms. Systems HOT.")
-        self.is_ready = True
+        logger.info(f"[Quant] JIT Compilation Complete ({count} signatures) in {dt:.2f}ms. Systems HOT.")
+        self.is_ready.set_result(True)
 
     def scan_triangular_arbitrage(self, rates_matrix: np.ndarray, fee_pct: float = 0.00075) -> dict:
         """واجهة مسح المراجحة"""
         # التأكد من نوع البيانات لضمان السرعة
-        if rates_matrix.dtype != np.float64:
+        if rates_matrix.dtype not in (np.float64, np.float32):
             rates_matrix = rates_matrix.astype(np.float64)
             
-        pnl, path_code = _jit_triangular_arb(rates_matrix, fee_pct)
+        pnl, path_code = self._kernel("triangular_arb")(rates_matrix, fee_pct)
         
         if pnl > 0:
             # فك تشفير المسار
@@ -214,7 +289,7 @@ class QuantLogicCore:
             if len(b_arr) == 0 or len(a_arr) == 0:
                 return 0.0
                 
-            return float(_jit_order_flow_imbalance(
+            return float(self._kernel("order_flow_imbalance")(
                 b_arr[:, 0], b_arr[:, 1], # Bid Price, Bid Vol
                 a_arr[:, 0], a_arr[:, 1], # Ask Price, Ask Vol
                 0.5 # Decay Factor
@@ -223,11 +298,27 @@ class QuantLogicCore:
             logger.error(f"OFI Calculation Error: {e}")
             return 0.0
 
+    def calculate_book_ofi(self, book, depth: int = 10, decay: float = 0.5) -> float:
+        """
+        ضغط دفتر الأوامر من دفتر L2OrderBook محلي.
+        أفضل المستويات تمرر للنواة كعروض على مصفوفات الدفتر (بدون تحويل قوائم ولا نسخ).
+        """
+        bid_p, bid_v = book.top("BID", depth)
+        ask_p, ask_v = book.top("ASK", depth)
+        return self.calculate_ofi_arrays(bid_p, bid_v, ask_p, ask_v, decay)
+
+    def calculate_ofi_arrays(self, bid_p: np.ndarray, bid_v: np.ndarray,
+                             ask_p: np.ndarray, ask_v: np.ndarray, decay: float = 0.5) -> float:
+        """ضغط الدفتر من مصفوفات المستويات مباشرة (الصيغة التي تعبر حدود العمليات)."""
+        if len(bid_p) == 0 or len(ask_p) == 0:
+            return 0.0
+        return float(self._kernel("order_flow_imbalance")(bid_p, bid_v, ask_p, ask_v, decay))
+
     def calculate_volatility(self, prices: list, span: int = 20) -> float:
         """واجهة حساب التقلب"""
         arr = np.array(prices, dtype=np.float64)
         alpha = 2.0 / (span + 1.0)
-        daily_vol = _jit_ewma_volatility(arr, alpha)
+        daily_vol = self._kernel("ewma_volatility")(arr, alpha)
         # تحويل لسنوي
         return float(daily_vol * np.sqrt(365 * 24))
 
@@ -237,7 +328,7 @@ class QuantLogicCore:
 if __name__ == "__main__":
     # اختبار السرعة والدقة
     logging.basicConfig(level=logging.INFO)
-    quant = QuantLogicCore()
+    quant = QuantLogicCore(warmup="sync")
     
     print("\n--- Speed Test: Triangular Arbitrage ---")
     # محاكاة مصفوفة أسعار لـ 50 عملة (2500 زوج)
@@ -0,0 +1,386 @@
+# Streaming Microstructure Features
+
+# -*- coding: utf-8 -*-
+# ALPHA SOVEREIGN - MICROSTRUCTURE FEATURE ENGINE
+# =================================================================
+# Component Name: brain/agents/quant/microstructure.py
+# Core Responsibility: استخراج خصائص البنية المجهرية من تدفق فروقات الدفتر والصفقات لحظياً ولعدة رموز معاً.
+# Design Pattern: Streaming State Arrays + Numba Kernels (prange عبر الرموز)
+# Forensic Impact: الاختلال الساكن للقطة واحدة لا يرى "التدفق"؛ هذه الخصائص تقيس من يضغط فعلاً عبر الزمن
+#                  وكم يحرك كل دولار موقّع السعر (Kyle Lambda).
+# =================================================================
+#
+# الخصائص (لكل رمز):
+#   - Event OFI (Cont-Kukanov-Stoikov): مجموع منزلق على آخر ofi_window حدث دفتر للمستوى الأول.
+#   - Multi-Level OFI: نفس التعريف لكل مستوى من أول `levels` مستويات.
+#   - Microprice: (Pa * Qb + Pb * Qa) / (Qb + Qa).
+#   - Queue Imbalance: (Qb - Qa) / (Qb + Qa) على المستوى الأول.
+#   - Trade-Sign Imbalance: Σ(sign * qty) / Σ(qty) على آخر trade_window صفقة.
+#   - Kyle Lambda: ميل انحدار تغير السعر الأوسط على الحجم الموقّع بين حدثي دفتر، على آخر lambda_window فترة.
+
+import logging
+from typing import Any, Dict, Sequence, Tuple
+
+import numpy as np
+
+# محاولة استيراد Numba مع fallback آمن
+try:
+    from numba import jit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def jit(*args, **kwargs):
+        def decorator(func):
+            return func
+        return decorator
+
+logger = logging.getLogger("Alpha.Brain.Quant.Microstructure")
+
+# =================================================================
+# 1. JIT KERNELS
+# =================================================================
+
+@jit(nopython=True, nogil=True, parallel=True, cache=True)
+def _jit_book_events(order, bounds, bp, bq, ap, aq,
+                     prev_bp, prev_bq, prev_ap, prev_aq, has_prev,
+                     ofi_ring, ofi_sum, ofi_pos, ofi_n,
+                     ky_x, ky_y, ky_sums, ky_pos, ky_n, pending_q, last_mid,
+                     top):
+    """
+    تطبيق أحداث دفتر مجمعة حسب الرمز. كل رمز في خيط مستقل؛ أحداث الرمز الواحد بترتيب وصولها.
+    top[s] = [mid, microprice, queue_imbalance, spread]
+    """
+    S = bounds.shape[0] - 1
+    L = bp.shape[1]
+    W = ofi_ring.shape[1]
+    K = ky_x.shape[1]
+
+    for s in prange(S):
+        for k in range(bounds[s], bounds[s + 1]):
+            e = order[k]
+            b0 = bp[e, 0]
+            a0 = ap[e, 0]
+            qb0 = bq[e, 0]
+            qa0 = aq[e, 0]
+            mid = (b0 + a0) / 2.0
+
+            if has_prev[s]:
+                # --- OFI لكل مستوى ---
+                pos = ofi_pos[s]
+                for m in range(L):
+                    pb = prev_bp[s, m]
+                    pqb = prev_bq[s, m]
+                    pa = prev_ap[s, m]
+                    pqa = prev_aq[s, m]
+                    nb = bp[e, m]
+                    nqb = bq[e, m]
+                    na = ap[e, m]
+                    nqa = aq[e, m]
+                    v = 0.0
+                    if not (np.isnan(pb) or np.isnan(nb) or np.isnan(pa) or np.isnan(na)):
+                        if nb >= pb:
+                            v += nqb
+                        if nb <= pb:
+                            v -= pqb
+                        if na <= pa:
+                            v -= nqa
+                        if na >= pa:
+                            v += pqa
+                    ofi_sum[s, m] += v - ofi_ring[s, pos, m]
+                    ofi_ring[s, pos, m] = v
+                pos += 1
+                if pos == W:
+                    pos = 0
+                    # مزامنة دقيقة دورية للمجاميع المنزلقة (O(W) كل W حدث)
+                    for m in range(L):
+                        acc = 0.0
+                        for j in range(W):
+                            acc += ofi_ring[s, j, m]
+                        ofi_sum[s, m] = acc
+                ofi_pos[s] = pos
+                if ofi_n[s] < W:
+                    ofi_n[s] += 1
+
+                # --- Kyle Lambda: فترة = ما بين حدثي دفتر ---
+                dm = mid - last_mid[s]
+                x = pending_q[s]
+                if not np.isnan(dm):
+                    kp = ky_pos[s]
+                    ox = ky_x[s, kp]
+                    oy = ky_y[s, kp]
+                    ky_sums[s, 0] += x - ox
+                    ky_sums[s, 1] += dm - oy
+                    ky_sums[s, 2] += x * dm - ox * oy
+                    ky_sums[s, 3] += x * x - ox * ox
+                    ky_x[s, kp] = x
+                    ky_y[s, kp] = dm
+                    kp += 1
+                    if kp == K:
+                        kp = 0
+                        sx = 0.0
+                        sy = 0.0
+                        sxy = 0.0
+                        sxx = 0.0
+                        for j in range(K):
+                            sx += ky_x[s, j]
+                            sy += ky_y[s, j]
+                            sxy += ky_x[s, j] * ky_y[s, j]
+                            sxx += ky_x[s, j] * ky_x[s, j]
+                        ky_sums[s, 0] = sx
+                        ky_sums[s, 1] = sy
+                        ky_sums[s, 2] = sxy
+                        ky_sums[s, 3] = sxx
+                    ky_pos[s] = kp
+                    if ky_n[s] < K:
+                        ky_n[s] += 1
+                pending_q[s] = 0.0
+            else:
+                has_prev[s] = True
+
+            for m in range(L):
+                prev_bp[s, m] = bp[e, m]
+                prev_bq[s, m] = bq[e, m]
+                prev_ap[s, m] = ap[e, m]
+                prev_aq[s, m] = aq[e, m]
+            last_mid[s] = mid
+
+            depth = qb0 + qa0
+            top[s, 0] = mid
+            if depth > 0:
+                top[s, 1] = (a0 * qb0 + b0 * qa0) / depth
+                top[s, 2] = (qb0 - qa0) / depth
+            else:
+                top[s, 1] = mid
+                top[s, 2] = 0.0
+            top[s, 3] = a0 - b0
+
+
+@jit(nopython=True, nogil=True, parallel=True, cache=True)
+def _jit_trades(order, bounds, qty, sign,
+                tr_signed, tr_abs, tr_sums, tr_pos, tr_n, pending_q):
+    """تطبيق صفقات مجمعة حسب الرمز: نافذة منزلقة للحجم الموقّع + تراكم الحجم للفترة الجارية (Kyle)."""
+    S = bounds.shape[0] - 1
+    W = tr_signed.shape[1]
+
+    for s in prange(S):
+        for k in range(bounds[s], bounds[s + 1]):
+            e = order[k]
+            q = qty[e]
+            sq = sign[e] * q
+            pos = tr_pos[s]
+            tr_sums[s, 0] += sq - tr_signed[s, pos]
+            tr_sums[s, 1] += q - tr_abs[s, pos]
+            tr_signed[s, pos] = sq
+            tr_abs[s, pos] = q
+            pos += 1
+            if pos == W:
+                pos = 0
+                a0 = 0.0
+                a1 = 0.0
+                for j in range(W):
+                    a0 += tr_signed[s, j]
+                    a1 += tr_abs[s, j]
+                tr_sums[s, 0] = a0
+                tr_sums[s, 1] = a1
+            tr_pos[s] = pos
+            if tr_n[s] < W:
+                tr_n[s] += 1
+            pending_q[s] += sq
+
+# =================================================================
+# 2. ENGINE (المحرك)
+# =================================================================
+
+class MicrostructureEngine:
+    """
+    محرك خصائص البنية المجهرية لعدة رموز.
+    الحالة كلها مصفوفات (رمز × ...) حتى تعالج دفعات أحداث كل الرموز في استدعاء نواة واحد.
+    """
+
+    def __init__(self,
+                 levels: int = 5,
+                 ofi_window: int = 100,
+                 trade_window: int = 200,
+                 lambda_window: int = 100,
+                 lambda_min_obs: int = 20,
+                 capacity: int = 16):
+        """
+        Args:
+            levels: عدد مستويات الدفتر في OFI متعدد المستويات.
+            ofi_window: عدد أحداث الدفتر في نافذة OFI.
+            trade_window: عدد الصفقات في نافذة اختلال الإشارة.
+            lambda_window: عدد الفترات في انحدار Kyle Lambda.
+            lambda_min_obs: أقل عدد فترات قبل نشر Lambda.
+            capacity: السعة الابتدائية للرموز (تتضاعف تلقائياً).
+        """
+        self.levels = levels
+        self.ofi_window = ofi_window
+        self.trade_window = trade_window
+        self.lambda_window = lambda_window
+        self.lambda_min_obs = lambda_min_obs
+
+        self._index: Dict[str, int] = {}
+        self._symbols: list = []
+        self._allocate(capacity)
+        self.stats: Dict[str, int] = {"book_events": 0, "trades": 0, "batches": 0}
+
+    # --- Storage ---
+
+    def _allocate(self, capacity: int):
+        S, L = capacity, self.levels
+        old = getattr(self, "_state", None)
+        nan = np.nan
+        state = {
+            "prev_bp": np.full((S, L), nan), "prev_bq": np.full((S, L), nan),
+            "prev_ap": np.full((S, L), nan), "prev_aq": np.full((S, L), nan),
+            "has_prev": np.zeros(S, dtype=np.bool_),
+            "ofi_ring": np.zeros((S, self.ofi_window, L)), "ofi_sum": np.zeros((S, L)),
+            "ofi_pos": np.zeros(S, dtype=np.int64), "ofi_n": np.zeros(S, dtype=np.int64),
+            "ky_x": np.zeros((S, self.lambda_window)), "ky_y": np.zeros((S, self.lambda_window)),
+            "ky_sums": np.zeros((S, 4)), "ky_pos": np.zeros(S, dtype=np.int64), "ky_n": np.zeros(S, dtype=np.int64),
+            "pending_q": np.zeros(S), "last_mid": np.full(S, nan),
+            "top": np.full((S, 4), nan),
+            "tr_signed": np.zeros((S, self.trade_window)), "tr_abs": np.zeros((S, self.trade_window)),
+            "tr_sums": np.zeros((S, 2)), "tr_pos": np.zeros(S, dtype=np.int64), "tr_n": np.zeros(S, dtype=np.int64),
+        }
+        if old is not None:
+            n = len(old["has_prev"])
+            for name, arr in state.items():
+                arr[:n] = old[name]
+        self._state = state
+
+    def _ids(self, symbols: Sequence[str]) -> np.ndarray:
+        """تحويل أسماء الرموز إلى فهارس (الرموز الجديدة تسجل تلقائياً)."""
+        out = np.empty(len(symbols), dtype=np.int64)
+        for i, symbol in enumerate(symbols):
+            idx = self._index.get(symbol)
+            if idx is None:
+                idx = self._index[symbol] = len(self._symbols)
+                self._symbols.append(symbol)
+                if idx >= len(self._state["has_prev"]):
+                    self._allocate(2 * len(self._state["has_prev"]))
+            out[i] = idx
+        return out
+
+    def _group(self, ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """ترتيب مستقر حسب الرمز + حدود كل رمز (يحافظ على ترتيب الوصول داخل الرمز)."""
+        order = np.argsort(ids, kind="stable")
+        bounds = np.searchsorted(ids[order], np.arange(len(self._state["has_prev"]) + 1))
+        return order, bounds
+
+    # --- Feed ---
+
+    def on_book_events(self, symbols: Sequence[str],
+                       bid_p: np.ndarray, bid_q: np.ndarray, ask_p: np.ndarray, ask_q: np.ndarray):
+        """
+        دفعة أحداث دفتر (E حدثاً) لأي خليط من الرموز.
+        كل مصفوفة (E, levels): أفضل المستويات بعد الحدث (NaN للمستويات الناقصة).
+        """
+        ids = self._ids(symbols)
+        if not len(ids):
+            return
+        order, bounds = self._group(ids)
+        st = self._state
+        _jit_book_events(order, bounds,
+                         np.ascontiguousarray(bid_p, dtype=np.float64), np.ascontiguousarray(bid_q, dtype=np.float64),
+                         np.ascontiguousarray(ask_p, dtype=np.float64), np.ascontiguousarray(ask_q, dtype=np.float64),
+                         st["prev_bp"], st["prev_bq"], st["prev_ap"], st["prev_aq"], st["has_prev"],
+                         st["ofi_ring"], st["ofi_sum"], st["ofi_pos"], st["ofi_n"],
+                         st["ky_x"], st["ky_y"], st["ky_sums"], st["ky_pos"], st["ky_n"],
+                         st["pending_q"], st["last_mid"], st["top"])
+        self.stats["book_events"] += len(ids)
+        self.stats["batches"] += 1
+
+    def on_book(self, symbol: str, book: Any):
+        """حدث دفتر واحد من L2OrderBook (يقرأ أفضل المستويات كعروض ثم يملأ الناقص بـ NaN)."""
+        L = self.levels
+        rows = []
+        for label in ("BID", "ASK"):
+            prices, qtys = book.top(label, L)
+            p = np.full(L, np.nan)
+            q = np.full(L, np.nan)
+            p[:len(prices)] = prices
+            q[:len(qtys)] = qtys
+            rows.append((p, q))
+        (bp, bq), (ap, aq) = rows
+        self.on_book_events([symbol], bp[None, :], bq[None, :], ap[None, :], aq[None, :])
+
+    def on_trades(self, symbols: Sequence[str], qty: np.ndarray, sign: np.ndarray):
+        """
+        دفعة صفقات: sign = +1 للمشتري المبادر (Taker Buy)، -1 للبائع المبادر.
+        """
+        ids = self._ids(symbols)
+        if not len(ids):
+            return
+        order, bounds = self._group(ids)
+        st = self._state
+        _jit_trades(order, bounds,
+                    np.ascontiguousarray(qty, dtype=np.float64), np.ascontiguousarray(sign, dtype=np.float64),
+                    st["tr_signed"], st["tr_abs"], st["tr_sums"], st["tr_pos"], st["tr_n"], st["pending_q"])
+        self.stats["trades"] += len(ids)
+
+    def on_trade(self, symbol: str, qty: float, is_buyer_maker: bool):
+        """صفقة واحدة بصيغة البورصة (is_buyer_maker = True يعني أن البائع هو المبادر)."""
+        self.on_trades([symbol], np.array([qty]), np.array([-1.0 if is_buyer_maker else 1.0]))
+
+    # --- Output ---
+
+    def feature_matrix(self) -> Tuple[list, Dict[str, np.ndarray]]:
+        """كل الخصائص لكل الرموز كمصفوفات (متجهة بالكامل)."""
+        n = len(self._symbols)
+        st = self._state
+        tr = st["tr_sums"][:n]
+        ky = st["ky_sums"][:n]
+        kn = st["ky_n"][:n].astype(np.float64)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            trade_imb = np.where(tr[:, 1] > 0, tr[:, 0] / tr[:, 1], 0.0)
+            denom = kn * ky[:, 3] - ky[:, 0] ** 2
+            lam = np.where((kn >= self.lambda_min_obs) & (denom > 0),
+                           (kn * ky[:, 2] - ky[:, 0] * ky[:, 1]) / denom, np.nan)
+
+        features = {
+            "ofi": st["ofi_sum"][:n, 0].copy(),
+            "mlofi": st["ofi_sum"][:n].copy(),
+            "mid": st["top"][:n, 0].copy(),
+            "microprice": st["top"][:n, 1].copy(),
+            "queue_imbalance": st["top"][:n, 2].copy(),
+            "spread": st["top"][:n, 3].copy(),
+            "trade_imbalance": trade_imb,
+            "kyle_lambda": lam,
+        }
+        return list(self._symbols), features
+
+    def features(self, symbol: str) -> Dict[str, Any]:
+        """خصائص رمز واحد كقاموس (فارغ إذا لم يصل له أي حدث)."""
+        i = self._index.get(symbol)
+        if i is None:
+            return {}
+        st = self._state
+        tr_signed, tr_abs = st["tr_sums"][i]
+        sx, sy, sxy, sxx = st["ky_sums"][i]
+        kn = float(st["ky_n"][i])
+        denom = kn * sxx - sx * sx
+        lam = (kn * sxy - sx * sy) / denom if kn >= self.lambda_min_obs and denom > 0 else None
+        mid, micro, qimb, spread = (float(v) for v in st["top"][i])
+        return {
+            "ofi": float(st["ofi_sum"][i, 0]),
+            "mlofi": [float(v) for v in st["ofi_sum"][i]],
+            "mid": mid,
+            "microprice": micro,
+            "queue_imbalance": qimb,
+            "spread": spread,
+            "trade_imbalance": float(tr_signed / tr_abs) if tr_abs > 0 else 0.0,
+            "kyle_lambda": lam,
+            "ofi_events": int(st["ofi_n"][i]),
+            "trades": int(st["tr_n"][i]),
+        }
+
+    def publish(self, symbol: str, market_data: Dict[str, Any]) -> Dict[str, Any]:
+        """كتابة خصائص الرمز في market_data["microstructure"] لدورة القرار."""
+        features = self.features(symbol)
+        if features:
+            market_data["microstructure"] = features
+        return market_data
@@ -0,0 +1,315 @@
+# Incremental Level-2 Book
+
+# -*- coding: utf-8 -*-
+# ALPHA SOVEREIGN - INCREMENTAL L2 ORDER BOOK
+# =================================================================
+# Component Name: brain/agents/quant/order_book.py
+# Core Responsibility: دفتر أوامر L2 محلي على مصفوفات NumPy مرتبة، يطبق فروقات العمق من البورصة في مكانها.
+# Design Pattern: Stateful Book + Incremental Aggregates
+# Forensic Impact: كشف فجوات التسلسل يمنع التحليل على دفتر فاسد؛ المقاييس (OFI/الجدران/العمق بالدولار)
+#                  تحدث عند كل فرق فقط إذا لمس المستويات المعنية، بدلاً من إعادة الحساب على لقطة كاملة.
+# =================================================================
+
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("Alpha.Brain.Quant.OrderBook")
+
+BID = "BID"
+ASK = "ASK"
+
+
+def harmonic_weights(n: int) -> np.ndarray:
+    """أوزان المستويات كما في OrderFlowAgent: 1 / (i + 1)."""
+    return 1.0 / np.arange(1, n + 1, dtype=np.float64)
+
+
+def decay_weights(n: int, decay: float) -> np.ndarray:
+    """أوزان أسية كما في _jit_order_flow_imbalance: exp(-decay * i)."""
+    return np.exp(-decay * np.arange(n, dtype=np.float64))
+
+
+class _BookSide:
+    """
+    جانب واحد من الدفتر: ثلاث مصفوفات متوازية مرتبة من الأفضل إلى الأسوأ.
+    keys مرتبة تصاعدياً دائماً (سعر الطلب سالب) لاستخدام searchsorted مباشرة.
+    """
+
+    __slots__ = ("is_bid", "keys", "prices", "qtys", "n", "_cum_qty", "_cum_notional", "_cum_valid")
+
+    def __init__(self, is_bid: bool, capacity: int):
+        self.is_bid = is_bid
+        self.keys = np.empty(capacity, dtype=np.float64)
+        self.prices = np.empty(capacity, dtype=np.float64)
+        self.qtys = np.empty(capacity, dtype=np.float64)
+        self.n = 0
+        self._cum_qty = np.empty(capacity, dtype=np.float64)
+        self._cum_notional = np.empty(capacity, dtype=np.float64)
+        self._cum_valid = 0
+
+    def load(self, levels: np.ndarray):
+        """تحميل لقطة كاملة (مصفوفة (k, 2) من [price, qty])."""
+        levels = levels[levels[:, 1] > 0] if len(levels) else levels
+        k = len(levels)
+        if k > len(self.keys):
+            self._grow(k)
+        keys = -levels[:, 0] if self.is_bid else levels[:, 0]
+        order = np.argsort(keys, kind="stable")
+        self.keys[:k] = keys[order]
+        self.prices[:k] = levels[order, 0]
+        self.qtys[:k] = levels[order, 1]
+        self.n = k
+        self._cum_valid = 0
+
+    def _grow(self, needed: int):
+        capacity = max(needed, 2 * len(self.keys))
+        for name in ("keys", "prices", "qtys", "_cum_qty", "_cum_notional"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=np.float64)
+            new[:self.n] = old[:self.n]
+            setattr(self, name, new)
+
+    def set(self, price: float, qty: float) -> Tuple[int, float]:
+        """
+        تطبيق مستوى واحد (qty = 0 يعني الحذف).
+        Returns: (موضع المستوى المتأثر أو -1 إن لم يتغير شيء، الكمية السابقة).
+        """
+        key = -price if self.is_bid else price
+        n = self.n
+        i = int(np.searchsorted(self.keys[:n], key))
+        exists = i < n and self.keys[i] == key
+
+        if exists:
+            old = float(self.qtys[i])
+            if qty > 0:
+                self.qtys[i] = qty
+            else:
+                # حذف: إزاحة الذيل خطوة للأعلى (NumPy يعالج التداخل بأمان)
+                self.keys[i:n - 1] = self.keys[i + 1:n]
+                self.prices[i:n - 1] = self.prices[i + 1:n]
+                self.qtys[i:n - 1] = self.qtys[i + 1:n]
+                self.n = n - 1
+        elif qty > 0:
+            if n == len(self.keys):
+                self._grow(n + 1)
+            self.keys[i + 1:n + 1] = self.keys[i:n]
+            self.prices[i + 1:n + 1] = self.prices[i:n]
+            self.qtys[i + 1:n + 1] = self.qtys[i:n]
+            self.keys[i] = key
+            self.prices[i] = price
+            self.qtys[i] = qty
+            self.n = n + 1
+            old = 0.0
+        else:
+            # حذف مستوى غير موجود (شائع بعد إعادة المزامنة): لا شيء يتغير
+            return -1, 0.0
+
+        self._cum_valid = min(self._cum_valid, i)
+        return i, old
+
+    def cumulative(self, depth: int) -> Tuple[np.ndarray, np.ndarray]:
+        """العمق التراكمي (كمية وقيمة) لأول depth مستوى؛ يعاد حسابه فقط من أول موضع تغير."""
+        depth = min(depth, self.n)
+        start = self._cum_valid
+        if start < depth:
+            q = self.qtys[start:depth]
+            v = self.prices[start:depth] * q
+            base_q = self._cum_qty[start - 1] if start else 0.0
+            base_v = self._cum_notional[start - 1] if start else 0.0
+            np.cumsum(q, out=self._cum_qty[start:depth])
+            np.cumsum(v, out=self._cum_notional[start:depth])
+            self._cum_qty[start:depth] += base_q
+            self._cum_notional[start:depth] += base_v
+            self._cum_valid = depth
+        return self._cum_qty[:depth], self._cum_notional[:depth]
+
+
+class L2OrderBook:
+    """
+    دفتر أوامر L2 لرمز واحد.
+    - apply_snapshot: تحميل لقطة REST كاملة مع رقم تسلسلها.
+    - apply_update: تطبيق فرق عمق (first_seq..last_seq) مع كشف الفجوات؛ عند الفجوة يعلم الدفتر
+      كغير متزامن ويرفض الفروقات حتى لقطة جديدة.
+    - المقاييس المجمعة لأعلى depth_levels مستوى تحدث فقط عندما يلمس الفرق تلك المستويات.
+    """
+
+    def __init__(self,
+                 symbol: str,
+                 depth_levels: int = 10,
+                 whale_threshold_usd: float = 100000.0,
+                 weights: Optional[np.ndarray] = None,
+                 capacity: int = 1024):
+        """
+        Args:
+            depth_levels: عدد المستويات في حساب الاختلال والعمق بالدولار.
+            whale_threshold_usd: قيمة المستوى التي يعتبر عندها "جداراً".
+            weights: أوزان المستويات للاختلال (افتراضياً 1/(i+1) كما في OrderFlowAgent).
+            capacity: السعة الابتدائية لكل جانب (تتضاعف تلقائياً).
+        """
+        self.symbol = symbol
+        self.depth_levels = depth_levels
+        self.whale_threshold_usd = whale_threshold_usd
+        self.weights = np.asarray(weights if weights is not None else harmonic_weights(depth_levels),
+                                  dtype=np.float64)[:depth_levels]
+
+        self.bids = _BookSide(True, capacity)
+        self.asks = _BookSide(False, capacity)
+        self.seq: Optional[int] = None
+        self.in_sync = False
+
+        # مجاميع أعلى الدفتر (تحدث عند لمس المستويات العليا فقط)
+        self._weighted = {BID: 0.0, ASK: 0.0}
+        self._depth_usd = {BID: 0.0, ASK: 0.0}
+        self._wall_count = {BID: 0, ASK: 0}
+
+        self.stats: Dict[str, int] = {"snapshots": 0, "updates": 0, "levels": 0, "gaps": 0,
+                                      "stale": 0, "top_refreshes": 0}
+
+    # ------------------------------------------------------------------
+    # التغذية (Feed)
+    # ------------------------------------------------------------------
+
+    def apply_snapshot(self, bids: Sequence[Sequence[float]], asks: Sequence[Sequence[float]],
+                       seq: Optional[int] = None):
+        """تحميل لقطة كاملة واستعادة التزامن."""
+        for side, levels in ((self.bids, bids), (self.asks, asks)):
+            arr = np.asarray(levels, dtype=np.float64).reshape(-1, 2)
+            side.load(arr)
+        self.seq = seq
+        self.in_sync = True
+        self.stats["snapshots"] += 1
+        for label, side in ((BID, self.bids), (ASK, self.asks)):
+            notional = side.prices[:side.n] * side.qtys[:side.n]
+            self._wall_count[label] = int(np.count_nonzero(notional >= self.whale_threshold_usd))
+            self._refresh_top(label, side)
+
+    def apply_update(self,
+                     bids: Iterable[Sequence[float]],
+                     asks: Iterable[Sequence[float]],
+                     first_seq: Optional[int] = None,
+                     last_seq: Optional[int] = None) -> bool:
+        """
+        تطبيق فرق عمق: كل مستوى [price, qty] يستبدل الكمية المطلقة (qty = 0 حذف).
+
+        Returns:
+            True إذا طبق الفرق (أو تجوهل لأنه قديم)، False عند فجوة تسلسل أو دفتر غير متزامن
+            (المستدعي يجب أن يجلب لقطة جديدة).
+        """
+        if not self.in_sync:
+            return False
+
+        if last_seq is not None and self.seq is not None:
+            if last_seq <= self.seq:
+                # فرق قديم سبق تضمينه في اللقطة
+                self.stats["stale"] += 1
+                return True
+            if first_seq is not None and first_seq > self.seq + 1:
+                self.in_sync = False
+                self.stats["gaps"] += 1
+                logger.warning(f"BOOK_SEQ_GAP: {self.symbol} توقعنا {self.seq + 1} ووصل {first_seq}. "
+                               f"الدفتر غير متزامن حتى لقطة جديدة.")
+                return False
+
+        self._apply_side(BID, self.bids, bids)
+        self._apply_side(ASK, self.asks, asks)
+        if last_seq is not None:
+            self.seq = last_seq
+        self.stats["updates"] += 1
+        return True
+
+    def _apply_side(self, label: str, side: _BookSide, levels: Iterable[Sequence[float]]):
+        threshold = self.whale_threshold_usd
+        top_touched = False
+        walls = self._wall_count[label]
+        for price, qty in levels:
+            price = float(price)
+            qty = float(qty)
+            i, old = side.set(price, qty)
+            if i < 0:
+                continue
+            self.stats["levels"] += 1
+            # عداد الجدران يحدث من الفرق بين القيمة القديمة والجديدة للمستوى
+            walls += (price * qty >= threshold) - (price * old >= threshold)
+            if i < self.depth_levels:
+                top_touched = True
+        self._wall_count[label] = walls
+        if top_touched:
+            self._refresh_top(label, side)
+
+    def _refresh_top(self, label: str, side: _BookSide):
+        """إعادة حساب مجاميع أعلى الدفتر: O(depth_levels) فقط."""
+        k = min(self.depth_levels, side.n)
+        q = side.qtys[:k]
+        self._weighted[label] = float(np.dot(q, self.weights[:k]))
+        self._depth_usd[label] = float(np.dot(side.prices[:k], q))
+        self.stats["top_refreshes"] += 1
+
+    # ------------------------------------------------------------------
+    # القراءة (Zero-Copy Views)
+    # ------------------------------------------------------------------
+
+    def _side(self, label: str) -> _BookSide:
+        return self.bids if label == BID else self.asks
+
+    def top(self, label: str, n: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(الأسعار، الكميات) لأفضل n مستوى كعروض على المصفوفات الداخلية (بدون نسخ؛ للقراءة فقط)."""
+        side = self._side(label)
+        k = side.n if n is None else min(n, side.n)
+        return side.prices[:k], side.qtys[:k]
+
+    def cumulative_depth(self, label: str, n: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(الكمية التراكمية، القيمة التراكمية بالدولار) لأفضل n مستوى."""
+        side = self._side(label)
+        return side.cumulative(side.n if n is None else n)
+
+    @property
+    def best_bid(self) -> float:
+        return float(self.bids.prices[0]) if self.bids.n else float("nan")
+
+    @property
+    def best_ask(self) -> float:
+        return float(self.asks.prices[0]) if self.asks.n else float("nan")
+
+    @property
+    def mid(self) -> float:
+        return (self.best_bid + self.best_ask) / 2
+
+    @property
+    def spread(self) -> float:
+        return self.best_ask - self.best_bid
+
+    def imbalance(self) -> float:
+        """الاختلال الموزون لأعلى الدفتر: من -1 (سيطرة البائعين) إلى 1 (سيطرة المشترين)."""
+        b, a = self._weighted[BID], self._weighted[ASK]
+        total = b + a
+        return (b - a) / total if total > 0 else 0.0
+
+    def depth_usd(self, label: str) -> float:
+        """قيمة أعلى depth_levels مستوى بالدولار."""
+        return self._depth_usd[label]
+
+    def wall_count(self, label: Optional[str] = None) -> int:
+        if label is None:
+            return self._wall_count[BID] + self._wall_count[ASK]
+        return self._wall_count[label]
+
+    def walls(self, label: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """الجدران مرتبة من الأقرب للسعر؛ يبنى عند الطلب (العداد نفسه تزايدي)."""
+        if not self._wall_count[label]:
+            return []
+        side = self._side(label)
+        prices, qtys = side.prices[:side.n], side.qtys[:side.n]
+        idx = np.flatnonzero(prices * qtys >= self.whale_threshold_usd)
+        if limit is not None:
+            idx = idx[:limit]
+        return [{"price": float(prices[i]), "qty": float(qtys[i]),
+                 "value_usd": float(prices[i] * qtys[i]), "side": label} for i in idx]
+
+    def to_snapshot(self, n: Optional[int] = None) -> Dict[str, Any]:
+        """لقطة بصيغة القوائم القديمة ({bids, asks}) للمستهلكين الذين لم ينتقلوا بعد."""
+        bp, bq = self.top(BID, n)
+        ap, aq = self.top(ASK, n)
+        return {"symbol": self.symbol, "bids": np.column_stack((bp, bq)).tolist(),
+                "asks": np.column_stack((ap, aq)).tolist(), "seq": self.seq}
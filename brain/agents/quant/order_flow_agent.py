@@ -7,6 +7,7 @@
 # Core Responsibility: تحليل تدفق الأوامر وسلوك الحيتان والبحث عن اختلالات السيولة اللحظية (Intelligence Pillar).
 # Design Pattern: Agent / Quantitative Analyst
 # Forensic Impact: يكشف التلاعب (Spoofing/Layering) ويحدد ما إذا كان تحرك السعر مدعوماً بسيولة حقيقية أم وهمية.
+# L2 Mode: مع دفاتر L2OrderBook المحلية تحدث المقاييس مع كل فرق عمق بدلاً من إعادة تحليل لقطة كاملة.
 # =================================================================
 
 import logging
@@ -14,6 +15,8 @@ import numpy as np
 from typing import Dict, List, Any, Tuple, Optional
 from datetime import datetime
 
+from brain.agents.quant.order_book import ASK, BID, L2OrderBook
+
 class OrderFlowAgent:
     """
     وكيل تحليل تدفق الأوامر (Quant Agent).
@@ -35,6 +38,9 @@ class OrderFlowAgent:
         self.whale_threshold_usd = self.config.get('whale_threshold_usd', 100000.0) # 100k$ يعتبر حوتاً
         self.imbalance_threshold = self.config.get('imbalance_threshold', 0.65) # 65% يعتبر ضغطاً قوياً
 
+        # دفاتر L2 المحلية لكل رمز (تغذى بالفروقات)
+        self.books: Dict[str, L2OrderBook] = {}
+
     def analyze_book(self, order_book: Dict[str, Any]) -> Dict[str, Any]:
         """
         تحليل لقطة دفتر الأوامر (Snapshot Analysis).
@@ -59,46 +65,109 @@ class OrderFlowAgent:
             # 2. الكشف عن جدران الحيتان (Whale Walls)
             bid_walls = self._detect_walls(bids, "BID")
             ask_walls = self._detect_walls(asks, "ASK")
-            
-            # 3. تحديد منطقة السيطرة (Control Zone)
-            sentiment = "NEUTRAL"
-            if imbalance_ratio > self.imbalance_threshold:
-                sentiment = "BULLISH_PRESSURE" # المشترون يسيطرون
-            elif imbalance_ratio < -self.imbalance_threshold:
-                sentiment = "BEARISH_PRESSURE" # البائعون يسيطرون
-
-            # 4. بناء الإشارة النهائية
-            analysis_result = {
-                "agent": "OrderFlowAgent",
-                "timestamp": datetime.utcnow().isoformat(),
-                "symbol": symbol,
-                "metrics": {
-                    "imbalance_ratio": round(imbalance_ratio, 4), # من -1 (بيع) إلى 1 (شراء)
-                    "bid_depth_usd": self._sum_value(bids[:self.depth_levels]),
-                    "ask_depth_usd": self._sum_value(asks[:self.depth_levels]),
-                },
-                "features": {
-                    "whale_walls_detected": len(bid_walls) + len(ask_walls),
-                    "nearest_bid_wall": bid_walls[0] if bid_walls else None,
-                    "nearest_ask_wall": ask_walls[0] if ask_walls else None,
-                },
-                "signal": {
-                    "sentiment": sentiment,
-                    "strength": abs(imbalance_ratio), # قوة الإشارة
-                    "reason": f"OFI: {imbalance_ratio:.2f} | Walls: +{len(bid_walls)}/-{len(ask_walls)}"
-                }
-            }
 
-            # تسجيل جنائي إذا كان هناك نشاط غير طبيعي
-            if abs(imbalance_ratio) > 0.8:
-                self.logger.info(f"HIGH_IMBALANCE: {symbol} ضغط شديد ({imbalance_ratio:.2f}).")
+            return self._build_signal(symbol, imbalance_ratio,
+                                      self._sum_value(bids[:self.depth_levels]),
+                                      self._sum_value(asks[:self.depth_levels]),
+                                      bid_walls, ask_walls)
 
-            return analysis_result
+        except Exception as e:
+            self.logger.error(f"ANALYSIS_ERROR: فشل تحليل تدفق الأوامر: {e}")
+            return self._empty_signal()
 
+    # ------------------------------------------------------------------
+    # دفاتر L2 التزايدية (Incremental Books)
+    # ------------------------------------------------------------------
+
+    def get_book(self, symbol: str) -> L2OrderBook:
+        """دفتر الرمز (ينشأ بإعدادات الوكيل عند أول طلب)."""
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = L2OrderBook(symbol, depth_levels=self.depth_levels,
+                                                    whale_threshold_usd=self.whale_threshold_usd)
+        return book
+
+    def on_depth_snapshot(self, symbol: str, bids: List[List[float]], asks: List[List[float]],
+                          seq: Optional[int] = None) -> Dict[str, Any]:
+        """تحميل لقطة كاملة (عند الإقلاع أو بعد فجوة تسلسل) وإرجاع التحليل."""
+        book = self.get_book(symbol)
+        book.apply_snapshot(bids, asks, seq)
+        return self.analyze_l2(book)
+
+    def on_depth_update(self, symbol: str, bids: List[List[float]], asks: List[List[float]],
+                        first_seq: Optional[int] = None, last_seq: Optional[int] = None) -> Dict[str, Any]:
+        """
+        تطبيق فرق عمق وإرجاع التحليل المحدث.
+        عند فجوة تسلسل تعاد إشارة فارغة مع resync_required حتى تصل لقطة جديدة.
+        """
+        book = self.get_book(symbol)
+        if not book.apply_update(bids, asks, first_seq, last_seq):
+            signal = self._empty_signal()
+            signal["resync_required"] = True
+            return signal
+        return self.analyze_l2(book)
+
+    def analyze_l2(self, book: L2OrderBook) -> Dict[str, Any]:
+        """
+        تحليل دفتر L2 محلي: نفس تقرير analyze_book لكن من المجاميع التزايدية
+        (لا تقطيع ولا جمع للقوائم في كل نبضة).
+        """
+        if not book.in_sync or not book.bids.n or not book.asks.n:
+            return self._empty_signal()
+        try:
+            return self._build_signal(book.symbol, book.imbalance(),
+                                      book.depth_usd(BID), book.depth_usd(ASK),
+                                      book.walls(BID, limit=1), book.walls(ASK, limit=1),
+                                      book.wall_count(BID), book.wall_count(ASK))
         except Exception as e:
             self.logger.error(f"ANALYSIS_ERROR: فشل تحليل تدفق الأوامر: {e}")
             return self._empty_signal()
 
+    def _build_signal(self, symbol: str, imbalance_ratio: float, bid_depth_usd: float, ask_depth_usd: float,
+                      bid_walls: List[Dict[str, Any]], ask_walls: List[Dict[str, Any]],
+                      bid_wall_count: Optional[int] = None, ask_wall_count: Optional[int] = None) -> Dict[str, Any]:
+        """
+        بناء الإشارة النهائية (مشترك بين اللقطات والدفاتر التزايدية).
+        عدادات الجدران اختيارية: الدفتر التزايدي يمررها جاهزة ويكتفي بأقرب جدار في القوائم.
+        """
+        n_bid_walls = len(bid_walls) if bid_wall_count is None else bid_wall_count
+        n_ask_walls = len(ask_walls) if ask_wall_count is None else ask_wall_count
+
+        # 3. تحديد منطقة السيطرة (Control Zone)
+        sentiment = "NEUTRAL"
+        if imbalance_ratio > self.imbalance_threshold:
+            sentiment = "BULLISH_PRESSURE" # المشترون يسيطرون
+        elif imbalance_ratio < -self.imbalance_threshold:
+            sentiment = "BEARISH_PRESSURE" # البائعون يسيطرون
+
+        # 4. بناء الإشارة النهائية
+        analysis_result = {
+            "agent": "OrderFlowAgent",
+            "timestamp": datetime.utcnow().isoformat(),
+            "symbol": symbol,
+            "metrics": {
+                "imbalance_ratio": round(imbalance_ratio, 4), # من -1 (بيع) إلى 1 (شراء)
+                "bid_depth_usd": bid_depth_usd,
+                "ask_depth_usd": ask_depth_usd,
+            },
+            "features": {
+                "whale_walls_detected": n_bid_walls + n_ask_walls,
+                "nearest_bid_wall": bid_walls[0] if bid_walls else None,
+                "nearest_ask_wall": ask_walls[0] if ask_walls else None,
+            },
+            "signal": {
+                "sentiment": sentiment,
+                "strength": abs(imbalance_ratio), # قوة الإشارة
+                "reason": f"OFI: {imbalance_ratio:.2f} | Walls: +{n_bid_walls}/-{n_ask_walls}"
+            }
+        }
+
+        # تسجيل جنائي إذا كان هناك نشاط غير طبيعي
+        if abs(imbalance_ratio) > 0.8:
+            self.logger.info(f"HIGH_IMBALANCE: {symbol} ضغط شديد ({imbalance_ratio:.2f}).")
+
+        return analysis_result
+
     def _calculate_imbalance(self, bids: List[List[float]], asks: List[List[float]], depth: int) -> float:
         """
         المعادلة الكمية لحساب اختلال التوازن (OFI).
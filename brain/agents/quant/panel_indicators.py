@@ -0,0 +1,476 @@
+# Universe-Wide Technical Analysis Core
+
+# -*- coding: utf-8 -*-
+# ALPHA SOVEREIGN - PANEL INDICATORS ENGINE
+# =================================================================
+# Component Name: brain/agents/quant/panel_indicators.py
+# Core Responsibility: حساب كل المؤشرات الفنية لكل رموز الكون في تمريرة واحدة على مصفوفات (رموز × زمن).
+# Design Pattern: Batch Kernel (Numba prange عبر الرموز، مع بديل NumPy متجه عبر الرموز)
+# Forensic Impact: نفس تعريفات IndicatorsAgent/StreamingIndicators، لكن مسح الكون كاملاً يتم في استدعاء واحد.
+# =================================================================
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# محاولة استيراد Numba مع fallback آمن
+try:
+    from numba import jit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def jit(*args, **kwargs):
+        def decorator(func):
+            return func
+        return decorator
+
+logger = logging.getLogger("Alpha.Brain.Quant.Panel")
+
+# أعمدة مصفوفة المخرجات (رمز × حقل)
+F_CLOSE, F_RSI, F_MACD, F_MACD_SIGNAL, F_PREV_MACD, F_PREV_MACD_SIGNAL = 0, 1, 2, 3, 4, 5
+F_BB_MID, F_BB_UPPER, F_BB_LOWER, F_ATR, F_VWAP, F_DIVERGENCE = 6, 7, 8, 9, 10, 11
+N_FIELDS = 12
+
+# رموز الحالات (مصفوفات int8)
+BB_INSIDE, BB_UPPER, BB_LOWER = 0, 1, -1
+MACD_NO_CROSS, MACD_GOLDEN, MACD_DEATH = 0, 1, -1
+DIV_NONE, DIV_BULLISH, DIV_BEARISH = 0, 1, -1
+
+# =================================================================
+# 1. JIT KERNEL (نواة متوازية عبر الرموز)
+# =================================================================
+
+@jit(nopython=True, nogil=True, parallel=True, cache=True)
+def _jit_panel_indicators(high, low, close, volume, session_ids,
+                          rsi_period, macd_fast, macd_slow, macd_signal,
+                          bb_period, bb_std, atr_period, div_window):
+    """
+    كل رمز يعالج في خيط مستقل (prange)؛ الزمن تسلسلي داخل الرمز لأن المؤشرات تكرارية.
+    Returns: مصفوفة (S, N_FIELDS) بقيم آخر شمعة.
+    """
+    S, T = close.shape
+    out = np.full((S, N_FIELDS), np.nan)
+    a_rsi = 1.0 / rsi_period
+    a_fast = 2.0 / (macd_fast + 1)
+    a_slow = 2.0 / (macd_slow + 1)
+    a_sig = 2.0 / (macd_signal + 1)
+
+    for s in prange(S):
+        avg_gain = 0.0
+        avg_loss = 0.0
+        ema_fast = 0.0
+        ema_slow = 0.0
+        sig = 0.0
+        macd = 0.0
+        prev_macd = np.nan
+        prev_sig = np.nan
+        bb_mean = 0.0
+        bb_m2 = 0.0
+        tr_sum = 0.0
+        cum_pv = 0.0
+        cum_v = 0.0
+        rsi = 50.0
+        rsi_hist = np.full(div_window, np.nan)
+
+        for t in range(T):
+            c = close[s, t]
+            h = high[s, t]
+            l = low[s, t]
+
+            # RSI (Wilder)
+            if t > 0:
+                d = c - close[s, t - 1]
+                g = d if d > 0 else 0.0
+                ls = -d if d < 0 else 0.0
+                if t == 1:
+                    avg_gain = g
+                    avg_loss = ls
+                else:
+                    avg_gain += a_rsi * (g - avg_gain)
+                    avg_loss += a_rsi * (ls - avg_loss)
+            rsi = 50.0
+            if t >= rsi_period:
+                if avg_loss > 0:
+                    rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+                elif avg_gain > 0:
+                    rsi = 100.0
+            rsi_hist[t % div_window] = rsi
+
+            # MACD
+            prev_macd = macd if t > 0 else np.nan
+            prev_sig = sig if t > 0 else np.nan
+            if t == 0:
+                ema_fast = c
+                ema_slow = c
+            else:
+                ema_fast = (1.0 - a_fast) * ema_fast + a_fast * c
+                ema_slow = (1.0 - a_slow) * ema_slow + a_slow * c
+            macd = ema_fast - ema_slow
+            if t == 0:
+                sig = macd
+            else:
+                sig = (1.0 - a_sig) * sig + a_sig * macd
+
+            # Bollinger (Welford منزلق)
+            if t < bb_period:
+                delta = c - bb_mean
+                bb_mean += delta / (t + 1)
+                bb_m2 += delta * (c - bb_mean)
+            else:
+                old = close[s, t - bb_period]
+                old_mean = bb_mean
+                bb_mean += (c - old) / bb_period
+                bb_m2 += (c - old) * (c - bb_mean + old - old_mean)
+
+            # ATR (مجموع منزلق)
+            if t == 0:
+                tr = h - l
+            else:
+                pc = close[s, t - 1]
+                tr = max(h - l, abs(h - pc), abs(l - pc))
+            tr_sum += tr
+            if t >= atr_period:
+                pc0 = close[s, t - atr_period - 1] if t - atr_period - 1 >= 0 else np.nan
+                h0 = high[s, t - atr_period]
+                l0 = low[s, t - atr_period]
+                if t - atr_period == 0:
+                    tr_sum -= h0 - l0
+                else:
+                    tr_sum -= max(h0 - l0, abs(h0 - pc0), abs(l0 - pc0))
+
+            # Session VWAP
+            if t > 0 and session_ids[t] != session_ids[t - 1]:
+                cum_pv = 0.0
+                cum_v = 0.0
+            cum_pv += (h + l + c) / 3 * volume[s, t]
+            cum_v += volume[s, t]
+
+        out[s, F_CLOSE] = close[s, T - 1]
+        out[s, F_RSI] = rsi
+        out[s, F_MACD] = macd
+        out[s, F_MACD_SIGNAL] = sig
+        out[s, F_PREV_MACD] = prev_macd
+        out[s, F_PREV_MACD_SIGNAL] = prev_sig
+        if T >= bb_period and bb_period > 1:
+            std = np.sqrt(max(bb_m2, 0.0) / (bb_period - 1))
+            out[s, F_BB_MID] = bb_mean
+            out[s, F_BB_UPPER] = bb_mean + std * bb_std
+            out[s, F_BB_LOWER] = bb_mean - std * bb_std
+        if T >= atr_period:
+            out[s, F_ATR] = tr_sum / atr_period
+        if cum_v != 0:
+            out[s, F_VWAP] = cum_pv / cum_v
+
+        # التباعد على آخر div_window شمعة (رتابة غير صارمة)
+        div = 0.0
+        if T >= 2:
+            w = min(div_window, T)
+            p_up = True
+            p_dn = True
+            r_up = True
+            r_dn = True
+            for k in range(T - w + 1, T):
+                c0 = close[s, k - 1]
+                c1 = close[s, k]
+                r0 = rsi_hist[(k - 1) % div_window]
+                r1 = rsi_hist[k % div_window]
+                if not c0 <= c1:
+                    p_up = False
+                if not c0 >= c1:
+                    p_dn = False
+                if not r0 <= r1:
+                    r_up = False
+                if not r0 >= r1:
+                    r_dn = False
+            if p_up and r_dn:
+                div = -1.0
+            elif p_dn and r_up:
+                div = 1.0
+        out[s, F_DIVERGENCE] = div
+
+    return out
+
+# =================================================================
+# 2. NUMPY FALLBACK (متجه عبر الرموز، تسلسلي عبر الزمن)
+# =================================================================
+
+def _numpy_panel_indicators(high, low, close, volume, session_ids,
+                            rsi_period, macd_fast, macd_slow, macd_signal,
+                            bb_period, bb_std, atr_period, div_window):
+    """نفس منطق النواة؛ كل خطوة زمنية عملية متجهة واحدة على كل الرموز."""
+    S, T = close.shape
+    out = np.full((S, N_FIELDS), np.nan)
+    a_rsi = 1.0 / rsi_period
+    a_fast = 2.0 / (macd_fast + 1)
+    a_slow = 2.0 / (macd_slow + 1)
+    a_sig = 2.0 / (macd_signal + 1)
+
+    avg_gain = np.zeros(S)
+    avg_loss = np.zeros(S)
+    ema_fast = close[:, 0].copy()
+    ema_slow = close[:, 0].copy()
+    sig = np.zeros(S)
+    macd = np.zeros(S)
+    prev_macd = np.full(S, np.nan)
+    prev_sig = np.full(S, np.nan)
+    bb_mean = np.zeros(S)
+    bb_m2 = np.zeros(S)
+    cum_pv = np.zeros(S)
+    cum_v = np.zeros(S)
+    rsi = np.full(S, 50.0)
+    rsi_hist = np.full((S, div_window), np.nan)
+
+    # المدى الحقيقي كاملاً مرة واحدة، ثم مجموع منزلق
+    tr_all = high - low
+    if T > 1:
+        pc = close[:, :-1]
+        tr_all[:, 1:] = np.maximum(tr_all[:, 1:], np.maximum(np.abs(high[:, 1:] - pc), np.abs(low[:, 1:] - pc)))
+    tr_sum = np.zeros(S)
+
+    for t in range(T):
+        c = close[:, t]
+        if t > 0:
+            d = c - close[:, t - 1]
+            g = np.where(d > 0, d, 0.0)
+            ls = np.where(d < 0, -d, 0.0)
+            if t == 1:
+                avg_gain, avg_loss = g, ls
+            else:
+                avg_gain = avg_gain + a_rsi * (g - avg_gain)
+                avg_loss = avg_loss + a_rsi * (ls - avg_loss)
+        if t >= rsi_period:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                rsi = np.where(avg_loss > 0, 100.0 - 100.0 / (1.0 + avg_gain / avg_loss),
+                               np.where(avg_gain > 0, 100.0, 50.0))
+        rsi_hist[:, t % div_window] = rsi
+
+        if t > 0:
+            prev_macd, prev_sig = macd, sig
+            ema_fast = (1.0 - a_fast) * ema_fast + a_fast * c
+            ema_slow = (1.0 - a_slow) * ema_slow + a_slow * c
+        macd = ema_fast - ema_slow
+        sig = macd if t == 0 else (1.0 - a_sig) * sig + a_sig * macd
+
+        if t < bb_period:
+            delta = c - bb_mean
+            bb_mean = bb_mean + delta / (t + 1)
+            bb_m2 = bb_m2 + delta * (c - bb_mean)
+        else:
+            old = close[:, t - bb_period]
+            old_mean = bb_mean
+            bb_mean = bb_mean + (c - old) / bb_period
+            bb_m2 = bb_m2 + (c - old) * (c - bb_mean + old - old_mean)
+
+        tr_sum = tr_sum + tr_all[:, t]
+        if t >= atr_period:
+            tr_sum = tr_sum - tr_all[:, t - atr_period]
+
+        if t > 0 and session_ids[t] != session_ids[t - 1]:
+            cum_pv = np.zeros(S)
+            cum_v = np.zeros(S)
+        cum_pv = cum_pv + (high[:, t] + low[:, t] + c) / 3 * volume[:, t]
+        cum_v = cum_v + volume[:, t]
+
+    out[:, F_CLOSE] = close[:, -1]
+    out[:, F_RSI] = rsi
+    out[:, F_MACD] = macd
+    out[:, F_MACD_SIGNAL] = sig
+    out[:, F_PREV_MACD] = prev_macd
+    out[:, F_PREV_MACD_SIGNAL] = prev_sig
+    if T >= bb_period and bb_period > 1:
+        std = np.sqrt(np.maximum(bb_m2, 0.0) / (bb_period - 1))
+        out[:, F_BB_MID] = bb_mean
+        out[:, F_BB_UPPER] = bb_mean + std * bb_std
+        out[:, F_BB_LOWER] = bb_mean - std * bb_std
+    if T >= atr_period:
+        out[:, F_ATR] = tr_sum / atr_period
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out[:, F_VWAP] = np.where(cum_v != 0, cum_pv / cum_v, np.nan)
+
+    # التباعد: آخر div_window شمعة من الإغلاق وRSI بترتيبها الزمني
+    div = np.zeros(S)
+    if T >= 2:
+        w = min(div_window, T)
+        closes = close[:, T - w:]
+        order = [(T - w + k) % div_window for k in range(w)]
+        rsis = rsi_hist[:, order]
+        dc = np.diff(closes, axis=1)
+        dr = np.diff(rsis, axis=1)
+        p_up, p_dn = (dc >= 0).all(axis=1), (dc <= 0).all(axis=1)
+        r_up, r_dn = (dr >= 0).all(axis=1), (dr <= 0).all(axis=1)
+        div = np.where(p_up & r_dn, -1.0, np.where(p_dn & r_up, 1.0, 0.0))
+    out[:, F_DIVERGENCE] = div
+    return out
+
+# =================================================================
+# 3. STRUCTURED RESULT (النتيجة المهيكلة)
+# =================================================================
+
+@dataclass
+class PanelIndicators:
+    """
+    مؤشرات آخر شمعة لكل رموز الكون (كل حقل مصفوفة بطول S).
+    تستهلك مباشرة: HypothesisGenerator.scan_panel (أقنعة متجهة) و WeightedVoter.cast_votes_batch (quant_scores).
+    التقارير النصية بصيغة IndicatorsAgent تبنى عند الطلب فقط.
+    """
+    symbols: Sequence[str]
+    bars: int
+    close: np.ndarray
+    rsi: np.ndarray
+    macd: np.ndarray
+    macd_signal: np.ndarray
+    prev_macd: np.ndarray
+    prev_macd_signal: np.ndarray
+    bb_mid: np.ndarray
+    bb_upper: np.ndarray
+    bb_lower: np.ndarray
+    atr: np.ndarray
+    vwap: np.ndarray
+    divergence: np.ndarray      # int8: DIV_*
+    valid: np.ndarray           # False = تاريخ ناقص (NaN) أو شموع أقل من الحد الأدنى
+    timestamp: Any = None
+
+    @classmethod
+    def from_matrix(cls, symbols: Sequence[str], out: np.ndarray, bars: int, valid: np.ndarray,
+                    timestamp: Any = None) -> "PanelIndicators":
+        return cls(symbols=symbols, bars=bars,
+                   close=out[:, F_CLOSE], rsi=out[:, F_RSI],
+                   macd=out[:, F_MACD], macd_signal=out[:, F_MACD_SIGNAL],
+                   prev_macd=out[:, F_PREV_MACD], prev_macd_signal=out[:, F_PREV_MACD_SIGNAL],
+                   bb_mid=out[:, F_BB_MID], bb_upper=out[:, F_BB_UPPER], bb_lower=out[:, F_BB_LOWER],
+                   atr=out[:, F_ATR], vwap=out[:, F_VWAP],
+                   divergence=out[:, F_DIVERGENCE].astype(np.int8), valid=valid, timestamp=timestamp)
+
+    # --- حقول مشتقة (متجهة) ---
+
+    @property
+    def macd_hist(self) -> np.ndarray:
+        return self.macd - self.macd_signal
+
+    @property
+    def bb_width(self) -> np.ndarray:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return (self.bb_upper - self.bb_lower) / self.bb_lower
+
+    @property
+    def bb_status(self) -> np.ndarray:
+        return np.where(self.close > self.bb_upper, BB_UPPER,
+                        np.where(self.close < self.bb_lower, BB_LOWER, BB_INSIDE)).astype(np.int8)
+
+    @property
+    def macd_cross(self) -> np.ndarray:
+        golden = (self.prev_macd < self.prev_macd_signal) & (self.macd > self.macd_signal)
+        death = (self.prev_macd > self.prev_macd_signal) & (self.macd < self.macd_signal)
+        return np.where(golden, MACD_GOLDEN, np.where(death, MACD_DEATH, MACD_NO_CROSS)).astype(np.int8)
+
+    @property
+    def trend_strong(self) -> np.ndarray:
+        return np.abs(self.macd_hist) > self.close * 0.0005
+
+    def quant_scores(self) -> np.ndarray:
+        """
+        درجات الوكيل الكمي لـ cast_votes_batch (-1..1): تشبع RSI كما في run_quant_agent
+        (فوق 70 بيع، تحت 30 شراء). الرموز غير الصالحة = 0.
+        """
+        scores = np.where(self.rsi > 70, -1.0, np.where(self.rsi < 30, 1.0, 0.0))
+        return np.where(self.valid, scores, 0.0)
+
+    def index_of(self, symbol: str) -> int:
+        return list(self.symbols).index(symbol)
+
+    # --- تقارير بصيغة IndicatorsAgent ---
+
+    def report(self, i: int) -> Dict[str, Any]:
+        """تقرير رمز واحد بنفس بنية IndicatorsAgent.analyze_market_state."""
+        if not self.valid[i]:
+            return {"status": "INSUFFICIENT_DATA"}
+
+        rsi = float(self.rsi[i])
+        rsi_state = "OVERBOUGHT" if rsi > 70 else "OVERSOLD" if rsi < 30 else "NEUTRAL"
+        bb = int(self.bb_status[i])
+        bb_status = "BREAKOUT_UPPER" if bb == BB_UPPER else "BREAKOUT_LOWER" if bb == BB_LOWER else "INSIDE"
+
+        signals: List[str] = []
+        cross = int(self.macd_cross[i])
+        if cross == MACD_GOLDEN:
+            signals.append("MACD_GOLDEN_CROSS")
+        elif cross == MACD_DEATH:
+            signals.append("MACD_DEATH_CROSS")
+        if self.divergence[i] == DIV_BEARISH:
+            signals.append("BEARISH_DIVERGENCE")
+        elif self.divergence[i] == DIV_BULLISH:
+            signals.append("BULLISH_DIVERGENCE")
+
+        return {
+            "agent": "IndicatorsAgent",
+            "timestamp": str(self.timestamp) if self.timestamp is not None else None,
+            "indicators": {
+                "rsi": round(rsi, 2),
+                "macd_hist": round(float(self.macd_hist[i]), 4),
+                "bb_width": round(float(self.bb_width[i]), 4),
+                "atr": round(float(self.atr[i]), 2),
+                "vwap": round(float(self.vwap[i]), 2)
+            },
+            "state": {
+                "rsi_status": rsi_state,
+                "bb_status": bb_status,
+                "trend_strength": "STRONG" if self.trend_strong[i] else "WEAK"
+            },
+            "detected_patterns": signals
+        }
+
+    def reports(self, indices: Optional[Sequence[int]] = None) -> Dict[str, Dict[str, Any]]:
+        """تقارير لعدة رموز (كل الرموز افتراضياً)."""
+        if indices is None:
+            indices = range(len(self.symbols))
+        return {self.symbols[i]: self.report(i) for i in indices}
+
+# =================================================================
+# 4. ENTRY POINT (نقطة الدخول)
+# =================================================================
+
+def compute_panel(symbols: Sequence[str],
+                  high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray,
+                  session_ids: Optional[np.ndarray] = None,
+                  rsi_period: int = 14, macd_fast: int = 12, macd_slow: int = 26, macd_signal: int = 9,
+                  bb_period: int = 20, bb_std: float = 2.0, atr_period: int = 14, div_window: int = 10,
+                  min_candles: int = 50, timestamp: Any = None) -> PanelIndicators:
+    """
+    حساب مؤشرات آخر شمعة لكل الرموز.
+
+    Args:
+        high/low/close/volume: مصفوفات (S, T) على محور زمني مشترك (الأقدم أولاً).
+        session_ids: معرف جلسة لكل عمود زمني (T,) لتصفير VWAP (None = VWAP تراكمي).
+        min_candles: أقل عدد شموع لاعتبار النتيجة صالحة (كما في IndicatorsAgent).
+    """
+    high = np.ascontiguousarray(high, dtype=np.float64)
+    low = np.ascontiguousarray(low, dtype=np.float64)
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    volume = np.ascontiguousarray(volume, dtype=np.float64)
+    if not (high.shape == low.shape == close.shape == volume.shape) or close.ndim != 2:
+        raise ValueError(f"Panel fields must share one (symbols, time) shape; got close {close.shape}")
+    S, T = close.shape
+    if len(symbols) != S:
+        raise ValueError(f"Got {len(symbols)} symbols for {S} panel rows")
+    if T == 0:
+        raise ValueError("Panel has no time columns")
+
+    if session_ids is None:
+        session_ids = np.zeros(T, dtype=np.int64)
+    else:
+        session_ids = np.ascontiguousarray(session_ids, dtype=np.int64)
+        if session_ids.shape != (T,):
+            raise ValueError(f"session_ids must have shape ({T},)")
+
+    kernel = _jit_panel_indicators if NUMBA_AVAILABLE else _numpy_panel_indicators
+    out = kernel(high, low, close, volume, session_ids,
+                 rsi_period, macd_fast, macd_slow, macd_signal, bb_period, float(bb_std), atr_period, div_window)
+
+    valid = ~(np.isnan(close).any(axis=1) | np.isnan(high).any(axis=1) | np.isnan(low).any(axis=1))
+    if T < min_candles:
+        valid[:] = False
+    return PanelIndicators.from_matrix(symbols, out, T, valid, timestamp)
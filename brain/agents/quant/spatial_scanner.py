@@ -0,0 +1,194 @@
+# Cross-Exchange Spread Matrix
+
+# -*- coding: utf-8 -*-
+# ALPHA SOVEREIGN - SPATIAL ARBITRAGE SCANNER
+# =================================================================
+# Component Name: brain/agents/quant/spatial_scanner.py
+# Core Responsibility: مسح المراجحة المكانية لكل الرموز وكل أزواج البورصات في عملية NumPy واحدة.
+# Design Pattern: In-Place Quote Matrix (رموز × بورصات) + Vectorized Pairwise Spread
+# Forensic Impact: كل فرصة تحمل الحجم القابل للتنفيذ (أصغر كمية بين جانبي الصفقة) وعمر أقدم سعر فيها،
+#                  فتميز الفرص الحقيقية عن أسعار متجمدة من بورصة متأخرة.
+# =================================================================
+
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger("Alpha.Brain.Quant.SpatialScanner")
+
+DEFAULT_FEE = 0.001
+
+
+def net_spread_matrix(bid: np.ndarray, ask: np.ndarray, fees: np.ndarray) -> np.ndarray:
+    """
+    صافي الهامش لكل (رمز، بورصة شراء، بورصة بيع):
+        net[s, i, j] = (bid[s, j] - ask[s, i]) / ask[s, i] - fee[i] - fee[j]
+    (نفس تقريب ArbitrageAgent._calculate_net_profit). القيم غير الصالحة و i == j تعاد NaN.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        net = bid[:, None, :] / ask[:, :, None] - 1.0
+    net -= fees[:, None] + fees[None, :]
+    e = fees.shape[0]
+    net[:, np.arange(e), np.arange(e)] = np.nan
+    return net
+
+
+class SpatialArbScanner:
+    """
+    مصفوفة أسعار (رموز × بورصات) تحدث في مكانها مع كل سعر جديد.
+    scan() يحسب كل الأزواج لكل الرموز دفعة واحدة ويعيد أفضل الفرص فقط.
+    """
+
+    def __init__(self,
+                 exchange_fees: Dict[str, float],
+                 min_profit: float = 0.002,
+                 max_quote_age_s: float = 2.0,
+                 capacity: int = 512):
+        """
+        Args:
+            exchange_fees: رسوم الأخذ لكل بورصة (ترتيبها يحدد أعمدة المصفوفة).
+            min_profit: الحد الأدنى للربح الصافي.
+            max_quote_age_s: الأسعار الأقدم من هذا تستبعد من المسح (0 = بدون حد).
+            capacity: السعة الابتدائية للرموز (تتضاعف تلقائياً).
+        """
+        self.min_profit = min_profit
+        self.max_quote_age_s = max_quote_age_s
+        self.exchanges: List[str] = list(exchange_fees)
+        self._ex_index = {ex: i for i, ex in enumerate(self.exchanges)}
+        self.fees = np.array([exchange_fees[ex] for ex in self.exchanges], dtype=np.float64)
+
+        self.symbols: List[str] = []
+        self._sym_index: Dict[str, int] = {}
+        e = len(self.exchanges)
+        self.bid = np.full((capacity, e), np.nan)
+        self.ask = np.full((capacity, e), np.nan)
+        self.bid_qty = np.zeros((capacity, e))
+        self.ask_qty = np.zeros((capacity, e))
+        self.updated_at = np.zeros((capacity, e))
+
+    # --- Indexing ---
+
+    _GRID = ("bid", "ask", "bid_qty", "ask_qty", "updated_at")
+
+    def exchange_id(self, exchange: str) -> int:
+        idx = self._ex_index.get(exchange)
+        if idx is None:
+            idx = self._ex_index[exchange] = len(self.exchanges)
+            self.exchanges.append(exchange)
+            self.fees = np.append(self.fees, DEFAULT_FEE)
+            for name in self._GRID:
+                arr = getattr(self, name)
+                fill = np.nan if name in ("bid", "ask") else 0.0
+                setattr(self, name, np.hstack([arr, np.full((arr.shape[0], 1), fill)]))
+        return idx
+
+    def symbol_id(self, symbol: str) -> int:
+        idx = self._sym_index.get(symbol)
+        if idx is None:
+            idx = self._sym_index[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+            cap = self.bid.shape[0]
+            if idx >= cap:
+                for name in self._GRID:
+                    arr = getattr(self, name)
+                    fill = np.nan if name in ("bid", "ask") else 0.0
+                    setattr(self, name, np.vstack([arr, np.full_like(arr, fill)]))
+        return idx
+
+    def set_fee(self, exchange: str, fee: float):
+        """تحديث رسوم بورصة (مثلاً بعد تغير مستوى VIP)."""
+        self.fees[self.exchange_id(exchange)] = fee
+
+    # --- Updates ---
+
+    def update(self, symbol: str, exchange: str, bid: float, ask: float,
+               bid_qty: float = 0.0, ask_qty: float = 0.0, ts: Optional[float] = None):
+        """تحديث خلية واحدة في مكانها (O(1))."""
+        j = self.exchange_id(exchange)
+        i = self.symbol_id(symbol)
+        valid = bid > 0 and ask > bid
+        self.bid[i, j] = bid if valid else np.nan
+        self.ask[i, j] = ask if valid else np.nan
+        self.bid_qty[i, j] = bid_qty
+        self.ask_qty[i, j] = ask_qty
+        self.updated_at[i, j] = time.time() if ts is None else ts
+
+    def update_many(self, symbols: Sequence[str], exchanges: Sequence[str],
+                    bid: np.ndarray, ask: np.ndarray,
+                    bid_qty: Optional[np.ndarray] = None, ask_qty: Optional[np.ndarray] = None,
+                    ts: Optional[float] = None):
+        """دفعة تحديثات (تجميعة رسائل من عدة بورصات) بفهرسة متجهة."""
+        rows = np.fromiter((self.symbol_id(s) for s in symbols), dtype=np.int64, count=len(symbols))
+        cols = np.fromiter((self.exchange_id(e) for e in exchanges), dtype=np.int64, count=len(exchanges))
+        bid = np.asarray(bid, dtype=np.float64)
+        ask = np.asarray(ask, dtype=np.float64)
+        valid = (bid > 0) & (ask > bid)
+        self.bid[rows, cols] = np.where(valid, bid, np.nan)
+        self.ask[rows, cols] = np.where(valid, ask, np.nan)
+        self.bid_qty[rows, cols] = 0.0 if bid_qty is None else bid_qty
+        self.ask_qty[rows, cols] = 0.0 if ask_qty is None else ask_qty
+        self.updated_at[rows, cols] = time.time() if ts is None else ts
+
+    # --- Scan ---
+
+    def _live(self, rows: slice, now: float):
+        bid = self.bid[rows]
+        ask = self.ask[rows]
+        if self.max_quote_age_s:
+            stale = (now - self.updated_at[rows]) > self.max_quote_age_s
+            if stale.any():
+                bid = np.where(stale, np.nan, bid)
+                ask = np.where(stale, np.nan, ask)
+        return bid, ask
+
+    def scan(self, top_n: int = 20, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        أفضل top_n فرصة فوق min_profit لكل الرموز (أو لرمز واحد عند وصول سعره).
+        """
+        now = time.time()
+        if symbol is not None:
+            i = self._sym_index.get(symbol)
+            if i is None:
+                return []
+            rows = slice(i, i + 1)
+        else:
+            rows = slice(0, len(self.symbols))
+
+        bid, ask = self._live(rows, now)
+        net = net_spread_matrix(bid, ask, self.fees)
+        flat = net.ravel()
+        hits = np.flatnonzero(flat >= self.min_profit)
+        if not hits.size:
+            return []
+        if hits.size > top_n:
+            hits = hits[np.argpartition(-flat[hits], top_n - 1)[:top_n]]
+        hits = hits[np.argsort(-flat[hits])]
+
+        e = len(self.exchanges)
+        offset = rows.start
+        stamp = datetime.utcnow().isoformat()
+        opportunities = []
+        for code in hits:
+            s, buy, sell = np.unravel_index(code, (net.shape[0], e, e))
+            r = offset + s
+            buy_price = float(self.ask[r, buy])
+            sell_price = float(self.bid[r, sell])
+            gross = sell_price / buy_price - 1.0
+            opportunities.append({
+                "type": "SPATIAL_ARB",
+                "timestamp": stamp,
+                "asset": self.symbols[r],
+                "buy_exchange": self.exchanges[buy],
+                "sell_exchange": self.exchanges[sell],
+                "buy_price": buy_price,
+                "sell_price": sell_price,
+                "gross_spread_pct": round(gross * 100, 4),
+                "net_profit_pct": round(float(flat[code]) * 100, 4),
+                "estimated_fees": round(float(self.fees[buy] + self.fees[sell]) * 100, 4),
+                "max_size": float(min(self.ask_qty[r, buy], self.bid_qty[r, sell])),
+                "quote_age_s": round(now - float(min(self.updated_at[r, buy], self.updated_at[r, sell])), 3),
+            })
+        return opportunities
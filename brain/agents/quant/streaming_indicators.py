@@ -0,0 +1,339 @@
+# Incremental Technical Analysis Core
+
+# -*- coding: utf-8 -*-
+# ALPHA SOVEREIGN - STREAMING INDICATORS ENGINE
+# =================================================================
+# Component Name: brain/agents/quant/streaming_indicators.py
+# Core Responsibility: تحديث المؤشرات الفنية شمعة بشمعة بتكلفة ثابتة O(1) بدلاً من إعادة الحساب على كامل التاريخ.
+# Design Pattern: Stateful Incremental Engine (Seed -> Update -> Snapshot/Restore)
+# Forensic Impact: نفس أرقام محرك Pandas (فرق أقل من 1e-9)، لكن زمن الشمعة لا ينمو مع طول التاريخ.
+# =================================================================
+#
+# المؤشرات ومطابقتها لمرجع Pandas في IndicatorsAgent:
+#   - RSI (Wilder):     ewm(alpha=1/n, adjust=False, min_periods=n) على المكاسب/الخسائر، والقيمة 50 قبل الجاهزية.
+#   - MACD:             ewm(span, adjust=False) للسريع والبطيء والإشارة.
+#   - Bollinger:        rolling(n).mean() / rolling(n).std() (ddof=1).
+#   - ATR:              rolling(n).mean() على المدى الحقيقي (أول شمعة = high - low).
+#   - Session VWAP:     مجموع تراكمي لـ (TP * V) / V يعاد تصفيره مع كل جلسة جديدة (يوم UTC افتراضياً).
+
+import logging
+import math
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, Hashable, Iterable, Optional
+
+logger = logging.getLogger("Alpha.Brain.Quant.StreamingIndicators")
+
+SNAPSHOT_VERSION = 1
+NAN = float("nan")
+
+
+def utc_day_session(ts: Any) -> Optional[str]:
+    """
+    مفتاح الجلسة الافتراضي: يوم UTC لطابع datetime / pd.Timestamp.
+    الطوابع غير الزمنية (أرقام تسلسلية) أو None تعني عدم وجود حدود جلسات (VWAP تراكمي).
+    """
+    if not isinstance(ts, datetime):
+        return None
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc)
+    return str(ts.date())
+
+
+class StreamingIndicators:
+    """
+    محرك مؤشرات تزايدي لرمز واحد.
+    كل استدعاء لـ update() يكلف عدداً ثابتاً من العمليات مهما طال التاريخ.
+    الحالة بالكامل قابلة للحفظ (snapshot) والاستعادة (restore) لتجاوز إعادة التسخين بعد إعادة التشغيل.
+    """
+
+    def __init__(self,
+                 rsi_period: int = 14,
+                 macd_fast: int = 12,
+                 macd_slow: int = 26,
+                 macd_signal: int = 9,
+                 bb_period: int = 20,
+                 bb_std: float = 2.0,
+                 atr_period: int = 14,
+                 history: int = 10,
+                 session_fn: Optional[Callable[[Any], Optional[Hashable]]] = utc_day_session,
+                 resync_every: int = 1000):
+        """
+        Args:
+            history: عدد الشموع الأخيرة المحفوظة (الإغلاق وRSI) لكشف التباعد.
+            session_fn: دالة طابع زمني -> مفتاح جلسة لـ VWAP (None = VWAP تراكمي دون تصفير).
+            resync_every: إعادة حساب مجاميع النوافذ المنزلقة من الحلقة كل N شمعة لمنع تراكم أخطاء الفاصلة العائمة.
+        """
+        self.rsi_period = rsi_period
+        self.macd_fast = macd_fast
+        self.macd_slow = macd_slow
+        self.macd_signal = macd_signal
+        self.bb_period = bb_period
+        self.bb_std = bb_std
+        self.atr_period = atr_period
+        self.history = history
+        self.session_fn = session_fn
+        self.resync_every = resync_every
+
+        self._a_rsi = 1.0 / rsi_period
+        self._a_fast = 2.0 / (macd_fast + 1)
+        self._a_slow = 2.0 / (macd_slow + 1)
+        self._a_signal = 2.0 / (macd_signal + 1)
+
+        self.reset()
+
+    def reset(self):
+        """مسح الحالة بالكامل (قبل إعادة البذر)."""
+        self.bars = 0
+        self.last_ts: Any = None
+        self._prev_close = NAN
+
+        # RSI (Wilder)
+        self._deltas = 0
+        self._avg_gain = NAN
+        self._avg_loss = NAN
+
+        # MACD
+        self._ema_fast = NAN
+        self._ema_slow = NAN
+        self._macd_signal = NAN
+
+        # Bollinger: نافذة منزلقة بمتوسط وM2 (Welford مع الإزالة)
+        self._bb_window: Deque[float] = deque()
+        self._bb_mean = 0.0
+        self._bb_m2 = 0.0
+
+        # ATR: مجموع منزلق للمدى الحقيقي
+        self._tr_window: Deque[float] = deque()
+        self._tr_sum = 0.0
+
+        # Session VWAP
+        self._session: Optional[str] = None
+        self._cum_pv = 0.0
+        self._cum_v = 0.0
+
+        self._since_resync = 0
+        self.values: Dict[str, float] = {}
+        self.previous: Dict[str, float] = {}
+        self.recent_close: Deque[float] = deque(maxlen=self.history)
+        self.recent_rsi: Deque[float] = deque(maxlen=self.history)
+
+    # ------------------------------------------------------------------
+    # التحديث (O(1) لكل شمعة)
+    # ------------------------------------------------------------------
+
+    def update(self, high: float, low: float, close: float, volume: float, ts: Any = None) -> Dict[str, float]:
+        """
+        إدخال شمعة مغلقة جديدة وإرجاع قيم المؤشرات بعدها.
+        """
+        close = float(close)
+        high = float(high)
+        low = float(low)
+        volume = float(volume)
+        prev_close = self._prev_close
+
+        # --- RSI (Wilder) ---
+        if self.bars > 0:
+            delta = close - prev_close
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else 0.0
+            if self._deltas == 0:
+                self._avg_gain, self._avg_loss = gain, loss
+            else:
+                self._avg_gain += self._a_rsi * (gain - self._avg_gain)
+                self._avg_loss += self._a_rsi * (loss - self._avg_loss)
+            self._deltas += 1
+
+        rsi = 50.0
+        if self._deltas >= self.rsi_period:
+            if self._avg_loss > 0:
+                rsi = 100.0 - 100.0 / (1.0 + self._avg_gain / self._avg_loss)
+            elif self._avg_gain > 0:
+                rsi = 100.0
+
+        # --- MACD ---
+        if self.bars == 0:
+            self._ema_fast = self._ema_slow = close
+        else:
+            self._ema_fast = (1.0 - self._a_fast) * self._ema_fast + self._a_fast * close
+            self._ema_slow = (1.0 - self._a_slow) * self._ema_slow + self._a_slow * close
+        macd = self._ema_fast - self._ema_slow
+        if self.bars == 0:
+            self._macd_signal = macd
+        else:
+            self._macd_signal = (1.0 - self._a_signal) * self._macd_signal + self._a_signal * macd
+
+        # --- Bollinger ---
+        self._push_bb(close)
+        n = len(self._bb_window)
+        if n == self.bb_period and n > 1:
+            std = math.sqrt(max(self._bb_m2, 0.0) / (n - 1))
+            bb_mid = self._bb_mean
+            bb_upper = bb_mid + std * self.bb_std
+            bb_lower = bb_mid - std * self.bb_std
+        else:
+            bb_mid = bb_upper = bb_lower = NAN
+
+        # --- ATR ---
+        if self.bars == 0:
+            tr = high - low
+        else:
+            tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        self._tr_window.append(tr)
+        self._tr_sum += tr
+        if len(self._tr_window) > self.atr_period:
+            self._tr_sum -= self._tr_window.popleft()
+        atr = self._tr_sum / self.atr_period if len(self._tr_window) == self.atr_period else NAN
+
+        # --- Session VWAP ---
+        session = self.session_fn(ts) if self.session_fn is not None else None
+        if session != self._session:
+            self._session = session
+            self._cum_pv = 0.0
+            self._cum_v = 0.0
+        self._cum_pv += (high + low + close) / 3 * volume
+        self._cum_v += volume
+        vwap = self._cum_pv / self._cum_v if self._cum_v != 0 else NAN
+
+        # --- مكافحة الانجراف العددي ---
+        self._since_resync += 1
+        if self.resync_every and self._since_resync >= self.resync_every:
+            self._resync()
+
+        self.bars += 1
+        self.last_ts = ts
+        self._prev_close = close
+
+        self.previous = self.values
+        self.values = {
+            "close": close,
+            "rsi": rsi,
+            "macd": macd,
+            "macd_signal": self._macd_signal,
+            "macd_hist": macd - self._macd_signal,
+            "bb_mid": bb_mid,
+            "bb_upper": bb_upper,
+            "bb_lower": bb_lower,
+            "atr": atr,
+            "vwap": vwap,
+        }
+        self.recent_close.append(close)
+        self.recent_rsi.append(rsi)
+        return self.values
+
+    def _push_bb(self, x: float):
+        window = self._bb_window
+        if len(window) < self.bb_period:
+            window.append(x)
+            delta = x - self._bb_mean
+            self._bb_mean += delta / len(window)
+            self._bb_m2 += delta * (x - self._bb_mean)
+            return
+        # استبدال الأقدم بالأحدث بنفس حجم النافذة
+        old = window.popleft()
+        window.append(x)
+        old_mean = self._bb_mean
+        self._bb_mean += (x - old) / self.bb_period
+        self._bb_m2 += (x - old) * (x - self._bb_mean + old - old_mean)
+
+    def _resync(self):
+        """إعادة حساب مجاميع النوافذ من الصفر (O(n) كل resync_every شمعة = O(1) بالمتوسط)."""
+        self._since_resync = 0
+        n = len(self._bb_window)
+        if n:
+            mean = math.fsum(self._bb_window) / n
+            self._bb_mean = mean
+            self._bb_m2 = math.fsum((x - mean) ** 2 for x in self._bb_window)
+        self._tr_sum = math.fsum(self._tr_window)
+
+    # ------------------------------------------------------------------
+    # البذر من التاريخ
+    # ------------------------------------------------------------------
+
+    def seed(self, candles_df, reset: bool = True) -> Dict[str, float]:
+        """
+        بناء الحالة من DataFrame تاريخي [high, low, close, volume] (الفهرس = الطابع الزمني).
+        تمرير واحد O(history) عند الإقلاع، ثم update() لكل شمعة جديدة.
+        """
+        if reset:
+            self.reset()
+        index = candles_df.index
+        rows = zip(index, candles_df["high"].to_numpy(), candles_df["low"].to_numpy(),
+                   candles_df["close"].to_numpy(), candles_df["volume"].to_numpy())
+        return self.seed_rows(rows)
+
+    def seed_rows(self, rows: Iterable) -> Dict[str, float]:
+        """بذر من صفوف (ts, high, low, close, volume)."""
+        for ts, high, low, close, volume in rows:
+            self.update(high, low, close, volume, ts)
+        return self.values
+
+    @property
+    def ready(self) -> bool:
+        """كل المؤشرات ذات النوافذ ممتلئة."""
+        return (self._deltas >= self.rsi_period and len(self._bb_window) == self.bb_period
+                and len(self._tr_window) == self.atr_period)
+
+    # ------------------------------------------------------------------
+    # الحفظ والاستعادة
+    # ------------------------------------------------------------------
+
+    def snapshot(self) -> Dict[str, Any]:
+        """حالة كاملة قابلة للتسلسل (pickle؛ وJSON إذا كان الطابع الزمني بدائياً). session_fn لا تحفظ."""
+        return {
+            "version": SNAPSHOT_VERSION,
+            "params": {
+                "rsi_period": self.rsi_period, "macd_fast": self.macd_fast, "macd_slow": self.macd_slow,
+                "macd_signal": self.macd_signal, "bb_period": self.bb_period, "bb_std": self.bb_std,
+                "atr_period": self.atr_period, "history": self.history, "resync_every": self.resync_every,
+            },
+            "state": {
+                "bars": self.bars, "last_ts": self.last_ts, "prev_close": self._prev_close,
+                "deltas": self._deltas, "avg_gain": self._avg_gain, "avg_loss": self._avg_loss,
+                "ema_fast": self._ema_fast, "ema_slow": self._ema_slow, "macd_signal": self._macd_signal,
+                "bb_window": list(self._bb_window), "bb_mean": self._bb_mean, "bb_m2": self._bb_m2,
+                "tr_window": list(self._tr_window), "tr_sum": self._tr_sum,
+                "session": self._session, "cum_pv": self._cum_pv, "cum_v": self._cum_v,
+                "since_resync": self._since_resync,
+                "values": dict(self.values), "previous": dict(self.previous),
+                "recent_close": list(self.recent_close), "recent_rsi": list(self.recent_rsi),
+            },
+        }
+
+    @classmethod
+    def from_snapshot(cls, snap: Dict[str, Any],
+                      session_fn: Optional[Callable[[Any], Optional[Hashable]]] = utc_day_session) -> "StreamingIndicators":
+        """استعادة محرك من لقطة (المعاملات تؤخذ من اللقطة نفسها)."""
+        if snap.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported indicators snapshot version: {snap.get('version')}")
+        engine = cls(session_fn=session_fn, **snap["params"])
+        engine.restore(snap)
+        return engine
+
+    def restore(self, snap: Dict[str, Any]):
+        """تحميل الحالة من لقطة في محرك بنفس المعاملات."""
+        if snap.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported indicators snapshot version: {snap.get('version')}")
+        st = snap["state"]
+        self.bars = st["bars"]
+        self.last_ts = st["last_ts"]
+        self._prev_close = st["prev_close"]
+        self._deltas = st["deltas"]
+        self._avg_gain = st["avg_gain"]
+        self._avg_loss = st["avg_loss"]
+        self._ema_fast = st["ema_fast"]
+        self._ema_slow = st["ema_slow"]
+        self._macd_signal = st["macd_signal"]
+        self._bb_window = deque(st["bb_window"])
+        self._bb_mean = st["bb_mean"]
+        self._bb_m2 = st["bb_m2"]
+        self._tr_window = deque(st["tr_window"])
+        self._tr_sum = st["tr_sum"]
+        self._session = st["session"]
+        self._cum_pv = st["cum_pv"]
+        self._cum_v = st["cum_v"]
+        self._since_resync = st["since_resync"]
+        self.values = dict(st["values"])
+        self.previous = dict(st["previous"])
+        self.recent_close = deque(st["recent_close"], maxlen=self.history)
+        self.recent_rsi = deque(st["recent_rsi"], maxlen=self.history)
@@ -0,0 +1,132 @@
+"""
+Goal
+----
+مطابقة المحرك التزايدي (StreamingIndicators) لمرجع Pandas في IndicatorsAgent بدقة rtol=1e-9:
+البذر من الإطار، التغذية شمعة بشمعة، والحفظ/الاستعادة في منتصف البث.
+
+Dependencies
+------------
+- brain.agents.quant.indicators_agent
+- brain.agents.quant.streaming_indicators
+"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from brain.agents.quant.indicators_agent import IndicatorsAgent
+
+RTOL = 1e-9
+KEYS = ("close", "rsi", "macd", "macd_signal", "macd_hist", "bb_upper", "bb_lower", "atr", "vwap")
+
+
+def _candles(n: int = 400, seed: int = 7) -> pd.DataFrame:
+    """شموع ساعية عبر عدة أيام UTC (حتى تختبر حدود جلسات VWAP)."""
+    rng = np.random.default_rng(seed)
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.01, n)))
+    spread = np.abs(rng.normal(0.0, 0.004, n)) * close
+    index = pd.date_range("2026-01-01 05:00", periods=n, freq="h", tz="UTC")
+    return pd.DataFrame({
+        "open": close,
+        "high": close + spread,
+        "low": close - spread,
+        "close": close,
+        "volume": rng.uniform(1.0, 50.0, n),
+    }, index=index)
+
+
+def _reference(agent: IndicatorsAgent, df: pd.DataFrame) -> pd.DataFrame:
+    """مرجع Pandas: نفس دوال الوكيل على نسخة من الإطار كاملاً."""
+    ref = df.copy()
+    agent._add_rsi(ref)
+    agent._add_macd(ref)
+    agent._add_bollinger_bands(ref)
+    agent._add_atr(ref)
+    agent._add_vwap(ref)
+    ref["macd_hist"] = ref["macd"] - ref["macd_signal"]
+    return ref
+
+
+def _assert_close(values, row) -> None:
+    for key in KEYS:
+        np.testing.assert_allclose(values[key], row[key], rtol=RTOL, atol=1e-12, err_msg=key)
+
+
+def test_symbol_path_matches_pandas_report() -> None:
+    """analyze_market_state(df, symbol) يعيد نفس تقرير analyze_market_state(df)."""
+    df = _candles()
+    agent = IndicatorsAgent()
+
+    batch = agent.analyze_market_state(df)
+    streaming = agent.analyze_market_state(df, symbol="BTCUSDT")
+    assert batch["indicators"] == pytest.approx(streaming["indicators"], rel=RTOL)
+    assert batch["state"] == streaming["state"]
+    assert batch["detected_patterns"] == streaming["detected_patterns"]
+    assert batch["timestamp"] == streaming["timestamp"]
+
+    ref = _reference(agent, df)
+    engine = agent._engines["BTCUSDT"]
+    _assert_close(engine.values, ref.iloc[-1])
+    _assert_close(engine.previous, ref.iloc[-2])
+
+
+def test_symbol_path_feeds_only_new_rows() -> None:
+    """إطار يمتد بشموع جديدة يغذي المحرك بها فقط ويبقى مطابقاً للمرجع."""
+    df = _candles()
+    agent = IndicatorsAgent()
+    agent.analyze_market_state(df.iloc[:120], symbol="ETHUSDT")
+
+    for end in (121, 180, 300, len(df)):
+        report = agent.analyze_market_state(df.iloc[:end], symbol="ETHUSDT")
+        batch = agent.analyze_market_state(df.iloc[:end])
+        assert report["indicators"] == pytest.approx(batch["indicators"], rel=RTOL)
+        _assert_close(agent._engines["ETHUSDT"].values, _reference(agent, df.iloc[:end]).iloc[-1])
+
+
+def test_update_candle_matches_pandas() -> None:
+    """التغذية شمعة بشمعة عبر update_candle تطابق إعادة الحساب الكاملة عند كل خطوة."""
+    df = _candles(n=200)
+    agent = IndicatorsAgent()
+    ref = _reference(agent, df)
+
+    for i, (ts, row) in enumerate(df.iterrows()):
+        report = agent.update_candle("SOLUSDT", row["high"], row["low"], row["close"], row["volume"], ts)
+        if i + 1 < agent.min_candles:
+            assert report == {"status": "INSUFFICIENT_DATA"}
+            continue
+        _assert_close(agent._engines["SOLUSDT"].values, ref.iloc[i])
+
+    batch = agent.analyze_market_state(df)
+    assert report["indicators"] == pytest.approx(batch["indicators"], rel=RTOL)
+    assert report["state"] == batch["state"]
+
+
+def test_snapshot_restore_continues_stream() -> None:
+    """محرك مستعاد من لقطة يكمل البث بنفس أرقام المحرك غير المنقطع ومرجع Pandas."""
+    df = _candles()
+    split = 250
+    live = IndicatorsAgent()
+    live.analyze_market_state(df.iloc[:split], symbol="BTCUSDT")
+
+    restored = IndicatorsAgent()
+    restored.restore_engines(live.snapshot_engines())
+
+    ref = _reference(live, df)
+    for i in range(split, len(df)):
+        ts, row = df.index[i], df.iloc[i]
+        a = live.update_candle("BTCUSDT", row["high"], row["low"], row["close"], row["volume"], ts)
+        b = restored.update_candle("BTCUSDT", row["high"], row["low"], row["close"], row["volume"], ts)
+        assert a == b
+        _assert_close(restored._engines["BTCUSDT"].values, ref.iloc[i])
+
+
+def test_restore_rejects_unknown_snapshot_version() -> None:
+    agent = IndicatorsAgent()
+    agent.analyze_market_state(_candles(n=60), symbol="BTCUSDT")
+    snaps = agent.snapshot_engines()
+    snaps["BTCUSDT"]["version"] = -1
+
+    fresh = IndicatorsAgent()
+    fresh.restore_engines(snaps)
+    assert "BTCUSDT" not in fresh._engines
@@ -0,0 +1,269 @@
+# Live Co-Movement Matrix
+
+# -*- coding: utf-8 -*-
+# ALPHA SOVEREIGN - EWMA COVARIANCE ENGINE
+# =================================================================
+# Component Name: brain/agents/risk/covariance_engine.py
+# Core Responsibility: مصفوفة تغاير/ارتباط EWMA حية لكامل الكون، تحدث مع كل شمعة بتكلفة O(N²).
+# Design Pattern: Streaming Estimator + Immutable Snapshot (ينشر للمخاطر والرسم المعرفي للقراءة فقط)
+# Forensic Impact: مخاطر المحفظة تحسب من الحركة المشتركة الفعلية وقت القرار، لا من ثوابت مكتوبة يدوياً؛
+#                  كل لقطة تحمل عدد التحديثات ووقتها لإثبات أي تقدير استخدم.
+# =================================================================
+#
+# النموذج (RiskMetrics):  S_t = λ S_{t-1} + (1 - λ) r_t r_tᵀ   (متوسط صفري للعوائد اللوغاريتمية)
+# تصحيح انحياز البداية:   Ŝ_ij = S_ij / (1 - λ^k_ij)،  k_ij = عدد الشموع منذ أن صار الرمزان كلاهما مرصودين
+#                         (رمز يضاف لاحقاً لا يأخذ تصحيح الكون الناضج)
+# الانكماش (اختياري):     Ŝ ← (1 - δ) Ŝ + δ diag(Ŝ)   (يدفع الارتباطات الضعيفة التقدير نحو الصفر)
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+# محاولة استيراد Numba مع fallback آمن
+try:
+    from numba import jit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def jit(*args, **kwargs):
+        def decorator(func):
+            return func
+        return decorator
+
+logger = logging.getLogger("Alpha.Brain.Risk.Covariance")
+
+# =================================================================
+# 1. JIT KERNELS
+# =================================================================
+
+@jit(nopython=True, nogil=True, parallel=True, cache=True)
+def _jit_ewma_cov_update(cov, r, lam):
+    """تحديث رتبة-1 في المكان: cov = lam * cov + (1 - lam) * r rᵀ (صفوف متوازية)."""
+    n = r.shape[0]
+    w = 1.0 - lam
+    for i in prange(n):
+        ri = w * r[i]
+        for j in range(n):
+            cov[i, j] = lam * cov[i, j] + ri * r[j]
+
+
+def _numpy_ewma_cov_update(cov, r, lam):
+    """نفس التحديث عبر BLAS (عند غياب Numba)."""
+    cov *= lam
+    cov += (1.0 - lam) * np.outer(r, r)
+
+# =================================================================
+# 2. SNAPSHOT (اللقطة المشتركة)
+# =================================================================
+
+@dataclass(frozen=True)
+class CovarianceSnapshot:
+    """
+    لقطة ثابتة للقراءة فقط (المصفوفات غير قابلة للكتابة).
+    آمنة للمشاركة بين الخيوط: المحرك يستبدل المرجع ولا يعدل لقطة منشورة.
+    تضم فقط الرموز التي بلغت min_updates مشاهدة؛ الرموز الأحدث في pending
+    (يعاملها المستهلكون كرموز غير معروفة).
+    """
+    symbols: tuple
+    cov: np.ndarray
+    corr: np.ndarray
+    vol: np.ndarray
+    n_updates: int
+    timestamp: float
+    index: Dict[str, int] = field(repr=False, default_factory=dict)
+    n_obs: Optional[np.ndarray] = field(repr=False, default=None)
+    pending: tuple = ()
+
+    def has(self, symbol: str) -> bool:
+        return symbol in self.index
+
+    def correlation(self, a: str, b: str) -> Optional[float]:
+        i, j = self.index.get(a), self.index.get(b)
+        if i is None or j is None:
+            return None
+        return float(self.corr[i, j])
+
+    def volatility(self, symbol: str) -> Optional[float]:
+        i = self.index.get(symbol)
+        return None if i is None else float(self.vol[i])
+
+    def exposure_vector(self, exposures: Mapping[str, float]) -> np.ndarray:
+        """تعرض موقّع (بالدولار) لكل رمز بترتيب اللقطة؛ الرموز غير المعروفة تتجاهل."""
+        x = np.zeros(len(self.symbols))
+        for symbol, value in exposures.items():
+            i = self.index.get(symbol)
+            if i is not None:
+                x[i] += value
+        return x
+
+    def portfolio_volatility(self, exposures: Mapping[str, float]) -> float:
+        """الانحراف المعياري لتغير قيمة المحفظة خلال شمعة واحدة (بالدولار): sqrt(xᵀ Σ x)."""
+        x = self.exposure_vector(exposures)
+        return float(np.sqrt(max(x @ self.cov @ x, 0.0)))
+
+    def strong_pairs(self, threshold: float = 0.5) -> List[tuple]:
+        """أزواج الارتباط القوي |ρ| >= threshold (المثلث العلوي فقط)."""
+        iu, ju = np.nonzero(np.triu(np.abs(self.corr) >= threshold, k=1))
+        return [(self.symbols[i], self.symbols[j], float(self.corr[i, j])) for i, j in zip(iu, ju)]
+
+# =================================================================
+# 3. ENGINE (المحرك)
+# =================================================================
+
+class EwmaCovarianceEngine:
+    """
+    مقدر تغاير EWMA متدفق لكون رموز ثابت الترتيب (يتوسع عند إضافة رموز).
+    الكاتب واحد (خيط الشموع)؛ القراء يأخذون latest() دون أقفال.
+    """
+
+    def __init__(self,
+                 symbols: Sequence[str] = (),
+                 lam: float = 0.94,
+                 shrinkage: float = 0.0,
+                 min_updates: int = 20,
+                 publish_every: int = 1):
+        """
+        Args:
+            symbols: الكون الابتدائي.
+            lam: معامل الاضمحلال λ (0.94 = RiskMetrics اليومي؛ أعلى لشموع أقصر).
+            shrinkage: شدة الانكماش δ نحو القطر (0 = بدون).
+            min_updates: أقل عدد شموع قبل اعتبار اللقطة صالحة للمخاطر.
+            publish_every: نشر لقطة جديدة كل N تحديث.
+        """
+        self.lam = lam
+        self.shrinkage = shrinkage
+        self.min_updates = min_updates
+        self.publish_every = max(1, publish_every)
+
+        self.symbols: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._cov = np.zeros((0, 0))
+        self._last_price = np.zeros(0)
+        # لكل رمز: λ^k وعدد المشاهدات k منذ أول عائد مرصود له (1 و 0 قبل ذلك)
+        self._decay_pow = np.ones(0)
+        self._n_obs = np.zeros(0, dtype=np.int64)
+        self.n_updates = 0
+        self._latest: Optional[CovarianceSnapshot] = None
+        self._lock = threading.Lock()  # للكتابة فقط (تحديث/توسيع)
+        for symbol in symbols:
+            self.add_symbol(symbol)
+
+    # --- Universe ---
+
+    def add_symbol(self, symbol: str) -> int:
+        """إضافة رمز (صف/عمود صفري؛ تقديره يبدأ من أول عائد له)."""
+        idx = self._index.get(symbol)
+        if idx is not None:
+            return idx
+        with self._lock:
+            idx = self._index[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+            n = idx + 1
+            cov = np.zeros((n, n))
+            cov[:idx, :idx] = self._cov
+            self._cov = cov
+            self._last_price = np.append(self._last_price, np.nan)
+            self._decay_pow = np.append(self._decay_pow, 1.0)
+            self._n_obs = np.append(self._n_obs, 0)
+        return idx
+
+    # --- Updates ---
+
+    def update_returns(self, returns: np.ndarray):
+        """
+        شمعة واحدة: متجه عوائد لوغاريتمية بترتيب self.symbols.
+        العوائد الناقصة (NaN) تعامل كصفر (السعر لم يتغير)؛ لكن تقدير الرمز يبدأ من أول عائد مرصود له.
+        """
+        r = np.asarray(returns, dtype=np.float64)
+        observed = np.isfinite(r)
+        r = np.where(observed, r, 0.0)
+        with self._lock:
+            if NUMBA_AVAILABLE:
+                _jit_ewma_cov_update(self._cov, r, self.lam)
+            else:
+                _numpy_ewma_cov_update(self._cov, r, self.lam)
+            started = observed | (self._n_obs > 0)
+            self._decay_pow[started] *= self.lam
+            self._n_obs[started] += 1
+            self.n_updates += 1
+        if self.n_updates % self.publish_every == 0:
+            self.publish()
+
+    def update_prices(self, prices: Mapping[str, float]):
+        """
+        شمعة واحدة من أسعار الإغلاق {symbol: close}. الرموز الجديدة تضاف تلقائياً.
+        أول سعر لكل رمز يؤسس المرجع فقط.
+        """
+        for symbol in prices:
+            self.add_symbol(symbol)
+        current = self._last_price.copy()
+        for symbol, price in prices.items():
+            if price and price > 0:
+                current[self._index[symbol]] = price
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = np.log(current / self._last_price)
+        self._last_price = current
+        self.update_returns(r)
+
+    def seed(self, returns: np.ndarray):
+        """تهيئة من تاريخ عوائد (T × N) بنفس ترتيب الرموز؛ تنشر لقطة واحدة في النهاية."""
+        every, self.publish_every = self.publish_every, 1 << 62
+        try:
+            for row in np.asarray(returns, dtype=np.float64):
+                self.update_returns(row)
+        finally:
+            self.publish_every = every
+        self.publish()
+
+    # --- Publication ---
+
+    def publish(self) -> CovarianceSnapshot:
+        """
+        بناء لقطة ثابتة (تصحيح انحياز لكل زوج + الانكماش) واستبدال المرجع المنشور.
+        الرموز التي لم تبلغ min_updates مشاهدة تستبعد من اللقطة (pending).
+        """
+        with self._lock:
+            mature = np.flatnonzero(self._n_obs >= max(self.min_updates, 1))
+            raw = self._cov[np.ix_(mature, mature)]
+            decay = self._decay_pow[mature]
+            n_obs = self._n_obs[mature]
+            symbols = tuple(self.symbols[i] for i in mature)
+            pending = tuple(s for i, s in enumerate(self.symbols) if self._n_obs[i] < max(self.min_updates, 1))
+            n_updates = self.n_updates
+
+        # الزوج مرصود منذ بدء أحدث الرمزين: أكبر λ^k بينهما
+        correction = 1.0 - np.maximum.outer(decay, decay)
+        cov = np.divide(raw, correction, out=np.zeros_like(raw), where=correction > 0)
+        index = {symbol: i for i, symbol in enumerate(symbols)}
+
+        if self.shrinkage > 0:
+            diag = np.diag(cov).copy()
+            cov *= 1.0 - self.shrinkage
+            cov[np.diag_indices_from(cov)] = diag
+
+        vol = np.sqrt(np.clip(np.diag(cov), 0.0, None))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = cov / np.outer(vol, vol)
+        corr = np.nan_to_num(corr, nan=0.0, posinf=0.0, neginf=0.0)
+        np.fill_diagonal(corr, np.where(vol > 0, 1.0, 0.0))
+
+        for arr in (cov, corr, vol, n_obs):
+            arr.flags.writeable = False
+        snapshot = CovarianceSnapshot(symbols=symbols, cov=cov, corr=corr, vol=vol,
+                                      n_updates=n_updates, timestamp=time.time(), index=index,
+                                      n_obs=n_obs, pending=pending)
+        self._latest = snapshot
+        return snapshot
+
+    def latest(self) -> Optional[CovarianceSnapshot]:
+        """آخر لقطة منشورة إذا ضمت رمزاً ناضجاً واحداً على الأقل (min_updates مشاهدة)، وإلا None."""
+        snapshot = self._latest
+        if snapshot is None or not snapshot.symbols:
+            return None
+        return snapshot
@@ -11,7 +11,7 @@
 
 import logging
 import numpy as np
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Tuple, Optional
 from datetime import datetime
 
 class ExposureAgent:
@@ -20,15 +20,20 @@ class ExposureAgent:
     يحسب المخاطر الهيكلية للمحفظة (Structural Risk).
     """
 
-    def __init__(self, max_leverage: float = 2.0, max_concentration: float = 0.20):
+    def __init__(self, max_leverage: float = 2.0, max_concentration: float = 0.20,
+                 covariance: Any = None, max_portfolio_vol: Optional[float] = None):
         """
         Args:
             max_leverage: الحد الأقصى للرافعة المالية المسموح بها (مثلاً 2x).
             max_concentration: الحد الأقصى لحجم صفقة واحدة نسبةً لرأس المال (مثلاً 20%).
+            covariance: محرك EwmaCovarianceEngine مشترك (مصدر الحركة المشتركة الحية).
+            max_portfolio_vol: حد تقلب المحفظة لكل شمعة كنسبة من رأس المال (None = مراقبة فقط).
         """
         self.logger = logging.getLogger("Alpha.Brain.Risk.Exposure")
         self.max_leverage = max_leverage
         self.max_concentration = max_concentration
+        self.covariance = covariance
+        self.max_portfolio_vol = max_portfolio_vol
         
         # حدود القطاعات (لتجنب المخاطرة في قطاع واحد مثل DeFi أو Meme)
         self.sector_limits = {
@@ -81,6 +86,14 @@ class ExposureAgent:
         sector_warnings = self._check_sector_limits(positions, equity)
         violations.extend(sector_warnings)
 
+        # D. تقلب المحفظة من مصفوفة التغاير الحية (التحوطات تخفضه، الأصول المترابطة ترفعه)
+        portfolio_vol_pct, uncovered_symbols = self._portfolio_volatility(positions, equity)
+        if (portfolio_vol_pct is not None and self.max_portfolio_vol is not None
+                and portfolio_vol_pct > self.max_portfolio_vol):
+            violations.append(
+                f"CORRELATED_RISK: Portfolio vol {portfolio_vol_pct*100:.2f}% > Max {self.max_portfolio_vol*100}%"
+            )
+
         # 3. القرار وتوصيات التخفيف (Mitigation)
         status = "HEALTHY"
         action = "NONE"
@@ -98,7 +111,9 @@ class ExposureAgent:
                 "gross_exposure": round(gross_exposure, 2),
                 "net_exposure": round(net_exposure, 2),
                 "current_leverage": round(current_leverage, 2),
-                "net_exposure_ratio": round(net_exposure_ratio, 2)
+                "net_exposure_ratio": round(net_exposure_ratio, 2),
+                "portfolio_vol_pct": None if portfolio_vol_pct is None else round(portfolio_vol_pct * 100, 3),
+                "uncovered_symbols": uncovered_symbols
             },
             "status": status,
             "violations": violations,
@@ -106,6 +121,30 @@ class ExposureAgent:
             "allowed_new_exposure_usd": max(0, (equity * self.max_leverage) - gross_exposure)
         }
 
+    def _portfolio_volatility(self, positions: List[Dict[str, Any]],
+                              equity: float) -> Tuple[Optional[float], List[str]]:
+        """
+        sqrt(xᵀ Σ x) / equity بالتعرض الموقّع، مع الرموز خارج اللقطة (غير معروفة أو لم تنضج بعد).
+        التعرض غير المغطى لا يهمل: يضاف |uncovered| × أعلى تقلب في اللقطة (ارتباط تام، أسوأ أصل).
+        None إذا لم تنشر لقطة صالحة بعد، أو لا يوجد في اللقطة رمز يقاس به التعرض غير المغطى.
+        """
+        snapshot = self.covariance.latest() if self.covariance is not None else None
+        if snapshot is None:
+            return None, []
+        exposures: Dict[str, float] = {}
+        for p in positions:
+            signed = p["notional_value"] if p["side"] == "LONG" else -p["notional_value"]
+            exposures[p["symbol"]] = exposures.get(p["symbol"], 0.0) + signed
+
+        uncovered = {s: v for s, v in exposures.items() if not snapshot.has(s)}
+        uncovered_symbols = sorted(uncovered)
+        dollar_vol = snapshot.portfolio_volatility(exposures)
+        if uncovered:
+            if not len(snapshot.vol):
+                return None, uncovered_symbols
+            dollar_vol += sum(abs(v) for v in uncovered.values()) * float(np.max(snapshot.vol))
+        return dollar_vol / equity, uncovered_symbols
+
     def _check_concentrations(self, positions: List[Dict[str, Any]], equity: float) -> List[str]:
         """فحص ما إذا كانت عملة واحدة تسيطر على المحفظة."""
         warnings = []
@@ -5,13 +5,13 @@
 # =================================================================
 # Component Name: brain/agents/risk/stress_tester.py
 # Core Responsibility: تشغيل محاكاة "ماذا لو" لحظية لكل قرار (Risk Management Pillar).
-# Design Pattern: Scenario Analysis / Monte Carlo Lite
+# Design Pattern: Scenario Analysis / Monte Carlo Lite (Vectorized: مصفوفة صدمات سيناريوهات × أصول)
 # Forensic Impact: يوفر "شهادة البقاء" (Survival Certificate) لكل صفقة. إذا خسرت الصفقة لاحقاً، لدينا دليل أنها كانت سليمة وقت اتخاذ القرار.
 # =================================================================
 
 import logging
 import numpy as np
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Sequence, Tuple
 from dataclasses import dataclass
 
 @dataclass
@@ -25,11 +25,31 @@ class StressTester:
     """
     مختبر الإجهاد.
     يطبق مصفوفة من سيناريوهات الكوارث التاريخية والافتراضية على المحفظة + الصفقة المقترحة.
+
+    التمثيل المتجه:
+      - المراكز: متجه تعرض موقّع x (بالدولار) على كون الأصول.
+      - السيناريوهات: مصفوفة صدمات عوائد (سيناريوهات × أصول) + مضاعف سيولة لكل سيناريو.
+      - الأثر: PnL = shocks @ x - تكلفة السيولة؛ عملية مصفوفية واحدة لآلاف السيناريوهات.
+    سيناريوهات الكوارث (DoomScenario) تبقى "عكسية" (السعر يتحرك دائماً ضد كل مركز) وتحسب
+    متجهياً من إجمالي التعرض.
+    التعرض لأصول خارج الكون (بما فيها الصفقة المقترحة) لا يعامل كصفر: في كل سيناريو مصفوفي
+    يفترض أنه تحرك ضد المركز بأسوأ حركة لأي أصل في ذلك السيناريو.
     """
 
-    def __init__(self, risk_aversion_level: float = 0.95):
+    # الحد الأقصى للخسارة المسموح بها في حدث واحد
+    MAX_EVENT_DRAWDOWN = 0.40
+    # الانزلاق الأساسي (0.1%) مضروباً في مضاعف التقلب للسيناريو
+    BASE_SLIPPAGE = 0.001
+
+    def __init__(self, risk_aversion_level: float = 0.95, covariance: Any = None):
+        """
+        Args:
+            risk_aversion_level: مستوى الثقة (للتقارير).
+            covariance: محرك EwmaCovarianceEngine مشترك لتوليد صدمات مترابطة.
+        """
         self.logger = logging.getLogger("Alpha.Brain.Risk.StressTest")
         self.confidence_level = risk_aversion_level
+        self.covariance = covariance
         
         # تعريف سيناريوهات الكوارث (The Doom Matrix)
         # هذه السيناريوهات مستوحاة من أحداث حقيقية (مثل انهيار مارس 2020، وانهيار FTX)
@@ -44,13 +64,158 @@ class StressTester:
             DoomScenario("LIQUIDITY_DEATH", price_shock_pct=-0.05, volatility_mult=10.0, correlation_break=True),
         ]
 
-    def simulate_proposal(self, proposal: Dict[str, Any], current_portfolio: Dict[str, Any]) -> Dict[str, Any]:
+        # مصفوفة السيناريوهات التاريخية/الاصطناعية على كون أصول ثابت الترتيب
+        self.universe: List[str] = []
+        self._asset_index: Dict[str, int] = {}
+        self.shocks = np.zeros((0, 0))
+        self.liquidity_mult = np.zeros(0)
+        # أكبر حركة مطلقة لأي أصل في كل سيناريو (الصدمة المحافظة للتعرض غير المغطى)
+        self.worst_move = np.zeros(0)
+        self.scenario_names: List[str] = []
+
+    # --- Scenario Set ---
+
+    def _align(self, symbols: Sequence[str]) -> np.ndarray:
+        """فهارس الرموز في الكون (الرموز الجديدة تضيف أعمدة صفرية للسيناريوهات الموجودة)."""
+        cols = []
+        for symbol in symbols:
+            idx = self._asset_index.get(symbol)
+            if idx is None:
+                idx = self._asset_index[symbol] = len(self.universe)
+                self.universe.append(symbol)
+            cols.append(idx)
+        if self.shocks.shape[1] < len(self.universe):
+            grown = np.zeros((self.shocks.shape[0], len(self.universe)), order="F")
+            grown[:, :self.shocks.shape[1]] = self.shocks
+            self.shocks = grown
+        return np.asarray(cols, dtype=np.int64)
+
+    def add_scenarios(self, symbols: Sequence[str], shocks: np.ndarray,
+                      names: Optional[Sequence[str]] = None, liquidity_mult: float = 1.0):
+        """
+        إضافة سيناريوهات (K × len(symbols)) كعوائد بسيطة لكل أصل (مثلاً -0.3 = هبوط 30%).
+        الأصول غير المذكورة في سيناريو لا تتحرك فيه.
+        """
+        shocks = np.atleast_2d(np.asarray(shocks, dtype=np.float64))
+        cols = self._align(symbols)
+        block = np.zeros((shocks.shape[0], len(self.universe)))
+        block[:, cols] = np.nan_to_num(shocks)
+        start = len(self.scenario_names)
+        # تخزين بترتيب الأعمدة: أعمدة أصول المحفظة فقط تقرأ متصلة عند التقييم
+        self.shocks = np.asfortranarray(np.vstack([self.shocks, block]))
+        self.liquidity_mult = np.append(self.liquidity_mult, np.full(shocks.shape[0], liquidity_mult))
+        self.worst_move = np.append(self.worst_move, np.abs(block).max(axis=1) if block.size else np.zeros(len(block)))
+        if names is None:
+            names = [f"SCENARIO_{start + i}" for i in range(shocks.shape[0])]
+        self.scenario_names.extend(names)
+
+    def add_historical(self, symbols: Sequence[str], returns: np.ndarray,
+                       horizon: int = 1, labels: Optional[Sequence[str]] = None,
+                       liquidity_mult: float = 2.0):
+        """
+        سيناريوهات تاريخية من سلسلة عوائد لوغاريتمية (T × assets):
+        كل نافذة متداخلة بطول horizon تصبح سيناريو (عائد تراكمي بسيط).
+        """
+        returns = np.nan_to_num(np.asarray(returns, dtype=np.float64))
+        cum = np.cumsum(returns, axis=0)
+        window = cum[horizon - 1:] - np.vstack([np.zeros((1, returns.shape[1])), cum[:-horizon]])
+        if labels is None:
+            labels = range(window.shape[0])
+        names = [f"HIST_{label}" for label in list(labels)[:window.shape[0]]]
+        self.add_scenarios(symbols, np.expm1(window), names, liquidity_mult)
+
+    def add_correlated(self, n: int = 5000, vol_mult: float = 3.0, horizon: int = 1,
+                       seed: Optional[int] = None, liquidity_mult: float = 3.0) -> int:
+        """
+        صدمات اصطناعية مترابطة من لقطة التغاير الحية: r = vol_mult * sqrt(horizon) * L z، حيث Σ = L Lᵀ.
+        تعيد عدد السيناريوهات المضافة (0 إذا لم تتوفر لقطة صالحة).
+        """
+        snapshot = self.covariance.latest() if self.covariance is not None else None
+        if snapshot is None or not snapshot.symbols:
+            return 0
+        cov = np.array(snapshot.cov)
+        # جذر عبر التحليل الطيفي (يتحمل المصفوفات شبه الموجبة)
+        eigval, eigvec = np.linalg.eigh(cov)
+        root = eigvec * np.sqrt(np.clip(eigval, 0.0, None))
+        rng = np.random.default_rng(seed)
+        z = rng.standard_normal((n, len(snapshot.symbols)))
+        log_shocks = vol_mult * np.sqrt(horizon) * (z @ root.T)
+        names = [f"CORR_{vol_mult:g}SIG_{i}" for i in range(n)]
+        self.add_scenarios(snapshot.symbols, np.expm1(log_shocks), names, liquidity_mult)
+        return n
+
+    def clear_scenarios(self):
+        """إزالة كل السيناريوهات المصفوفية (تبقى سيناريوهات الكوارث)."""
+        self.shocks = np.zeros((0, len(self.universe)), order="F")
+        self.liquidity_mult = np.zeros(0)
+        self.worst_move = np.zeros(0)
+        self.scenario_names = []
+
+    # --- Evaluation ---
+
+    def _position_arrays(self, positions: List[Dict[str, Any]],
+                         proposal: Optional[Dict[str, Any]] = None) -> Tuple[np.ndarray, float, Dict[str, float]]:
+        """
+        المحفظة الافتراضية كمتجه تعرض موقّع على الكون (بدون نسخ قواميس المراكز).
+        تعيد (x, gross_notional, uncovered) حيث uncovered = {symbol: تعرض مطلق} لأصول خارج الكون.
+        """
+        x = np.zeros(len(self.universe))
+        gross = 0.0
+        uncovered: Dict[str, float] = {}
+        legs = positions if proposal is None else positions + [{
+            "symbol": proposal["symbol"],
+            "side": proposal["side"],
+            "quantity": proposal["quantity"],
+            "entry_price": proposal.get("current_price", 0.0)
+        }]
+        for pos in legs:
+            notional = pos["quantity"] * pos.get("entry_price", 0.0) # أو السعر الحالي للتبسيط
+            signed = notional if pos["side"] == "LONG" else -notional
+            gross += abs(notional)
+            idx = self._asset_index.get(pos["symbol"])
+            if idx is None:
+                uncovered[pos["symbol"]] = uncovered.get(pos["symbol"], 0.0) + abs(notional)
+            else:
+                x[idx] += signed
+        return x, gross, uncovered
+
+    def evaluate(self, positions: List[Dict[str, Any]], equity: float,
+                 proposal: Optional[Dict[str, Any]] = None) -> Tuple[np.ndarray, List[str], Dict[str, float]]:
+        """
+        أثر كل السيناريوهات على رأس المال دفعة واحدة.
+        تعيد (scenario_equity, names, uncovered) بترتيب: سيناريوهات الكوارث ثم المصفوفة.
+        """
+        x, gross, uncovered = self._position_arrays(positions, proposal)
+        uncovered_gross = sum(uncovered.values())
+
+        # سيناريوهات الكوارث: الحركة ضد كل مركز = -|shock| × إجمالي التعرض
+        doom_shock = np.array([abs(s.price_shock_pct) for s in self.scenarios])
+        doom_liq = np.array([s.volatility_mult for s in self.scenarios])
+        doom_pnl = -(doom_shock + self.BASE_SLIPPAGE * doom_liq) * gross
+
+        # المصفوفة: منتج مصفوفة × متجه واحد لكل السيناريوهات (على أعمدة الأصول المحتفظ بها فقط)
+        if self.shocks.shape[0]:
+            held = np.flatnonzero(x)
+            matrix_pnl = self.shocks[:, held] @ x[held] - self.BASE_SLIPPAGE * self.liquidity_mult * gross
+            if uncovered_gross:
+                # لا صدمات معروفة لهذه الأصول: أسوأ حركة في السيناريو، ضد المركز
+                matrix_pnl -= self.worst_move * uncovered_gross
+        else:
+            matrix_pnl = np.zeros(0)
+
+        scenario_equity = equity + np.concatenate([doom_pnl, matrix_pnl])
+        names = [s.name for s in self.scenarios] + self.scenario_names
+        return scenario_equity, names, uncovered
+
+    def simulate_proposal(self, proposal: Dict[str, Any], current_portfolio: Dict[str, Any],
+                          report_worst: int = 10) -> Dict[str, Any]:
         """
         تشغيل المحاكاة على الصفقة المقترحة.
         
         Args:
             proposal: {symbol, side, quantity, current_price}
             current_portfolio: {equity, positions: [...]}
+            report_worst: عدد أسوأ السيناريوهات في التقرير.
             
         Returns:
             نتيجة الاختبار (PASS/FAIL) مع تقرير التأثير.
@@ -59,108 +224,47 @@ class StressTester:
         if equity <= 0:
             return self._reject("Portfolio already insolvent")
 
-        # 1. دمج الصفقة المقترحة مع المحفظة الحالية (Virtual Portfolio)
-        # لنسأل: كيف سيبدو شكلنا بعد هذه الصفقة؟
-        simulated_positions = self._merge_proposal(proposal, current_portfolio["positions"])
-        
-        worst_case_drawdown = 0.0
-        failed_scenarios = []
-        survival_score = 100.0
-
-        # 2. حلقة التعذيب: تطبيق السيناريوهات
-        for scenario in self.scenarios:
-            simulated_equity = self._calculate_scenario_equity(
-                equity, simulated_positions, scenario, proposal["symbol"]
-            )
-            
-            drawdown_pct = (equity - simulated_equity) / equity
-            
-            # إذا كان الانهيار يتجاوز حد التصفية (مثلاً خسارة 50% من رأس المال في لحظة)
-            # أو إذا أصبح الرصيد سالباً (الإفلاس)
-            if simulated_equity <= 0 or drawdown_pct > 0.40: # 40% Max Drawdown allowed per event
-                failed_scenarios.append(f"{scenario.name} (DD: {drawdown_pct*100:.1f}%)")
-                survival_score -= 33.0 # خصم كبير من درجة النجاة
-                
-                # تحديث أسوأ حالة
-                if drawdown_pct > worst_case_drawdown:
-                    worst_case_drawdown = drawdown_pct
-
-        # 3. الحكم النهائي
-        is_safe = len(failed_scenarios) == 0
-        
+        # 1. المحفظة الافتراضية (المراكز الحالية + الصفقة المقترحة) وكل السيناريوهات دفعة واحدة
+        scenario_equity, names, uncovered = self.evaluate(current_portfolio["positions"], equity, proposal)
+        drawdown = (equity - scenario_equity) / equity
+
+        # 2. الفشل: إفلاس أو خسارة تتجاوز الحد المسموح في حدث واحد
+        failed = (scenario_equity <= 0) | (drawdown > self.MAX_EVENT_DRAWDOWN)
+        n_total = len(names)
+        n_failed = int(failed.sum())
+
+        # 3. الترتيب من الأسوأ (أكبر تراجع أولاً)
+        k = min(report_worst, n_total)
+        worst = np.argpartition(-drawdown, k - 1)[:k] if n_total > k else np.arange(n_total)
+        worst = worst[np.argsort(-drawdown[worst])]
+        failed_idx = [i for i in worst if failed[i]]
+        failed_scenarios = [f"{names[i]} (DD: {drawdown[i]*100:.1f}%)" for i in failed_idx]
+        worst_case_drawdown = max(0.0, float(drawdown[worst[0]])) if n_total else 0.0
+
+        is_safe = n_failed == 0
+        survival_score = 100.0 * (1.0 - n_failed / n_total) if n_total else 100.0
+
         result = {
             "agent": "StressTester",
             "passed": is_safe,
             "survival_score": max(0.0, round(survival_score, 1)),
             "worst_case_drawdown_pct": round(worst_case_drawdown * 100, 2),
             "failed_scenarios": failed_scenarios,
-            "forensic_audit": f"Tested {len(self.scenarios)} extreme scenarios."
+            "failed_count": n_failed,
+            # تعرض بلا سيناريوهات خاصة به (صُدم بأسوأ حركة في كل سيناريو)
+            "uncovered_notional": round(sum(uncovered.values()), 2),
+            "uncovered_symbols": sorted(uncovered),
+            "worst_scenarios": [
+                {"name": names[i], "drawdown_pct": round(float(drawdown[i]) * 100, 2)} for i in worst
+            ],
+            "forensic_audit": f"Tested {n_total} extreme scenarios."
         }
         
         if not is_safe:
-            self.logger.warning(f"STRESS_FAIL: Proposal {proposal['side']} {proposal['symbol']} rejected. Failed: {failed_scenarios}")
+            self.logger.warning(f"STRESS_FAIL: Proposal {proposal['side']} {proposal['symbol']} rejected. "
+                                f"Failed {n_failed}/{n_total}: {failed_scenarios[:3]}")
 
         return result
 
-    def _calculate_scenario_equity(self, 
-                                   start_equity: float, 
-                                   positions: List[Dict[str, Any]], 
-                                   scenario: DoomScenario,
-                                   target_symbol: str) -> float:
-        """
-        حساب قيمة رأس المال في ظل السيناريو المحدد.
-        """
-        pnl_shock = 0.0
-        
-        for pos in positions:
-            symbol = pos["symbol"]
-            side = pos["side"] # LONG or SHORT
-            size = pos["quantity"]
-            price = pos["entry_price"] # أو السعر الحالي للتبسيط
-            
-            # تحديد حركة السعر بناءً على السيناريو
-            # في سيناريوهات "كسر الارتباط"، كل شيء ينهار معاً
-            # في السيناريوهات العادية، قد نستخدم بيتا (Beta) للأصل، لكن هنا نفترض الأسوأ (صدمة كاملة)
-            
-            shock = scenario.price_shock_pct
-            
-            # إذا كان السيناريو "انهيار ارتباط"، فالأصول التي نعتبرها تحوطاً (Hedges) قد تفشل وتتحرك ضدنا
-            # للتبسيط والتحوط الأقصى: نفترض أن السعر يتحرك *دائماً* ضد مركزنا في اختبار الإجهاد
-            if side == "LONG":
-                # السعر ينخفض
-                price_move = -abs(shock) 
-            else: # SHORT
-                # السعر يرتفع
-                price_move = abs(shock)
-            
-            # تطبيق مضاعف التقلب على الانزلاق (Slippage)
-            # تكلفة الخروج تزيد في الأزمات
-            liquidity_cost = (price * 0.001) * scenario.volatility_mult * size # 0.1% base slippage
-            
-            # حساب الربح/الخسارة
-            # PnL = Size * Price * %Move
-            position_pnl = (size * price * price_move) - liquidity_cost
-            pnl_shock += position_pnl
-
-        return start_equity + pnl_shock
-
-    def _merge_proposal(self, proposal: Dict[str, Any], current_positions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """
-        إنشاء قائمة مراكز افتراضية (Deep Copy + Proposal).
-        """
-        # نسخ القائمة لتجنب تعديل البيانات الأصلية (Side Effect Free)
-        simulated = [p.copy() for p in current_positions]
-        
-        # إضافة المقترح
-        # (في الواقع يجب دمج المراكز المتشابهة، لكن الإضافة كعنصر جديد تكفي للاختبار)
-        simulated.append({
-            "symbol": proposal["symbol"],
-            "side": proposal["side"],
-            "quantity": proposal["quantity"],
-            "entry_price": proposal.get("current_price", 0.0)
-        })
-        
-        return simulated
-
     def _reject(self, reason: str) -> Dict[str, Any]:
-        return {"passed": False, "survival_score": 0.0, "reason": reason}
\ No newline at end of file
+        return {"passed": False, "survival_score": 0.0, "reason": reason}
@@ -0,0 +1,366 @@
+# Portfolio Tail-Risk Meter
+
+# -*- coding: utf-8 -*-
+# ALPHA SOVEREIGN - VaR / CVaR SERVICE
+# =================================================================
+# Component Name: brain/agents/risk/var_service.py
+# Core Responsibility: قيمة المخاطرة (VaR) والعجز المتوقع (CVaR) للمحفظة بثلاث طرق: تاريخية، معلمية، مونت كارلو.
+# Design Pattern: Scenario P&L Vectors + Incremental Delta Updates + Composition Cache
+# Forensic Impact: كل رقم مخاطرة يحمل طريقته وعدد المشاهدات ونسخة البيانات التي بني عليها،
+#                  فيمكن إعادة إنتاج قرار الرفض/القبول قبل التداول لاحقاً بدقة.
+# =================================================================
+#
+# التاريخي ومونت كارلو: متجه أرباح/خسائر لكل سيناريو P = R[:, held] @ x[held].
+#   تغير مركز واحد j بمقدار Δ: P += Δ R[:, j]   (O(T) بدلاً من O(T × N)).
+# المعلمي: σ² = xᵀ Σ x مع الاحتفاظ بـ Σx.
+#   تغير مركز واحد: σ² += 2Δ (Σx)_j + Δ² Σ_jj ،  Σx += Δ Σ[:, j]   (O(N)).
+# التعرض خارج عالم البيانات (uncovered) لا يهمل: يفترض أنه يتحرك ضدنا بأسوأ حركة أصل
+#   في كل سيناريو (P -= |u| · max_j |R[t, j]|)، وفي المعلمي σ += |u| · max_j σ_j (ارتباط تام).
+
+import logging
+import threading
+from collections import OrderedDict
+from statistics import NormalDist
+from typing import Any, Dict, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    from sim_lab.monte_carlo.probability_engine import ProbabilityEngine
+    MONTE_CARLO_AVAILABLE = True
+except ImportError:
+    MONTE_CARLO_AVAILABLE = False
+
+logger = logging.getLogger("Alpha.Brain.Risk.VaR")
+
+METHODS = ("historical", "parametric", "monte_carlo")
+
+
+def tail_metrics(pnl: np.ndarray, confidence: float) -> Tuple[float, float]:
+    """(VaR, CVaR) كخسائر موجبة بالدولار من متجه أرباح/خسائر السيناريوهات."""
+    n = pnl.shape[0]
+    k = int(np.floor((1.0 - confidence) * n))
+    k = min(max(k, 0), n - 1)
+    # partition: O(n) بدلاً من الفرز الكامل
+    part = np.partition(pnl, k)
+    var = -part[k]
+    cvar = -part[:k + 1].mean()
+    return float(max(var, 0.0)), float(max(cvar, 0.0))
+
+# =================================================================
+# 1. BOOKS (حالة المحفظة الحية لكل طريقة)
+# =================================================================
+
+class _ScenarioBook:
+    """متجه تعرض + متجه أرباح/خسائر السيناريوهات (التاريخي ومونت كارلو)."""
+
+    def __init__(self, symbols: Sequence[str], scenarios: np.ndarray):
+        self.index = {s: i for i, s in enumerate(symbols)}
+        # ترتيب الأعمدة: عمود أصل واحد متصل لتحديثات Δ
+        self.scenarios = np.asfortranarray(scenarios, dtype=np.float64)
+        # أسوأ حركة مطلقة في كل سيناريو (تطبق على التعرض غير المغطى)
+        self.worst_move = (np.abs(self.scenarios).max(axis=1) if self.scenarios.shape[1]
+                           else np.zeros(self.scenarios.shape[0]))
+        self.x = np.zeros(len(symbols))
+        self.pnl = np.zeros(self.scenarios.shape[0])
+        self.uncovered: Dict[str, float] = {}
+
+    def load(self, exposures: Mapping[str, float]):
+        self.x[:] = 0.0
+        self.uncovered = {}
+        for symbol, value in exposures.items():
+            i = self.index.get(symbol)
+            if i is None:
+                self.uncovered[symbol] = value
+            else:
+                self.x[i] += value
+        held = np.flatnonzero(self.x)
+        self.pnl = self.scenarios[:, held] @ self.x[held] if held.size else np.zeros(self.scenarios.shape[0])
+
+    def delta_pnl(self, symbol: str, delta: float) -> np.ndarray:
+        i = self.index.get(symbol)
+        if i is None:
+            return self.pnl
+        return self.pnl + delta * self.scenarios[:, i]
+
+    def apply(self, symbol: str, delta: float):
+        i = self.index.get(symbol)
+        if i is None:
+            _shift_uncovered(self.uncovered, symbol, delta)
+            return
+        self.pnl += delta * self.scenarios[:, i]
+        self.x[i] += delta
+
+    def stressed_pnl(self, pnl: np.ndarray, uncovered_gross: float) -> np.ndarray:
+        return pnl - uncovered_gross * self.worst_move if uncovered_gross else pnl
+
+
+class _GaussianBook:
+    """متجه تعرض + Σx + xᵀΣx (المعلمي)."""
+
+    def __init__(self, symbols: Sequence[str], cov: np.ndarray):
+        self.index = {s: i for i, s in enumerate(symbols)}
+        self.cov = np.asarray(cov, dtype=np.float64)
+        # أعلى تقلب بين الأصول المغطاة (يطبق على التعرض غير المغطى)
+        self.max_sigma = float(np.sqrt(np.max(np.diag(self.cov)))) if self.cov.size else 0.0
+        self.x = np.zeros(len(symbols))
+        self.sx = np.zeros(len(symbols))
+        self.variance = 0.0
+        self.uncovered: Dict[str, float] = {}
+
+    def load(self, exposures: Mapping[str, float]):
+        self.x[:] = 0.0
+        self.uncovered = {}
+        for symbol, value in exposures.items():
+            i = self.index.get(symbol)
+            if i is None:
+                self.uncovered[symbol] = value
+            else:
+                self.x[i] += value
+        self.sx = self.cov @ self.x
+        self.variance = float(self.x @ self.sx)
+
+    def delta_variance(self, symbol: str, delta: float) -> float:
+        i = self.index.get(symbol)
+        if i is None:
+            return self.variance
+        return self.variance + 2.0 * delta * self.sx[i] + delta * delta * self.cov[i, i]
+
+    def apply(self, symbol: str, delta: float):
+        i = self.index.get(symbol)
+        if i is None:
+            _shift_uncovered(self.uncovered, symbol, delta)
+            return
+        self.variance += 2.0 * delta * self.sx[i] + delta * delta * self.cov[i, i]
+        self.sx += delta * self.cov[:, i]
+        self.x[i] += delta
+
+
+def _shift_uncovered(uncovered: Dict[str, float], symbol: str, delta: float):
+    value = uncovered.get(symbol, 0.0) + delta
+    if value:
+        uncovered[symbol] = value
+    else:
+        uncovered.pop(symbol, None)
+
+# =================================================================
+# 2. SERVICE (الخدمة)
+# =================================================================
+
+class VaRService:
+    """
+    خدمة VaR/CVaR للمحفظة الحية ولفحوص ما قبل التداول.
+    البيانات الثقيلة (العوائد التاريخية، سيناريوهات مونت كارلو) تحمل مرة واحدة؛
+    كل استعلام بعدها عمليات متجهة على أعمدة الأصول المحتفظ بها فقط.
+    """
+
+    def __init__(self,
+                 rollups: Any = None,
+                 covariance: Any = None,
+                 probability_engine: Any = None,
+                 confidence: float = 0.99,
+                 horizon_bars: int = 1,
+                 interval: str = "1h",
+                 cache_size: int = 256):
+        """
+        Args:
+            rollups: OHLCVRollupBuilder (مصدر شموع البحيرة الباردة عبر query_candles).
+            covariance: EwmaCovarianceEngine مشترك (للمعلمي ومونت كارلو).
+            probability_engine: ProbabilityEngine لتوليد مسارات مونت كارلو (ينشأ افتراضياً).
+            confidence: مستوى الثقة (0.99 = أسوأ 1%).
+            horizon_bars: أفق المخاطرة بعدد الشموع.
+            interval: إطار الشموع التاريخية (يجب أن يطابق شموع محرك التغاير).
+            cache_size: عدد تركيبات المحافظ المخزنة نتائجها.
+        """
+        self.rollups = rollups
+        self.covariance = covariance
+        if probability_engine is None and MONTE_CARLO_AVAILABLE:
+            probability_engine = ProbabilityEngine(num_simulations=10000)
+        self.probability_engine = probability_engine
+        self.confidence = confidence
+        self.horizon_bars = max(1, horizon_bars)
+        self.interval = interval
+        self.cache_size = cache_size
+
+        self._books: Dict[str, Any] = {}
+        self._versions: Dict[str, Any] = {m: None for m in METHODS}
+        self._exposures: Dict[str, float] = {}
+        self._cache: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        self._history_loads = 0
+        self._lock = threading.RLock()
+
+    # --- Data Sources ---
+
+    def load_history(self, symbols: Sequence[str], start_ts: Optional[float] = None,
+                     end_ts: Optional[float] = None) -> int:
+        """
+        تحميل إغلاقات البحيرة الباردة وبناء مصفوفة عوائد الأفق (نوافذ متداخلة).
+        تعيد عدد السيناريوهات التاريخية.
+        """
+        closes = {}
+        for symbol in symbols:
+            bars = self.rollups.query_candles(symbol, self.interval, start_ts, end_ts)
+            if not bars.empty:
+                closes[symbol] = bars["close"]
+        if not closes:
+            logger.warning("VAR_HISTORY_EMPTY: لا توجد شموع في البحيرة للرموز المطلوبة.")
+            return 0
+        # محاذاة على الزمن: الشموع الناقصة تعامل كسعر ثابت
+        frame = pd.DataFrame(closes).sort_index().ffill().dropna()
+        log_returns = np.diff(np.log(frame.to_numpy(dtype=np.float64)), axis=0)
+        return self.set_history(list(frame.columns), log_returns)
+
+    def set_history(self, symbols: Sequence[str], log_returns: np.ndarray) -> int:
+        """تعيين عوائد تاريخية لوغاريتمية (T × N) لكل شمعة مباشرة."""
+        log_returns = np.nan_to_num(np.asarray(log_returns, dtype=np.float64))
+        h = self.horizon_bars
+        cum = np.vstack([np.zeros((1, log_returns.shape[1])), np.cumsum(log_returns, axis=0)])
+        scenarios = np.expm1(cum[h:] - cum[:-h])
+        with self._lock:
+            self._history_loads += 1
+            self._install("historical", _ScenarioBook(symbols, scenarios), ("hist", self._history_loads))
+        logger.info(f"VAR_HISTORY_READY: {len(scenarios)} scenarios x {len(symbols)} assets (h={h}).")
+        return len(scenarios)
+
+    def _refresh_model(self):
+        """إعادة بناء المعلمي ومونت كارلو فقط عند نشر لقطة تغاير جديدة."""
+        snapshot = self.covariance.latest() if self.covariance is not None else None
+        if snapshot is None:
+            return
+        version = ("cov", snapshot.n_updates, snapshot.timestamp)
+        if self._versions["parametric"] == version:
+            return
+        h = self.horizon_bars
+        self._install("parametric", _GaussianBook(snapshot.symbols, np.array(snapshot.cov) * h), version)
+        if self.probability_engine is not None:
+            scenarios = self.probability_engine.generate_correlated_returns(np.array(snapshot.cov), steps=h)
+            self._install("monte_carlo", _ScenarioBook(snapshot.symbols, scenarios), version)
+
+    def _install(self, method: str, book: Any, version: Any):
+        book.load(self._exposures)
+        self._books[method] = book
+        self._versions[method] = version
+
+    # --- Live Portfolio ---
+
+    def set_portfolio(self, exposures: Mapping[str, float]):
+        """تحميل المحفظة الحية كاملة {symbol: تعرض موقّع بالدولار} (إعادة حساب كاملة)."""
+        with self._lock:
+            self._exposures = {s: float(v) for s, v in exposures.items() if v}
+            self._refresh_model()
+            for book in self._books.values():
+                book.load(self._exposures)
+
+    def update_position(self, symbol: str, notional: float):
+        """تغير مركز واحد: تحديث تزايدي لكل الطرق (O(T) تاريخي/مونت كارلو، O(N) معلمي)."""
+        with self._lock:
+            self._refresh_model()
+            delta = float(notional) - self._exposures.get(symbol, 0.0)
+            if delta == 0.0:
+                return
+            if notional:
+                self._exposures[symbol] = float(notional)
+            else:
+                self._exposures.pop(symbol, None)
+            for book in self._books.values():
+                book.apply(symbol, delta)
+
+    def _measure(self, method: str, book: Any, pnl: Optional[np.ndarray] = None,
+                 variance: Optional[float] = None,
+                 uncovered: Optional[Mapping[str, float]] = None) -> Dict[str, Any]:
+        """
+        uncovered: التعرض خارج عالم البيانات (افتراضياً تعرض الدفتر)؛ يقاس بالبديل المحافظ
+        (أسوأ حركة أصل) بدلاً من إهماله، فالرمز المجهول لا يخفض المخاطرة أبداً.
+        """
+        uncovered = book.uncovered if uncovered is None else uncovered
+        uncovered_gross = float(sum(abs(v) for v in uncovered.values()))
+        if method == "parametric":
+            sigma = float(np.sqrt(max(book.variance if variance is None else variance, 0.0)))
+            sigma += uncovered_gross * book.max_sigma
+            z = NormalDist().inv_cdf(self.confidence)
+            var = z * sigma
+            cvar = sigma * NormalDist().pdf(z) / (1.0 - self.confidence)
+            observations = None
+        else:
+            pnl = book.stressed_pnl(book.pnl if pnl is None else pnl, uncovered_gross)
+            var, cvar = tail_metrics(pnl, self.confidence)
+            observations = int(book.scenarios.shape[0])
+        return {
+            "var": round(var, 2),
+            "cvar": round(cvar, 2),
+            "observations": observations,
+            "uncovered_symbols": sorted(uncovered),
+            "uncovered_notional": round(uncovered_gross, 2),
+        }
+
+    def live_var(self, methods: Sequence[str] = METHODS) -> Dict[str, Any]:
+        """VaR/CVaR للمحفظة الحية من الحالة التزايدية (بدون إعادة حساب)."""
+        with self._lock:
+            self._refresh_model()
+            return self._report({m: self._measure(m, self._books[m]) for m in methods if m in self._books})
+
+    def what_if(self, symbol: str, delta_notional: float, methods: Sequence[str] = METHODS) -> Dict[str, Any]:
+        """
+        VaR/CVaR بعد صفقة مقترحة (فحص ما قبل التداول) دون تعديل الحالة الحية.
+        رمز خارج عالم البيانات يقاس بالبديل المحافظ (انظر _measure) ويظهر في uncovered_symbols.
+        """
+        with self._lock:
+            self._refresh_model()
+            results = {}
+            for m in methods:
+                book = self._books.get(m)
+                if book is None:
+                    continue
+                uncovered = None
+                if symbol not in book.index:
+                    uncovered = dict(book.uncovered)
+                    _shift_uncovered(uncovered, symbol, delta_notional)
+                if m == "parametric":
+                    results[m] = self._measure(m, book, variance=book.delta_variance(symbol, delta_notional),
+                                               uncovered=uncovered)
+                else:
+                    results[m] = self._measure(m, book, pnl=book.delta_pnl(symbol, delta_notional),
+                                               uncovered=uncovered)
+            return self._report(results)
+
+    # --- Arbitrary Compositions (مخزنة) ---
+
+    def portfolio_var(self, exposures: Mapping[str, float], methods: Sequence[str] = METHODS) -> Dict[str, Any]:
+        """
+        VaR/CVaR لأي تركيبة محفظة؛ النتائج مخزنة حسب التركيبة ونسخة البيانات.
+        """
+        with self._lock:
+            self._refresh_model()
+            composition = tuple(sorted((s, round(float(v), 2)) for s, v in exposures.items() if v))
+            key = (composition, tuple(methods), tuple(self._versions[m] for m in methods),
+                   self.confidence, self.horizon_bars)
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+
+            results = {}
+            for m in methods:
+                live = self._books.get(m)
+                if live is None:
+                    continue
+                book = (_GaussianBook(list(live.index), live.cov) if m == "parametric"
+                        else _ScenarioBook(list(live.index), live.scenarios))
+                book.load(dict(composition))
+                results[m] = self._measure(m, book)
+
+            report = self._report(results)
+            self._cache[key] = report
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return report
+
+    def _report(self, results: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "agent": "VaRService",
+            "confidence": self.confidence,
+            "horizon_bars": self.horizon_bars,
+            "interval": self.interval,
+            "methods": results,
+        }
@@ -11,30 +11,63 @@ Forensic Features:
   2. **Error Containment Shield**: درع برمجي يمنع أخطاء العميل من إيقاف النظام.
   3. **Performance Metrics**: قياس زمن الاستجابة لكل عميل لتحديد "الحلقات الأضعف".
   4. **Context Management**: إدارة ذاكرة قصيرة المدى مدمجة.
+  5. **Async-Native Thinking**: العملاء غير المتزامنة تنفذ على حلقة الأحداث مباشرة،
+     والمتزامنة تنقل إلى مجمع خيوط محدود حتى لا تجمد الحلقة.
+  6. **Per-Agent Concurrency Cap**: حد أعلى لعدد عمليات التفكير المتزامنة لكل عميل، مع تمرير الإلغاء.
 
 Author: Alpha Architect (AI)
 Status: PRODUCTION READY
 """
 
+import asyncio
 import logging
+import threading
 import time
 import uuid
 import traceback
 from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, Optional, List
 
 # استيراد القوانين والنواة
 from alpha_project.core.interfaces import IReasoningUnit, ComponentStatus
 from alpha_project.core.registry import registry
 
+# مفتاح السياق الذي يحمل إشارة الإلغاء للعملاء المتزامنة (threading.Event)
+CANCEL_EVENT_KEY = "cancel_event"
+
+# مجمع الخيوط المشترك لنقل العملاء المتزامنة خارج حلقة الأحداث
+_OFFLOAD_MAX_WORKERS = 16
+_offload_pool: Optional[ThreadPoolExecutor] = None
+_offload_lock = threading.Lock()
+
+
+def _get_offload_pool() -> ThreadPoolExecutor:
+    global _offload_pool
+    if _offload_pool is None:
+        with _offload_lock:
+            if _offload_pool is None:
+                _offload_pool = ThreadPoolExecutor(max_workers=_OFFLOAD_MAX_WORKERS,
+                                                   thread_name_prefix="alpha-think")
+    return _offload_pool
+
+
 class BaseAgent(IReasoningUnit):
     """
     العميل الأساسي (Base Agent).
     يجب على أي عميل ذكاء (Risk, Sentiment, Strategy) أن يرث من هذا الكلاس.
     
     يوفر: Logging, Error Handling, Config Management, Health Checks.
+
+    التفكير غير المتزامن:
+      - العميل الذي يعتمد على I/O غير متزامن يكتب `_execute_reasoning_async` (coroutine).
+      - غير ذلك، تنقل `_execute_reasoning` تلقائياً إلى مجمع خيوط محدود.
+      - `MAX_CONCURRENCY` (أو `max_concurrency` في الإعدادات) يحد عدد الطلبات المتزامنة لكل عميل.
     """
 
+    # أقصى عدد عمليات think_async متزامنة لهذا العميل
+    MAX_CONCURRENCY: int = 4
+
     def __init__(self, name: str, category: str = "brain"):
         self._name = name
         self._category = category
@@ -45,6 +78,10 @@ class BaseAgent(IReasoningUnit):
         self._status = ComponentStatus.STARTING
         self._config: Dict[str, Any] = {}
         self._memory: List[Dict] = [] # ذاكرة قصيرة المدى (Short-term context)
+
+        # بوابة التزامن (تنشأ كسولاً داخل حلقة الأحداث التي تستخدمها)
+        self._think_gate: Optional[asyncio.Semaphore] = None
+        self._gate_loop: Optional[asyncio.AbstractEventLoop] = None
         
         self._logger.info(f"🧬 Agent Born: {self.name} (ID: {self._id})")
 
@@ -112,35 +149,54 @@ class BaseAgent(IReasoningUnit):
             # 2. استدعاء المنطق الفعلي (الذي يكتبه المبرمج)
             response = self._execute_reasoning(prompt, current_context)
             
-            # 3. حساب الأداء
-            latency = round(time.time() - start_time, 3)
-            
-            # 4. التدقيق الجنائي للمخرجات
-            self._logger.info(f"[{correlation_id}] 💡 Insight Generated in {latency}s")
-            
-            # تحديث الحالة إذا كانت متدهورة
-            if self._status == ComponentStatus.DEGRADED:
-                self._status = ComponentStatus.HEALTHY
-                
+            # 3+4. حساب الأداء والتدقيق الجنائي للمخرجات
+            self._record_insight(correlation_id, start_time)
             return response
 
         except Exception as e:
             # 5. احتواء الكارثة (Disaster Containment)
-            self._status = ComponentStatus.DEGRADED
-            error_msg = f"Error in {self.name}: {str(e)}"
-            self._logger.error(f"[{correlation_id}] 🚨 THINKING FAILURE: {error_msg}")
-            self._logger.debug(traceback.format_exc())
-            
-            # إعادة رد آمن (Fallback) بدلاً من تحطيم الواجهة
-            return self._get_fallback_response(prompt, error_msg)
+            return self._contain_failure(prompt, correlation_id, e)
 
     async def think_async(self, prompt: str, context: Optional[Dict] = None) -> str:
         """
-        النسخة غير المتزامنة (للمستقبل وللواجهات الحديثة).
-        افتراضياً، تستدعي النسخة المتزامنة ما لم يقم الابن بتعديلها.
+        الغلاف الآمن غير المتزامن.
+        لا يحجب حلقة الأحداث أبداً: العملاء المتزامنة تنفذ في مجمع الخيوط المحدود.
+        الإلغاء (CancelledError) يمرر للمستدعي ولا يعامل كفشل.
         """
-        # في المستقبل: يمكن استخدام ThreadPoolExecutor هنا
-        return self.think(prompt, context)
+        start_time = time.time()
+        correlation_id = str(uuid.uuid4())[:6]
+        self._logger.debug(f"[{correlation_id}] 🤔 Thinking (async) about: {prompt[:50]}...")
+
+        async with self._get_think_gate():
+            try:
+                response = await self._execute_reasoning_async(prompt, context or {})
+                self._record_insight(correlation_id, start_time)
+                return response
+
+            except asyncio.CancelledError:
+                self._logger.info(f"[{correlation_id}] ✋ THINK_CANCELLED after {round(time.time() - start_time, 3)}s")
+                raise
+
+            except Exception as e:
+                return self._contain_failure(prompt, correlation_id, e)
+
+    async def _execute_reasoning_async(self, prompt: str, context: Dict) -> str:
+        """
+        نقطة التنفيذ غير المتزامنة. أعد تعريفها في العملاء ذات I/O غير المتزامن.
+        افتراضياً: تشغيل `_execute_reasoning` في مجمع الخيوط.
+        الخيط الجاري لا يمكن إيقافه قسراً؛ عند الإلغاء تضبط إشارة `context[CANCEL_EVENT_KEY]`
+        ليتوقف العميل المتعاون عند أول فحص، ويتجاهل رده إن أكمل.
+        """
+        cancel_event = threading.Event()
+        offload_context = dict(context)
+        offload_context[CANCEL_EVENT_KEY] = cancel_event
+
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(_get_offload_pool(), self._execute_reasoning, prompt, offload_context)
+        except asyncio.CancelledError:
+            cancel_event.set()
+            raise
 
     # =========================================================================
     # 3. Abstract Methods (ما يجب على الابن كتابته)
@@ -158,6 +214,32 @@ class BaseAgent(IReasoningUnit):
     # 4. Helper Methods (أدوات مساعدة)
     # =========================================================================
 
+    def _get_think_gate(self) -> asyncio.Semaphore:
+        """بوابة التزامن الخاصة بالعميل (تعاد إنشاؤها إذا تغيرت حلقة الأحداث)."""
+        loop = asyncio.get_running_loop()
+        if self._think_gate is None or self._gate_loop is not loop:
+            limit = int(self._config.get("max_concurrency", self.MAX_CONCURRENCY))
+            self._think_gate = asyncio.Semaphore(max(1, limit))
+            self._gate_loop = loop
+        return self._think_gate
+
+    def _record_insight(self, correlation_id: str, start_time: float):
+        """تسجيل زمن الاستجابة واستعادة الصحة بعد نجاح التفكير."""
+        latency = round(time.time() - start_time, 3)
+        self._logger.info(f"[{correlation_id}] 💡 Insight Generated in {latency}s")
+
+        # تحديث الحالة إذا كانت متدهورة
+        if self._status == ComponentStatus.DEGRADED:
+            self._status = ComponentStatus.HEALTHY
+
+    def _contain_failure(self, prompt: str, correlation_id: str, e: Exception) -> str:
+        """احتواء الفشل: تدهور الحالة، تسجيل الأثر، وإعادة رد آمن بدلاً من تحطيم الواجهة."""
+        self._status = ComponentStatus.DEGRADED
+        error_msg = f"Error in {self.name}: {str(e)}"
+        self._logger.error(f"[{correlation_id}] 🚨 THINKING FAILURE: {error_msg}")
+        self._logger.debug(traceback.format_exc())
+        return self._get_fallback_response(prompt, error_msg)
+
     def _validate_config(self, config: Dict) -> bool:
         """
         دالة اختيارية للتحقق من الإعدادات.
@@ -8,13 +8,16 @@ Status: PRODUCTION (Smart Routing Only - No Manual Hacks)
 """
 
 import logging
+import threading
 import uuid
 import time
-from typing import Optional, Dict, List, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FutureTimeout
+from typing import Optional, Dict, List, Any, Tuple
 
 # استيراد البنية التحتية
 from alpha_project.core.registry import registry
 from alpha_project.ui.core.config_provider import config as sys_config
+from alpha_project.brain.inference.response_cache import ResponseCache
 
 logger = logging.getLogger("Alpha.Brain.Router")
 
@@ -27,8 +30,46 @@ class BrainRouter:
     def __init__(self):
         # تحميل استراتيجية التوجيه (الذكية دائماً)
         self.strategy = "smart"
+
+        # ذاكرة الردود (الطلبات المتكررة لا تدفع زمن وتكلفة استدعاء جديد)
+        self.cache: Optional[ResponseCache] = None
+        if sys_config.get("brain.response_cache.enabled", True):
+            self.cache = ResponseCache(
+                ttl_s=float(sys_config.get("brain.response_cache.ttl_s", 30.0)),
+                max_entries=int(sys_config.get("brain.response_cache.max_entries", 512)),
+                similarity_threshold=float(sys_config.get("brain.response_cache.similarity_threshold", 0.95)),
+                max_semantic_entries=int(sys_config.get("brain.response_cache.max_semantic_entries", 2048))
+            )
+
+        # وضع السباق: إطلاق أفضل K مرشحين معاً وأخذ أول رد صالح
+        self.racing_enabled = bool(sys_config.get("brain.racing.enabled", False))
+        self.race_top_k = int(sys_config.get("brain.racing.top_k", 2))
+        self.race_max_paid = int(sys_config.get("brain.racing.max_paid_calls", 1))
+        self.race_timeout_s = float(sys_config.get("brain.racing.timeout_s", 60.0))
+        self._race_pool: Optional[ThreadPoolExecutor] = None  # ينشأ عند أول سباق فقط
+        self._race_pool_lock = threading.Lock()
+
+        # إحصاءات زمن الاستجابة لكل مرشح (تغذي ترتيب _get_candidates)
+        self.latency_stats: Dict[str, Dict[str, float]] = {}
+        # المرشح الفاشل يؤخر لفترة تتضاعف مع الفشل المتتالي (مستقلة عن زمنه)
+        self.failure_cooldown_s = float(sys_config.get("brain.failover.cooldown_s", 30.0))
+        self.failure_cooldown_max_s = float(sys_config.get("brain.failover.cooldown_max_s", 600.0))
+        self._stats_lock = threading.Lock()
         logger.info(f"🧠 BrainRouter initialized. Strategy: {self.strategy.upper()}")
 
+    def enable_semantic_cache(self, embed_fn, vector_index=None):
+        """
+        تفعيل طبقة التشابه الدلالي في ذاكرة الردود.
+        vector_index الافتراضي هو الفهرس المتجهي المحلي (بدون خادم).
+        """
+        if self.cache is None:
+            return
+        if vector_index is None:
+            from data.storage.vector.embedded_index import EmbeddedVectorIndex
+            vector_index = EmbeddedVectorIndex()
+        self.cache.enable_semantic(embed_fn, vector_index)
+        logger.info("🧠 Semantic response cache enabled.")
+
     def route_request(self, prompt: str, context: Optional[Dict] = None) -> str:
         """
         نقطة الدخول الرئيسية لتوجيه الطلبات.
@@ -45,6 +86,15 @@ class BrainRouter:
         task_type = self._classify_intent(prompt, context)
         logger.info(f"[{request_id}] 📡 Incoming Request. Classified as: {task_type.upper()}")
 
+        # فحص ذاكرة الردود قبل أي استدعاء لنموذج
+        use_cache = self.cache is not None and not context.get("no_cache")
+        if use_cache:
+            cached = self.cache.get(prompt, context, task_type)
+            if cached is not None:
+                logger.info(f"[{request_id}] ♻️ Cache hit. Served in {round(time.time() - start_time, 4)}s "
+                            f"(hit rate {self.cache.hit_rate():.1%}).")
+                return cached
+
         # ---------------------------------------------------------
         # المرحلة 2: اختيار المرشحين (Selection Phase)
         # ---------------------------------------------------------
@@ -56,42 +106,40 @@ class BrainRouter:
             candidates = self._get_candidates("general")
 
         # ---------------------------------------------------------
-        # المرحلة 3: حلقة التنفيذ والتعافي (Execution & Failover Loop)
+        # المرحلة 3أ: السباق (Racing) - اختياري
         # ---------------------------------------------------------
         last_error = ""
 
+        if self.racing_enabled and len(candidates) > 1:
+            response, raced, last_error = self._race(candidates, prompt, context, task_type, request_id)
+            if response is not None:
+                duration = round(time.time() - start_time, 2)
+                logger.info(f"[{request_id}] 🏁 Race won in {duration}s.")
+                if use_cache:
+                    self.cache.put(prompt, context, task_type, response)
+                return response
+            # من خسر السباق لا يعاد تجربته في حلقة التعافي
+            candidates = [c for c in candidates if c not in raced]
+
+        # ---------------------------------------------------------
+        # المرحلة 3: حلقة التنفيذ والتعافي (Execution & Failover Loop)
+        # ---------------------------------------------------------
         for idx, candidate in enumerate(candidates):
-            provider = candidate.get("provider") # local | openrouter
             model_id = candidate.get("id")       # اسم الموديل المحدد
-            
-            # تحويل المزود إلى اسم العميل البرمجي (Mapping)
-            agent_name = self._map_provider_to_agent(provider)
+            agent_name = self._map_provider_to_agent(candidate.get("provider"))
             
             logger.info(f"[{request_id}] 👉 Attempt {idx+1}/{len(candidates)}: Routing to {agent_name} ({model_id})")
 
             try:
-                # أ) التحقق من وجود العميل (Health Check)
-                agent = registry.get(agent_name)
-                if not agent:
-                    logger.warning(f"[{request_id}] ⚠️ Agent '{agent_name}' not loaded/found. Skipping.")
+                response = self._invoke_candidate(candidate, prompt, context, task_type, request_id)
+                if response is None:
                     continue
 
-                # ب) تجهيز سياق التنفيذ (Context Injection)
-                execution_context = context.copy()
-                execution_context["target_model"] = model_id
-                execution_context["mode"] = task_type
-                execution_context["request_id"] = request_id
-
-                # ج) التنفيذ الفعلي (The Thinking Process)
-                response = agent.think(prompt, execution_context)
-
-                # د) التحقق من جودة الرد (Quality Assurance)
-                if self._validate_response(response):
-                    duration = round(time.time() - start_time, 2)
-                    logger.info(f"[{request_id}] ✅ Success via {agent_name} in {duration}s.")
-                    return response
-                else:
-                    raise ValueError(f"Empty or invalid response from {agent_name}")
+                duration = round(time.time() - start_time, 2)
+                logger.info(f"[{request_id}] ✅ Success via {agent_name} in {duration}s.")
+                if use_cache:
+                    self.cache.put(prompt, context, task_type, response)
+                return response
 
             except Exception as e:
                 # هـ) تسجيل الفشل والمحاولة مع التالي (Failover)
@@ -105,6 +153,170 @@ class BrainRouter:
         logger.critical(f"[{request_id}] 💀 ALL SYSTEMS FAILED. Last error: {last_error}")
         return f"⚠️ **System Critical**: Unable to process request. All intelligence units failed.\nError: {last_error}"
 
+    # =========================================================================
+    # Execution (التنفيذ والسباق)
+    # =========================================================================
+
+    def _invoke_candidate(self, candidate: Dict, prompt: str, context: Dict,
+                          task_type: str, request_id: str,
+                          race_over: Optional[threading.Event] = None) -> Optional[str]:
+        """
+        استدعاء مرشح واحد وقياس زمنه.
+        race_over: في السباق، إن حسم قبل أن يبدأ هذا المرشح فعلاً فلا يرسل طلبه.
+        Returns: الرد الصالح، أو None إذا لم يكن العميل محملاً (أو انتهى السباق). يرفع استثناء عند الفشل.
+        """
+        if race_over is not None and race_over.is_set():
+            return None
+
+        model_id = candidate.get("id")
+        agent_name = self._map_provider_to_agent(candidate.get("provider"))
+
+        # أ) التحقق من وجود العميل (Health Check)
+        agent = registry.get(agent_name)
+        if not agent:
+            logger.warning(f"[{request_id}] ⚠️ Agent '{agent_name}' not loaded/found. Skipping.")
+            return None
+
+        # ب) تجهيز سياق التنفيذ (Context Injection)
+        execution_context = context.copy()
+        execution_context["target_model"] = model_id
+        execution_context["mode"] = task_type
+        execution_context["request_id"] = request_id
+
+        # ج) التنفيذ الفعلي (The Thinking Process)
+        t0 = time.perf_counter()
+        try:
+            response = agent.think(prompt, execution_context)
+        except Exception:
+            self._record_outcome(candidate, time.perf_counter() - t0, ok=False)
+            raise
+
+        # د) التحقق من جودة الرد (Quality Assurance)
+        ok = self._validate_response(response)
+        self._record_outcome(candidate, time.perf_counter() - t0, ok=ok)
+        if not ok:
+            raise ValueError(f"Empty or invalid response from {agent_name}")
+        return response
+
+    def _race(self, candidates: List[Dict], prompt: str, context: Dict,
+              task_type: str, request_id: str) -> Tuple[Optional[str], List[Dict], str]:
+        """
+        إطلاق أفضل K مرشحين في وقت واحد وإرجاع أول رد صالح.
+        ميزانية المدفوعات: لا يدخل السباق أكثر من max_paid_calls مرشحاً مدفوعاً.
+
+        حدود الإلغاء: الاستدعاء الذي أرسل طلبه فعلاً لا يمكن إيقافه (agent.think متزامن في خيط)،
+        فيكمل في الخلفية ويدفع ثمنه ويتجاهل رده. بعد الحسم لا يرسل أي مرشح لم يبدأ بعد طلبه:
+        المستقبل الذي لم يبدأ يلغى، والذي بدأ ولم يرسل بعد يتوقف عند race_over.
+
+        Returns:
+            (الرد الفائز أو None، المرشحون الذين دخلوا السباق، آخر خطأ)
+        """
+        entrants, paid = [], 0
+        for candidate in candidates:
+            if len(entrants) >= self.race_top_k:
+                break
+            if self._is_paid(candidate):
+                if paid >= self.race_max_paid:
+                    continue
+                paid += 1
+            entrants.append(candidate)
+
+        if len(entrants) < 2:
+            # لا سباق حقيقي؛ حلقة التعافي العادية تتولى الأمر
+            return None, [], ""
+
+        names = ", ".join(str(c.get("id")) for c in entrants)
+        logger.info(f"[{request_id}] 🏁 Racing {len(entrants)} candidates ({paid} paid): {names}")
+
+        race_over = threading.Event()
+        pool = self._get_race_pool()
+        futures = {pool.submit(self._invoke_candidate, c, prompt, context, task_type, request_id, race_over): c
+                   for c in entrants}
+        last_error = ""
+        try:
+            for future in as_completed(futures, timeout=self.race_timeout_s):
+                try:
+                    response = future.result()
+                except Exception as e:
+                    last_error = str(e)
+                    logger.error(f"[{request_id}] ❌ Race entrant {futures[future].get('id')} failed: {e}")
+                    continue
+                if response is not None:
+                    logger.info(f"[{request_id}] 🥇 Winner: {futures[future].get('id')}")
+                    return response, entrants, last_error
+        except FutureTimeout:
+            last_error = f"Race timed out after {self.race_timeout_s}s"
+            logger.error(f"[{request_id}] ⏱️ {last_error}")
+        finally:
+            # إلغاء البقية: ما لم يبدأ يلغى فوراً، وما بدأ يكمل في الخلفية ويتجاهل رده
+            # (نتيجته تبقى مفيدة لإحصاءات الزمن)
+            race_over.set()
+            for future in futures:
+                future.cancel()
+
+        return None, entrants, last_error
+
+    def _get_race_pool(self) -> ThreadPoolExecutor:
+        with self._race_pool_lock:
+            if self._race_pool is None:
+                self._race_pool = ThreadPoolExecutor(max_workers=max(2, self.race_top_k * 2),
+                                                     thread_name_prefix="alpha-race")
+            return self._race_pool
+
+    @staticmethod
+    def _is_paid(candidate: Dict) -> bool:
+        """هل يستهلك هذا المرشح ميزانية مدفوعة؟"""
+        if candidate.get("provider") == "local":
+            return False
+        tier = candidate.get("cost_tier")
+        if tier is not None:
+            return tier != "free"
+        return not str(candidate.get("id", "")).endswith(":free")
+
+    @staticmethod
+    def _candidate_key(candidate: Dict) -> str:
+        return f"{candidate.get('provider')}:{candidate.get('id')}"
+
+    def _record_outcome(self, candidate: Dict, latency_s: float, ok: bool):
+        """
+        تحديث إحصاءات المرشح.
+        الزمن يقاس من النجاحات فقط (الفشل السريع لا يجعل المزود "أسرع")؛
+        الفشل يفتح فترة تأخير تتضاعف مع الفشل المتتالي، والنجاح يصفرها.
+        """
+        key = self._candidate_key(candidate)
+        with self._stats_lock:
+            st = self.latency_stats.get(key)
+            if st is None:
+                st = self.latency_stats[key] = {"ewma_s": None, "calls": 0, "failures": 0,
+                                                "consecutive_failures": 0, "cooldown_until": 0.0}
+            st["calls"] += 1
+            if ok:
+                st["consecutive_failures"] = 0
+                st["cooldown_until"] = 0.0
+                st["ewma_s"] = latency_s if st["ewma_s"] is None else 0.8 * st["ewma_s"] + 0.2 * latency_s
+            else:
+                st["failures"] += 1
+                st["consecutive_failures"] += 1
+                cooldown = min(self.failure_cooldown_max_s,
+                               self.failure_cooldown_s * 2 ** (st["consecutive_failures"] - 1))
+                st["cooldown_until"] = time.monotonic() + cooldown
+
+    def _candidate_score(self, candidate: Dict) -> Tuple[int, float]:
+        """
+        مفتاح الترتيب (الأصغر أفضل): (الفئة، القيمة).
+          0: مرشح سليم مجرب، حسب متوسط زمن نجاحاته.
+          1: مرشح لم ينجح بعد (ترتيب الملف).
+          2: مرشح في فترة تأخير بعد فشل، حسب موعد انتهائها؛ يبقى متاحاً كملاذ أخير.
+        """
+        st = self.latency_stats.get(self._candidate_key(candidate))
+        if st is None:
+            return (1, 0.0)
+        if st["cooldown_until"] > time.monotonic():
+            return (2, st["cooldown_until"])
+        if st["ewma_s"] is None:
+            return (1, 0.0)
+        return (0, st["ewma_s"])
+
     # =========================================================================
     # Internal Logic (The Brain Cells)
     # =========================================================================
@@ -140,8 +352,12 @@ class BrainRouter:
         """قراءة قائمة الخبراء من ملف YAML."""
         candidates = sys_config.get(f"brain.specialties.{task_type}")
         if not candidates:
-            return sys_config.get("brain.specialties.general", [])
-        return candidates
+            candidates = sys_config.get("brain.specialties.general", [])
+        if not self.latency_stats:
+            return candidates
+        # المرشحون المجربون يرتبون حسب أدائهم الفعلي؛ غير المجربين يبقون بترتيب الملف بعدهم
+        # (الترتيب المستقر يحفظ ترتيب الملف عند التعادل)
+        return sorted(candidates, key=self._candidate_score)
 
     def _map_provider_to_agent(self, provider: str) -> str:
         """تحويل اسم المزود إلى اسم العميل."""
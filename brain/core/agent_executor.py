@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+"""
+ALPHA SOVEREIGN - AGENT EXECUTOR (PLACEMENT LAYER)
+=================================================================
+Component: brain/core/agent_executor.py
+Core Responsibility: تحديد مكان تنفيذ كل وكيل: حلقة الأحداث، مجمع خيوط، أو مجمع عمليات دافئ.
+Forensic Features:
+  - Per-Agent Placement: المكان يقرأ من ملف الاستراتيجية (execution_placement) في كل دورة.
+  - Warm Process Pool: كل عملية عاملة تبني الموارد الثقيلة (QuantLogicCore + نوى Numba) مرة واحدة عند الإقلاع.
+  - Zero-Copy Market Data: المصفوفات الكبيرة تمرر عبر الذاكرة المشتركة بدل نسخها في pickle.
+  - Safe Fallback: أي تعذر في مسار العمليات يعود إلى الخيوط مع تسجيل السبب، دون تشغيل الوكيل مرتين.
+=================================================================
+"""
+
+import asyncio
+import importlib
+import inspect
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from multiprocessing import shared_memory
+    SHM_AVAILABLE = True
+except ImportError:
+    SHM_AVAILABLE = False
+
+log = logging.getLogger("Alpha.Brain.Executor")
+
+PLACEMENT_LOOP = "loop"
+PLACEMENT_THREAD = "thread"
+PLACEMENT_PROCESS = "process"
+PLACEMENTS = (PLACEMENT_LOOP, PLACEMENT_THREAD, PLACEMENT_PROCESS)
+
+# الموارد الثقيلة التي تبنى مرة واحدة لكل عملية ("module:Class")
+DEFAULT_WARMERS = ("brain.agents.quant.logic:QuantLogicCore",)
+
+# =================================================================
+# 1. PER-PROCESS RESOURCES (موارد العملية)
+# =================================================================
+
+_RESOURCES: Dict[str, Any] = {}
+
+
+def register_resource(name: str, instance: Any):
+    """تسجيل مورد جاهز في العملية الحالية (مثل QuantLogicCore الخاص بخط الإنتاج)."""
+    _RESOURCES[name] = instance
+
+
+def worker_resource(name: str, factory: Optional[Callable[[], Any]] = None) -> Any:
+    """
+    جلب مورد العملية الحالية (أو بناؤه عند أول طلب).
+    دوال الوكلاء تستخدمها بدلاً من self حتى تعمل كما هي في أي مكان تنفيذ.
+    """
+    instance = _RESOURCES.get(name)
+    if instance is None:
+        if factory is None:
+            raise KeyError(f"Resource not available in this process: {name}")
+        instance = _RESOURCES[name] = factory()
+    return instance
+
+
+def _init_worker(warmers: Sequence[str]):
+    """مهيئ العملية العاملة: بناء الموارد الثقيلة (وتسخين نوى JIT) قبل أول مهمة."""
+    for spec in warmers:
+        module_name, _, attr = spec.partition(":")
+        try:
+            cls = getattr(importlib.import_module(module_name), attr)
+            instance = cls()
+            # الموارد ذات التسخين الخلفي (QuantLogicCore.is_ready): لا يعود المهيئ قبل اكتماله،
+            # وإلا تنفذ أولى المهام على المسار البايثوني الاحتياطي بدل النوى المترجمة
+            ready = getattr(instance, "is_ready", None)
+            if ready is not None and hasattr(ready, "result"):
+                ready.result()
+            _RESOURCES[attr] = instance
+        except Exception as e:
+            # العامل يبقى صالحاً؛ المورد سيبنى كسولاً عند الطلب
+            logging.getLogger("Alpha.Brain.Executor.Worker").error(f"WORKER_WARM_FAIL: {spec}: {e}")
+
+
+def _warm_ping() -> int:
+    return len(_RESOURCES)
+
+# =================================================================
+# 2. SHARED MEMORY TRANSPORT (نقل المصفوفات دون نسخ)
+# =================================================================
+
+@dataclass(frozen=True)
+class SharedArrayRef:
+    """مرجع خفيف لمصفوفة في الذاكرة المشتركة (هو فقط ما يمر عبر pickle)."""
+    name: str
+    shape: Tuple[int, ...]
+    dtype: str
+
+
+def _pack(obj: Any, threshold: int, segments: List[Any]) -> Any:
+    """استبدال المصفوفات الكبيرة بمراجع ذاكرة مشتركة (القواميس والقوائم تعالج تكرارياً)."""
+    if isinstance(obj, np.ndarray) and obj.nbytes >= threshold and obj.nbytes > 0:
+        shm = shared_memory.SharedMemory(create=True, size=obj.nbytes)
+        segments.append(shm)
+        view = np.ndarray(obj.shape, dtype=obj.dtype, buffer=shm.buf)
+        view[...] = obj
+        return SharedArrayRef(shm.name, obj.shape, obj.dtype.str)
+    if isinstance(obj, dict):
+        return {k: _pack(v, threshold, segments) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_pack(v, threshold, segments) for v in obj)
+    return obj
+
+
+def _unpack(obj: Any, attached: List[Any]) -> Any:
+    if isinstance(obj, SharedArrayRef):
+        shm = shared_memory.SharedMemory(name=obj.name)
+        attached.append(shm)
+        return np.ndarray(obj.shape, dtype=np.dtype(obj.dtype), buffer=shm.buf)
+    if isinstance(obj, dict):
+        return {k: _unpack(v, attached) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_unpack(v, attached) for v in obj)
+    return obj
+
+
+def _invoke_in_worker(fn: Callable, args: tuple) -> Any:
+    """نقطة الدخول داخل العملية العاملة: ربط الذاكرة المشتركة، التنفيذ، ثم الفصل."""
+    attached: List[Any] = []
+    try:
+        return fn(*_unpack(args, attached))
+    finally:
+        for shm in attached:
+            try:
+                shm.close()
+            except BufferError:
+                # النتيجة ما زالت تشير إلى العرض؛ يغلق عند جمع القمامة
+                pass
+
+# =================================================================
+# 3. EXECUTOR (المنفذ)
+# =================================================================
+
+class AgentExecutor:
+    """
+    منفذ الوكلاء.
+    - loop: الدوال الرخيصة تنفذ مباشرة، والـ coroutines تنتظر كما هي.
+    - thread: مجمع خيوط محدود (مناسب للوكلاء التي تحرر GIL أو تنتظر I/O).
+    - process: مجمع عمليات دافئ للوكلاء الحسابية في Python الخالص.
+    """
+
+    def __init__(self,
+                 max_threads: int = 4,
+                 max_processes: int = 2,
+                 warmers: Sequence[str] = DEFAULT_WARMERS,
+                 start_method: str = "spawn",
+                 share_threshold_bytes: int = 64 * 1024):
+        """
+        Args:
+            max_threads: حجم مجمع الخيوط.
+            max_processes: حجم مجمع العمليات (0 = تعطيل مسار العمليات).
+            warmers: الموارد التي تبنيها كل عملية عند الإقلاع ("module:Class").
+            start_method: طريقة إنشاء العمليات؛ spawn آمنة مع الخيوط وحلقة الأحداث.
+            share_threshold_bytes: المصفوفات الأكبر من هذا تمرر عبر الذاكرة المشتركة.
+        """
+        self.max_processes = max_processes
+        self.warmers = tuple(warmers)
+        self.start_method = start_method
+        self.share_threshold = share_threshold_bytes
+
+        self._threads = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="alpha-agent")
+        self._processes: Optional[ProcessPoolExecutor] = None
+        self._warned: set = set()
+
+        self.stats: Dict[str, int] = {"loop": 0, "thread": 0, "process": 0, "fallback": 0, "shared_arrays": 0}
+
+    # --- Lifecycle ---
+
+    def _process_pool(self) -> Optional[ProcessPoolExecutor]:
+        if self.max_processes <= 0:
+            return None
+        if self._processes is None:
+            ctx = multiprocessing.get_context(self.start_method)
+            self._processes = ProcessPoolExecutor(max_workers=self.max_processes, mp_context=ctx,
+                                                  initializer=_init_worker, initargs=(self.warmers,))
+        return self._processes
+
+    async def start(self):
+        """إقلاع العمليات العاملة وتسخينها الآن، لا عند أول قرار."""
+        pool = self._process_pool()
+        if pool is None:
+            return
+        loop = asyncio.get_running_loop()
+        try:
+            warmed = await asyncio.gather(*[loop.run_in_executor(pool, _warm_ping)
+                                            for _ in range(self.max_processes)])
+            log.info(f"EXECUTOR_READY: {self.max_processes} عمليات دافئة (موارد لكل عملية: {max(warmed)}).")
+        except Exception as e:
+            log.error(f"EXECUTOR_WARM_FAIL: {e}. الوكلاء الحسابية ستعمل في الخيوط.")
+            self.max_processes = 0
+
+    def shutdown(self):
+        self._threads.shutdown(wait=False)
+        if self._processes is not None:
+            self._processes.shutdown(wait=False, cancel_futures=True)
+            self._processes = None
+
+    # --- Placement ---
+
+    @staticmethod
+    def placement_for(agent: str, profile: Any, default: str = PLACEMENT_THREAD) -> str:
+        """قراءة مكان تنفيذ الوكيل من ملف الاستراتيجية (execution_placement)."""
+        placement = (profile.get("execution_placement") or {}).get(agent, default)
+        if placement not in PLACEMENTS:
+            log.warning(f"Unknown placement '{placement}' for {agent}. Using {default}.")
+            return default
+        return placement
+
+    def _warn_once(self, key: str, message: str):
+        if key not in self._warned:
+            self._warned.add(key)
+            log.warning(message)
+
+    async def run(self, agent: str, fn: Callable, *args, placement: str = PLACEMENT_THREAD) -> Any:
+        """تنفيذ وكيل في المكان المطلوب وإرجاع نتيجته."""
+        if placement == PLACEMENT_PROCESS:
+            # العمليات تتطلب دالة على مستوى الوحدة (قابلة لـ pickle بالاسم، بلا self)
+            if not (inspect.isfunction(fn) and fn.__qualname__ == fn.__name__):
+                self._warn_once(f"{agent}:picklable",
+                                f"EXECUTOR_FALLBACK: {agent} ليست دالة على مستوى الوحدة؛ تنفيذها في الخيوط.")
+                placement = PLACEMENT_THREAD
+            elif self._process_pool() is None:
+                placement = PLACEMENT_THREAD
+
+        if placement == PLACEMENT_LOOP:
+            self.stats["loop"] += 1
+            result = fn(*args)
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+
+        loop = asyncio.get_running_loop()
+
+        if placement == PLACEMENT_PROCESS:
+            try:
+                return await self._run_in_process(loop, fn, args)
+            except BrokenProcessPool as e:
+                # العامل مات قبل/أثناء التنفيذ: نعيد بناء المجمع ونكمل هذه الدورة في الخيوط
+                self.stats["fallback"] += 1
+                log.error(f"EXECUTOR_POOL_BROKEN: {agent}: {e}. إعادة بناء مجمع العمليات.")
+                self._processes = None
+
+        if inspect.iscoroutinefunction(fn):
+            self.stats["loop"] += 1
+            return await fn(*args)
+
+        self.stats["thread"] += 1
+        return await loop.run_in_executor(self._threads, lambda: fn(*args))
+
+    async def _run_in_process(self, loop, fn: Callable, args: tuple) -> Any:
+        segments: List[Any] = []
+        payload = _pack(args, self.share_threshold, segments) if SHM_AVAILABLE else args
+        self.stats["shared_arrays"] += len(segments)
+        try:
+            self.stats["process"] += 1
+            return await loop.run_in_executor(self._processes, _invoke_in_worker, fn, payload)
+        finally:
+            for shm in segments:
+                shm.close()
+                shm.unlink()
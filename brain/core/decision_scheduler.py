@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+ALPHA SOVEREIGN - PER-SYMBOL DECISION SCHEDULER
+=================================================================
+Component: brain/core/decision_scheduler.py
+Core Responsibility: جدولة دورات القرار لعدة رموز بزمن استجابة محدود تحت الضغط.
+Forensic Features:
+  - Per-Symbol Mailbox: صندوق بريد لكل رمز يحتفظ بآخر نبضة فقط (Conflation).
+  - Single Flight: قرار واحد على الأكثر قيد التنفيذ لكل رمز.
+  - Global Concurrency Cap: حد أعلى لعدد القرارات المتزامنة عبر كل الرموز.
+  - Priority Lanes: الرموز ذات المراكز المفتوحة تخدم قبل قائمة المراقبة.
+  - Queue Delay Metrics: قياس زمن الانتظار لكل رمز (من أول نبضة غير مخدومة حتى بدء القرار).
+=================================================================
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, asdict
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set
+
+log = logging.getLogger("Alpha.Brain.Scheduler")
+
+# المسارات مرتبة من الأعلى أولوية إلى الأدنى
+LANE_POSITION = "POSITION"
+LANE_WATCHLIST = "WATCHLIST"
+DEFAULT_LANES = (LANE_POSITION, LANE_WATCHLIST)
+
+DecisionHandler = Callable[[str, Dict[str, Any]], Awaitable[Any]]
+
+
+@dataclass
+class SymbolStats:
+    """مقاييس الجدولة لرمز واحد"""
+    submitted: int = 0
+    conflated: int = 0          # نبضات استبدلت بأحدث منها قبل أن تخدم
+    decisions: int = 0
+    errors: int = 0
+    last_queue_delay_ms: float = 0.0
+    ewma_queue_delay_ms: float = 0.0
+    max_queue_delay_ms: float = 0.0
+
+
+class _Mailbox:
+    __slots__ = ("data", "pending_since", "in_flight", "queued")
+
+    def __init__(self):
+        self.data: Optional[Dict[str, Any]] = None
+        self.pending_since: Optional[float] = None
+        self.in_flight = False
+        self.queued = False
+
+
+class DecisionScheduler:
+    """
+    مجدول القرارات متعدد الرموز.
+    submit() لا يحجب أبداً: يضع النبضة في صندوق الرمز (مستبدلاً أي نبضة لم تخدم بعد)
+    ثم يطلق القرارات الجاهزة حسب الأولوية وضمن الحد الأعلى للتزامن.
+    """
+
+    def __init__(self,
+                 handler: DecisionHandler,
+                 max_concurrency: int = 8,
+                 lanes: tuple = DEFAULT_LANES,
+                 default_lane: str = LANE_WATCHLIST,
+                 slow_queue_ms: float = 250.0):
+        """
+        Args:
+            handler: دالة القرار (مثل BrainPipeline.process_tick).
+            max_concurrency: أقصى عدد قرارات قيد التنفيذ عبر كل الرموز.
+            lanes: أسماء المسارات مرتبة تنازلياً حسب الأولوية.
+            default_lane: مسار الرموز غير المصنفة.
+            slow_queue_ms: عتبة التحذير من زمن الانتظار.
+        """
+        if default_lane not in lanes:
+            raise ValueError(f"Unknown default lane: {default_lane}")
+
+        self.handler = handler
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.lanes = tuple(lanes)
+        self.default_lane = default_lane
+        self.slow_queue_ms = slow_queue_ms
+
+        self._mailboxes: Dict[str, _Mailbox] = {}
+        self._ready: Dict[str, Deque[str]] = {lane: deque() for lane in self.lanes}
+        self._symbol_lane: Dict[str, str] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._closed = False
+
+        self.stats: Dict[str, SymbolStats] = {}
+
+    # --- Configuration ---
+
+    def set_lane(self, symbol: str, lane: str):
+        """نقل رمز إلى مسار أولوية (يسري على الجدولة التالية للرمز)."""
+        if lane not in self._ready:
+            raise ValueError(f"Unknown lane: {lane}")
+        self._symbol_lane[symbol] = lane
+
+    def set_positions(self, symbols: List[str]):
+        """
+        تحديث الرموز ذات المراكز المفتوحة دفعة واحدة:
+        المذكورة تنتقل إلى مسار POSITION، والبقية تعود إلى المسار الافتراضي.
+        """
+        held = set(symbols)
+        for symbol in list(self._symbol_lane):
+            if self._symbol_lane[symbol] == LANE_POSITION and symbol not in held:
+                del self._symbol_lane[symbol]
+        for symbol in held:
+            self.set_lane(symbol, LANE_POSITION)
+
+    # --- Submission ---
+
+    def submit(self, symbol: str, market_data: Dict[str, Any]):
+        """تسليم نبضة جديدة. يجب استدعاؤها من داخل حلقة الأحداث."""
+        if self._closed:
+            return
+
+        box = self._mailboxes.get(symbol)
+        if box is None:
+            box = self._mailboxes[symbol] = _Mailbox()
+        stats = self.stats.get(symbol)
+        if stats is None:
+            stats = self.stats[symbol] = SymbolStats()
+
+        stats.submitted += 1
+        if box.data is not None:
+            stats.conflated += 1
+        else:
+            box.pending_since = time.perf_counter()
+        box.data = market_data
+
+        if not box.in_flight and not box.queued:
+            self._enqueue(symbol, box)
+        self._pump()
+
+    def _enqueue(self, symbol: str, box: _Mailbox):
+        box.queued = True
+        self._ready[self._symbol_lane.get(symbol, self.default_lane)].append(symbol)
+
+    def _next_ready(self) -> Optional[str]:
+        for lane in self.lanes:
+            if self._ready[lane]:
+                return self._ready[lane].popleft()
+        return None
+
+    def _pump(self):
+        """إطلاق القرارات الجاهزة حتى بلوغ الحد الأعلى."""
+        while len(self._tasks) < self.max_concurrency:
+            symbol = self._next_ready()
+            if symbol is None:
+                break
+
+            box = self._mailboxes[symbol]
+            box.queued = False
+            data, since = box.data, box.pending_since
+            box.data, box.pending_since = None, None
+            box.in_flight = True
+
+            self._record_delay(symbol, (time.perf_counter() - since) * 1000)
+
+            task = asyncio.ensure_future(self._run(symbol, data))
+            self._tasks.add(task)
+            self._idle.clear()
+            task.add_done_callback(self._on_done)
+
+    async def _run(self, symbol: str, data: Dict[str, Any]):
+        stats = self.stats[symbol]
+        try:
+            await self.handler(symbol, data)
+            stats.decisions += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            stats.errors += 1
+            log.error(f"SCHED_DECISION_FAIL: {symbol}: {e}")
+        finally:
+            box = self._mailboxes[symbol]
+            box.in_flight = False
+            # وصلت نبضة أحدث أثناء التنفيذ: يعاد الرمز إلى الطابور بآخر قيمة فقط
+            if box.data is not None and not self._closed:
+                self._enqueue(symbol, box)
+
+    def _on_done(self, task: asyncio.Task):
+        # الإطلاق التالي بعد خروج هذه المهمة من العداد
+        self._tasks.discard(task)
+        if not self._closed:
+            self._pump()
+        if not self._tasks:
+            self._idle.set()
+
+    def _record_delay(self, symbol: str, delay_ms: float):
+        stats = self.stats[symbol]
+        stats.last_queue_delay_ms = delay_ms
+        stats.max_queue_delay_ms = max(stats.max_queue_delay_ms, delay_ms)
+        if stats.ewma_queue_delay_ms == 0.0:
+            stats.ewma_queue_delay_ms = delay_ms
+        else:
+            stats.ewma_queue_delay_ms = 0.9 * stats.ewma_queue_delay_ms + 0.1 * delay_ms
+        if delay_ms > self.slow_queue_ms:
+            log.warning(f"SCHED_QUEUE_SLOW: {symbol} انتظر {delay_ms:.1f}ms قبل بدء القرار.")
+
+    # --- Lifecycle & Reporting ---
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    @property
+    def backlog(self) -> int:
+        return sum(len(q) for q in self._ready.values())
+
+    async def drain(self):
+        """انتظار تفريغ كل الصناديق وانتهاء كل القرارات الجارية."""
+        while self._tasks or self.backlog:
+            await self._idle.wait()
+            await asyncio.sleep(0)
+
+    async def close(self):
+        """إيقاف القبول وإلغاء القرارات الجارية."""
+        self._closed = True
+        for lane in self._ready.values():
+            lane.clear()
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._idle.set()
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """مقاييس الجدولة لكل رمز (للوحة المراقبة)."""
+        return {symbol: dict(asdict(s), lane=self._symbol_lane.get(symbol, self.default_lane))
+                for symbol, s in self.stats.items()}
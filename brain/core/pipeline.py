@@ -5,44 +5,92 @@ ALPHA SOVEREIGN - DECISION PIPELINE (THE ORCHESTRATOR)
 Component: brain/core/pipeline.py
 Core Responsibility: قراءة الاستراتيجية، تشغيل الوكلاء، وتنفيذ الحكم.
 Forensic Features:
-  - Dynamic Strategy Loading: قراءة ملف الإعدادات في كل دورة (Live Reload).
+  - Dynamic Strategy Loading: لقطة إعدادات محدثة حية (Live Reload) دون قراءة القرص في كل دورة.
   - Selective Execution: تشغيل الوكلاء المحددين فقط لتوفير الموارد.
   - Voter Integration: تسليم النتائج للمحكمة العليا (WeightedVoter).
+  - Agent Placement: كل وكيل ينفذ في الحلقة أو الخيوط أو مجمع عمليات دافئ حسب ملف الاستراتيجية.
+  - Deadline-Aware Fan-Out: لكل وكيل ميزانية زمنية؛ التصويت يتم بما وصل في الموعد.
+  - Sharded Scheduling: نبضات الرموز المتعددة تمر عبر DecisionScheduler (صندوق لكل رمز + حد تزامن).
 =================================================================
 """
 
 import asyncio
+import json
 import logging
 import time
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 
 # --- استيراد المكونات التي بنيناها سابقاً ---
 from brain.memory.context_engine import ContextEngine
 from brain.reasoning.cot_engine import CoTEngine
 from brain.weighted_voter import WeightedVoter
 from brain.core.strategy_manager import StrategyConfigManager
+from brain.core.decision_scheduler import DecisionScheduler
+from brain.core.agent_executor import AgentExecutor, register_resource, worker_resource
 
 # --- استيراد الوكلاء ---
 from brain.agents.sentiment.processor import HybridSentimentProcessor
 from brain.agents.quant.logic import QuantLogicCore
+from brain.agents.quant.microstructure import MicrostructureEngine
 from brain.agents.risk.validator import ConstitutionalValidator
 
 log = logging.getLogger("Alpha.Brain.Pipeline")
+# سجل منفصل للإشارات المتأخرة حتى يمكن توجيهه لملف خاص للتحليل اللاحق
+late_log = logging.getLogger("Alpha.Brain.Pipeline.Late")
+
+# ميزانيات افتراضية بالمللي ثانية إن لم يحددها ملف الاستراتيجية (agent_deadlines_ms)
+DEFAULT_AGENT_DEADLINES_MS = {"quant": 100, "sentiment": 800, "hybrid": 1500, "risk": 200}
+
+
+def quant_agent_inputs(data: Dict[str, Any], depth: int = 10) -> Dict[str, Any]:
+    """
+    تجهيز مدخلات الوكيل الكمي في العملية الرئيسية: فقط ما تحتاجه النوى.
+    لا يمرر market_data كاملاً (ولا L2OrderBook) عبر حدود العمليات؛ أفضل المستويات
+    تنسخ كمصفوفات صغيرة مستقلة عن الدفتر الذي يستمر تحديثه بالفروقات.
+    """
+    inputs = {"volatility": float(data.get("volatility", 0.0))}
+    book = data.get("l2_book")
+    if book is not None and book.in_sync:
+        bid_p, bid_v = book.top("BID", depth)
+        ask_p, ask_v = book.top("ASK", depth)
+        inputs["book"] = (bid_p.copy(), bid_v.copy(), ask_p.copy(), ask_v.copy())
+    return inputs
+
+
+def run_quant_agent(inputs: Dict[str, Any]):
+    """
+    تشغيل المنطق الكمي على مدخلات quant_agent_inputs.
+    دالة على مستوى الوحدة (وليست method) حتى يمكن إرسالها لمجمع العمليات؛
+    QuantLogicCore يؤخذ من موارد العملية الحالية (مسخن مسبقاً في العمال).
+    """
+    quant_core = worker_resource("QuantLogicCore", QuantLogicCore)
+    book = inputs.get("book")
+    ofi = quant_core.calculate_ofi_arrays(*book) if book is not None else 0.0
+    # منطق بسيط للتجربة: إذا السعر مرتفع نبيع، منخفض نشتري (Mean Reversion)
+    rsi_sim = 50 + (inputs['volatility'] * 100) # محاكاة
+    signal = "NEUTRAL"
+    if rsi_sim > 70: signal = "SELL"
+    elif rsi_sim < 30: signal = "BUY"
+    return {"signal": signal, "confidence": 0.8, "ofi": ofi}
+
 
 class BrainPipeline:
     """
     خط إنتاج القرارات الذكي.
     """
 
-    def __init__(self, grpc_stub, pb_types):
+    def __init__(self, grpc_stub, pb_types, max_concurrent_decisions: int = 8,
+                 memory_stores: List[Any] = ()):
         self.stub = grpc_stub         # قناة الاتصال بالمحرك (Rust)
         self.pb = pb_types            # أنواع الرسائل (Protobuf)
+        # مخازن ذات كتابة مؤجلة (SemanticMemory / VectorService): تفرغ عند الإغلاق
+        self.memory_stores = list(memory_stores)
         
         log.info("🧠 Initializing Cognitive Pipeline...")
         
         # 1. المديرون (Managers)
         self.config_mgr = StrategyConfigManager()
-        self.voter = WeightedVoter()
+        self.voter = WeightedVoter(config_mgr=self.config_mgr)
         self.validator = ConstitutionalValidator()
         
         # 2. المحركات (Engines)
@@ -52,10 +100,53 @@ class BrainPipeline:
         # 3. الوكلاء (Agents)
         self.quant_core = QuantLogicCore()
         self.sentiment = HybridSentimentProcessor() 
+        register_resource("QuantLogicCore", self.quant_core)
+        # خصائص البنية المجهرية (تغذى من تدفق العمق والصفقات، وتنشر في market_data لكل دورة)
+        self.microstructure = MicrostructureEngine()
+
+        # مكان تنفيذ الوكلاء (حلقة / خيوط / عمليات)
+        self.executor = AgentExecutor()
+
+        # 4. المجدول (Scheduler): نقطة الدخول لتدفق النبضات متعدد الرموز
+        self.scheduler = DecisionScheduler(self.process_tick, max_concurrency=max_concurrent_decisions)
 
     async def initialize(self):
         """تحميل النماذج الثقيلة في الخلفية"""
         await self.sentiment.initialize()
+        # مجمع العمليات يسخن فقط إن طلبه ملف الاستراتيجية (الافتراضي: الخيوط)
+        placements = (self.config_mgr.snapshot().get("execution_placement") or {}).values()
+        if "process" in placements:
+            await self.executor.start()
+
+    async def shutdown(self):
+        """إنهاء الجلسة: إيقاف القرارات، ثم تفريغ الذاكرة المعلقة، ثم إغلاق المنفذين."""
+        await self.scheduler.close()
+        for store in self.memory_stores:
+            try:
+                if not await store.close():
+                    log.error(f"MEMORY_FLUSH_FAIL: {type(store).__name__} لم يكتب كل النقاط المعلقة عند الإغلاق.")
+            except Exception as e:
+                log.error(f"MEMORY_FLUSH_FAIL: {type(store).__name__}: {e}")
+        self.executor.shutdown()
+
+    def submit_tick(self, symbol: str, market_data: Dict[str, Any]):
+        """
+        تسليم نبضة إلى المجدول (لا يحجب).
+        إذا كان قرار الرمز قيد التنفيذ، تدمج النبضات اللاحقة في آخرها فقط.
+        """
+        self.scheduler.submit(symbol, market_data)
+
+    def on_depth(self, symbol: str, book: Any):
+        """حدث عمق بعد تطبيقه على L2OrderBook المحلي."""
+        self.microstructure.on_book(symbol, book)
+
+    def on_trade(self, symbol: str, qty: float, is_buyer_maker: bool):
+        """صفقة منفذة من تدفق الصفقات العامة."""
+        self.microstructure.on_trade(symbol, qty, is_buyer_maker)
+
+    def set_open_positions(self, symbols: List[str]):
+        """الرموز ذات المراكز المفتوحة تخدم قبل قائمة المراقبة."""
+        self.scheduler.set_positions(symbols)
 
     async def process_tick(self, symbol: str, market_data: Dict[str, Any]):
         """
@@ -63,11 +154,14 @@ class BrainPipeline:
         """
         start_time = time.perf_counter()
         
-        # أ. تحميل ملف الاستراتيجية (تحديث فوري)
+        # أ. لقطة الاستراتيجية الحالية (تحديث فوري عند تغير الملف)
         # هذا يسمح لك بتغيير الاستراتيجية من الواجهة دون إيقاف النظام
-        profile = self.config_mgr.load_profile()
-        modules_cfg = profile.get("modules", {})
+        profile = self.config_mgr.snapshot()
+        modules_cfg = profile.modules
         
+        # نشر خصائص البنية المجهرية الحالية قبل السياق والوكلاء
+        self.microstructure.publish(symbol, market_data)
+
         # ب. بناء السياق (Context)
         ctx = await self.context_engine.build_decision_context(
             symbol, market_data, None, None
@@ -76,24 +170,32 @@ class BrainPipeline:
         # ج. التنفيذ المتوازي الانتقائي (Selective Parallel Execution)
         # نقوم بتشغيل فقط الوكلاء الذين تم تفعيلهم في strategy_profile.json
         tasks = {}
+        run = self.executor.run
+        where = lambda agent: self.executor.placement_for(agent, profile)
         
         # 1. المسار الكمي (Quant)
         if modules_cfg.get("quant_analysis", {}).get("enabled", False):
-            tasks["quant"] = asyncio.to_thread(self._run_quant, market_data)
+            tasks["quant"] = run("quant", run_quant_agent, quant_agent_inputs(market_data), placement=where("quant"))
             
         # 2. مسار المشاعر (Sentiment)
         if modules_cfg.get("sentiment_analysis", {}).get("enabled", False):
-            tasks["sentiment"] = self._run_sentiment(symbol)
+            tasks["sentiment"] = run("sentiment", self._run_sentiment, symbol, placement=where("sentiment"))
             
         # 3. المسار الهجين (Hybrid AI)
         if modules_cfg.get("hybrid_reasoning", {}).get("enabled", False):
-            tasks["hybrid"] = asyncio.to_thread(self._run_hybrid, symbol, ctx)
+            tasks["hybrid"] = run("hybrid", self._run_hybrid, symbol, ctx, placement=where("hybrid"))
             
         # 4. المخاطر (إجباري دائماً)
-        tasks["risk"] = asyncio.to_thread(self._run_risk, market_data)
+        tasks["risk"] = run("risk", self._run_risk, market_data, placement=where("risk"))
+
+        # د. انتظار النتائج حتى موعد كل وكيل فقط
+        deadlines = dict(DEFAULT_AGENT_DEADLINES_MS, **(profile.get("agent_deadlines_ms") or {}))
+        results, missing = await self._gather_results(tasks, deadlines, symbol)
 
-        # د. انتظار النتائج
-        results = await self._gather_results(tasks)
+        # المخاطر إجبارية: غيابها لا يعني السماح
+        if "risk" in missing:
+            results["risk"] = {"status": "BLOCK", "reason": "Risk check missed its deadline"}
+            missing.remove("risk")
         
         # هـ. التصويت والحكم (The Judge)
         # نرسل النتائج إلى WeightedVoter ليقرر بناءً على الأوزان
@@ -103,7 +205,8 @@ class BrainPipeline:
             sentiment_signal=results.get("sentiment", {}),
             hybrid_signal=results.get("hybrid", {}),
             risk_signal=results.get("risk", {}),
-            market_volatility=market_data.get("volatility", 0.0)
+            market_volatility=market_data.get("volatility", 0.0),
+            missing=missing
         )
 
         # و. التنفيذ (Execution)
@@ -117,18 +220,6 @@ class BrainPipeline:
 
     # --- أغلفة التشغيل (Execution Wrappers) ---
 
-    def _run_quant(self, data):
-        """تشغيل المنطق الكمي"""
-        # (هنا نستخدم QuantLogicCore الذي كتبناه سابقاً)
-        # محاكاة لحين ربط البيانات الحقيقية
-        ofi = self.quant_core.calculate_ofi([], [], 10) 
-        # منطق بسيط للتجربة: إذا السعر مرتفع نبيع، منخفض نشتري (Mean Reversion)
-        rsi_sim = 50 + (data['volatility'] * 100) # محاكاة
-        signal = "NEUTRAL"
-        if rsi_sim > 70: signal = "SELL"
-        elif rsi_sim < 30: signal = "BUY"
-        return {"signal": signal, "confidence": 0.8}
-
     async def _run_sentiment(self, symbol):
         """تشغيل تحليل المشاعر"""
         # يستخدم HybridSentimentProcessor (Auto Mode)
@@ -136,31 +227,66 @@ class BrainPipeline:
 
     def _run_hybrid(self, symbol, ctx):
         """تشغيل التفكير المتسلسل"""
-        trace = self.cot_engine.deliberate(f"Trade {symbol}", {"raw": ctx}, "hash")
-        return {"final_verdict": trace.final_verdict, "final_score": trace.final_score}
+        # تقييم مترجم دون بناء الأثر المقروء (يبنى عند الحاجة عبر evaluate(...).trace())
+        result = self.cot_engine.evaluate(f"Trade {symbol}", {"raw": ctx}, ctx.get("context_id", "hash"))
+        return {"final_verdict": result.final_verdict, "final_score": result.final_score}
 
     def _run_risk(self, data):
         """تشغيل مدقق المخاطر"""
         return {"status": "ALLOW", "reason": "Within limits"}
 
-    async def _gather_results(self, tasks: Dict) -> Dict:
-        """تجميع نتائج المهام غير المتزامنة بأمان"""
-        results = {}
-        if not tasks: return results
+    async def _gather_results(self, tasks: Dict, deadlines_ms: Dict[str, float],
+                              symbol: str = "") -> Tuple[Dict, List[str]]:
+        """
+        تجميع نتائج المهام بمواعيد نهائية لكل وكيل.
+        Returns:
+            (النتائج التي وصلت في الموعد، أسماء الوكلاء الغائبين: متأخر أو معطل)
+        """
+        results, missing = {}, []
+        if not tasks: return results, missing
         
         # تشغيل الجميع في وقت واحد
-        keys = list(tasks.keys())
-        coroutines = list(tasks.values())
-        
-        completed = await asyncio.gather(*coroutines, return_exceptions=True)
-        
-        for k, res in zip(keys, completed):
-            if isinstance(res, Exception):
-                log.error(f"❌ Task {k} Crashed: {res}")
-                results[k] = {}
+        t0 = time.perf_counter()
+        running = {k: asyncio.ensure_future(c) for k, c in tasks.items()}
+        budget_s = {k: deadlines_ms.get(k, max(deadlines_ms.values())) / 1000.0 for k in running}
+
+        key_of = {t: k for k, t in running.items()}
+
+        pending = set(running.values())
+        while pending:
+            # الانتظار حتى أول نتيجة أو أقرب موعد نهائي، أيهما أسبق
+            nearest = min(budget_s[key_of[t]] for t in pending) - (time.perf_counter() - t0)
+            _, pending = await asyncio.wait(pending, timeout=max(nearest, 0.0),
+                                            return_when=asyncio.FIRST_COMPLETED)
+            # إسقاط من تجاوز موعده (يبقى يعمل في الخلفية ليسجل عند وصوله)
+            elapsed = time.perf_counter() - t0
+            pending = {t for t in pending if budget_s[key_of[t]] > elapsed}
+
+        for k, task in running.items():
+            if not task.done():
+                missing.append(k)
+                log.warning(f"⏱️ Agent {k} missed its {budget_s[k] * 1000:.0f}ms deadline. Voting without it.")
+                task.add_done_callback(self._late_logger(symbol, k, t0))
+            elif task.exception() is not None:
+                log.error(f"❌ Task {k} Crashed: {task.exception()}")
+                missing.append(k)
             else:
-                results[k] = res
-        return results
+                results[k] = task.result()
+        return results, missing
+
+    @staticmethod
+    def _late_logger(symbol: str, agent: str, t0: float):
+        """تسجيل الإشارة المتأخرة عند وصولها (للتحليل اللاحق: هل كانت ستغير الحكم؟)"""
+        def _on_done(task: asyncio.Task):
+            arrived_ms = (time.perf_counter() - t0) * 1000
+            if task.cancelled():
+                return
+            err = task.exception()
+            record = {"symbol": symbol, "agent": agent, "arrived_ms": round(arrived_ms, 1),
+                      "error": str(err) if err else None,
+                      "result": None if err else task.result()}
+            late_log.info(f"LATE_SIGNAL: {json.dumps(record, default=str)}")
+        return _on_done
 
     async def _dispatch_order(self, symbol, receipt, price):
         """إرسال الأمر للمحرك عبر gRPC"""
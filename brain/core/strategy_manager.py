@@ -8,16 +8,22 @@ Forensic Features:
   - Atomic Writes (منع فساد الملف عند انقطاع الطاقة).
   - Schema Validation (منع القيم غير المنطقية).
   - Auto-Recovery (إعادة بناء الملف إذا تم حذفه).
+  - Versioned Snapshot (لقطة ثابتة في الذاكرة؛ تعاد قراءة الملف فقط عند تغيره على القرص).
 =================================================================
 """
 
+import asyncio
 import json
 import logging
 import os
 import shutil
 import sys
+import threading
+import time
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Any
+from types import MappingProxyType
+from typing import Dict, Any, Callable, List, Mapping, Optional, Tuple
 from datetime import datetime, timezone
 
 # تحديد المسار ديناميكياً
@@ -47,18 +53,154 @@ DEFAULT_PROFILE = {
         "hybrid_reasoning": {"enabled": False, "weight": 0.0, "mode": "DISABLED"} # معطل افتراضياً للأمان
     },
     "risk_parameters": {"strict_mode": True},
+    "execution_placement": {"quant": "thread", "sentiment": "loop", "hybrid": "thread", "risk": "loop"},
+    "agent_deadlines_ms": {"quant": 100, "sentiment": 800, "hybrid": 1500, "risk": 200},
     "global_switch": "PAUSED"
 }
 
+def _freeze(value: Any) -> Any:
+    """تجميد عميق: القواميس تصبح للقراءة فقط والقوائم تصبح tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    """عكس _freeze: نسخة قابلة للتعديل."""
+    if isinstance(value, Mapping):
+        return {k: _thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(v) for v in value]
+    return value
+
+
+@dataclass(frozen=True)
+class ProfileSnapshot:
+    """
+    لقطة ثابتة (Immutable) من ملف الاستراتيجية.
+    الرقم version يزداد مع كل تغيير، فيمكن للمستهلكين تخزين ما يشتقونه منها
+    (مثل الأوزان) وإعادة حسابه فقط عند تغير الرقم.
+    """
+    version: int
+    data: Mapping[str, Any]
+    loaded_at: float
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.data.get(key, default)
+
+    @property
+    def modules(self) -> Mapping[str, Any]:
+        return self.data.get("modules", MappingProxyType({}))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """نسخة قابلة للتعديل (للتحرير ثم save_profile)."""
+        return _thaw(self.data)
+
+
+ProfileListener = Callable[[ProfileSnapshot], None]
+
+
 class StrategyConfigManager:
     """
     مدير التكوين الاستراتيجي.
     يضمن أن العقل يقرأ دائماً إعدادات صالحة.
+
+    المسار الساخن (كل نبضة) يستدعي snapshot() التي لا تلمس القرص إلا بفحص stat
+    رخيص كل poll_interval_s ثانية على الأكثر؛ ولا يعاد تحليل JSON إلا إذا تغير
+    mtime/inode/size للملف أو تم الحفظ عبر save_profile.
     """
 
-    def __init__(self):
+    def __init__(self, poll_interval_s: float = 1.0):
+        self.poll_interval_s = poll_interval_s
+        self._lock = threading.Lock()
+        self._listeners: List[ProfileListener] = []
+        self._file_key: Optional[Tuple[int, int, int]] = None
+        self._next_check = 0.0
+        self._snapshot = ProfileSnapshot(0, _freeze(DEFAULT_PROFILE), time.time())
+
         self._ensure_config_exists()
-        self.cache = self.load_profile()
+        self._reload(force=True)
+
+    @property
+    def cache(self) -> Mapping[str, Any]:
+        """آخر نسخة معروفة من الإعدادات (للقراءة فقط)."""
+        return self.snapshot().data
+
+    @property
+    def version(self) -> int:
+        return self._snapshot.version
+
+    # --- Snapshot & Watching ---
+
+    @staticmethod
+    def _stat_key() -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(CONFIG_PATH)
+        except OSError:
+            return None
+        # الاستبدال الذري يغير inode، والتحرير اليدوي يغير mtime/size
+        return (st.st_mtime_ns, st.st_ino, st.st_size)
+
+    def snapshot(self) -> ProfileSnapshot:
+        """اللقطة الحالية. آمنة للاستدعاء في كل نبضة."""
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self.poll_interval_s
+            self._reload()
+        return self._snapshot
+
+    def refresh(self) -> bool:
+        """فحص فوري للملف متجاهلاً فترة الاستطلاع. يعيد True إذا تغيرت اللقطة."""
+        self._next_check = time.monotonic() + self.poll_interval_s
+        return self._reload()
+
+    def _reload(self, force: bool = False) -> bool:
+        key = self._stat_key()
+        if not force and key == self._file_key:
+            return False
+        with self._lock:
+            if not force and key == self._file_key:
+                return False
+            self._file_key = key
+            data = self.load_profile()
+            self._publish(data)
+        return True
+
+    def _publish(self, data: Dict[str, Any]):
+        """تثبيت لقطة جديدة وإبلاغ المشتركين (يستدعى تحت القفل)."""
+        snap = ProfileSnapshot(self._snapshot.version + 1, _freeze(data), time.time())
+        self._snapshot = snap
+        if snap.version > 1:
+            logger.info(f"Strategy Profile Reloaded (v{snap.version}).")
+        for listener in list(self._listeners):
+            try:
+                listener(snap)
+            except Exception as e:
+                logger.error(f"Profile listener failed: {e}")
+
+    def subscribe(self, listener: ProfileListener) -> Callable[[], None]:
+        """
+        تسجيل مستمع يستدعى باللقطة الجديدة عند كل تغيير.
+        Returns: دالة لإلغاء الاشتراك.
+        """
+        self._listeners.append(listener)
+
+        def _unsubscribe():
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+        return _unsubscribe
+
+    async def watch(self, interval_s: Optional[float] = None):
+        """
+        حلقة مراقبة في الخلفية: تضمن وصول الإشعارات للمشتركين حتى في غياب نبضات.
+        Usage: asyncio.create_task(mgr.watch())
+        """
+        while True:
+            await asyncio.sleep(interval_s or self.poll_interval_s)
+            self.refresh()
 
     def _ensure_config_exists(self):
         """التأكد من وجود الملف والمجلد"""
@@ -104,8 +246,10 @@ class StrategyConfigManager:
             # 2. الاستبدال الذري (Atomic Replace)
             shutil.move(str(temp_path), str(CONFIG_PATH))
             
-            # تحديث الكاش
-            self.cache = new_data
+            # تحديث اللقطة مباشرة (دون انتظار الاستطلاع)
+            with self._lock:
+                self._file_key = self._stat_key()
+                self._publish(new_data)
             logger.info(f"Strategy Profile Updated by {author}.")
             return True
 
@@ -144,4 +288,5 @@ if __name__ == "__main__":
     
     # Reload to verify
     reloaded = mgr.load_profile()
-    print(f"[*] New Weight: {reloaded['modules']['hybrid_reasoning']['weight']}")
\ No newline at end of file
+    print(f"[*] New Weight: {reloaded['modules']['hybrid_reasoning']['weight']}")
+    print(f"[*] Snapshot Version: {mgr.snapshot().version}")
\ No newline at end of file
@@ -4,10 +4,11 @@ ALPHA SOVEREIGN - ADVANCED REMOTE GATEWAY (MULTI-KEY ARCHITECTURE)
 ==================================================================
 Path: alpha_project/brain/inference/remote_gateway.py
 Role: البوابة الدبلوماسية التي تتحدث مع مختلف مزودي الذكاء الاصطناعي.
-Features: Multi-Key Support, Vision Handling, Connection Pooling.
+Features: Multi-Key Support, Vision Handling, Connection Pooling, Native Async (aiohttp).
 Status: PRODUCTION (Patched: Default Model ID Fixed)
 """
 
+import asyncio
 import logging
 import json
 import requests
@@ -15,6 +16,12 @@ from typing import Dict, Any, Optional, List
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
 # استيراد البنية التحتية للنظام
 from alpha_project.brain.base_agent import BaseAgent
 from alpha_project.core.registry import register_component
@@ -37,16 +44,21 @@ class RemoteGateway(BaseAgent):
         self.session = requests.Session()
         
         # استراتيجية إعادة المحاولة (Retry Strategy)
-        retries = Retry(
+        # المسار غير المتزامن يقرأ نفس الكائن حتى تبقى السياستان متطابقتين
+        self.retries = Retry(
             total=3,
             backoff_factor=0.5,
             status_forcelist=[500, 502, 503, 504],
             allowed_methods=["POST"]
         )
-        self.session.mount('https://', HTTPAdapter(max_retries=retries))
+        self.session.mount('https://', HTTPAdapter(max_retries=self.retries))
         
         self.keys: Dict[str, str] = {}
 
+        # جلسة غير متزامنة (تنشأ كسولاً داخل حلقة الأحداث)
+        self._async_session = None
+        self._async_loop = None
+
     # =========================================================================
     # 1. Initialization (تحميل الذخيرة)
     # =========================================================================
@@ -77,6 +89,12 @@ class RemoteGateway(BaseAgent):
 
     def shutdown(self) -> None:
         self.session.close()
+        if self._async_session is not None and self._async_loop is not None and not self._async_loop.is_closed():
+            try:
+                asyncio.run_coroutine_threadsafe(self._async_session.close(), self._async_loop)
+            except RuntimeError:
+                pass
+        self._async_session = None
         super().shutdown()
 
     # =========================================================================
@@ -133,6 +151,67 @@ class RemoteGateway(BaseAgent):
             self._logger.error(f"💥 Critical Gateway Error: {e}")
             raise e
 
+    async def _execute_reasoning_async(self, prompt: str, context: Dict) -> str:
+        """
+        المسار غير المتزامن الأصلي: الطلب يخرج عبر aiohttp دون حجز خيط.
+        بدون aiohttp يعود إلى النقل الافتراضي (مجمع الخيوط).
+        """
+        if not AIOHTTP_AVAILABLE:
+            return await super()._execute_reasoning_async(prompt, context)
+
+        default_model = "google/gemini-2.0-flash-exp:free"
+        target_model = context.get("target_model", default_model)
+
+        api_key = self._select_best_key(target_model)
+        if not api_key:
+            return "⚠️ Security Error: No valid API Key found for this operation."
+
+        payload = self._construct_payload(prompt, target_model, context)
+        headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+            "HTTP-Referer": "https://alpha-sovereign.local",
+            "X-Title": "Alpha Sovereign Node"
+        }
+        timeout = aiohttp.ClientTimeout(total=int(context.get("timeout", 60)))
+        session = self._get_async_session()
+
+        # نفس سياسة المسار المتزامن (self.retries): أخطاء الاتصال وأخطاء 5xx تستهلك نفس العداد
+        for attempt in range(self.retries.total + 1):
+            retry_left = attempt < self.retries.total
+            try:
+                self._logger.debug(f"📡 Transmitting to Cloud (async): {target_model}...")
+                async with session.post(self.BASE_URL, json=payload, headers=headers, timeout=timeout) as response:
+                    status, text = response.status, await response.text()
+            except asyncio.TimeoutError:
+                self._logger.error(f"❌ Timeout contacting {target_model}")
+                raise TimeoutError("Gateway timed out.")
+            except aiohttp.ClientConnectionError as e:
+                if retry_left:
+                    self._logger.warning(f"🔁 Connection error ({e}). Retry {attempt + 1}/{self.retries.total}.")
+                    await asyncio.sleep(self._retry_backoff(attempt + 1))
+                    continue
+                self._logger.error("❌ Network Unreachable.")
+                raise ConnectionError("No Internet Connection.")
+
+            if status in self.retries.status_forcelist and retry_left:
+                await asyncio.sleep(self._retry_backoff(attempt + 1))
+                continue
+            return self._parse_body(status, text)
+
+    def _retry_backoff(self, retry_number: int) -> float:
+        """نفس تأخير urllib3: لا انتظار قبل أول إعادة، ثم backoff_factor * 2^(n-1)."""
+        if retry_number <= 1:
+            return 0.0
+        return self.retries.backoff_factor * (2 ** (retry_number - 1))
+
+    def _get_async_session(self):
+        loop = asyncio.get_running_loop()
+        if self._async_session is None or self._async_session.closed or self._async_loop is not loop:
+            self._async_session = aiohttp.ClientSession()
+            self._async_loop = loop
+        return self._async_session
+
     # =========================================================================
     # 3. Helper Methods (الذكاء الداخلي)
     # =========================================================================
@@ -187,16 +266,20 @@ class RemoteGateway(BaseAgent):
 
     def _parse_response(self, response: requests.Response) -> str:
         """فك تشفير الرد"""
-        if response.status_code != 200:
-            error_msg = f"HTTP {response.status_code}: {response.text[:200]}"
+        return self._parse_body(response.status_code, response.text)
+
+    def _parse_body(self, status_code: int, text: str) -> str:
+        """فك تشفير الرد (مشترك بين المسارين المتزامن وغير المتزامن)"""
+        if status_code != 200:
+            error_msg = f"HTTP {status_code}: {text[:200]}"
             self._logger.error(f"❌ API Error: {error_msg}")
             
-            if response.status_code == 401: return "⚠️ Auth Error: Invalid API Key."
-            if response.status_code == 429: return "⚠️ Rate Limit: Too many requests."
+            if status_code == 401: return "⚠️ Auth Error: Invalid API Key."
+            if status_code == 429: return "⚠️ Rate Limit: Too many requests."
             raise ValueError(error_msg)
 
         try:
-            data = response.json()
+            data = json.loads(text)
             if "error" in data:
                 err_content = data['error'].get('message', str(data['error']))
                 raise ValueError(f"Provider Error: {err_content}")
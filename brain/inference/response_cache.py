@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+"""
+ALPHA SOVEREIGN - LLM RESPONSE CACHE (THE SHORT-TERM RECALL)
+============================================================
+Path: alpha_project/brain/inference/response_cache.py
+Role: إعادة استخدام ردود النماذج للطلبات المتكررة بدلاً من دفع زمن وتكلفة استدعاء جديد.
+
+Forensic Features:
+  1. **Exact Tier**: مفتاح = نوع المهمة + هاش السياق + النص المطبع؛ مع TTL وإخلاء LRU.
+  2. **Semantic Tier (Optional)**: بحث تشابه عبر الفهرس المتجهي المحلي لطلبات متقاربة الصياغة؛
+     مجموعة محدودة الحجم تكنس نقاطها المنتهية دورياً (لا تنمو بلا حد).
+  3. **Context Isolation**: لا يعاد رد أبداً لسياق مختلف (نفس السؤال عن رمز آخر = طلب جديد).
+  4. **Hit-Rate Telemetry**: نسبة الإصابة تسجل دورياً في سجلات الراوتر.
+
+Status: PRODUCTION READY
+"""
+
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("Alpha.Brain.Router.Cache")
+
+# مفاتيح سياق تتغير مع كل طلب ولا تؤثر على الرد
+VOLATILE_CONTEXT_KEYS = {"request_id", "timeout", "target_model", "mode", "no_cache"}
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class ResponseCache:
+    """
+    ذاكرة ردود ثنائية الطبقة.
+    آمنة للخيوط (الراوتر قد يستدعى من عدة خيوط في آن واحد).
+    """
+
+    def __init__(self,
+                 ttl_s: float = 30.0,
+                 max_entries: int = 512,
+                 embed_fn: Optional[Callable[[str], List[float]]] = None,
+                 vector_index: Any = None,
+                 similarity_threshold: float = 0.95,
+                 collection: str = "llm_response_cache",
+                 max_semantic_entries: int = 2048,
+                 report_every: int = 100):
+        """
+        Args:
+            ttl_s: عمر الرد المخزن بالثواني.
+            max_entries: أقصى عدد ردود في الطبقة الدقيقة (الأقدم استخداماً يخلى أولاً).
+            embed_fn: دالة تضمين نص -> متجه. بدونها تعطل الطبقة الدلالية.
+            vector_index: فهرس متجهات يطبق store_memory / recall_similar (مثل EmbeddedVectorIndex).
+            similarity_threshold: أدنى تشابه جيبي لقبول رد من الطبقة الدلالية.
+            max_semantic_entries: أقصى عدد نقاط في المجموعة الدلالية (الأقدم يحذف أولاً).
+            report_every: تسجيل نسبة الإصابة كل N طلب.
+        """
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.embed_fn = embed_fn
+        self.vector_index = vector_index
+        self.similarity_threshold = similarity_threshold
+        self.collection = collection
+        self.max_semantic_entries = max_semantic_entries
+        self.report_every = report_every
+
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        # نقاط المجموعة الدلالية بترتيب الكتابة: معرف النقطة (UUID) -> وقت الانتهاء (ساعة الحائط، كما في payload)
+        self._semantic_keys: "OrderedDict[str, float]" = OrderedDict()
+        self._next_sweep = 0.0
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"lookups": 0, "exact_hits": 0, "semantic_hits": 0, "stores": 0, "evictions": 0,
+                                      "semantic_purged": 0}
+
+    @property
+    def semantic_enabled(self) -> bool:
+        return self.embed_fn is not None and self.vector_index is not None
+
+    def enable_semantic(self, embed_fn: Callable[[str], List[float]], vector_index: Any):
+        """
+        تفعيل الطبقة الدلالية لاحقاً (بعد تحميل نموذج التضمين).
+        المجموعة ملك هذه الذاكرة وحدها: ما بقي فيها من تشغيل سابق يحذف (عمره أطول من TTL غالباً
+        ولا نملك قائمة بمعرفاته لكنسه لاحقاً).
+        """
+        try:
+            vector_index.drop_collection(self.collection)
+        except Exception as e:
+            logger.warning(f"CACHE_SEMANTIC_RESET_FAIL: {e}")
+        with self._lock:
+            self._semantic_keys.clear()
+        self.embed_fn = embed_fn
+        self.vector_index = vector_index
+
+    # --- Keys ---
+
+    @staticmethod
+    def normalize_prompt(prompt: str) -> str:
+        """توحيد الصياغة: حالة الأحرف والمسافات فقط (الأرقام تبقى كما هي لأنها جزء من المعنى)."""
+        return _WHITESPACE.sub(" ", prompt.strip().casefold())
+
+    @staticmethod
+    def context_hash(context: Optional[Dict[str, Any]]) -> str:
+        """هاش السياق المؤثر: context_id إن وجد (من ContextEngine)، وإلا هاش الحقول الثابتة."""
+        context = context or {}
+        if context.get("context_id"):
+            return str(context["context_id"])
+        stable = {k: v for k, v in context.items() if k not in VOLATILE_CONTEXT_KEYS}
+        raw = json.dumps(stable, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+    def _key(self, task_type: str, ctx_hash: str, normalized: str) -> str:
+        return hashlib.sha256(f"{task_type}|{ctx_hash}|{normalized}".encode()).hexdigest()
+
+    @staticmethod
+    def _point_id(key: str) -> str:
+        """
+        معرف النقطة الدلالية: Qdrant يقبل UUID أو عدداً صحيحاً فقط، لا هاش hex خاماً.
+        أول 128 بت من المفتاح كـ UUID (نفس الطلب = نفس النقطة)؛ المفتاح الخام يحفظ في payload.
+        """
+        return str(uuid.UUID(key[:32]))
+
+    # --- Lookup / Store ---
+
+    def get(self, prompt: str, context: Optional[Dict[str, Any]], task_type: str) -> Optional[str]:
+        """إرجاع رد مخزن صالح، أو None."""
+        normalized = self.normalize_prompt(prompt)
+        ctx_hash = self.context_hash(context)
+        key = self._key(task_type, ctx_hash, normalized)
+        now = time.monotonic()
+
+        with self._lock:
+            self.stats["lookups"] += 1
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.stats["exact_hits"] += 1
+                    self._maybe_report()
+                    return entry[1]
+                del self._entries[key]
+
+        response = self._semantic_lookup(normalized, ctx_hash, task_type) if self.semantic_enabled else None
+        with self._lock:
+            if response is not None:
+                self.stats["semantic_hits"] += 1
+            self._maybe_report()
+        return response
+
+    def put(self, prompt: str, context: Optional[Dict[str, Any]], task_type: str, response: str):
+        """تخزين رد ناجح (يجب أن يكون قد اجتاز التحقق)."""
+        normalized = self.normalize_prompt(prompt)
+        ctx_hash = self.context_hash(context)
+        key = self._key(task_type, ctx_hash, normalized)
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_s, response)
+            self._entries.move_to_end(key)
+            self.stats["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+        if self.semantic_enabled:
+            expires_at = time.time() + self.ttl_s
+            point_id = self._point_id(key)
+            try:
+                self.vector_index.store_memory(
+                    self.collection,
+                    self.embed_fn(normalized),
+                    {"response": response, "context_hash": ctx_hash, "task_type": task_type,
+                     "expires_at": expires_at, "cache_key": key},
+                    memory_id=point_id
+                )
+            except Exception as e:
+                logger.warning(f"CACHE_SEMANTIC_STORE_FAIL: {e}")
+                return
+            with self._lock:
+                self._semantic_keys[point_id] = expires_at
+                self._semantic_keys.move_to_end(point_id)
+            self._sweep_semantic()
+
+    def _sweep_semantic(self, force: bool = False):
+        """
+        كنس المجموعة الدلالية: حذف النقاط المنتهية، ثم الأقدم إن تجاوز العدد الحد.
+        يعمل مرة كل TTL على الأكثر (أو عند تجاوز الحد)، والحذف يرسل دفعة واحدة.
+        عند تجاوز الحد يقص إلى 90% منه حتى لا يتحول كل put لاحق إلى حذف.
+        """
+        now = time.time()
+        with self._lock:
+            over = len(self._semantic_keys) > self.max_semantic_entries
+            if not (force or over or now >= self._next_sweep):
+                return
+            self._next_sweep = now + self.ttl_s
+            stale = []
+            # الترتيب ترتيب الكتابة، والـ TTL ثابت، فالمنتهية في المقدمة
+            for point_id, expires_at in self._semantic_keys.items():
+                if expires_at > now:
+                    break
+                stale.append(point_id)
+            for point_id in stale:
+                del self._semantic_keys[point_id]
+            if over:
+                target = int(self.max_semantic_entries * 0.9)
+                while len(self._semantic_keys) > target:
+                    stale.append(self._semantic_keys.popitem(last=False)[0])
+        self._purge_semantic(stale)
+
+    def _purge_semantic(self, point_ids: List[str]):
+        if not point_ids:
+            return
+        try:
+            self.vector_index.delete_memories(self.collection, point_ids)
+            with self._lock:
+                self.stats["semantic_purged"] += len(point_ids)
+        except Exception as e:
+            logger.warning(f"CACHE_SEMANTIC_PURGE_FAIL: {e}")
+
+    def _semantic_lookup(self, normalized: str, ctx_hash: str, task_type: str) -> Optional[str]:
+        try:
+            hits = self.vector_index.recall_similar(self.collection, self.embed_fn(normalized),
+                                                    limit=5, score_threshold=self.similarity_threshold)
+        except Exception as e:
+            logger.warning(f"CACHE_SEMANTIC_LOOKUP_FAIL: {e}")
+            return None
+
+        now = time.time()
+        expired = []
+        response = None
+        for hit in hits:
+            payload = hit.get("payload") or {}
+            if payload.get("expires_at", 0) <= now:
+                # منتهية: تحذف الآن بدل أن تشغل مقاعد النتائج حتى الكنس القادم
+                # (معرف الإصابة UUID نصي، وهو نفسه مفتاح _semantic_keys)
+                expired.append(str(hit.get("id")))
+                continue
+            # العزل: نفس السياق ونفس نوع المهمة فقط
+            if payload.get("context_hash") == ctx_hash and payload.get("task_type") == task_type:
+                response = payload.get("response")
+                break
+
+        if expired:
+            with self._lock:
+                for point_id in expired:
+                    self._semantic_keys.pop(point_id, None)
+            self._purge_semantic(expired)
+        return response
+
+    # --- Telemetry ---
+
+    def hit_rate(self) -> float:
+        lookups = self.stats["lookups"]
+        return (self.stats["exact_hits"] + self.stats["semantic_hits"]) / lookups if lookups else 0.0
+
+    def _maybe_report(self):
+        if self.report_every and self.stats["lookups"] % self.report_every == 0:
+            logger.info(
+                f"CACHE_STATS: hit_rate={self.hit_rate():.1%} | exact={self.stats['exact_hits']} "
+                f"semantic={self.stats['semantic_hits']} lookups={self.stats['lookups']} "
+                f"size={len(self._entries)} evictions={self.stats['evictions']} "
+                f"semantic_size={len(self._semantic_keys)} semantic_purged={self.stats['semantic_purged']}"
+            )
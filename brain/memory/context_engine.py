@@ -9,14 +9,19 @@ Forensic Features:
   - Stale Data Rejector (رفض البيانات القديمة).
   - Smart Token Budgeting (ميزانية ذكية للرموز).
   - Numpy-Safe Serialization (تسلسل آمن للأرقام).
+  - Incremental Assembly (عد الرموز وSHA-256 فقط للطبقات التي تغير نصها المسلسل).
+  - Fingerprint Change Detection (الطبقات ذات القيم الأولية تقارن ببصمة دون إعادة تسلسلها كل نبضة).
 =================================================================
 """
 
 import logging
 import json
 import hashlib
+import itertools
 import math
-from typing import Dict, List, Any, Optional, Union
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Tuple, Union
 from datetime import datetime, timedelta, timezone
 
 # محاولة استيراد مكتبات حساب الرموز الدقيقة، أو استخدام مقدر تقريبي
@@ -48,6 +53,68 @@ class AlphaJSONEncoder(json.JSONEncoder):
             pass
         return super().default(obj)
 
+@lru_cache(maxsize=8)
+def _get_encoder(model_name: str):
+    """
+    مرمز tiktoken لكل نموذج يبنى مرة واحدة فقط (بناؤه يحمل جداول BPE وهو مكلف).
+    None = غير متاح، فيستخدم التقدير التقريبي.
+    """
+    if not TOKENIZER_AVAILABLE:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except Exception:
+        return None
+
+
+# الغلاف الثابت للكبسولة: يطابق حرفياً ناتج json.dumps للقاموس النهائي
+_CAPSULE_TEMPLATE = ('{{"role": "SYSTEM_ALPHA_CORE", "market_data": {market}, '
+                     '"agent_state": {episodic}, "historical_analogies": [{history}]}}')
+
+
+# رقم تسلسلي لكل جزء مسلسل: يميز الأجزاء دون الاعتماد على id() الذي قد يعاد استخدامه
+_FRAGMENT_SEQ = itertools.count(1)
+
+
+# القيم الأولية التي تدخل البصمة كما هي (أي نوع آخر، مثل numpy، يلزمه التسلسل الكامل)
+_SCALAR_TYPES = (str, int, float, bool, type(None))
+
+
+def _fingerprint(value: Any) -> Optional[Tuple]:
+    """
+    بصمة رخيصة لقاموس/قائمة من القيم الأولية (مع تداخل): لقطة tuple تقارن دون json.dumps.
+    لقطة للقيم لا للمرجع، فالتعديل في المكان يغير البصمة؛ والنوع جزء منها لأن 1 و1.0 وTrue
+    متساوية في المقارنة لكن نصوصها المسلسلة مختلفة. None = يلزم التسلسل الكامل للمقارنة.
+    """
+    if isinstance(value, dict):
+        pairs = value.items()
+    elif isinstance(value, (list, tuple)):
+        pairs = enumerate(value)
+    else:
+        return None
+    parts = [type(value)]
+    for k, v in pairs:
+        if type(v) in _SCALAR_TYPES:
+            parts.append((k, type(v), v))
+            continue
+        sub = _fingerprint(v)
+        if sub is None:
+            return None
+        parts.append((k, sub))
+    return tuple(parts)
+
+
+class _LayerEntry:
+    """طبقة مسلسلة مع عدد رموزها وبصمتها (تعاد فقط إذا تغير نصها المسلسل)."""
+    __slots__ = ("text", "tokens", "seq", "fingerprint")
+
+    def __init__(self, text: str, tokens: int, fingerprint: Optional[Tuple] = None):
+        self.text = text
+        self.tokens = tokens
+        self.seq = next(_FRAGMENT_SEQ)
+        self.fingerprint = fingerprint
+
+
 class ContextEngine:
     """
     المحرك المسؤول عن تحويل البيانات الخام إلى "مشهد عقلي" (Mental Scene) للذكاء الاصطناعي.
@@ -59,6 +126,15 @@ class ContextEngine:
         self.model_name = model_name
         self.max_tokens = max_token_limit
         self.last_context_hash = None
+
+        # ذاكرة البناء التراكمي: لكل رمز طبقاته الأخيرة وآخر كبسولة وهاشها
+        self._layers: Dict[str, Dict[str, _LayerEntry]] = {}
+        self._capsules: Dict[str, Tuple[Tuple[int, ...], str, str, int]] = {}
+        # عناصر التاريخ الدلالي تتكرر بين النبضات: بصمة (أو json) -> (json, tokens, seq)
+        self._item_cache: "OrderedDict[Union[Tuple, str], Tuple[str, int, int]]" = OrderedDict()
+        self._item_cache_size = 2048
+        self.cache_stats = {"layer_hits": 0, "layer_builds": 0, "hash_reused": 0}
+        self._envelope_tokens = self._estimate_tokens(_CAPSULE_TEMPLATE)
         
         # ميزانية الرموز (Token Budget Allocation)
         # نضمن مساحة للبيانات الحرجة دائماً
@@ -102,7 +178,7 @@ class ContextEngine:
             # الطبقة أ: الحقائق الصلبة (Immutable)
             layer_market = {
                 "asset": symbol,
-                "t": datetime.now(timezone.utc).isoformat(),
+                "t": self._data_time(market_data),
                 "price": market_data.get("price"),
                 "indicators": market_data.get("technical", {}),
                 "order_book_imbalance": market_data.get("ob_imbalance", 0.0)
@@ -121,21 +197,38 @@ class ContextEngine:
                 for m in long_term
             ]
 
-            # 4. دمج وضغط السياق (Optimization & Budgeting)
-            final_context = self._optimize_context_structure(
-                layer_market, layer_episodic, layer_semantic
-            )
+            # 4. تسلسل الطبقات المتغيرة فقط
+            layers = self._layers.setdefault(symbol, {})
+            market_entry = self._layer(layers, "market", layer_market)
+            episodic_entry = self._layer(layers, "episodic", layer_episodic)
 
-            # 5. التوقيع الجنائي (Forensic Hashing)
+            # 5. دمج وضغط السياق (Optimization & Budgeting)
+            history = self._fit_history(layer_semantic, market_entry.tokens + episodic_entry.tokens)
+
+            # 6. التوقيع الجنائي (Forensic Hashing)
             # ننشئ بصمة فريدة لهذا السياق. إذا حدث خطأ، نبحث بهذا الهاش في السجلات.
-            context_str = json.dumps(final_context, cls=AlphaJSONEncoder)
-            context_hash = hashlib.sha256(context_str.encode()).hexdigest()[:16]
+            # نفس الأجزاء المسلسلة = نفس النص = نفس الهاش، فلا نعيد التجميع ولا SHA-256.
+            key = (market_entry.seq, episodic_entry.seq) + tuple(h[2] for h in history)
+            cached = self._capsules.get(symbol)
+            if cached is not None and cached[0] == key:
+                _, context_str, context_hash, token_count = cached
+                self.cache_stats["hash_reused"] += 1
+            else:
+                context_str = _CAPSULE_TEMPLATE.format(
+                    market=market_entry.text,
+                    episodic=episodic_entry.text,
+                    history=", ".join(h[0] for h in history)
+                )
+                context_hash = hashlib.sha256(context_str.encode()).hexdigest()[:16]
+                token_count = (market_entry.tokens + episodic_entry.tokens
+                               + sum(h[1] for h in history) + self._envelope_tokens)
+                self._capsules[symbol] = (key, context_str, context_hash, token_count)
             self.last_context_hash = context_hash
 
             return {
                 "context_id": context_hash,
                 "prompt": context_str,
-                "token_count": self._estimate_tokens(context_str)
+                "token_count": token_count
             }
 
         except Exception as e:
@@ -169,38 +262,74 @@ class ContextEngine:
             self.logger.warning(f"Timestamp parsing failed for: {ts}")
             return True
 
-    def _optimize_context_structure(self, market: Dict, episodic: Dict, semantic: List) -> Dict:
+    @staticmethod
+    def _data_time(data: Dict[str, Any]) -> str:
         """
-        تقليم ذكي يعتمد على الأولويات وليس الحذف العشوائي.
+        وقت الكبسولة = وقت بيانات السوق (وليس وقت البناء)،
+        حتى تعطي المدخلات نفسها الكبسولة نفسها والهاش نفسه.
+        """
+        ts = data.get("timestamp") or data.get("time") or data.get("t")
+        if isinstance(ts, (int, float)):
+            if ts > 1e11: ts /= 1000
+            return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
+        if ts:
+            return str(ts)
+        return datetime.now(timezone.utc).isoformat()
+
+    def _layer(self, layers: Dict[str, _LayerEntry], name: str, value: Any) -> _LayerEntry:
+        """
+        إرجاع الطبقة المخزنة إن لم يتغير محتواها، وإلا تسلسلها وعد رموزها مرة واحدة.
+        المقارنة على لقطة القيم لا على الكائن: المتصل قد يعدل قاموساً متداخلاً في مكانه
+        (market_data["technical"][...] = x) فتبقى المقارنة بالمرجع صحيحة زوراً.
+        البصمة تكفي للطبقات ذات القيم الأولية؛ غيرها (numpy...) يقارن بنصه المسلسل.
+        """
+        fingerprint = _fingerprint(value)
+        entry = layers.get(name)
+        if entry is not None and fingerprint is not None and entry.fingerprint == fingerprint:
+            self.cache_stats["layer_hits"] += 1
+            return entry
+        text = json.dumps(value, cls=AlphaJSONEncoder)
+        if entry is not None and entry.text == text:
+            entry.fingerprint = fingerprint
+            self.cache_stats["layer_hits"] += 1
+            return entry
+        entry = layers[name] = _LayerEntry(text, self._estimate_tokens(text), fingerprint)
+        self.cache_stats["layer_builds"] += 1
+        return entry
+
+    def _fit_history(self, semantic: List[Dict], base_tokens: int) -> List[Tuple[str, int, int]]:
+        """
+        تقليم ذكي يعتمد على الأولويات وليس الحذف العشوائي:
+        إضافة التاريخ بقدر ما تسمح الميزانية بعد الحقائق الصلبة والحالة الداخلية،
+        مع تسلسل كل عنصر وعد رموزه مرة واحدة عبر كل النبضات (المفتاح بصمته،
+        أو نصه المسلسل إذا احتوى قيماً غير أولية).
         """
-        # حساب مبدئي
-        base = {"market": market, "internal": episodic}
-        base_tokens = self._estimate_tokens(json.dumps(base, cls=AlphaJSONEncoder))
-        
         remaining_budget = self.max_tokens - base_tokens
-        
-        # إضافة التاريخ بقدر ما تسمح الميزانية
-        fitted_history = []
+        fitted = []
         for item in semantic:
-            item_tokens = self._estimate_tokens(json.dumps(item, cls=AlphaJSONEncoder))
-            if remaining_budget >= item_tokens:
-                fitted_history.append(item)
-                remaining_budget -= item_tokens
+            key = _fingerprint(item)
+            if key is None:
+                key = json.dumps(item, cls=AlphaJSONEncoder)
+            cached = self._item_cache.get(key)
+            if cached is None:
+                text = key if isinstance(key, str) else json.dumps(item, cls=AlphaJSONEncoder)
+                cached = self._item_cache[key] = (text, self._estimate_tokens(text), next(_FRAGMENT_SEQ))
+                if len(self._item_cache) > self._item_cache_size:
+                    self._item_cache.popitem(last=False)
+            else:
+                self._item_cache.move_to_end(key)
+            if remaining_budget >= cached[1]:
+                fitted.append(cached)
+                remaining_budget -= cached[1]
             else:
                 break # توقف عند امتلاء الذاكرة
-        
-        return {
-            "role": "SYSTEM_ALPHA_CORE",
-            "market_data": market,
-            "agent_state": episodic,
-            "historical_analogies": fitted_history
-        }
+        return fitted
 
     def _estimate_tokens(self, text: str) -> int:
         """حساب دقيق أو تقديري للرموز"""
-        if TOKENIZER_AVAILABLE:
+        enc = _get_encoder(self.model_name)
+        if enc is not None:
             try:
-                enc = tiktoken.encoding_for_model(self.model_name)
                 return len(enc.encode(text))
             except:
                 pass # Fallback to approximation
@@ -9,7 +9,7 @@
 
 import logging
 import networkx as nx
-from typing import Dict, List, Any, Tuple, Optional
+from typing import Dict, List, Any, Tuple, Optional, Mapping
 
 class KnowledgeGraph:
     """
@@ -46,6 +46,47 @@ class KnowledgeGraph:
         self.graph.add_edge(source, target, weight=weight, type=relation_type)
         self.logger.debug(f"GRAPH_UPDATE: Added {source} --[{relation_type}]--> {target}")
 
+    def sync_correlations(self,
+                          snapshot: Any,
+                          threshold: float = 0.5,
+                          aliases: Optional[Mapping[str, str]] = None) -> Dict[str, int]:
+        """
+        مزامنة حواف الارتباط مع لقطة التغاير الحية (CovarianceSnapshot).
+          - حواف CORRELATION / INVERSE_CORRELATION المعروفة تأخذ الارتباط الحي بدلاً من الثابت.
+          - الأزواج ذات |ρ| >= threshold تضاف كحواف LIVE_CORRELATION في الاتجاهين.
+          - حواف LIVE_CORRELATION التي ضعف ارتباطها تحت العتبة تزال.
+
+        Args:
+            snapshot: لقطة للقراءة فقط من EwmaCovarianceEngine.latest().
+            aliases: تحويل رموز اللقطة إلى أسماء العقد (مثلاً {"BTCUSDT": "BTC"}).
+        """
+        aliases = aliases or {}
+        to_symbol = {aliases.get(s, s): s for s in snapshot.symbols}
+        stats = {"updated": 0, "added": 0, "removed": 0}
+
+        for source, target, data in list(self.graph.edges(data=True)):
+            if data.get("type") not in ("CORRELATION", "INVERSE_CORRELATION", "LIVE_CORRELATION"):
+                continue
+            if source not in to_symbol or target not in to_symbol:
+                continue
+            rho = snapshot.correlation(to_symbol[source], to_symbol[target])
+            if data["type"] == "LIVE_CORRELATION" and abs(rho) < threshold:
+                self.graph.remove_edge(source, target)
+                stats["removed"] += 1
+            else:
+                data["weight"] = round(rho, 3)
+                stats["updated"] += 1
+
+        for a, b, rho in snapshot.strong_pairs(threshold):
+            a, b = aliases.get(a, a), aliases.get(b, b)
+            for source, target in ((a, b), (b, a)):
+                if not self.graph.has_edge(source, target):
+                    self.graph.add_edge(source, target, weight=round(rho, 3), type="LIVE_CORRELATION")
+                    stats["added"] += 1
+
+        self.logger.info(f"GRAPH_CORR_SYNC: {stats} (n={snapshot.n_updates})")
+        return stats
+
     def propagate_shock(self, event_node: str, initial_impact: float = 1.0) -> Dict[str, float]:
         """
         محاكاة انتشار الصدمة (Ripple Effect Simulation).
@@ -9,12 +9,13 @@
 
 import logging
 import json
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 
 # استيراد عميل قاعدة البيانات المتجهة (تمت الإشارة إليه في الملف 85)
 # نفترض وجوده كواجهة للتعامل مع Qdrant أو Pinecone
-from data.storage.vector.qdrant_client import AlphaQdrantClient
+from data.storage.vector.qdrant_client import create_vector_client
+from data.storage.vector.write_buffer import VectorWriteBuffer
 
 class SemanticMemory:
     """
@@ -25,7 +26,8 @@ class SemanticMemory:
 
     def __init__(self):
         self.logger = logging.getLogger("Alpha.Brain.Memory.Semantic")
-        self.vector_db = AlphaQdrantClient()
+        self.vector_db = create_vector_client()
+        self.write_buffer = VectorWriteBuffer(self.vector_db, max_points=128, max_delay_s=5.0)
         
         # مجموعات المعرفة (Knowledge Collections)
         self.collections = {
@@ -37,44 +39,72 @@ class SemanticMemory:
     async def consolidate_lesson(self, 
                                  context_vector: List[float], 
                                  outcome: Dict[str, Any], 
-                                 lesson_tags: List[str]) -> bool:
+                                 lesson_tags: List[str],
+                                 flush: bool = True) -> bool:
         """
         ترسيخ درس جديد في الذاكرة الطويلة (Learning).
         يتم استدعاء هذه الدالة بعد إغلاق الصفقة وتحليل نتائجها.
+        الافتراضي flush=True: True تعني أن الدرس كتب فعلاً (مع أي دروس معلقة أخرى).
         
         Args:
             context_vector: تمثيل رقمي لحالة السوق وقت الدخول.
             outcome: النتيجة {profit: 100, success: True, reason: "Good trend"}.
             lesson_tags: وسوم للبحث (e.g., ["BULL_FLAG", "HIGH_VOLATILITY"]).
         """
+        return await self.consolidate_lessons([(context_vector, outcome, lesson_tags)], flush=flush)
+
+    async def consolidate_lessons(self,
+                                  lessons: List[Tuple[List[float], Dict[str, Any], List[str]]],
+                                  flush: bool = False) -> bool:
+        """
+        ترسيخ مجموعة دروس دفعة واحدة (تعلم نهاية الجلسة).
+        الدروس تمر عبر مخزن الكتابة المؤقت، و flush=True يجبر الكتابة فوراً.
+        بدون flush: True تعني القبول في المخزن فقط (الكتابة الفعلية عند التفريغ أو close()).
+
+        Args:
+            lessons: قائمة (context_vector, outcome, lesson_tags).
+        """
         try:
-            # صياغة "الذاكرة"
-            memory_point = {
-                "vector": context_vector,
-                "payload": {
-                    "timestamp": datetime.utcnow().isoformat(),
-                    "tags": lesson_tags,
-                    "outcome_summary": outcome,
-                    "effectiveness": outcome.get("roi_pct", 0.0)
+            timestamp = datetime.utcnow().isoformat()
+
+            # صياغة "الذكريات"
+            memory_points = [
+                {
+                    "vector": context_vector,
+                    "payload": {
+                        "timestamp": timestamp,
+                        "tags": lesson_tags,
+                        "outcome_summary": outcome,
+                        "effectiveness": outcome.get("roi_pct", 0.0)
+                    }
                 }
-            }
-            
+                for context_vector, outcome, lesson_tags in lessons
+            ]
+
             # تخزين في قاعدة البيانات المتجهة
             # النظام يتعلم: "في مثل هذه الظروف (Vector)، كانت النتيجة X"
-            success = await self.vector_db.upsert(
-                collection_name=self.collections["STRATEGY_RESULTS"],
-                points=[memory_point]
-            )
-            
+            success = await self.write_buffer.add(self.collections["STRATEGY_RESULTS"], memory_points)
+            if flush:
+                success = await self.write_buffer.flush()
+
             if success:
-                self.logger.info(f"LEARNING: Lesson consolidated. Tags: {lesson_tags}")
-                
+                state = "consolidated" if flush else "buffered"
+                self.logger.info(f"LEARNING: {len(memory_points)} lesson(s) {state}.")
+
             return success
 
         except Exception as e:
             self.logger.error(f"CONSOLIDATION_FAIL: {e}")
             return False
 
+    async def flush(self) -> bool:
+        """إجبار كتابة الدروس المعلقة في المخزن المؤقت."""
+        return await self.write_buffer.flush()
+
+    async def close(self) -> bool:
+        """تفريغ نهائي عند نهاية الجلسة (لا تضيع الدروس المعلقة مع الإغلاق)."""
+        return await self.write_buffer.close()
+
     async def recall_similar_experience(self, current_market_vector: List[float], top_k: int = 3) -> List[Dict[str, Any]]:
         """
         استدعاء الخبرات المشابهة (Recall).
@@ -93,23 +123,47 @@ class SemanticMemory:
                 limit=top_k
             )
             
-            # تحليل النتائج المسترجعة
-            # إذا كانت معظم النتائج المشابهة "خسارة"، فهذا تحذير قوي
-            experiences = []
-            for point in results:
-                experiences.append({
-                    "similarity_score": point.score, # مدى الشبه (0.0 to 1.0)
-                    "date": point.payload.get("timestamp"),
-                    "outcome": point.payload.get("outcome_summary"),
-                    "lesson": f"Similar scenario yielded {point.payload.get('effectiveness')}% ROI"
-                })
-                
-            return experiences
+            return self._to_experiences(results)
 
         except Exception as e:
             self.logger.error(f"RECALL_FAIL: {e}")
             return []
 
+    async def recall_similar_experiences(self,
+                                         market_vectors: List[List[float]],
+                                         top_k: int = 3) -> List[List[Dict[str, Any]]]:
+        """
+        استدعاء الخبرات المشابهة لعدة حالات سوق (رموز متعددة) في استدعاء واحد.
+        """
+        if len(market_vectors) == 0:
+            return []
+        try:
+            batch_results = await self.vector_db.search_batch(
+                collection_name=self.collections["STRATEGY_RESULTS"],
+                query_vectors=market_vectors,
+                limit=top_k
+            )
+            return [self._to_experiences(results) for results in batch_results]
+
+        except Exception as e:
+            self.logger.error(f"RECALL_FAIL: {e}")
+            return [[] for _ in market_vectors]
+
+    def _to_experiences(self, results) -> List[Dict[str, Any]]:
+        """
+        تحليل النتائج المسترجعة.
+        إذا كانت معظم النتائج المشابهة "خسارة"، فهذا تحذير قوي.
+        """
+        experiences = []
+        for point in results:
+            experiences.append({
+                "similarity_score": point.score, # مدى الشبه (0.0 to 1.0)
+                "date": point.payload.get("timestamp"),
+                "outcome": point.payload.get("outcome_summary"),
+                "lesson": f"Similar scenario yielded {point.payload.get('effectiveness')}% ROI"
+            })
+        return experiences
+
     def get_abstract_concept(self, concept_key: str) -> Optional[Dict[str, Any]]:
         """
         استرجاع قاعدة ثابتة أو تعريف (Rule-Based Memory).
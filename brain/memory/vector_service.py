@@ -9,8 +9,9 @@
 
 import logging
 import numpy as np
-from typing import Dict, List, Any, Optional, Union
-from data.storage.vector.qdrant_client import AlphaQdrantClient
+from typing import Dict, List, Any, Optional, Union, Tuple
+from data.storage.vector.qdrant_client import create_vector_client
+from data.storage.vector.write_buffer import VectorWriteBuffer
 
 class VectorService:
     """
@@ -23,8 +24,11 @@ class VectorService:
         self.logger = logging.getLogger("Alpha.Brain.Memory.VectorSvc")
         
         # الاتصال بقاعدة البيانات الخلفية
-        # (تم تعريف العميل في ملف سابق 85)
-        self.db_client = AlphaQdrantClient()
+        # (Qdrant إن كان متاحاً، وإلا الفهرس المحلي المدمج بنفس الواجهة)
+        self.db_client = create_vector_client()
+
+        # مخزن الكتابة المؤجلة: الكتابات المتفرقة تجمع وتفرغ حسب الحجم أو الزمن
+        self.write_buffer = VectorWriteBuffer(self.db_client, max_points=256, max_delay_s=2.0)
         
         # عتبة التشابه المقبولة (Similarity Threshold)
         # أي نتيجة تشابهها أقل من 75% تعتبر "غير ذات صلة"
@@ -61,18 +65,7 @@ class VectorService:
             )
 
             # 3. تصفية ومعالجة النتائج
-            relevant_memories = []
-            for hit in search_results:
-                # تجاهل النتائج الضعيفة (Noise Filtering)
-                if hit.score < self.similarity_threshold:
-                    continue
-
-                relevant_memories.append({
-                    "id": hit.id,
-                    "similarity": round(hit.score, 4),
-                    "payload": hit.payload, # البيانات الوصفية (النتيجة، التاريخ، الزوج)
-                    "vector": hit.vector if hasattr(hit, 'vector') else None
-                })
+            relevant_memories = self._filter_hits(search_results)
 
             if relevant_memories:
                 self.logger.debug(f"VECTOR_HIT: Found {len(relevant_memories)} similar events in {collection} (Top Score: {relevant_memories[0]['similarity']})")
@@ -85,29 +78,87 @@ class VectorService:
             self.logger.error(f"VECTOR_SEARCH_FAIL: {e}")
             return []
 
+    async def search_memory_batch(self,
+                                  collection: str,
+                                  query_vectors: List[List[float]],
+                                  limit: int = 5,
+                                  filter_tags: Optional[List[str]] = None) -> List[List[Dict[str, Any]]]:
+        """
+        البحث لعدة متجهات دفعة واحدة (مثلاً: حالة كل رمز في قائمة المراقبة).
+        استدعاء واحد لقاعدة البيانات بدلاً من استدعاء لكل رمز.
+
+        Returns:
+            قائمة نتائج لكل متجه استعلام بنفس الترتيب.
+        """
+        if len(query_vectors) == 0:
+            return []
+        try:
+            normalized = self._normalize_matrix(query_vectors)
+            batch_results = await self.db_client.search_batch(
+                collection_name=collection,
+                query_vectors=normalized,
+                limit=limit,
+                tags=filter_tags
+            )
+            return [self._filter_hits(hits) for hits in batch_results]
+
+        except Exception as e:
+            self.logger.error(f"VECTOR_BATCH_SEARCH_FAIL: {e}")
+            return [[] for _ in query_vectors]
+
+    def _filter_hits(self, hits) -> List[Dict[str, Any]]:
+        """تجاهل النتائج الضعيفة (Noise Filtering) وتوحيد صيغة الإخراج."""
+        relevant_memories = []
+        for hit in hits:
+            if hit.score < self.similarity_threshold:
+                continue
+
+            relevant_memories.append({
+                "id": hit.id,
+                "similarity": round(hit.score, 4),
+                "payload": hit.payload, # البيانات الوصفية (النتيجة، التاريخ، الزوج)
+                "vector": hit.vector if hasattr(hit, 'vector') else None
+            })
+        return relevant_memories
+
     async def archive_experience(self, 
                                  collection: str, 
                                  vector: List[float], 
                                  metadata: Dict[str, Any]) -> bool:
         """
         أرشفة تجربة جديدة (كتابة في الذاكرة).
+        الكتابة تمر عبر المخزن المؤقت وتفرغ مع غيرها حسب الحجم أو الزمن.
+        """
+        return await self.archive_experiences(collection, [(vector, metadata)])
+
+    async def archive_experiences(self,
+                                  collection: str,
+                                  items: List[Tuple[List[float], Dict[str, Any]]]) -> bool:
+        """
+        أرشفة مجموعة تجارب دفعة واحدة (مثلاً: تعلم نهاية الجلسة).
         """
+        if not items:
+            return True
         try:
-            # تطبيع المتجه قبل التخزين لضمان الاتساق
-            norm_vector = self._normalize_vector(vector)
-            
-            success = await self.db_client.upsert(
-                collection_name=collection,
-                points=[{
-                    "vector": norm_vector,
-                    "payload": metadata
-                }]
-            )
-            return success
+            # تطبيع المتجهات قبل التخزين لضمان الاتساق
+            norm_vectors = self._normalize_matrix([vec for vec, _ in items])
+            points = [
+                {"vector": vec, "payload": metadata}
+                for vec, (_, metadata) in zip(norm_vectors, items)
+            ]
+            return await self.write_buffer.add(collection, points)
         except Exception as e:
             self.logger.error(f"VECTOR_WRITE_FAIL: {e}")
             return False
 
+    async def flush(self) -> bool:
+        """إجبار تفريغ الكتابات المعلقة (قبل الإغلاق أو نهاية الجلسة)."""
+        return await self.write_buffer.flush()
+
+    async def close(self) -> bool:
+        """تفريغ نهائي عند نهاية الجلسة."""
+        return await self.write_buffer.close()
+
     def _normalize_vector(self, vector: Union[List[float], np.ndarray]) -> List[float]:
         """
         تحويل المتجه إلى متجه وحدة (Unit Vector).
@@ -122,6 +173,13 @@ class VectorService:
             
         return (np_vec / norm).tolist()
 
+    def _normalize_matrix(self, vectors: Union[List[List[float]], np.ndarray]) -> List[List[float]]:
+        """تطبيع عدة متجهات في عملية واحدة (المتجهات الصفرية تبقى كما هي)."""
+        mat = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        norms = np.linalg.norm(mat, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (mat / norms).tolist()
+
     def health_check(self) -> bool:
         """فحص اتصال خدمة المتجهات."""
         try:
@@ -9,18 +9,30 @@ Forensic Features:
   - Evidence Weighting (وزن متغير للأدلة حسب سياق السوق).
   - Devil's Advocate Protocol (محامي الشيطان المدمج).
   - Traceability Hash (توقيع جنائي لكل سلسلة تفكير).
+  - Compiled Rule Table (العتبات والأوزان من config/logic/cot_rules.yaml، والتقييم على متجه خصائص مسطح).
+  - Lazy Trace (الأثر المقروء يبنى فقط عند التنفيذ أو طلب التدقيق).
 =================================================================
 """
 
 import logging
+import operator
 import uuid
-import hashlib
-import json
-from typing import Dict, List, Any, Optional, Tuple
-from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Sequence, Tuple, Union
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from enum import Enum
 
+import numpy as np
+
+try:
+    import yaml
+    YAML_AVAILABLE = True
+except ImportError:
+    YAML_AVAILABLE = False
+
+RULES_PATH = Path(__file__).resolve().parent.parent.parent / "config" / "logic" / "cot_rules.yaml"
+
 class ReasoningPhase(Enum):
     FOUNDATION = "FOUNDATION" # البنية التحتية (Macro)
     TACTICAL = "TACTICAL"     # التكتيك (Tech/Flow)
@@ -50,219 +62,443 @@ class DecisionTrace:
     veto_triggered: bool = False
     veto_reason: Optional[str] = None
 
+# =================================================================
+# Feature Schema (متجه الخصائص المسطح)
+# =================================================================
+
+# (اسم الخاصية، المسار في السياق، القيمة الافتراضية)
+FEATURES: Tuple[Tuple[str, Tuple[str, str], Any], ...] = (
+    ("regime", ("macro", "regime"), "NEUTRAL"),
+    ("vix", ("macro", "volatility_index"), 20.0),
+    ("trend", ("technical", "trend"), "SIDEWAYS"),
+    ("rsi", ("technical", "rsi"), 50.0),
+    ("ofi", ("order_flow", "ofi"), 0.0),
+    ("intent", ("sentiment", "overall"), "NEUTRAL"),
+    ("sent_score", ("sentiment", "score"), 0.0),
+    ("leverage", ("account", "leverage"), 1.0),
+    ("drawdown", ("account", "drawdown_pct"), 0.0),
+)
+FEATURE_INDEX = {name: i for i, (name, _, _) in enumerate(FEATURES)}
+CATEGORICAL = {"regime", "trend", "intent"}
+
+# ترميز ثابت للقيم المعروفة؛ القيم الجديدة تضاف عند أول ظهور
+_VOCAB: Dict[str, Dict[str, float]] = {
+    "regime": {"NEUTRAL": 0.0, "RISK_ON": 1.0, "RISK_OFF": -1.0},
+    "trend": {"SIDEWAYS": 0.0, "UP": 1.0, "DOWN": -1.0},
+    "intent": {"NEUTRAL": 0.0, "BULLISH": 1.0, "BEARISH": -1.0},
+}
+_LABELS: Dict[str, Dict[float, str]] = {f: {v: k for k, v in m.items()} for f, m in _VOCAB.items()}
+
+
+def _encode(feature: str, label: Any) -> float:
+    vocab = _VOCAB[feature]
+    code = vocab.get(label)
+    if code is None:
+        code = vocab[label] = float(len(vocab) + 1)
+        _LABELS[feature][code] = label
+    return code
+
+
+def extract_features(ctx: Dict[str, Any]) -> List[float]:
+    """تحويل السياق المتداخل إلى متجه خصائص مسطح (مرة واحدة لكل سياق)."""
+    row = []
+    for name, (section, key), default in FEATURES:
+        value = (ctx.get(section) or {}).get(key, default)
+        row.append(_encode(name, value) if name in CATEGORICAL else float(value))
+    return row
+
+
+def _decode_row(row: Sequence[float]) -> Dict[str, Any]:
+    """قيم قابلة للعرض (للقوالب النصية في الأثر المقروء)."""
+    out = {}
+    for i, (name, _, _) in enumerate(FEATURES):
+        v = float(row[i])
+        out[name] = _LABELS[name].get(v, v) if name in CATEGORICAL else v
+    return out
+
+# =================================================================
+# Compiled Rule Table (جدول القواعد المترجم)
+# =================================================================
+
+DEFAULT_RULES: Dict[str, Any] = {
+    "weights": {"FOUNDATION": 0.25, "TACTICAL": 0.35, "SENTIMENT": 0.20, "RISK": 0.20},
+    "fail_fast": {"phase": "FOUNDATION", "below": 0.3, "score": 0.1},
+    "risk_veto": {"phase": "RISK", "below": 0.8},
+    "verdicts": [{"min": 0.75, "label": "STRONG_BUY"}, {"min": 0.60, "label": "WEAK_BUY"}],
+    "default_verdict": "HOLD/REJECT",
+    "phases": {
+        "FOUNDATION": {
+            "premise": "Capital requires stability or clear trends.",
+            "observation": "Regime: {regime}, VIX: {vix}",
+            "rules": [
+                {"when": {"all": [["regime", "eq", "RISK_ON"], ["vix", "lt", 25]]},
+                 "score": 0.9, "deduction": "Favorable macro winds (Risk-On)."},
+                {"when": {"any": [["regime", "eq", "RISK_OFF"], ["vix", "gt", 35]]},
+                 "score": 0.2, "deduction": "Hostile environment (High Volatility/Risk-Off)."},
+            ],
+            "default": {"score": 0.5, "deduction": "Market environment is neutral."},
+        },
+        "TACTICAL": {
+            "premise": "Align with the path of least resistance.",
+            "observation": "Trend: {trend}, OFI: {ofi:.2f}, RSI: {rsi}",
+            "rules": [
+                {"when": {"all": [["trend", "eq", "UP"], ["ofi", "gt", 0.2]]},
+                 "score": 0.95, "deduction": "Strong confluence: Trend + Buying Pressure."},
+                {"when": {"all": [["trend", "eq", "UP"], ["ofi", "lt", -0.2]]},
+                 "score": 0.4, "deduction": "Divergence warning: Price rising but whales selling."},
+                {"when": {"all": [["trend", "eq", "DOWN"]]},
+                 "score": 0.1, "deduction": "Trend is bearish."},
+            ],
+            "default": {"score": 0.5, "deduction": "No clear tactical advantage."},
+        },
+        "SENTIMENT": {
+            "premise": "Crowd psychology drives short-term moves.",
+            "observation": "Intent: {intent}, Score: {sent_score:.2f}",
+            "rules": [
+                {"when": {"all": [["intent", "eq", "BULLISH"]]},
+                 "score": {"offset": 0.5, "scale": 0.5, "feature": "sent_score", "abs": True},
+                 "deduction": "Market sentiment is {intent}."},
+            ],
+            "default": {"score": {"offset": 0.5, "scale": -0.5, "feature": "sent_score", "abs": True},
+                        "deduction": "Market sentiment is {intent}."},
+        },
+        "RISK": {
+            "premise": "Risk parameters within safety limits.",
+            "observation": "Lev: {leverage}x, DD: {drawdown:.1%}",
+            "rules": [
+                {"when": {"any": [["leverage", "gt", 3.0], ["drawdown", "gt", 0.15]]},
+                 "score": 0.0, "premise": "Preservation of capital is paramount.",
+                 "deduction": "CRITICAL RISK LEVEL EXCEEDED."},
+            ],
+            "default": {"score": 1.0, "deduction": "Trade is permissive within risk budget."},
+        },
+    },
+}
+
+_OPS = {"eq": operator.eq, "ne": operator.ne, "lt": operator.lt,
+        "le": operator.le, "gt": operator.gt, "ge": operator.ge}
+
+PHASE_ORDER = (ReasoningPhase.FOUNDATION, ReasoningPhase.TACTICAL,
+               ReasoningPhase.SENTIMENT, ReasoningPhase.RISK)
+_STEP_IDS = {ReasoningPhase.FOUNDATION: "STEP-FND", ReasoningPhase.TACTICAL: "STEP-TAC",
+             ReasoningPhase.SENTIMENT: "STEP-SNT", ReasoningPhase.RISK: "STEP-RSK"}
+
+# رموز الحكم في مسار الدفعات
+CODE_REJECTED, CODE_BLOCKED = -2, -1
+
+
+class _CompiledRule:
+    """قاعدة مترجمة: شروط على فهارس المتجه + درجة (ثابتة أو خطية)."""
+    __slots__ = ("conds", "any_mode", "offset", "scale", "feature", "use_abs", "premise", "deduction")
+
+    def __init__(self, spec: Dict[str, Any], premise: str):
+        when = spec.get("when") or {}
+        self.any_mode = "any" in when
+        self.conds = []
+        for name, op, value in (when.get("any") or when.get("all") or []):
+            idx = FEATURE_INDEX[name]
+            target = _encode(name, value) if name in CATEGORICAL else float(value)
+            self.conds.append((idx, _OPS[op], target))
+
+        score = spec.get("score", 0.0)
+        if isinstance(score, dict):
+            self.offset = float(score.get("offset", 0.0))
+            self.scale = float(score.get("scale", 0.0))
+            self.feature = FEATURE_INDEX[score["feature"]]
+            self.use_abs = bool(score.get("abs", False))
+        else:
+            self.offset, self.scale, self.feature, self.use_abs = float(score), 0.0, -1, False
+        self.premise = spec.get("premise", premise)
+        self.deduction = spec.get("deduction", "")
+
+    def matches(self, row: Sequence[float]) -> bool:
+        hits = (op(row[i], v) for i, op, v in self.conds)
+        return any(hits) if self.any_mode else all(hits)
+
+    def match_mask(self, X: np.ndarray) -> np.ndarray:
+        if not self.conds:
+            return np.ones(X.shape[0], dtype=bool)
+        masks = [op(X[:, i], v) for i, op, v in self.conds]
+        return np.logical_or.reduce(masks) if self.any_mode else np.logical_and.reduce(masks)
+
+    def score(self, row: Sequence[float]) -> float:
+        if self.feature < 0:
+            return self.offset
+        x = row[self.feature]
+        return self.offset + self.scale * (abs(x) if self.use_abs else x)
+
+    def score_vec(self, X: np.ndarray) -> np.ndarray:
+        if self.feature < 0:
+            return np.full(X.shape[0], self.offset)
+        x = X[:, self.feature]
+        return self.offset + self.scale * (np.abs(x) if self.use_abs else x)
+
+
+class CompiledRuleTable:
+    """
+    تمثيل مترجم لمراحل التفكير: لكل مرحلة قائمة قواعد مرتبة + قاعدة افتراضية.
+    نفس الجدول يقيم صفاً واحداً (Python خالص، بلا تخصيص كائنات) أو مصفوفة رموز (NumPy).
+    """
+
+    def __init__(self, spec: Dict[str, Any]):
+        weights = spec.get("weights", {})
+        self.weights = np.array([float(weights.get(p.value, 0.0)) for p in PHASE_ORDER])
+        self.total_weight = float(self.weights.sum())
+
+        self.phases: List[List[_CompiledRule]] = []
+        self.templates: List[str] = []
+        for phase in PHASE_ORDER:
+            ps = spec["phases"][phase.value]
+            premise = ps.get("premise", "")
+            rules = [_CompiledRule(r, premise) for r in ps.get("rules", [])]
+            rules.append(_CompiledRule(dict(ps.get("default", {}), when={}), premise))
+            self.phases.append(rules)
+            self.templates.append(ps.get("observation", ""))
+
+        ff = spec.get("fail_fast", {})
+        self.fail_phase = PHASE_ORDER.index(ReasoningPhase(ff.get("phase", "FOUNDATION")))
+        self.fail_below = float(ff.get("below", 0.3))
+        self.fail_score = float(ff.get("score", 0.1))
+        rv = spec.get("risk_veto", {})
+        self.veto_phase = PHASE_ORDER.index(ReasoningPhase(rv.get("phase", "RISK")))
+        self.veto_below = float(rv.get("below", 0.8))
+
+        verdicts = sorted(spec.get("verdicts", []), key=lambda v: -float(v["min"]))
+        self.verdict_mins = [float(v["min"]) for v in verdicts]
+        self.verdict_labels = [v["label"] for v in verdicts] + [spec.get("default_verdict", "HOLD/REJECT")]
+
+    @classmethod
+    def load(cls, path: Union[str, Path] = RULES_PATH) -> "CompiledRuleTable":
+        """تحميل الجدول من YAML، أو القيم المدمجة إذا تعذر ذلك."""
+        if YAML_AVAILABLE and Path(path).exists():
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    doc = yaml.safe_load(f) or {}
+                return cls(doc["cot_rules"])
+            except Exception as e:
+                logging.getLogger("Alpha.Brain.Reasoning.CoT").error(
+                    f"CoT rules invalid ({e}). Using built-in defaults.")
+        return cls(DEFAULT_RULES)
+
+    # --- Scalar path ---
+
+    def evaluate_row(self, row: Sequence[float]) -> Tuple[str, float, Tuple[float, ...], Tuple[int, ...], bool]:
+        """
+        Returns:
+            (الحكم، الدرجة النهائية، درجات المراحل، فهرس القاعدة المطابقة لكل مرحلة، هل حدث فيتو)
+        """
+        scores, picks = [], []
+        for p, rules in enumerate(self.phases):
+            for k, rule in enumerate(rules):
+                if rule.matches(row):
+                    scores.append(rule.score(row))
+                    picks.append(k)
+                    break
+            if p == self.fail_phase and scores[-1] < self.fail_below:
+                return "REJECTED", self.fail_score, tuple(scores), tuple(picks), True
+
+        if scores[self.veto_phase] < self.veto_below:
+            return "BLOCKED_BY_RISK", 0.0, tuple(scores), tuple(picks), True
+
+        final = sum(s * w for s, w in zip(scores, self.weights)) / self.total_weight if self.total_weight > 0 else 0.0
+        final = round(final, 4)
+        label = self.verdict_labels[-1]
+        for threshold, name in zip(self.verdict_mins, self.verdict_labels):
+            if final >= threshold:
+                label = name
+                break
+        return label, final, tuple(scores), tuple(picks), False
+
+    # --- Batch path ---
+
+    def evaluate_matrix(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        تقييم N صف دفعة واحدة.
+        Returns:
+            (رموز الحكم int8، الدرجات النهائية، درجات المراحل N×4، فهارس القواعد N×4)
+            رمز الحكم: فهرس في verdict_labels، أو CODE_REJECTED / CODE_BLOCKED.
+        """
+        n = X.shape[0]
+        P = len(self.phases)
+        scores = np.empty((n, P))
+        picks = np.empty((n, P), dtype=np.int16)
+        for p, rules in enumerate(self.phases):
+            # نطبق القواعد من الأخيرة إلى الأولى حتى تكون الأسبقية لأول قاعدة متحققة
+            phase_scores = rules[-1].score_vec(X)
+            phase_picks = np.full(n, len(rules) - 1, dtype=np.int16)
+            for k in range(len(rules) - 2, -1, -1):
+                m = rules[k].match_mask(X)
+                phase_scores = np.where(m, rules[k].score_vec(X), phase_scores)
+                phase_picks[m] = k
+            scores[:, p] = phase_scores
+            picks[:, p] = phase_picks
+
+        final = np.round(scores @ self.weights / self.total_weight, 4) if self.total_weight > 0 else np.zeros(n)
+        codes = np.full(n, len(self.verdict_labels) - 1, dtype=np.int8)
+        for k in range(len(self.verdict_mins) - 1, -1, -1):
+            codes[final >= self.verdict_mins[k]] = k
+
+        blocked = scores[:, self.veto_phase] < self.veto_below
+        codes[blocked] = CODE_BLOCKED
+        final[blocked] = 0.0
+        rejected = scores[:, self.fail_phase] < self.fail_below
+        codes[rejected] = CODE_REJECTED
+        final[rejected] = self.fail_score
+        return codes, final, scores, picks
+
+    # --- Human-readable trace (lazy) ---
+
+    def render_trace(self, row: Sequence[float], scores: Sequence[float], picks: Sequence[int],
+                     verdict: str, final: float, hypothesis: str, context_id: str) -> DecisionTrace:
+        """بناء DecisionTrace الكامل (نصوص + طوابع زمنية) من نتيجة التقييم المترجم."""
+        values = _decode_row(row)
+        trace = DecisionTrace(
+            trace_id=f"TRC-{uuid.uuid4().hex[:8]}",
+            context_hash=context_id,
+            hypothesis=hypothesis,
+            final_verdict=verdict,
+            final_score=final
+        )
+        for p, score in enumerate(scores):
+            phase = PHASE_ORDER[p]
+            rule = self.phases[p][picks[p]]
+            trace.steps.append(LogicStep(
+                id=_STEP_IDS[phase],
+                phase=phase,
+                premise=rule.premise,
+                observation=self.templates[p].format(**values),
+                deduction=rule.deduction.format(**values),
+                confidence=score,
+                weight=float(self.weights[p])
+            ))
+
+        if verdict == "REJECTED":
+            trace.veto_triggered = True
+            trace.veto_reason = f"Foundation Collapse: {trace.steps[-1].deduction}"
+        elif verdict == "BLOCKED_BY_RISK":
+            trace.veto_triggered = True
+            trace.veto_reason = f"Risk Violation: {trace.steps[self.veto_phase].deduction}"
+        return trace
+
+
+@dataclass
+class CoTEvaluation:
+    """
+    نتيجة التقييم المترجم (خفيفة: بلا نصوص ولا طوابع زمنية).
+    trace() تبني الأثر المقروء عند الحاجة فقط (تنفيذ صفقة أو تدقيق).
+    """
+    final_verdict: str
+    final_score: float
+    veto_triggered: bool
+    phase_scores: Tuple[float, ...]
+    hypothesis: str
+    context_id: str
+    _row: List[float] = field(repr=False)
+    _picks: Tuple[int, ...] = field(repr=False)
+    _engine: "CoTEngine" = field(repr=False)
+    _trace: Optional[DecisionTrace] = field(default=None, repr=False)
+
+    def trace(self) -> DecisionTrace:
+        if self._trace is None:
+            self._trace = self._engine._materialize(self._row, self.phase_scores, self._picks,
+                                                    self.final_verdict, self.final_score,
+                                                    self.hypothesis, self.context_id)
+        return self._trace
+
+
+@dataclass
+class BatchDeliberation:
+    """نتيجة تقييم دفعة رموز: مصفوفات متوازية + بناء الأثر لرمز واحد عند الطلب."""
+    symbols: Sequence[str]
+    codes: np.ndarray
+    final_scores: np.ndarray
+    phase_scores: np.ndarray
+    features: np.ndarray
+    _picks: np.ndarray = field(repr=False)
+    _engine: "CoTEngine" = field(repr=False)
+
+    def verdict(self, i: int) -> str:
+        code = int(self.codes[i])
+        if code == CODE_REJECTED:
+            return "REJECTED"
+        if code == CODE_BLOCKED:
+            return "BLOCKED_BY_RISK"
+        return self._engine.table.verdict_labels[code]
+
+    def trace(self, i: int, hypothesis: str = "", context_id: str = "") -> DecisionTrace:
+        return self._engine._materialize(self.features[i], tuple(self.phase_scores[i]), tuple(self._picks[i]),
+                                         self.verdict(i), float(self.final_scores[i]),
+                                         hypothesis or f"Trade {self.symbols[i]}", context_id)
+
+
 class CoTEngine:
     """
     محرك التفكير المتسلسل المتقدم.
     يبني "قضية" متكاملة لكل قرار تداول، مع القدرة على رفض الفرضيات (Veto) في أي مرحلة.
+    المراحل تقيم عبر جدول قواعد مترجم؛ الأثر المقروء يبنى عند الطلب فقط.
     """
 
-    def __init__(self):
+    def __init__(self, rules_path: Union[str, Path] = RULES_PATH):
         self.logger = logging.getLogger("Alpha.Brain.Reasoning.CoT")
-        
-        # أوزان استراتيجية (يمكن تعديلها ديناميكياً)
-        self.weights = {
-            ReasoningPhase.FOUNDATION: 0.25,
-            ReasoningPhase.TACTICAL: 0.35,
-            ReasoningPhase.SENTIMENT: 0.20,
-            ReasoningPhase.RISK: 0.20
-        }
+        self.table = CompiledRuleTable.load(rules_path)
+
+        # أوزان استراتيجية (من جدول القواعد)
+        self.weights = {phase: float(w) for phase, w in zip(PHASE_ORDER, self.table.weights)}
+
+    def evaluate(self,
+                 hypothesis: str,
+                 context_data: Dict[str, Any],
+                 context_id: str) -> CoTEvaluation:
+        """التقييم السريع لسياق واحد (المسار الساخن)."""
+        row = extract_features(context_data)
+        verdict, final, scores, picks, veto = self.table.evaluate_row(row)
+        return CoTEvaluation(verdict, final, veto, scores, hypothesis, context_id,
+                             _row=row, _picks=picks, _engine=self)
+
+    def evaluate_batch(self,
+                       symbols: Sequence[str],
+                       contexts: Union[Sequence[Dict[str, Any]], np.ndarray]) -> BatchDeliberation:
+        """
+        تقييم دفعة رموز في تمريرة واحدة.
+        contexts: قائمة سياقات، أو مصفوفة خصائص جاهزة N×len(FEATURES).
+        """
+        if isinstance(contexts, np.ndarray):
+            X = np.asarray(contexts, dtype=np.float64)
+        else:
+            X = np.array([extract_features(c) for c in contexts], dtype=np.float64).reshape(-1, len(FEATURES))
+        codes, final, scores, picks = self.table.evaluate_matrix(X)
+        return BatchDeliberation(symbols, codes, final, scores, X, _picks=picks, _engine=self)
 
     def deliberate(self, 
                    hypothesis: str, 
                    context_data: Dict[str, Any],
                    context_id: str) -> DecisionTrace:
         """
-        جلسة التداول الفكري (Deliberation Session).
-        يقوم المحرك بعقد "اجتماع" بين الوكلاء المختلفين للخروج بقرار موحد.
+        جلسة التداول الفكري (Deliberation Session) مع الأثر الكامل.
+        مكافئة لـ evaluate(...).trace(): تستخدم للتدقيق أو عند تنفيذ صفقة.
         """
-        trace = DecisionTrace(
-            trace_id=f"TRC-{uuid.uuid4().hex[:8]}",
-            context_hash=context_id,
-            hypothesis=hypothesis
-        )
-
         try:
-            # 1. المرحلة الأساسية: هل الأرض صلبة؟ (Macro/Geo)
-            step_found = self._evaluate_foundation(context_data)
-            trace.steps.append(step_found)
-            
-            # بروتوكول الرفض السريع (Fail Fast Protocol)
-            if step_found.confidence < 0.3:
-                trace.veto_triggered = True
-                trace.veto_reason = f"Foundation Collapse: {step_found.deduction}"
-                trace.final_verdict = "REJECTED"
-                trace.final_score = 0.1
-                return trace
-
-            # 2. المرحلة التكتيكية: هل التوقيت مناسب؟ (Tech/Flow)
-            step_tact = self._evaluate_tactics(context_data)
-            trace.steps.append(step_tact)
-
-            # 3. مرحلة المشاعر: هل الجمهور معنا؟ (Sentiment)
-            step_sent = self._evaluate_sentiment(context_data)
-            trace.steps.append(step_sent)
-
-            # 4. مرحلة المخاطرة: هل نستطيع تحمل الخسارة؟ (Risk)
-            # هذه المرحلة تملك حق النقض (Veto Power)
-            step_risk = self._evaluate_risk(context_data)
-            trace.steps.append(step_risk)
-
-            if step_risk.confidence < 0.8: # إذا كانت المخاطرة غير مقبولة تماماً
-                trace.veto_triggered = True
-                trace.veto_reason = f"Risk Violation: {step_risk.deduction}"
-                trace.final_verdict = "BLOCKED_BY_RISK"
-                trace.final_score = 0.0
-                return trace
-
-            # 5. التجميع والحكم النهائي (Final Synthesis)
-            self._synthesize_verdict(trace)
-            
-            # تسجيل جنائي للأثر
-            self._archive_trace(trace)
-            
-            return trace
-
+            return self.evaluate(hypothesis, context_data, context_id).trace()
         except Exception as e:
             self.logger.error(f"CoT CRASH: {e}", exc_info=True)
+            trace = DecisionTrace(
+                trace_id=f"TRC-{uuid.uuid4().hex[:8]}",
+                context_hash=context_id,
+                hypothesis=hypothesis
+            )
             trace.final_verdict = "ERROR"
             trace.veto_reason = str(e)
             return trace
 
-    # =================================================================
-    # Cognitive Modules (وحدات الإدراك)
-    # =================================================================
-
-    def _evaluate_foundation(self, ctx: Dict) -> LogicStep:
-        """تقييم البيئة الاقتصادية والجيوسياسية"""
-        macro = ctx.get("macro", {})
-        
-        # استخراج المتغيرات (مع قيم افتراضية آمنة)
-        regime = macro.get("regime", "NEUTRAL")
-        vix = macro.get("volatility_index", 20.0)
-        
-        # منطق التقييم
-        score = 0.5
-        deduction = "Market environment is neutral."
-        
-        if regime == "RISK_ON" and vix < 25:
-            score = 0.9
-            deduction = "Favorable macro winds (Risk-On)."
-        elif regime == "RISK_OFF" or vix > 35:
-            score = 0.2
-            deduction = "Hostile environment (High Volatility/Risk-Off)."
-            
-        return LogicStep(
-            id="STEP-FND",
-            phase=ReasoningPhase.FOUNDATION,
-            premise="Capital requires stability or clear trends.",
-            observation=f"Regime: {regime}, VIX: {vix}",
-            deduction=deduction,
-            confidence=score,
-            weight=self.weights[ReasoningPhase.FOUNDATION]
-        )
-
-    def _evaluate_tactics(self, ctx: Dict) -> LogicStep:
-        """تقييم التحليل الفني وتدفق الأوامر"""
-        tech = ctx.get("technical", {})
-        flow = ctx.get("order_flow", {})
-        
-        # مؤشرات
-        rsi = tech.get("rsi", 50)
-        trend = tech.get("trend", "SIDEWAYS")
-        ofi = flow.get("ofi", 0.0) # Order Flow Imbalance (-1 to 1)
-        
-        score = 0.5
-        deduction = "No clear tactical advantage."
-        
-        # التوافق (Confluence)
-        if trend == "UP" and ofi > 0.2:
-            score = 0.95
-            deduction = "Strong confluence: Trend + Buying Pressure."
-        elif trend == "UP" but ofi < -0.2:
-            score = 0.4
-            deduction = "Divergence warning: Price rising but whales selling."
-        elif trend == "DOWN":
-            score = 0.1
-            deduction = "Trend is bearish."
-            
-        return LogicStep(
-            id="STEP-TAC",
-            phase=ReasoningPhase.TACTICAL,
-            premise="Align with the path of least resistance.",
-            observation=f"Trend: {trend}, OFI: {ofi:.2f}, RSI: {rsi}",
-            deduction=deduction,
-            confidence=score,
-            weight=self.weights[ReasoningPhase.TACTICAL]
-        )
-
-    def _evaluate_sentiment(self, ctx: Dict) -> LogicStep:
-        """تقييم مشاعر السوق"""
-        sent = ctx.get("sentiment", {})
-        
-        intent = sent.get("overall", "NEUTRAL")
-        score_val = sent.get("score", 0.0) # -1 to 1
-        
-        conf = 0.5 + (abs(score_val) * 0.5) # كلما كانت المشاعر أقوى، زادت الثقة
-        
-        return LogicStep(
-            id="STEP-SNT",
-            phase=ReasoningPhase.SENTIMENT,
-            premise="Crowd psychology drives short-term moves.",
-            observation=f"Intent: {intent}, Score: {score_val:.2f}",
-            deduction=f"Market sentiment is {intent}.",
-            confidence=conf if intent == "BULLISH" else (1.0 - conf), # نفترض الفرضية شراء (Bullish)
-            weight=self.weights[ReasoningPhase.SENTIMENT]
-        )
-
-    def _evaluate_risk(self, ctx: Dict) -> LogicStep:
-        """تقييم المخاطر (محامي الشيطان)"""
-        acct = ctx.get("account", {})
-        
-        # الرافعة المالية الحالية
-        lev = acct.get("leverage", 1.0)
-        drawdown = acct.get("drawdown_pct", 0.0)
-        
-        # قواعد صارمة
-        if lev > 3.0 or drawdown > 0.15: # 15% drawdown limit
-            return LogicStep(
-                id="STEP-RSK",
-                phase=ReasoningPhase.RISK,
-                premise="Preservation of capital is paramount.",
-                observation=f"Lev: {lev}x, DD: {drawdown*100:.1f}%",
-                deduction="CRITICAL RISK LEVEL EXCEEDED.",
-                confidence=0.0, # رفض تام
-                weight=self.weights[ReasoningPhase.RISK]
-            )
-            
-        return LogicStep(
-            id="STEP-RSK",
-            phase=ReasoningPhase.RISK,
-            premise="Risk parameters within safety limits.",
-            observation=f"Lev: {lev}x, DD: {drawdown*100:.1f}%",
-            deduction="Trade is permissive within risk budget.",
-            confidence=1.0,
-            weight=self.weights[ReasoningPhase.RISK]
-        )
-
-    def _synthesize_verdict(self, trace: DecisionTrace):
-        """حساب النتيجة النهائية الموزونة"""
-        total_score = 0.0
-        total_weight = 0.0
-        
-        for step in trace.steps:
-            total_score += step.confidence * step.weight
-            total_weight += step.weight
-            
-        final_score = total_score / total_weight if total_weight > 0 else 0.0
-        trace.final_score = round(final_score, 4)
-        
-        # عتبة القرار (Decision Threshold)
-        if final_score >= 0.75:
-            trace.final_verdict = "STRONG_BUY"
-        elif final_score >= 0.60:
-            trace.final_verdict = "WEAK_BUY"
-        else:
-            trace.final_verdict = "HOLD/REJECT"
+    def _materialize(self, row, scores, picks, verdict, final, hypothesis, context_id) -> DecisionTrace:
+        # بروتوكول الرفض السريع: الأثر يتوقف عند المرحلة التي انهارت
+        n_steps = self.table.fail_phase + 1 if verdict == "REJECTED" else len(scores)
+        trace = self.table.render_trace(row, scores[:n_steps], picks[:n_steps],
+                                        verdict, final, hypothesis, context_id)
+        if not trace.veto_triggered:
+            # تسجيل جنائي للأثر
+            self._archive_trace(trace)
+        return trace
 
     def _archive_trace(self, trace: DecisionTrace):
         """تخزين الأثر في سجل غير قابل للتعديل (Simulated)"""
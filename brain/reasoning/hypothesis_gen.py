@@ -14,6 +14,12 @@ from typing import Dict, List, Any, Optional
 from dataclasses import dataclass, field
 from datetime import datetime
 
+try:
+    from brain.agents.quant.panel_indicators import PanelIndicators, BB_UPPER, BB_LOWER, DIV_NONE
+    PANEL_AVAILABLE = True
+except ImportError:
+    PANEL_AVAILABLE = False
+
 @dataclass
 class MarketHypothesis:
     id: str
@@ -79,12 +85,43 @@ class HypothesisGenerator:
             
         return hypotheses
 
+    def scan_panel(self, panel: "PanelIndicators",
+                   market_states: Optional[Dict[str, Dict[str, Any]]] = None) -> List[MarketHypothesis]:
+        """
+        مسح الكون كاملاً من نتيجة IndicatorsAgent.analyze_panel.
+        شروط الأنماط تقيم كأقنعة متجهة على كل الرموز، والتقارير تبنى فقط للرموز المرشحة
+        ثم تمر بنفس قواعد scan_opportunities (لا ازدواج في منطق الفرضيات).
+        """
+        if not PANEL_AVAILABLE:
+            raise RuntimeError("Panel indicators module is not available")
+
+        rsi = panel.rsi
+        bb = panel.bb_status
+        candidates = panel.valid & (
+            ((rsi > 75) & (bb == BB_UPPER)) |
+            ((rsi < 25) & (bb == BB_LOWER)) |
+            (panel.bb_width < 0.02) |
+            (panel.divergence != DIV_NONE)
+        )
+
+        hypotheses: List[MarketHypothesis] = []
+        for i in np.flatnonzero(candidates):
+            symbol = panel.symbols[i]
+            state = dict((market_states or {}).get(symbol, {}))
+            state.setdefault("symbol", symbol)
+            hypotheses.extend(self.scan_opportunities(state, panel.report(i)))
+
+        self.logger.info(f"HYPOTHESIS_PANEL: {int(candidates.sum())}/{len(panel.symbols)} symbols flagged, "
+                         f"{len(hypotheses)} theories.")
+        return hypotheses
+
     def _formulate_rubber_band(self, symbol: str, indicators: Dict[str, Any]) -> Optional[MarketHypothesis]:
         """
         فرضية الارتداد للمتوسط.
         الشرط: RSI متطرف جداً (>80 أو <20) والسعر خارج البولنجر باند.
         """
-        rsi = indicators.get("rsi", 50)
+        # تقارير IndicatorsAgent تضع RSI تحت "indicators"
+        rsi = indicators.get("indicators", {}).get("rsi", indicators.get("rsi", 50))
         bb_status = indicators.get("state", {}).get("bb_status", "INSIDE")
         
         if rsi > 75 and bb_status == "BREAKOUT_UPPER":
@@ -9,15 +9,19 @@ Forensic Features:
   - Volatility-Awareness (زيادة وزن المخاطر في أوقات الذعر).
   - Veto Traceability (معرفة من أوقف الصفقة ولماذا).
   - Audit Trail Generation (إصدار شهادة ميلاد لكل قرار).
+  - Partial Voting (الوكلاء المتأخرون يستبعدون وتعاد موازنة الأوزان على الحاضرين).
+  - Batch Voting (تصويت مئات الرموز دفعة واحدة عبر NumPy، والإيصالات تبنى عند الطلب فقط).
 =================================================================
 """
 
 import logging
 import math
-from typing import Dict, Any, Tuple, Optional
+from typing import Dict, Any, Iterable, List, Sequence, Tuple, Optional, Union
 from dataclasses import dataclass, field, asdict
 from datetime import datetime, timezone
 
+import numpy as np
+
 # محاولة استيراد مدير الإعدادات
 try:
     from brain.core.strategy_manager import StrategyConfigManager
@@ -37,6 +41,64 @@ class VoteReceipt:
     veto_active: bool
     veto_reason: Optional[str]
     votes: Dict[str, float] # تفاصيل أصوات الوكلاء
+    missing: List[str] = field(default_factory=list)  # وكلاء لم تصل إشاراتهم في الموعد
+
+# ترميز الأحكام وأنماط الإجماع في مسار الدفعات
+VERDICT_CODES = {1: "BUY", -1: "SELL", 0: "HOLD"}
+MODE_SPLIT, MODE_MAJORITY, MODE_UNANIMOUS, MODE_VETOED = 0, 1, 2, 3
+MODE_NAMES = ("SPLIT", "MAJORITY", "UNANIMOUS", "VETOED")
+
+
+@dataclass
+class BatchVoteResult:
+    """
+    نتيجة تصويت دفعة من الرموز (مصفوفات متوازية بطول عدد الرموز).
+    الإيصالات لا تبنى إلا عند طلبها، وعادة للأحكام غير HOLD فقط.
+    """
+    symbols: Sequence[str]
+    verdicts: np.ndarray        # int8: 1 BUY / -1 SELL / 0 HOLD
+    net_scores: np.ndarray      # float64: -1.0 to 1.0
+    confidence: np.ndarray      # float64: 0.0 to 1.0
+    modes: np.ndarray           # int8: MODE_* (انظر MODE_NAMES)
+    veto: np.ndarray            # bool
+    votes: Dict[str, np.ndarray]    # الصوت الفعلي لكل وكيل (score * confidence)
+    present: Dict[str, np.ndarray]  # هل وصلت إشارة الوكيل لهذا الرمز
+    timestamp: str
+    veto_reasons: Optional[Sequence[Optional[str]]] = None
+    _receipts: Dict[int, VoteReceipt] = field(default_factory=dict, repr=False)
+
+    def actionable(self) -> np.ndarray:
+        """فهارس الرموز ذات الحكم BUY/SELL."""
+        return np.flatnonzero(self.verdicts)
+
+    def receipt(self, i: int) -> VoteReceipt:
+        """بناء إيصال رمز واحد (مرة واحدة ثم من الذاكرة)."""
+        cached = self._receipts.get(i)
+        if cached is not None:
+            return cached
+        veto = bool(self.veto[i])
+        reason = None
+        if veto:
+            reason = (self.veto_reasons[i] if self.veto_reasons is not None else None) or "Risk: BLOCK"
+        rec = VoteReceipt(
+            id=f"VOTE-{self.symbols[i][:8]}",
+            timestamp=self.timestamp,
+            final_verdict=VERDICT_CODES[int(self.verdicts[i])],
+            net_score=round(float(self.net_scores[i]), 4),
+            confidence=round(float(self.confidence[i]), 2),
+            consensus_mode=MODE_NAMES[int(self.modes[i])],
+            veto_active=veto,
+            veto_reason=reason,
+            votes={} if veto else {a: float(v[i]) for a, v in self.votes.items() if self.present[a][i]},
+            missing=[] if veto else sorted(a for a, p in self.present.items() if not p[i])
+        )
+        self._receipts[i] = rec
+        return rec
+
+    def receipts(self) -> Dict[str, VoteReceipt]:
+        """إيصالات الأحكام القابلة للتنفيذ فقط (BUY/SELL)."""
+        return {self.symbols[i]: self.receipt(int(i)) for i in self.actionable()}
+
 
 class WeightedVoter:
     """
@@ -44,11 +106,15 @@ class WeightedVoter:
     يجمع الأصوات، يزنها، ويطبق الفيتو، ثم يصدر الحكم.
     """
 
-    def __init__(self):
+    def __init__(self, config_mgr: Optional["StrategyConfigManager"] = None):
         self.logger = logging.getLogger("Alpha.Brain.Voter")
         
-        # الاتصال بمدير الإعدادات
-        self.config_mgr = StrategyConfigManager() if CONFIG_AVAILABLE else None
+        # الاتصال بمدير الإعدادات (مشترك مع خط الإنتاج إن وجد)
+        if config_mgr is None and CONFIG_AVAILABLE:
+            config_mgr = StrategyConfigManager()
+        self.config_mgr = config_mgr
+        # الأوزان المشتقة من آخر نسخة إعدادات: (version, weights)
+        self._weights_cache: Tuple[int, Dict[str, float]] = (-1, {})
         
         # الأوزان الافتراضية (Fallback)
         self.default_weights = {
@@ -59,12 +125,17 @@ class WeightedVoter:
         }
 
     def _get_active_weights(self) -> Dict[str, float]:
-        """جلب الأوزان الحالية من ملف الإعدادات"""
+        """جلب الأوزان الحالية من لقطة الإعدادات (تعاد الحسابات فقط عند تغير النسخة)"""
         if not self.config_mgr:
-            return self.default_weights
+            return dict(self.default_weights)
             
-        profile = self.config_mgr.load_profile()
-        modules = profile.get("modules", {})
+        profile = self.config_mgr.snapshot()
+        cached_version, cached_weights = self._weights_cache
+        if cached_version == profile.version:
+            # نسخة لأن cast_vote يعدل الأوزان حسب التقلب
+            return dict(cached_weights)
+
+        modules = profile.modules
         
         weights = {}
         for name, cfg in modules.items():
@@ -76,7 +147,8 @@ class WeightedVoter:
         # إضافة وزن المخاطر (ثابت أو من الإعدادات)
         weights["risk"] = 2.0 
         
-        return weights
+        self._weights_cache = (profile.version, weights)
+        return dict(weights)
 
     def cast_vote(self, 
                   context_id: str,
@@ -84,16 +156,25 @@ class WeightedVoter:
                   sentiment_signal: Dict,
                   hybrid_signal: Dict,
                   risk_signal: Dict,
-                  market_volatility: float = 0.0) -> VoteReceipt:
+                  market_volatility: float = 0.0,
+                  missing: Optional[Iterable[str]] = None) -> VoteReceipt:
         """
         جلسة التصويت الرئيسية.
+
+        Args:
+            missing: الوكلاء الذين لم تصل إشاراتهم (تأخر/عطل). يسقط وزنهم بالكامل،
+                     فيحسب الصافي على الحاضرين فقط بدلاً من احتسابهم أصواتاً محايدة.
         """
         weights = self._get_active_weights()
+        missing = sorted(set(missing or ()))
+        for agent in missing:
+            weights.pop(agent, None)
         
         # 1. التكيف مع التقلب (Volatility Adjustment)
         # في أوقات الخوف، نخفض وزن المشاعر ونرفع وزن المخاطر والتحليل الكمي
         if market_volatility > 0.05: # 5% volatility is high
-            weights["sentiment"] *= 0.5
+            if "sentiment" in weights:
+                weights["sentiment"] *= 0.5
             weights["risk"] *= 1.5
             self.logger.info("⚠️ High Volatility Detected: Risk weight increased.")
 
@@ -164,7 +245,7 @@ class WeightedVoter:
 
         return self._generate_receipt(
             context_id, verdict, final_net, abs(final_net), mode, 
-            veto=False, reason=None, votes=details
+            veto=False, reason=None, votes=details, missing=missing
         )
 
     def _normalize_signal(self, text_signal: str) -> float:
@@ -176,7 +257,102 @@ class WeightedVoter:
         if "SELL" in s: return -0.6
         return 0.0
 
-    def _generate_receipt(self, uid, verdict, score, conf, mode, veto, reason, votes=None):
+    # --- Batch API ---
+
+    _SIGNAL_CODES: Dict[str, float] = {}
+
+    def encode_signals(self, labels: Sequence[str]) -> np.ndarray:
+        """
+        تحويل قائمة إشارات نصية إلى مصفوفة أرقام بنفس قواعد _normalize_signal.
+        كل نص مميز يحلل مرة واحدة فقط (عدد الأنواع صغير جداً مقارنة بعدد الرموز).
+        """
+        codes = self._SIGNAL_CODES
+        out = np.empty(len(labels), dtype=np.float64)
+        for i, label in enumerate(labels):
+            v = codes.get(label)
+            if v is None:
+                v = codes[label] = self._normalize_signal(label or "NEUTRAL")
+            out[i] = v
+        return out
+
+    def cast_votes_batch(self,
+                         symbols: Sequence[str],
+                         scores: Dict[str, np.ndarray],
+                         confidence: Optional[Dict[str, np.ndarray]] = None,
+                         present: Optional[Dict[str, np.ndarray]] = None,
+                         risk_veto: Optional[np.ndarray] = None,
+                         market_volatility: Union[float, np.ndarray] = 0.0,
+                         veto_reasons: Optional[Sequence[Optional[str]]] = None) -> BatchVoteResult:
+        """
+        تصويت N رمز في تمريرة واحدة، بنفس منطق cast_vote.
+
+        Args:
+            symbols: أسماء الرموز (N).
+            scores: لكل وكيل ('quant', 'sentiment', 'hybrid') مصفوفة درجات بين -1 و 1
+                    (استخدم encode_signals للإشارات النصية).
+            confidence: مضاعف ثقة اختياري لكل وكيل (مثل final_score للمسار الهجين).
+            present: قناع اختياري لكل وكيل؛ False = إشارة غائبة (يسقط وزنها لهذا الرمز).
+            risk_veto: قناع الفيتو (True = BLOCK).
+            market_volatility: قيمة واحدة أو مصفوفة بطول N.
+        """
+        n = len(symbols)
+        weights = self._get_active_weights()
+        agents = [a for a in weights if a != "risk" and a in scores]
+
+        if agents:
+            S = np.vstack([np.asarray(scores[a], dtype=np.float64) for a in agents])
+            if confidence:
+                for row, a in enumerate(agents):
+                    if a in confidence:
+                        S[row] *= np.asarray(confidence[a], dtype=np.float64)
+            P = np.vstack([np.asarray(present[a], dtype=bool) if present and a in present
+                           else np.ones(n, dtype=bool) for a in agents])
+        else:
+            S = np.zeros((0, n))
+            P = np.zeros((0, n), dtype=bool)
+
+        # 1. التكيف مع التقلب: وزن المشاعر ينخفض للرموز عالية التقلب فقط
+        W = np.repeat(np.array([weights[a] for a in agents], dtype=np.float64)[:, None], n, axis=1)
+        if "sentiment" in agents:
+            high_vol = np.broadcast_to(np.asarray(market_volatility, dtype=np.float64) > 0.05, (n,))
+            W[agents.index("sentiment")] *= np.where(high_vol, 0.5, 1.0)
+        W *= P
+
+        # 2. تجميع النقاط
+        total_weight = W.sum(axis=0)
+        net = np.divide((S * W).sum(axis=0), total_weight,
+                        out=np.zeros(n, dtype=np.float64), where=total_weight > 0)
+
+        # 3. الحكم ونمط الإجماع
+        verdicts = np.where(net > 0.6, 1, np.where(net < -0.6, -1, 0)).astype(np.int8)
+        has_pos = ((S > 0) & P).any(axis=0)
+        has_neg = ((S < 0) & P).any(axis=0)
+        modes = np.where(~(has_pos & has_neg), MODE_UNANIMOUS,
+                         np.where(np.abs(net) > 0.5, MODE_MAJORITY, MODE_SPLIT)).astype(np.int8)
+        conf = np.abs(net)
+
+        # 4. الفيتو يطغى على كل شيء
+        veto = np.zeros(n, dtype=bool) if risk_veto is None else np.asarray(risk_veto, dtype=bool)
+        if veto.any():
+            verdicts[veto] = 0
+            net[veto] = 0.0
+            conf[veto] = 1.0
+            modes[veto] = MODE_VETOED
+
+        return BatchVoteResult(
+            symbols=symbols,
+            verdicts=verdicts,
+            net_scores=net,
+            confidence=conf,
+            modes=modes,
+            veto=veto,
+            votes={a: S[row] for row, a in enumerate(agents)},
+            present={a: P[row] for row, a in enumerate(agents)},
+            timestamp=datetime.now(timezone.utc).isoformat(),
+            veto_reasons=veto_reasons
+        )
+
+    def _generate_receipt(self, uid, verdict, score, conf, mode, veto, reason, votes=None, missing=None):
         return VoteReceipt(
             id=f"VOTE-{uid[:8]}",
             timestamp=datetime.now(timezone.utc).isoformat(),
@@ -186,7 +362,8 @@ class WeightedVoter:
             consensus_mode=mode,
             veto_active=veto,
             veto_reason=reason,
-            votes=votes or {}
+            votes=votes or {},
+            missing=list(missing or [])
         )
 
 # =================================================================
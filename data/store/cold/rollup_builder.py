@@ -0,0 +1,370 @@
+# -*- coding: utf-8 -*-
+# ALPHA SOVEREIGN - COLD STORAGE OHLCV ROLLUP BUILDER
+# =================================================================
+# Component Name: data/storage/cold/rollup_builder.py
+# Core Responsibility: تجسيد شموع OHLCV+VWAP (1s/1m/5m/1h/1d) من النبضات المؤرشفة في بحيرة البيانات.
+# Design Pattern: Materialized View / Incremental ETL (Watermark)
+# Forensic Impact: الشموع مشتقة حصرياً من النبضات المؤرشفة لدينا، فيمكن إعادة بنائها والتحقق منها في أي وقت.
+# =================================================================
+
+import json
+import logging
+import os
+import re
+import shutil
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# الأطر الزمنية المجسدة (بالثواني) مرتبة من الأدق إلى الأخشن
+ROLLUP_INTERVALS: Dict[str, int] = {
+    "1s": 1,
+    "1m": 60,
+    "5m": 300,
+    "1h": 3600,
+    "1d": 86400,
+}
+
+# تقسيم الملفات لكل إطار: الأطر الدقيقة يومياً، والخشنة شهرياً/سنوياً
+# حتى يبقى حجم الملف الذي يعاد كتابته في كل دورة محدوداً
+_PARTITION_FORMAT: Dict[str, str] = {
+    "1s": "%Y-%m-%d",
+    "1m": "%Y-%m-%d",
+    "5m": "%Y-%m-%d",
+    "1h": "%Y-%m",
+    "1d": "%Y",
+}
+
+_INTERVAL_PATTERN = re.compile(r"^(\d+)([smhd])$")
+_UNIT_SECONDS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+# أعمدة الشمعة المخزنة (turnover = sum(price*qty) يسمح بإعادة تجميع VWAP بدقة)
+BAR_COLUMNS = ["bucket", "open", "high", "low", "close", "volume", "turnover", "trades"]
+
+
+def interval_to_seconds(interval: str) -> int:
+    """
+    تحويل نص الإطار الزمني إلى ثوانٍ.
+    Example: '15m' -> 900, '4h' -> 14400
+    """
+    match = _INTERVAL_PATTERN.match(interval.strip().lower())
+    if not match:
+        raise ValueError(f"Unsupported interval format: {interval}")
+    return int(match.group(1)) * _UNIT_SECONDS[match.group(2)]
+
+
+class OHLCVRollupBuilder:
+    """
+    باني الشموع الباردة.
+    يقرأ النبضات الخام من data/lake ويجسد منها شموعاً جاهزة بصيغة Parquet،
+    بشكل تراكمي: لا يعالج إلا النبضات الأحدث من آخر علامة مائية (Watermark).
+    """
+
+    def __init__(self, archive_root: str = "data/lake"):
+        """
+        Args:
+            archive_root: المسار الأساسي لبحيرة البيانات (نفس جذر ParquetArchiver).
+        """
+        self.logger = logging.getLogger("Alpha.Storage.Cold.Rollup")
+        self.archive_path = Path(archive_root)
+        self.rollup_path = self.archive_path / "_rollups"
+        self.watermark_file = self.rollup_path / "_watermarks.json"
+
+        self.rollup_path.mkdir(parents=True, exist_ok=True)
+        self.watermarks: Dict[str, float] = self._load_watermarks()
+
+    # ------------------------------------------------------------------
+    # البناء التراكمي (Incremental Materialization)
+    # ------------------------------------------------------------------
+
+    def run_cycle(self, symbols: Optional[List[str]] = None) -> Dict[str, int]:
+        """
+        تشغيل دورة تجسيد لكل الرموز (أو لقائمة محددة).
+
+        Returns:
+            عدد النبضات الجديدة المعالجة لكل رمز.
+        """
+        if symbols is None:
+            symbols = [
+                p.name for p in self.archive_path.iterdir()
+                if p.is_dir() and not p.name.startswith("_")
+            ]
+
+        processed = {}
+        for symbol in symbols:
+            processed[symbol] = self.build_incremental(symbol)
+        return processed
+
+    def build_incremental(self, symbol: str) -> int:
+        """
+        تجسيد الشموع الجديدة لرمز واحد.
+        النبضات التي وصلت متأخرة بطابع زمني أقدم من العلامة المائية يتم تجاهلها.
+
+        Returns:
+            عدد النبضات الجديدة التي تمت معالجتها.
+        """
+        try:
+            return self._build_symbol(symbol)
+        except Exception as e:
+            self.logger.error(f"ROLLUP_FAIL: فشل تجسيد الشموع لـ {symbol}: {e}")
+            return 0
+
+    def _build_symbol(self, symbol: str) -> int:
+        """نفس build_incremental لكن يرفع الاستثناء بدلاً من ابتلاعه."""
+        watermark = self.watermarks.get(symbol, float("-inf"))
+
+        ticks = self._load_ticks_since(symbol, watermark)
+        if ticks.empty:
+            return 0
+
+        # 1. الشموع الأدق (1s) تبنى مباشرة من النبضات
+        base_bars = self._aggregate_ticks(ticks, ROLLUP_INTERVALS["1s"])
+
+        # 2. الأطر الأخشن تبنى من شموع الثانية (التجميع تجميعي Associative)
+        for name, seconds in ROLLUP_INTERVALS.items():
+            bars = base_bars if seconds == 1 else self._aggregate_bars(base_bars, seconds)
+            self._merge_into_partitions(symbol, name, bars)
+
+        # 3. تقديم العلامة المائية فقط بعد نجاح كتابة جميع الأطر
+        self.watermarks[symbol] = float(ticks["exchange_ts"].iloc[-1])
+        self._save_watermarks()
+
+        self.logger.info(f"ROLLUP_BUILT: {symbol} | {len(ticks)} نبضة جديدة -> {len(base_bars)} شمعة (1s).")
+        return len(ticks)
+
+    def downsample_raw_ticks(self, start_ts: Optional[float], end_ts: float) -> int:
+        """
+        معالج انتقال 'cold:downsample' لـ TierPolicyEngine.
+        يحذف ملفات النبضات اليومية في النافذة [start_ts, end_ts) بعد التأكد من أن شموع
+        الثانية (1s) قد غطتها، فيبقى التاريخ البارد على دقة 1s بدلاً من النبضات الخام.
+
+        Returns:
+            عدد الملفات اليومية المحذوفة.
+        """
+        lo = pd.Timestamp(start_ts, unit="s").strftime("%Y-%m-%d") if start_ts is not None else None
+        hi = pd.Timestamp(end_ts, unit="s").strftime("%Y-%m-%d")
+
+        removed = 0
+        for symbol_path in self.archive_path.iterdir():
+            if not symbol_path.is_dir() or symbol_path.name.startswith("_"):
+                continue
+            symbol = symbol_path.name
+
+            # لا نحذف نبضة واحدة لم تتحول إلى شمعة بعد (الفشل يرفع استثناء فلا تتقدم العلامة المائية)
+            self._build_symbol(symbol)
+
+            for f in symbol_path.rglob("*.parquet"):
+                file_date = f.stem.rsplit("_", 1)[-1]
+                if (lo is None or file_date >= lo) and file_date < hi:
+                    f.unlink()
+                    removed += 1
+
+        if removed:
+            self.logger.info(f"ROLLUP_DOWNSAMPLED: حذف {removed} ملف نبضات خام (محفوظة كشموع 1s).")
+        return removed
+
+    def _load_ticks_since(self, symbol: str, watermark: float) -> pd.DataFrame:
+        """تحميل النبضات الأحدث من العلامة المائية فقط (مع تخطي الملفات اليومية الأقدم)."""
+        symbol_path = self.archive_path / symbol
+        if not symbol_path.exists():
+            return pd.DataFrame()
+
+        min_date = None
+        if np.isfinite(watermark):
+            min_date = pd.Timestamp(watermark, unit="s").strftime("%Y-%m-%d")
+
+        frames = []
+        for f in sorted(symbol_path.rglob("*.parquet")):
+            file_date = f.stem.rsplit("_", 1)[-1]
+            if min_date is not None and file_date < min_date:
+                continue
+            df = pd.read_parquet(f, columns=["exchange_ts", "price", "quantity"])
+            frames.append(df[df["exchange_ts"] > watermark])
+
+        if not frames:
+            return pd.DataFrame()
+
+        ticks = pd.concat(frames, ignore_index=True)
+        return ticks.sort_values("exchange_ts", kind="stable", ignore_index=True)
+
+    # ------------------------------------------------------------------
+    # محرك التجميع (Vectorized Aggregation)
+    # ------------------------------------------------------------------
+
+    def _aggregate_ticks(self, ticks: pd.DataFrame, seconds: int) -> pd.DataFrame:
+        """تحويل النبضات المرتبة زمنياً إلى شموع."""
+        ts = ticks["exchange_ts"].to_numpy(dtype=np.float64)
+        frame = pd.DataFrame({
+            "bucket": (np.floor(ts / seconds) * seconds).astype(np.int64),
+            "price": ticks["price"].to_numpy(dtype=np.float64),
+            "quantity": ticks["quantity"].to_numpy(dtype=np.float64),
+        })
+        frame["turnover"] = frame["price"] * frame["quantity"]
+
+        bars = frame.groupby("bucket", sort=True).agg(
+            open=("price", "first"),
+            high=("price", "max"),
+            low=("price", "min"),
+            close=("price", "last"),
+            volume=("quantity", "sum"),
+            turnover=("turnover", "sum"),
+            trades=("price", "size"),
+        )
+        return bars.reset_index()[BAR_COLUMNS]
+
+    def _aggregate_bars(self, bars: pd.DataFrame, seconds: int) -> pd.DataFrame:
+        """إعادة تجميع شموع مرتبة إلى إطار أخشن (open أول، close آخر، والباقي max/min/sum)."""
+        frame = bars.assign(bucket=(bars["bucket"] // seconds) * seconds)
+        out = frame.groupby("bucket", sort=True).agg(
+            open=("open", "first"),
+            high=("high", "max"),
+            low=("low", "min"),
+            close=("close", "last"),
+            volume=("volume", "sum"),
+            turnover=("turnover", "sum"),
+            trades=("trades", "sum"),
+        )
+        return out.reset_index()[BAR_COLUMNS]
+
+    # ------------------------------------------------------------------
+    # التخزين (Partitioned Parquet)
+    # ------------------------------------------------------------------
+
+    def _partition_file(self, symbol: str, interval: str, key: str) -> Path:
+        return self.rollup_path / interval / symbol / f"{symbol}_{key}.parquet"
+
+    def _partition_keys(self, buckets: pd.Series, interval: str) -> pd.Series:
+        return pd.to_datetime(buckets, unit="s").dt.strftime(_PARTITION_FORMAT[interval])
+
+    def _merge_into_partitions(self, symbol: str, interval: str, bars: pd.DataFrame):
+        """
+        دمج الشموع الجديدة مع الأقسام الموجودة.
+        الشمعة الحدية (التي بدأت في الدورة السابقة) يعاد تجميعها مع الجزء الجديد.
+        """
+        keys = self._partition_keys(bars["bucket"], interval)
+        for key, new_part in bars.groupby(keys.to_numpy(), sort=True):
+            path = self._partition_file(symbol, interval, key)
+            if path.exists():
+                existing = pd.read_parquet(path)
+                merged = pd.concat([existing, new_part], ignore_index=True)
+                merged = merged.sort_values("bucket", kind="stable", ignore_index=True)
+                seconds = ROLLUP_INTERVALS[interval]
+                new_part = self._aggregate_bars(merged, seconds)
+            self._atomic_write(new_part, path)
+
+    def _atomic_write(self, df: pd.DataFrame, path: Path):
+        """كتابة ذرية: ملف مؤقت ثم استبدال (لا يرى القارئ ملفاً نصف مكتوب)."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_suffix(".tmp")
+        df.to_parquet(temp_path, index=False, engine='pyarrow', compression='snappy')
+        shutil.move(str(temp_path), str(path))
+
+    def _load_watermarks(self) -> Dict[str, float]:
+        if not self.watermark_file.exists():
+            return {}
+        try:
+            with open(self.watermark_file, 'r', encoding='utf-8') as f:
+                return {k: float(v) for k, v in json.load(f).items()}
+        except Exception as e:
+            self.logger.error(f"WATERMARK_CORRUPT: {e}. سيتم إعادة البناء من البداية.")
+            return {}
+
+    def _save_watermarks(self):
+        temp_path = self.watermark_file.with_suffix(".tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.watermarks, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        shutil.move(str(temp_path), str(self.watermark_file))
+
+    # ------------------------------------------------------------------
+    # واجهة الاستعلام (Query API)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def select_rollup(interval: str) -> Tuple[str, int]:
+        """
+        اختيار أخشن إطار مجسد يكفي لبناء الإطار المطلوب.
+        Example: '15m' -> '5m', '4h' -> '1h', '1d' -> '1d'
+        """
+        target = interval_to_seconds(interval)
+        best = None
+        for name, seconds in ROLLUP_INTERVALS.items():
+            if seconds <= target and target % seconds == 0:
+                best = (name, seconds)
+        if best is None:
+            raise ValueError(f"No rollup can serve interval: {interval}")
+        return best
+
+    def query_candles(self,
+                      symbol: str,
+                      interval: str,
+                      start_ts: Optional[float] = None,
+                      end_ts: Optional[float] = None) -> pd.DataFrame:
+        """
+        استرجاع شموع جاهزة للرسم البياني أو الاختبار الخلفي أو IndicatorsAgent.
+
+        Args:
+            interval: الإطار المطلوب (مثلاً '1m', '15m', '4h').
+            start_ts/end_ts: حدود زمنية بتوقيت Unix (ثوانٍ، شاملة).
+
+        Returns:
+            DataFrame مفهرس بالوقت (UTC) بالأعمدة [open, high, low, close, volume, vwap, trades].
+        """
+        try:
+            rollup_name, rollup_seconds = self.select_rollup(interval)
+            target_seconds = interval_to_seconds(interval)
+
+            bars = self._read_range(symbol, rollup_name, start_ts, end_ts)
+            if bars.empty:
+                return bars
+
+            if target_seconds != rollup_seconds:
+                bars = self._aggregate_bars(bars, target_seconds)
+
+            return self._finalize(bars)
+
+        except Exception as e:
+            self.logger.error(f"ROLLUP_QUERY_FAIL: {symbol}@{interval}: {e}")
+            return pd.DataFrame()
+
+    def _read_range(self, symbol: str, interval: str,
+                    start_ts: Optional[float], end_ts: Optional[float]) -> pd.DataFrame:
+        """قراءة الأقسام المتقاطعة مع النطاق الزمني فقط."""
+        base = self.rollup_path / interval / symbol
+        if not base.exists():
+            return pd.DataFrame()
+
+        fmt = _PARTITION_FORMAT[interval]
+        lo = pd.Timestamp(start_ts, unit="s").strftime(fmt) if start_ts is not None else None
+        hi = pd.Timestamp(end_ts, unit="s").strftime(fmt) if end_ts is not None else None
+
+        frames = []
+        for f in sorted(base.glob("*.parquet")):
+            key = f.stem.rsplit("_", 1)[-1]
+            if (lo is not None and key < lo) or (hi is not None and key > hi):
+                continue
+            frames.append(pd.read_parquet(f))
+
+        if not frames:
+            return pd.DataFrame()
+
+        bars = pd.concat(frames, ignore_index=True)
+        if start_ts is not None:
+            bars = bars[bars["bucket"] >= start_ts]
+        if end_ts is not None:
+            bars = bars[bars["bucket"] <= end_ts]
+        return bars.sort_values("bucket", kind="stable", ignore_index=True)
+
+    def _finalize(self, bars: pd.DataFrame) -> pd.DataFrame:
+        """حساب VWAP وتحويل المفتاح الزمني إلى فهرس."""
+        volume = bars["volume"].to_numpy(dtype=np.float64)
+        turnover = bars["turnover"].to_numpy(dtype=np.float64)
+        close = bars["close"].to_numpy(dtype=np.float64)
+        vwap = np.divide(turnover, volume, out=close.copy(), where=volume > 0)
+
+        out = bars.drop(columns=["turnover"]).assign(vwap=vwap)
+        out.index = pd.to_datetime(out.pop("bucket"), unit="s", utc=True)
+        out.index.name = "timestamp"
+        return out[["open", "high", "low", "close", "volume", "vwap", "trades"]]
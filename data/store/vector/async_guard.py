@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+# ALPHA SOVEREIGN - NON-BLOCKING CALL GUARD FOR VECTOR MEMORY
+# =================================================================
+# Component Name: data/vector/async_guard.py
+# Core Responsibility: تنفيذ استدعاءات الذاكرة المتجهية دون حجب حلقة الأحداث، مع مهلة وقاطع تيار (Pillar: Intelligence).
+# Design Pattern: Bulkhead / Circuit Breaker
+# Forensic Impact: مخزن متجهات بطيء يضعف جودة الاسترجاع فقط، ولا يجمد معالجة النبضات أبداً. كل رفض أو مهلة يُحصى.
+# =================================================================
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class AsyncCallGuard:
+    """
+    حارس الاستدعاءات غير المتزامنة.
+    - الدوال المتزامنة تنفذ في مجمع خيوط محدود (Bounded Pool) وليس داخل حلقة الأحداث.
+    - لكل استدعاء مهلة (Timeout)؛ عند تجاوزها يعاد البديل (Fallback) فوراً.
+      للكتابة مهلة مستقلة أطول (تكلفتها تنمو مع حجم الدفعة)، والكتابة التي تتجاوز مهلتها
+      ثم تكتمل لا تحسب إخفاقاً: الحكم عليها عند انتهاء الخيط فعلياً.
+    - بعد عدد من الإخفاقات المتتالية يفتح القاطع ويرفض الاستدعاءات لفترة تبريد (Fast-Fail).
+    - إذا امتلأ المجمع بالمهام المعلقة يرفض الاستدعاء بدلاً من الاصطفاف خلف خادم بطيء.
+    """
+
+    def __init__(self,
+                 name: str,
+                 timeout_s: float = 0.5,
+                 write_timeout_s: float = 5.0,
+                 max_workers: int = 4,
+                 max_pending: int = 16,
+                 failure_threshold: int = 3,
+                 cooldown_s: float = 5.0):
+        self.logger = logging.getLogger(f"Alpha.Storage.Vector.Guard.{name}")
+        self.name = name
+        self.timeout_s = timeout_s
+        self.write_timeout_s = write_timeout_s
+        self.max_pending = max_pending
+        self.failure_threshold = failure_threshold
+        self.cooldown_s = cooldown_s
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"alpha-{name}")
+        self._lock = threading.Lock()
+        self._inflight = 0
+        self._failures = 0
+        self._open_until = 0.0
+        # كتابات async تجاوزت مهلتها: مرجع قوي حتى تكتمل (الحلقة تحتفظ بمراجع ضعيفة للمهام فقط)
+        self._late_tasks = set()
+
+        self.stats: Dict[str, int] = {"calls": 0, "timeouts": 0, "errors": 0, "rejected": 0, "late_writes": 0}
+
+    @property
+    def is_open(self) -> bool:
+        """القاطع مفتوح = نرفض الاستدعاءات حتى انتهاء فترة التبريد."""
+        return time.monotonic() < self._open_until
+
+    def _admit(self) -> bool:
+        with self._lock:
+            if self.is_open or self._inflight >= self.max_pending:
+                self.stats["rejected"] += 1
+                return False
+            self._inflight += 1
+            self.stats["calls"] += 1
+            return True
+
+    def _release(self, *_):
+        with self._lock:
+            self._inflight -= 1
+
+    def _record_success(self):
+        with self._lock:
+            self._failures = 0
+
+    def _record_failure(self, kind: str, error: Any = None):
+        with self._lock:
+            self.stats[kind] += 1
+            self._failures += 1
+            opened = self._failures >= self.failure_threshold and not self.is_open
+            if opened:
+                self._open_until = time.monotonic() + self.cooldown_s
+        if opened:
+            self.logger.warning(
+                f"CIRCUIT_OPEN: {self._failures} إخفاقات متتالية ({kind}). رفض الاستدعاءات لمدة {self.cooldown_s}s."
+            )
+        elif kind == "errors":
+            self.logger.error(f"VECTOR_CALL_FAIL: {error}")
+
+    def _settle_late_write(self, cf):
+        """حكم نهائي على كتابة تجاوزت مهلتها: الفشل الفعلي فقط يحسب على القاطع."""
+        if cf.cancelled():
+            return
+        error = cf.exception()
+        if error is not None:
+            self._record_failure("errors", error)
+        else:
+            self._record_success()
+
+    async def run_sync(self, fn: Callable[..., Any], *args,
+                       fallback: Any = None, timeout: Optional[float] = None,
+                       write: bool = False, **kwargs) -> Any:
+        """
+        تنفيذ دالة متزامنة في المجمع المحدود مع مهلة.
+        write=True: مهلة الكتابة، والخيط الذي يتجاوزها يكمل ويحكم عليه عند انتهائه.
+        """
+        if not self._admit():
+            return fallback
+
+        # العداد ينقص عند انتهاء الخيط فعلياً، لا عند انتهاء المهلة، حتى يبقى الحد صادقاً
+        cf = self._executor.submit(fn, *args, **kwargs)
+        cf.add_done_callback(self._release)
+        if not write:
+            return await self._await(asyncio.wrap_future(cf), fallback, timeout)
+        return await self._await_write(asyncio.wrap_future(cf), fallback, timeout)
+
+    async def run_async(self, coro: Awaitable[Any],
+                        fallback: Any = None, timeout: Optional[float] = None,
+                        write: bool = False) -> Any:
+        """
+        تنفيذ coroutine أصلية (مثل AsyncQdrantClient) مع مهلة.
+        القراءة تلغى فعلياً عند تجاوز المهلة؛ الكتابة (write=True) لا تلغى: تكمل كمهمة
+        ويحكم عليها عند اكتمالها، كما في run_sync.
+        """
+        if not self._admit():
+            if hasattr(coro, "close"):
+                coro.close()
+            return fallback
+        if not write:
+            try:
+                return await self._await(coro, fallback, timeout)
+            finally:
+                self._release()
+        task = asyncio.ensure_future(coro)
+        task.add_done_callback(self._release)
+        return await self._await_write(task, fallback, timeout)
+
+    async def _await_write(self, future: "asyncio.Future", fallback: Any, timeout: Optional[float]) -> Any:
+        """
+        انتظار كتابة دون إلغائها: asyncio.wait لا يلغي المهمة عند المهلة، والحماية (shield)
+        تمنع إلغاء المستدعي من الوصول إليها. الكتابة المتأخرة تحسم في _settle_late_write.
+        """
+        timeout = timeout or self.write_timeout_s
+        try:
+            done, _ = await asyncio.shield(asyncio.wait({future}, timeout=timeout))
+        except asyncio.CancelledError:
+            self._defer_write(future)
+            raise
+        if not done:
+            with self._lock:
+                self.stats["late_writes"] += 1
+            self.logger.warning(f"VECTOR_WRITE_SLOW: الكتابة تجاوزت {timeout}s وما زالت جارية.")
+            self._defer_write(future)
+            return fallback
+        error = future.exception()
+        if error is not None:
+            self._record_failure("errors", error)
+            return fallback
+        self._record_success()
+        return future.result()
+
+    def _defer_write(self, future: "asyncio.Future"):
+        """الحكم على الكتابة عند اكتمالها فعلياً، مع إبقاء مرجع لها حتى ذلك الحين."""
+        self._late_tasks.add(future)
+        future.add_done_callback(self._late_tasks.discard)
+        future.add_done_callback(self._settle_late_write)
+
+    async def _await(self, awaitable: Awaitable[Any], fallback: Any, timeout: Optional[float]) -> Any:
+        try:
+            result = await asyncio.wait_for(awaitable, timeout=timeout or self.timeout_s)
+            self._record_success()
+            return result
+        except asyncio.TimeoutError:
+            self._record_failure("timeouts")
+            return fallback
+        except Exception as e:
+            self._record_failure("errors", e)
+            return fallback
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
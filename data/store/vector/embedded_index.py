@@ -0,0 +1,574 @@
+# -*- coding: utf-8 -*-
+# ALPHA SOVEREIGN - EMBEDDED VECTOR INDEX (LOCAL FALLBACK)
+# =================================================================
+# Component Name: data/vector/embedded_index.py
+# Core Responsibility: فهرس متجهات مدمج داخل العملية كبديل مباشر لـ AlphaQdrantClient (Pillar: Intelligence).
+# Design Pattern: Adapter / Drop-in Replacement
+# Forensic Impact: يحفظ الذاكرة الطويلة للعقل حتى عند سقوط Qdrant، ويجعل الاختبارات مغلقة (Hermetic) بلا خدمات خارجية.
+# =================================================================
+
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+import numpy as np
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Union, Sequence
+
+from data.storage.vector.async_guard import AsyncCallGuard
+
+PointId = Union[int, str]
+
+
+@dataclass
+class VectorHit:
+    """نتيجة بحث بنفس شكل ScoredPoint في Qdrant (id, score, payload, vector)."""
+    id: PointId
+    score: float
+    payload: Dict[str, Any]
+    vector: Optional[List[float]] = None
+
+
+class _LocalCollection:
+    """
+    مجموعة واحدة مخزنة على القرص.
+    المتجهات (مطبعة لطول 1) في ملف memmap، والبيانات الوصفية في meta.json
+    مع سجل إلحاق (meta.journal) لكل دفعة؛ يدمج السجل في meta.json عندما يبلغ حجم المجموعة.
+    فوق عتبة الحجم يبنى فهرس IVF (k-means كروي) لتقليص مساحة البحث.
+    """
+
+    INITIAL_CAPACITY = 1024
+    # أقل عدد نقاط في السجل قبل الدمج (الدمج O(N) لكن تكلفته موزعة على N كتابة)
+    COMPACT_MIN_POINTS = 4096
+
+    def __init__(self, path: Path, dim: int, ivf_threshold: int, nprobe: Optional[int]):
+        self.path = path
+        self.dim = dim
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+        self.lock = threading.RLock()
+
+        self.count = 0
+        self.capacity = 0
+        self.ids: List[PointId] = []
+        self.payloads: List[Dict[str, Any]] = []
+        self.id_to_row: Dict[PointId, int] = {}
+        self.tag_index: Dict[str, set] = {}
+        self.centroids: Optional[np.ndarray] = None
+        self.ivf_built_at = 0
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._meta_file = self.path / "meta.json"
+        self._journal_file = self.path / "meta.journal"
+        self._journal_points = 0
+        self._vectors_file = self.path / "vectors.f32"
+        self._lists_file = self.path / "lists.i32"
+        self._centroids_file = self.path / "centroids.npy"
+
+        if self._meta_file.exists() or self._journal_file.exists():
+            self._load()
+        else:
+            # meta.json يكتب عند الإنشاء: وجوده (أو وجود السجل) هو علامة المجموعة بعد إعادة التشغيل
+            self._open_maps(self.INITIAL_CAPACITY)
+            self._persist()
+
+    # --- Persistence ---
+
+    def _open_maps(self, capacity: int):
+        """فتح (أو توسيع) ملفات memmap. التخطيط صفي، لذا التوسيع لا يحرك الصفوف الموجودة."""
+        for f, itemsize in ((self._vectors_file, 4 * self.dim), (self._lists_file, 4)):
+            with open(f, "ab") as fh:
+                fh.truncate(capacity * itemsize)
+        self.vectors = np.memmap(self._vectors_file, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        self.list_ids = np.memmap(self._lists_file, dtype=np.int32, mode="r+", shape=(capacity,))
+        self.capacity = capacity
+
+    @staticmethod
+    def _is_collection(path: Path) -> bool:
+        return (path / "meta.json").exists() or (path / "meta.journal").exists()
+
+    def _load(self):
+        if self._meta_file.exists():
+            with open(self._meta_file, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        else:
+            # سجل بلا meta.json (مجموعة لم تدمج بعد): كل الحالة في السجل
+            meta = {"dim": self.dim, "count": 0, "capacity": 0, "ids": [], "payloads": []}
+        self.dim = meta["dim"]
+        self.count = meta["count"]
+        self.ids = meta["ids"]
+        self.payloads = meta["payloads"]
+        self.ivf_built_at = meta.get("ivf_built_at", 0)
+        capacity, torn = meta["capacity"], False
+        if self._journal_file.exists():
+            journal_capacity, torn = self._replay_journal()
+            capacity = max(capacity, journal_capacity)
+        if not self.dim and capacity and self._vectors_file.exists():
+            # السجل لا يحفظ البعد: يستنتج من حجم ملف المتجهات (السعة × البعد × 4 بايت)
+            self.dim = self._vectors_file.stat().st_size // (4 * capacity)
+        self.id_to_row = {pid: row for row, pid in enumerate(self.ids)}
+        for row, payload in enumerate(self.payloads):
+            self._index_tags(row, payload)
+        self._open_maps(max(capacity, self.INITIAL_CAPACITY))
+        if torn or not self._meta_file.exists():
+            # لا نلحق بعد سطر مبتور، ولا نترك المجموعة بلا meta.json: الدمج يبدأ سجلاً نظيفاً
+            self._persist()
+        if self._centroids_file.exists():
+            self.centroids = np.load(self._centroids_file)
+
+    def _replay_journal(self):
+        """
+        إعادة تطبيق دفعات السجل فوق meta.json (إعادة التطبيق آمنة: كل سطر يحدد صفوفه صراحةً).
+        تعيد (أكبر سعة مسجلة، هل انتهى السجل بسطر مبتور).
+        """
+        capacity, torn = 0, False
+        with open(self._journal_file, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    torn = True  # سطر مبتور من انقطاع أثناء الكتابة: كل ما قبله سليم
+                    break
+                for row, pid, payload in zip(entry["rows"], entry["ids"], entry["payloads"]):
+                    if row < len(self.ids):
+                        self.ids[row] = pid
+                        self.payloads[row] = payload
+                    else:
+                        self.ids.append(pid)
+                        self.payloads.append(payload)
+                self.count = max(self.count, entry["count"])
+                self.ivf_built_at = entry.get("ivf_built_at", self.ivf_built_at)
+                capacity = max(capacity, entry["capacity"])
+                self._journal_points += len(entry["rows"])
+        return capacity, torn
+
+    def _append_journal(self, rows: np.ndarray, ids: Sequence[PointId], payloads: Sequence[Dict[str, Any]]):
+        """إلحاق دفعة واحدة بالسجل بعد تفريغ صفحات memmap (التكلفة تتناسب مع الدفعة لا مع المجموعة)."""
+        self.vectors.flush()
+        self.list_ids.flush()
+        entry = {
+            "rows": rows.tolist(),
+            "ids": list(ids),
+            "payloads": list(payloads),
+            "count": self.count,
+            "capacity": self.capacity,
+            "ivf_built_at": self.ivf_built_at,
+        }
+        with open(self._journal_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal_points += len(rows)
+
+    def _persist(self):
+        """حفظ ذري للبيانات الوصفية كاملة بعد تفريغ صفحات memmap، ثم حذف السجل المدمج."""
+        self.vectors.flush()
+        self.list_ids.flush()
+        meta = {
+            "dim": self.dim,
+            "count": self.count,
+            "capacity": self.capacity,
+            "ids": self.ids,
+            "payloads": self.payloads,
+            "ivf_built_at": self.ivf_built_at,
+        }
+        temp_path = self._meta_file.with_suffix(".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, default=str)
+            f.flush()
+            os.fsync(f.fileno())
+        shutil.move(str(temp_path), str(self._meta_file))
+        # الانقطاع هنا يترك سجلاً مدمجاً سابقاً: إعادة تطبيقه تعطي النتيجة نفسها
+        if self._journal_file.exists():
+            self._journal_file.unlink()
+        self._journal_points = 0
+
+    # --- Tag Index ---
+
+    def _index_tags(self, row: int, payload: Dict[str, Any]):
+        for tag in payload.get("tags", None) or []:
+            self.tag_index.setdefault(str(tag), set()).add(row)
+
+    def _unindex_tags(self, row: int, payload: Dict[str, Any]):
+        for tag in payload.get("tags", None) or []:
+            rows = self.tag_index.get(str(tag))
+            if rows is not None:
+                rows.discard(row)
+
+    # --- Write Path ---
+
+    def upsert(self, vectors: np.ndarray, ids: Sequence[PointId], payloads: Sequence[Dict[str, Any]]):
+        with self.lock:
+            rows = np.empty(len(ids), dtype=np.int64)
+            for i, (pid, payload) in enumerate(zip(ids, payloads)):
+                row = self.id_to_row.get(pid)
+                if row is None:
+                    row = self.count
+                    self.count += 1
+                    self.id_to_row[pid] = row
+                    self.ids.append(pid)
+                    self.payloads.append(payload)
+                else:
+                    self._unindex_tags(row, self.payloads[row])
+                    self.payloads[row] = payload
+                self._index_tags(row, payload)
+                rows[i] = row
+
+            if self.count > self.capacity:
+                self._open_maps(max(self.capacity * 2, self.count))
+
+            self.vectors[rows] = vectors
+
+            if self.centroids is not None:
+                self.list_ids[rows] = np.argmax(vectors @ self.centroids.T, axis=1)
+
+            if self.count >= self.ivf_threshold and self.count >= 2 * self.ivf_built_at:
+                # التدريب O(N) أصلاً، فيدمج السجل معه
+                self._train_ivf()
+                self._persist()
+            else:
+                self._append_journal(rows, ids, payloads)
+                if self._journal_points >= max(self.COMPACT_MIN_POINTS, self.count):
+                    self._persist()
+
+    def delete(self, ids: Sequence[PointId]) -> int:
+        """
+        حذف نقاط بالمعرف: الصف الأخير ينقل إلى مكان المحذوف (بلا ثقوب في memmap).
+        السجل إلحاقي فقط، لذا يدمج الحذف في meta.json مباشرة؛ المستدعون يحذفون بالدفعات.
+        """
+        with self.lock:
+            removed = 0
+            for pid in ids:
+                row = self.id_to_row.pop(pid, None)
+                if row is None:
+                    continue
+                self._unindex_tags(row, self.payloads[row])
+                last = self.count - 1
+                if row != last:
+                    moved_id, moved_payload = self.ids[last], self.payloads[last]
+                    self._unindex_tags(last, moved_payload)
+                    self.vectors[row] = self.vectors[last]
+                    self.list_ids[row] = self.list_ids[last]
+                    self.ids[row] = moved_id
+                    self.payloads[row] = moved_payload
+                    self.id_to_row[moved_id] = row
+                    self._index_tags(row, moved_payload)
+                self.ids.pop()
+                self.payloads.pop()
+                self.count = last
+                removed += 1
+            if removed:
+                self._persist()
+            return removed
+
+    def _train_ivf(self, iterations: int = 10, chunk: int = 65536):
+        """تدريب المكمم الخشن (Spherical k-means) وإعادة توزيع كل الصفوف على القوائم."""
+        n = self.count
+        nlist = int(np.clip(np.sqrt(n), 16, 4096))
+        rng = np.random.default_rng(0)
+
+        sample_idx = np.sort(rng.choice(n, size=min(n, nlist * 64), replace=False))
+        sample = np.asarray(self.vectors[sample_idx])
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+
+        for _ in range(iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            filled = norms[:, 0] > 0
+            centroids[filled] = sums[filled] / norms[filled]
+
+        for start in range(0, n, chunk):
+            end = min(start + chunk, n)
+            self.list_ids[start:end] = np.argmax(self.vectors[start:end] @ centroids.T, axis=1)
+
+        self.centroids = centroids
+        self.ivf_built_at = n
+        np.save(self._centroids_file, centroids)
+
+    # --- Read Path ---
+
+    def _candidate_rows(self, queries: np.ndarray, tags: Optional[List[str]]):
+        """
+        الصفوف المرشحة بعد تصفية الوسوم و/أو فحص قوائم IVF.
+
+        Returns:
+            (rows, probe_mask): rows=None تعني كل الصفوف، و probe_mask مصفوفة (استعلامات × قوائم)
+            تحدد القوائم المفحوصة لكل استعلام (None عند غياب IVF).
+        """
+        n = self.count
+        candidates = None
+        probe_mask = None
+
+        if self.centroids is not None:
+            nlist = len(self.centroids)
+            nprobe = min(nlist, self.nprobe or max(4, nlist // 10))
+            probes = np.argpartition(-(queries @ self.centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+            probe_mask = np.zeros((len(queries), nlist), dtype=bool)
+            probe_mask[np.arange(len(queries))[:, None], probes] = True
+            candidates = np.flatnonzero(probe_mask.any(axis=0)[self.list_ids[:n]])
+
+        if tags:
+            allowed = set()
+            for tag in tags:
+                allowed |= self.tag_index.get(str(tag), set())
+            allowed_rows = np.fromiter(allowed, dtype=np.int64, count=len(allowed))
+            candidates = np.sort(allowed_rows) if candidates is None else np.intersect1d(candidates, allowed_rows)
+
+        return candidates, probe_mask
+
+    def search(self, query: np.ndarray, limit: int, tags: Optional[List[str]],
+               score_threshold: Optional[float], with_vectors: bool = False) -> List[VectorHit]:
+        return self.search_batch(query[None, :], limit, tags, score_threshold, with_vectors)[0]
+
+    def search_batch(self, queries: np.ndarray, limit: int, tags: Optional[List[str]],
+                     score_threshold: Optional[float], with_vectors: bool = False) -> List[List[VectorHit]]:
+        """
+        بحث لعدة استعلامات دفعة واحدة: ضرب مصفوفة × مصفوفة (Q · Vᵀ) بدلاً من حلقة استعلامات.
+        """
+        with self.lock:
+            m = len(queries)
+            n = self.count
+            if n == 0 or limit <= 0:
+                return [[] for _ in range(m)]
+
+            rows, probe_mask = self._candidate_rows(queries, tags)
+            if rows is None:
+                rows = np.arange(n)
+                block = self.vectors[:n]
+            elif rows.size == 0:
+                return [[] for _ in range(m)]
+            else:
+                block = self.vectors[rows]
+
+            # تقسيم الاستعلامات لحصر مصفوفة النتائج في ~64MB
+            chunk = max(1, (1 << 24) // len(rows))
+            k = min(limit, len(rows))
+            results: List[List[VectorHit]] = []
+
+            for start in range(0, m, chunk):
+                q = queries[start:start + chunk]
+                scores = q @ block.T
+                if probe_mask is not None:
+                    # كل استعلام يرى فقط القوائم التي فحصها هو
+                    visible = probe_mask[start:start + chunk][:, self.list_ids[rows]]
+                    scores = np.where(visible, scores, -np.inf)
+
+                top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+                top_scores = np.take_along_axis(scores, top, axis=1)
+                order = np.argsort(-top_scores, axis=1)
+                top = np.take_along_axis(top, order, axis=1)
+                top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+                for qi in range(len(q)):
+                    hits = []
+                    for j in range(k):
+                        score = float(top_scores[qi, j])
+                        if not np.isfinite(score) or (score_threshold is not None and score < score_threshold):
+                            break
+                        row = int(rows[top[qi, j]])
+                        hits.append(VectorHit(
+                            id=self.ids[row],
+                            score=score,
+                            payload=self.payloads[row],
+                            vector=self.vectors[row].tolist() if with_vectors else None
+                        ))
+                    results.append(hits)
+
+            return results
+
+
+class EmbeddedVectorIndex:
+    """
+    فهرس متجهات مدمج (بدون خادم).
+    يطبق نفس واجهة AlphaQdrantClient (ensure_collection / upsert / search)
+    باستخدام NumPy: بحث شامل (Brute Force) للمجموعات الصغيرة، و IVF فوق عتبة الحجم.
+    """
+
+    def __init__(self,
+                 root: str = "data/vector_index",
+                 ivf_threshold: int = 20000,
+                 nprobe: Optional[int] = None,
+                 timeout_s: float = 0.25,
+                 write_timeout_s: float = 5.0,
+                 max_workers: int = 2):
+        """
+        Args:
+            root: مجلد التخزين (مجلد فرعي لكل مجموعة).
+            ivf_threshold: عدد النقاط الذي يبدأ عنده بناء فهرس IVF.
+            nprobe: عدد القوائم التي تفحص في كل بحث (None = تلقائي ~10%).
+            timeout_s: المهلة الافتراضية للبحث غير المتزامن.
+            write_timeout_s: مهلة الكتابة (أطول: الكتابة تفرغ memmap وتستدعي fsync).
+            max_workers: حجم مجمع الخيوط الذي ينفذ البحث والكتابة خارج حلقة الأحداث.
+        """
+        self.logger = logging.getLogger("Alpha.Storage.Vector.Embedded")
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+        self._collections: Dict[str, _LocalCollection] = {}
+        self._lock = threading.Lock()
+        self._guard = AsyncCallGuard("embedded", timeout_s=timeout_s, write_timeout_s=write_timeout_s,
+                                     max_workers=max_workers)
+        self.is_active = True
+
+    def _get(self, collection_name: str, vector_size: Optional[int] = None) -> Optional[_LocalCollection]:
+        with self._lock:
+            coll = self._collections.get(collection_name)
+            if coll is not None:
+                return coll
+            path = self.root / collection_name
+            if not _LocalCollection._is_collection(path) and vector_size is None:
+                return None
+            coll = _LocalCollection(path, vector_size or 0, self.ivf_threshold, self.nprobe)
+            self._collections[collection_name] = coll
+            return coll
+
+    @staticmethod
+    def _normalize(vectors: Union[List[float], List[List[float]], np.ndarray]) -> np.ndarray:
+        """تطبيع لطول 1 حتى يساوي الضرب النقطي التشابه الجيبي (Cosine)."""
+        arr = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        norms = np.linalg.norm(arr, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return arr / norms
+
+    def ensure_collection(self, collection_name: str, vector_size: int = 768):
+        """إنشاء المجموعة إذا لم تكن موجودة (Cosine دائماً)."""
+        if self._get(collection_name, vector_size) is not None:
+            return
+        self.logger.info(f"INIT_MEMORY: إنشاء مجموعة محلية جديدة '{collection_name}'...")
+
+    # --- Qdrant-compatible surface (used by VectorService / SemanticMemory) ---
+
+    async def upsert(self, collection_name: str, points: List[Dict[str, Any]],
+                     timeout: Optional[float] = None) -> bool:
+        """
+        كتابة نقاط بصيغة {"id"?, "vector", "payload"}.
+        تنشأ المجموعة تلقائياً بحجم أول متجه.
+        """
+        return await self._guard.run_sync(self._upsert_points, collection_name, points,
+                                          fallback=False, timeout=timeout, write=True)
+
+    async def search(self,
+                     collection_name: str,
+                     query_vector: List[float],
+                     limit: int = 5,
+                     tags: Optional[List[str]] = None,
+                     score_threshold: Optional[float] = None,
+                     with_vectors: bool = False,
+                     timeout: Optional[float] = None) -> List[VectorHit]:
+        """بحث دلالي مع تصفية اختيارية بالوسوم (أي وسم مطابق يكفي)."""
+        return await self._guard.run_sync(self._search, collection_name, query_vector, limit, tags,
+                                          score_threshold, with_vectors, fallback=[], timeout=timeout)
+
+    async def search_batch(self,
+                           collection_name: str,
+                           query_vectors: List[List[float]],
+                           limit: int = 5,
+                           tags: Optional[List[str]] = None,
+                           score_threshold: Optional[float] = None,
+                           with_vectors: bool = False,
+                           timeout: Optional[float] = None) -> List[List[VectorHit]]:
+        """بحث لعدة متجهات استعلام في استدعاء واحد (نتيجة لكل استعلام بنفس الترتيب)."""
+        return await self._guard.run_sync(self._search_batch, collection_name, query_vectors, limit, tags,
+                                          score_threshold, with_vectors,
+                                          fallback=[[] for _ in query_vectors], timeout=timeout)
+
+    def is_connected(self) -> bool:
+        return not self._guard.is_open
+
+    # --- AlphaQdrantClient-compatible surface ---
+
+    def store_memory(self,
+                     collection_name: str,
+                     vector: List[float],
+                     payload: Dict[str, Any],
+                     memory_id: Optional[PointId] = None):
+        """تخزين "ذكرى" جديدة (Upsert)."""
+        try:
+            self._upsert_points(collection_name, [{"id": memory_id, "vector": vector, "payload": payload}])
+        except Exception as e:
+            self.logger.error(f"STORE_FAIL: فشل حفظ الذكرى محلياً: {e}")
+
+    def recall_similar(self,
+                       collection_name: str,
+                       query_vector: List[float],
+                       limit: int = 5,
+                       score_threshold: float = 0.7) -> List[Dict[str, Any]]:
+        """استرجاع الذكريات المشابهة بنفس صيغة AlphaQdrantClient."""
+        hits = self._search(collection_name, query_vector, limit, None, score_threshold, False)
+        return [{"id": h.id, "score": h.score, "payload": h.payload} for h in hits]
+
+    def delete_memories(self, collection_name: str, memory_ids: Sequence[PointId]) -> int:
+        """حذف ذكريات بالمعرف. يعيد عدد النقاط المحذوفة."""
+        if not memory_ids:
+            return 0
+        coll = self._get(collection_name)
+        if coll is None:
+            return 0
+        try:
+            return coll.delete(memory_ids)
+        except Exception as e:
+            self.logger.error(f"DELETE_FAIL: فشل حذف الذكريات محلياً: {e}")
+            return 0
+
+    def drop_collection(self, collection_name: str):
+        """حذف المجموعة كاملة من القرص (للمجموعات المؤقتة مثل ذاكرة الردود)."""
+        with self._lock:
+            coll = self._collections.pop(collection_name, None)
+            if coll is not None:
+                with coll.lock:
+                    shutil.rmtree(coll.path, ignore_errors=True)
+            else:
+                shutil.rmtree(self.root / collection_name, ignore_errors=True)
+
+    def health_check(self) -> Dict[str, str]:
+        return {
+            "status": "DEGRADED" if self._guard.is_open else "ONLINE",
+            "provider": "Embedded (NumPy/IVF)"
+        }
+
+    # --- Internals ---
+
+    def _upsert_points(self, collection_name: str, points: List[Dict[str, Any]]) -> bool:
+        """الكتابة الفعلية. الأخطاء ترفع (لا تبتلع) حتى يحصيها الحارس ويعيد المخزن المؤقت الدفعة."""
+        if not points:
+            return True
+        vectors = self._normalize([p["vector"] for p in points])
+        coll = self._get(collection_name, vectors.shape[1])
+        if coll.dim != vectors.shape[1]:
+            raise ValueError(f"Dimension mismatch: {vectors.shape[1]} != {coll.dim}")
+
+        stored_at = datetime.utcnow().isoformat()
+        ids, payloads = [], []
+        for p in points:
+            pid = p.get("id")
+            ids.append(pid if pid is not None else str(uuid.uuid4()))
+            payload = dict(p.get("payload") or {})
+            payload["stored_at"] = stored_at
+            payloads.append(payload)
+
+        coll.upsert(vectors, ids, payloads)
+        return True
+
+    def _search(self, collection_name, query_vector, limit, tags, score_threshold, with_vectors) -> List[VectorHit]:
+        return self._search_batch(collection_name, [query_vector], limit, tags, score_threshold, with_vectors)[0]
+
+    def _search_batch(self, collection_name, query_vectors, limit, tags, score_threshold,
+                      with_vectors) -> List[List[VectorHit]]:
+        if len(query_vectors) == 0:
+            return []
+        try:
+            coll = self._get(collection_name)
+            if coll is None:
+                return [[] for _ in query_vectors]
+            queries = self._normalize(query_vectors)
+            return coll.search_batch(queries, limit, tags, score_threshold, with_vectors)
+        except Exception as e:
+            self.logger.error(f"RECALL_FAIL: فشل البحث المحلي: {e}")
+            return [[] for _ in query_vectors]
@@ -8,6 +8,7 @@
 # =================================================================
 
 import logging
+import uuid
 from typing import List, Dict, Any, Optional, Union
 from datetime import datetime
 
@@ -20,26 +21,44 @@ except ImportError:
     QbClient = None
     models = None
 
+# العميل غير المتزامن متاح في الإصدارات الحديثة فقط (>= 1.6)
+try:
+    from qdrant_client import AsyncQdrantClient as QbAsyncClient
+except ImportError:
+    QbAsyncClient = None
+
+from data.storage.vector.async_guard import AsyncCallGuard
+from data.storage.vector.embedded_index import EmbeddedVectorIndex
+
 class AlphaQdrantClient:
     """
     عميل الذاكرة المتجهية.
     يدير تخزين واسترجاع "الذكريات الدلالية" (Semantic Memories).
     """
 
-    def __init__(self, host: str = "127.0.0.1", port: int = 6333):
+    def __init__(self, host: str = "127.0.0.1", port: int = 6333, timeout_s: float = 0.5,
+                 write_timeout_s: float = 5.0):
         """
         تهيئة الاتصال بقاعدة الذاكرة.
         
         Args:
             host: عنوان الخادم (Localhost للأمان).
             port: المنفذ الافتراضي لـ Qdrant.
+            timeout_s: المهلة الافتراضية لكل بحث غير متزامن (بعدها نعيد نتيجة فارغة).
+            write_timeout_s: مهلة الكتابة (upsert) المستقلة عن مهلة البحث.
         """
         self.logger = logging.getLogger("Alpha.Storage.Vector")
         self.host = host
         self.port = port
         self.client: Optional[QbClient] = None
+        self.async_client = None
         self.is_active = False
 
+        # المسار غير المتزامن لا يحجب حلقة الأحداث أبداً:
+        # AsyncQdrantClient إن توفر، وإلا مجمع خيوط محدود حول العميل المتزامن
+        self._guard = AsyncCallGuard("qdrant", timeout_s=timeout_s, write_timeout_s=write_timeout_s,
+                                     max_workers=4)
+
         if QbClient is None:
             self.logger.critical("DEPENDENCY_MISSING: مكتبة 'qdrant-client' غير مثبتة.")
             return
@@ -52,6 +71,8 @@ class AlphaQdrantClient:
             self.client = QbClient(host=self.host, port=self.port)
             # فحص سريع للاتصال
             self.client.get_collections()
+            if QbAsyncClient is not None:
+                self.async_client = QbAsyncClient(host=self.host, port=self.port)
             self.is_active = True
             self.logger.info("VECTOR_DB_CONNECTED: الذاكرة الدلالية متصلة بنجاح.")
         except Exception as e:
@@ -106,7 +127,6 @@ class AlphaQdrantClient:
             
             # استخدام رقم عشوائي كمعرف إذا لم يحدد
             if memory_id is None:
-                import uuid
                 memory_id = str(uuid.uuid4())
 
             point = models.PointStruct(
@@ -164,9 +184,156 @@ class AlphaQdrantClient:
             self.logger.error(f"RECALL_FAIL: فشل استرجاع الذكريات: {e}")
             return []
 
+    def delete_memories(self, collection_name: str, memory_ids: List[Union[int, str]]) -> int:
+        """
+        حذف ذكريات بالمعرف.
+        
+        Returns:
+            int: عدد المعرفات المرسلة للحذف (0 عند الفشل).
+        """
+        if not self.is_active or not memory_ids: return 0
+
+        try:
+            self.client.delete(
+                collection_name=collection_name,
+                points_selector=models.PointIdsList(points=list(memory_ids))
+            )
+            return len(memory_ids)
+        except Exception as e:
+            self.logger.error(f"DELETE_FAIL: فشل حذف الذكريات: {e}")
+            return 0
+
+    def drop_collection(self, collection_name: str):
+        """حذف المجموعة كاملة (للمجموعات المؤقتة مثل ذاكرة الردود)."""
+        if not self.is_active: return
+
+        try:
+            self.client.delete_collection(collection_name=collection_name)
+        except Exception as e:
+            self.logger.error(f"COLLECTION_ERROR: فشل حذف المجموعة: {e}")
+
+    async def _call(self, method: str, fallback: Any, timeout: Optional[float],
+                    write: bool = False, **kwargs) -> Any:
+        """
+        توجيه الاستدعاء عبر الحارس: العميل غير المتزامن إن توفر، وإلا المجمع المحدود.
+        في الحالتين: مهلة لكل استدعاء (الكتابة بمهلتها الخاصة)، ورفض فوري إذا كان القاطع مفتوحاً.
+        """
+        if self.async_client is not None:
+            return await self._guard.run_async(getattr(self.async_client, method)(**kwargs),
+                                               fallback=fallback, timeout=timeout, write=write)
+        return await self._guard.run_sync(getattr(self.client, method),
+                                          fallback=fallback, timeout=timeout, write=write, **kwargs)
+
+    def _tags_filter(self, tags: Optional[List[str]]):
+        if not tags:
+            return None
+        return models.Filter(must=[
+            models.FieldCondition(key="tags", match=models.MatchAny(any=list(tags)))
+        ])
+
+    async def upsert(self, collection_name: str, points: List[Dict[str, Any]],
+                     timeout: Optional[float] = None) -> bool:
+        """
+        كتابة نقاط بصيغة {"id"?, "vector", "payload"} (نفس واجهة EmbeddedVectorIndex).
+        """
+        if not self.is_active: return False
+
+        try:
+            stored_at = datetime.utcnow().isoformat()
+            structs = []
+            for p in points:
+                payload = dict(p.get("payload") or {})
+                payload['stored_at'] = stored_at
+                memory_id = p.get("id")
+                if memory_id is None:
+                    memory_id = str(uuid.uuid4())
+                structs.append(models.PointStruct(id=memory_id, vector=p["vector"], payload=payload))
+        except Exception as e:
+            self.logger.error(f"STORE_FAIL: فشل حفظ الذكرى: {e}")
+            return False
+
+        result = await self._call("upsert", None, timeout, write=True,
+                                  collection_name=collection_name, points=structs)
+        return result is not None
+
+    async def search(self,
+                     collection_name: str,
+                     query_vector: List[float],
+                     limit: int = 5,
+                     tags: Optional[List[str]] = None,
+                     score_threshold: Optional[float] = None,
+                     with_vectors: bool = False,
+                     timeout: Optional[float] = None) -> List[Any]:
+        """
+        بحث دلالي مع تصفية اختيارية بالوسوم (أي وسم مطابق يكفي).
+        يعيد ScoredPoint (id, score, payload, vector)، أو [] عند المهلة/القاطع المفتوح.
+        """
+        if not self.is_active: return []
+
+        return await self._call(
+            "search", [], timeout,
+            collection_name=collection_name,
+            query_vector=query_vector,
+            query_filter=self._tags_filter(tags),
+            limit=limit,
+            score_threshold=score_threshold,
+            with_vectors=with_vectors
+        )
+
+    async def search_batch(self,
+                           collection_name: str,
+                           query_vectors: List[List[float]],
+                           limit: int = 5,
+                           tags: Optional[List[str]] = None,
+                           score_threshold: Optional[float] = None,
+                           with_vectors: bool = False,
+                           timeout: Optional[float] = None) -> List[List[Any]]:
+        """
+        بحث لعدة متجهات استعلام في طلب شبكي واحد (Qdrant search_batch).
+        """
+        empty = [[] for _ in query_vectors]
+        if not self.is_active: return empty
+
+        query_filter = self._tags_filter(tags)
+        requests = [
+            models.SearchRequest(
+                vector=list(vec),
+                filter=query_filter,
+                limit=limit,
+                score_threshold=score_threshold,
+                with_payload=True,
+                with_vector=with_vectors
+            )
+            for vec in query_vectors
+        ]
+        return await self._call("search_batch", empty, timeout,
+                                collection_name=collection_name, requests=requests)
+
+    def is_connected(self) -> bool:
+        return self.is_active and not self._guard.is_open
+
     def health_check(self) -> Dict[str, str]:
         """فحص حالة العقل."""
         return {
-            "status": "ONLINE" if self.is_active else "OFFLINE",
+            "status": ("DEGRADED" if self._guard.is_open else "ONLINE") if self.is_active else "OFFLINE",
             "provider": "Qdrant (Local)"
-        }
\ No newline at end of file
+        }
+
+
+def create_vector_client(host: str = "127.0.0.1",
+                         port: int = 6333,
+                         embedded_root: str = "data/vector_index",
+                         prefer_embedded: bool = False) -> Union[AlphaQdrantClient, EmbeddedVectorIndex]:
+    """
+    اختيار الذاكرة المتجهية المتاحة.
+    إذا كان Qdrant غير متاح (أو طُلب الوضع المدمج صراحةً) نعود للفهرس المحلي
+    بدلاً من إرجاع [] بصمت في كل عملية استرجاع.
+    """
+    if not prefer_embedded:
+        client = AlphaQdrantClient(host=host, port=port)
+        if client.is_active:
+            return client
+        logging.getLogger("Alpha.Storage.Vector").warning(
+            "VECTOR_FALLBACK: Qdrant غير متاح. التحويل إلى الفهرس المحلي المدمج."
+        )
+    return EmbeddedVectorIndex(root=embedded_root)
\ No newline at end of file
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+# ALPHA SOVEREIGN - VECTOR WRITE BUFFER
+# =================================================================
+# Component Name: data/vector/write_buffer.py
+# Core Responsibility: تجميع كتابات الذاكرة المتجهية وتفريغها دفعة واحدة حسب الحجم أو الزمن (Pillar: Intelligence).
+# Design Pattern: Write-Behind Buffer
+# Forensic Impact: كل نقطة مؤجلة تكتب خلال max_delay_s على الأكثر؛ ويتم تسجيل فشل أي دفعة بعدد نقاطها.
+# =================================================================
+
+import asyncio
+import logging
+import uuid
+from typing import List, Dict, Any, Optional
+
+
+class VectorWriteBuffer:
+    """
+    مخزن كتابة مؤقت أمام عميل المتجهات (Qdrant أو الفهرس المدمج).
+    يحول N عملية upsert منفصلة إلى استدعاء واحد لكل مجموعة.
+    الدفعة الفاشلة تعاد إلى المخزن (بحد أقصى) وتعاد محاولتها مع التفريغ التالي.
+    """
+
+    def __init__(self, client, max_points: int = 256, max_delay_s: float = 2.0,
+                 max_pending_points: int = 10000):
+        """
+        Args:
+            client: أي عميل يطبق `async upsert(collection_name, points) -> bool`.
+            max_points: التفريغ الفوري عند بلوغ هذا العدد من النقاط المعلقة.
+            max_delay_s: أقصى زمن تبقى فيه نقطة معلقة قبل التفريغ (ومهلة إعادة المحاولة بعد الفشل).
+            max_pending_points: سقف النقاط المحتفظ بها أثناء تعطل العميل (الأقدم يسقط أولاً).
+        """
+        self.logger = logging.getLogger("Alpha.Storage.Vector.Buffer")
+        self.client = client
+        self.max_points = max_points
+        self.max_delay_s = max_delay_s
+        self.max_pending_points = max(max_points, max_pending_points)
+
+        self._pending: Dict[str, List[Dict[str, Any]]] = {}
+        self._count = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        # True بعد فشل تفريغ حتى ينجح تفريغ لاحق: add() يعيد False لينتبه المتصل
+        self._failing = False
+        self.stats: Dict[str, int] = {"flushed": 0, "failed_batches": 0, "dropped": 0}
+
+    @property
+    def pending_count(self) -> int:
+        return self._count
+
+    async def add(self, collection_name: str, points: List[Dict[str, Any]]) -> bool:
+        """
+        إضافة نقاط إلى المخزن. يفرغ فوراً إذا امتلأ، وإلا يجدول تفريغاً زمنياً.
+        كل نقطة بلا معرف تأخذ معرفاً الآن حتى تكون إعادة المحاولة upsert لا تكراراً.
+
+        Returns:
+            True عند القبول (النقطة معلقة ولم يكتبها العميل بعد)، أو نتيجة التفريغ إذا حدث فوراً.
+            False إذا كان آخر تفريغ قد فشل ولم ينجح بعده شيء (النقاط معلقة لإعادة المحاولة).
+        """
+        if not points:
+            return True
+
+        points = [p if p.get("id") is not None else dict(p, id=str(uuid.uuid4())) for p in points]
+        self._pending.setdefault(collection_name, []).extend(points)
+        self._count += len(points)
+        self._enforce_limit()
+
+        # أثناء التعطل لا نفرغ مع كل إضافة: إعادة المحاولة بالمؤقت فقط
+        if self._count >= self.max_points and not self._failing:
+            return await self.flush()
+
+        self._schedule()
+        return not self._failing
+
+    def _schedule(self):
+        if self._timer is None and self._count:
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_later(self.max_delay_s, self._on_timer)
+
+    def _on_timer(self):
+        self._timer = None
+        # نحتفظ بمرجع للمهمة حتى لا يجمعها جامع القمامة قبل انتهائها
+        self._flush_task = asyncio.ensure_future(self.flush())
+
+    def _enforce_limit(self):
+        """إسقاط الأقدم عند تجاوز السقف (عميل معطل لفترة طويلة لا يستنفد الذاكرة)."""
+        overflow = self._count - self.max_pending_points
+        if overflow <= 0:
+            return
+        self.stats["dropped"] += overflow
+        self.logger.error(f"BUFFER_OVERFLOW: إسقاط أقدم {overflow} نقطة (العميل متعطل والسقف {self.max_pending_points}).")
+        for collection_name in list(self._pending):
+            points = self._pending[collection_name]
+            cut = min(overflow, len(points))
+            del points[:cut]
+            overflow -= cut
+            self._count -= cut
+            if not points:
+                del self._pending[collection_name]
+            if overflow <= 0:
+                break
+
+    async def flush(self) -> bool:
+        """
+        تفريغ كل النقاط المعلقة: استدعاء upsert واحد لكل مجموعة.
+        الدفعات الفاشلة تعاد إلى مقدمة المخزن وتجدول إعادة محاولتها.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        pending, self._pending, self._count = self._pending, {}, 0
+
+        success = True
+        for collection_name, points in pending.items():
+            try:
+                ok = await self.client.upsert(collection_name=collection_name, points=points)
+            except Exception as e:
+                self.logger.error(f"BUFFER_FLUSH_ERROR: {collection_name}: {e}")
+                ok = False
+            if ok:
+                self.stats["flushed"] += len(points)
+                continue
+            success = False
+            self.stats["failed_batches"] += 1
+            self.logger.error(f"BUFFER_FLUSH_FAIL: فشل تفريغ {len(points)} نقطة إلى {collection_name}. إعادتها للمخزن.")
+            # الأقدم أولاً: ما أضيف أثناء التفريغ يبقى خلف الدفعة المعادة
+            self._pending[collection_name] = points + self._pending.get(collection_name, [])
+            self._count += len(points)
+
+        self._failing = not success
+        if not success:
+            self._enforce_limit()
+            self._schedule()
+        return success
+
+    async def close(self) -> bool:
+        """تفريغ نهائي عند الإغلاق: انتظار التفريغ الزمني الجاري ثم كتابة ما تبقى."""
+        if self._flush_task is not None and not self._flush_task.done():
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+        success = await self.flush()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._count:
+            self.logger.error(f"BUFFER_CLOSE_LOSS: {self._count} نقطة لم تكتب عند الإغلاق.")
+        return success
@@ -152,6 +152,30 @@ impl TSDBManager {
         Ok(rows)
     }
 
+    /// التطهير بعد الأرشفة (Post-Archive Purge).
+    /// حذف نافذة [start, end) لرمز واحد. يستدعى فقط بعد التحقق من كتابة الأرشيف البارد.
+    pub async fn delete_range(
+        &self,
+        symbol: &str,
+        start: DateTime<Utc>,
+        end: DateTime<Utc>
+    ) -> Result<u64, sqlx::Error> {
+
+        let query = "
+            DELETE FROM market_ticks
+            WHERE symbol = $1 AND time >= $2 AND time < $3
+        ";
+
+        let result = sqlx::query(query)
+            .bind(symbol)
+            .bind(start)
+            .bind(end)
+            .execute(&self.pool)
+            .await?;
+
+        Ok(result.rows_affected())
+    }
+
     /// إغلاق الاتصال بأمان.
     pub async fn close(&self) {
         self.pool.close().await;
@@ -0,0 +1,46 @@
+# =================================================================
+# ALPHA SOVEREIGN ORGANISM - JIT CACHE BUILDER
+# =================================================================
+# File: ops/build_tools/jit_cache_builder.py
+# Status: PRODUCTION (Automation Tool)
+# Pillar: Performance
+# Forensic Purpose: ترجمة نوى QuantLogicCore مسبقاً لكل التواقيع المعلنة وحفظها في مجلد الكاش
+#                   المشحون مع الإصدار، حتى لا تدفع أي عملية زمن الترجمة عند الإقلاع.
+# =================================================================
+#
+# الاستخدام (أثناء بناء الصورة، على نفس المعالج/الإصدار الذي سيشغلها):
+#   python ops/build_tools/jit_cache_builder.py [--cache-dir PATH]
+# الافتراضي brain/generated/jit_cache؛ التشغيل يستخدمه عند ضبط ALPHA_JIT_CACHE_DIR على نفس المسار.
+
+import os
+import sys
+import time
+
+
+def build_cache():
+    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+    if "--cache-dir" in sys.argv:
+        cache_dir = sys.argv[sys.argv.index("--cache-dir") + 1]
+    else:
+        cache_dir = os.path.join(base_dir, "brain", "generated", "jit_cache")
+    # يجب ضبطه قبل استيراد logic (Numba يحدد موقع الكاش عند تعريف النوى)
+    os.environ["ALPHA_JIT_CACHE_DIR"] = os.path.abspath(cache_dir)
+    sys.path.insert(0, base_dir)
+
+    from brain.agents.quant import logic
+
+    if not logic.NUMBA_AVAILABLE:
+        print("[-] CRITICAL ERROR: numba is not installed; nothing to compile.")
+        sys.exit(1)
+
+    import numba
+    print("[*] Alpha JIT Cache Builder Initialized")
+    print(f"[*] Cache Dir: {numba.config.CACHE_DIR or '(numba default: __pycache__)'}")
+
+    t0 = time.time()
+    count = logic.compile_kernels()
+    print(f"[+] Compiled {count} kernel signatures in {time.time() - t0:.2f}s")
+
+
+if __name__ == "__main__":
+    build_cache()
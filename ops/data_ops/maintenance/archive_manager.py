@@ -12,12 +12,13 @@
 import asyncio
 import logging
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 # استيراد مدراء التخزين الذين صنعناهم سابقاً
 # نفترض أنهم متاحون في المسارات التالية
 from data.storage.warm.ts_db_manager import TSDBManager
 from data.storage.cold.parquet_archiver import ParquetArchiver
+from data.storage.cold.rollup_builder import OHLCVRollupBuilder
 
 class ArchiveManager:
     """
@@ -28,73 +29,102 @@ class ArchiveManager:
     def __init__(self, 
                  warm_db: TSDBManager, 
                  cold_archiver: ParquetArchiver,
-                 retention_days: int = 30):
+                 rollup_builder: Optional[OHLCVRollupBuilder] = None):
         """
         تهيئة المدير.
         
         Args:
             warm_db: مدير قاعدة البيانات السريعة (المصدر).
             cold_archiver: مدير الأرشيف البارد (الوجهة).
-            retention_days: عدد الأيام التي تبقى فيها البيانات "حارة" قبل الترحيل.
+            rollup_builder: باني الشموع (اختياري) لتجسيد OHLCV بعد كل دورة أرشفة.
+
+        ملاحظة: لا يملك المدير نافذة احتفاظ خاصة به؛ متى تنتقل البيانات يقرره
+        TierPolicyEngine (ticks 'warm->cold') ويستدعي window_handler بالنافذة المستحقة.
         """
         self.logger = logging.getLogger("Alpha.Maintenance.Archive")
         self.warm_db = warm_db
         self.cold_archiver = cold_archiver
-        self.retention_days = retention_days
+        self.rollup_builder = rollup_builder
 
-    async def run_daily_cycle(self, symbol_list: List[str]):
-        """
-        تشغيل دورة الأرشفة اليومية.
-        يجب جدولة هذه الوظيفة لتعمل في وقت هدوء السوق (مثلاً 00:00 UTC).
+    async def archive_window(self,
+                             symbol_list: List[str],
+                             start: Optional[datetime],
+                             end: datetime,
+                             strict: bool = False) -> int:
         """
-        self.logger.info("ARCHIVE_START: بدء دورة الترحيل اليومية...")
-        
-        cutoff_date = datetime.utcnow() - timedelta(days=self.retention_days)
-        self.logger.info(f"CUTOFF_DATE: سيتم أرشفة البيانات الأقدم من {cutoff_date.date()}")
+        أرشفة نافذة زمنية [start, end) يوماً بيوم.
+        start = None يعني اليوم الأخير قبل end فقط.
+
+        Args:
+            strict: رفع استثناء إذا فشل أي رمز (يستخدمه TierPolicyEngine حتى لا تتقدم العلامة المائية).
 
+        Returns:
+            عدد السجلات المرحلة.
+        """
+        day = (start or end - timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
         total_archived = 0
+        failed = []
 
-        for symbol in symbol_list:
-            try:
-                # 1. الاستخراج (Extract)
-                # جلب البيانات المرشحة للأرشفة ليوم واحد (قبل الـ Cutoff)
-                # للتبسيط، نأخذ يوماً واحداً محدداً (اليوم الذي سقط من نافذة الـ retention)
-                target_day_start = cutoff_date.replace(hour=0, minute=0, second=0, microsecond=0)
-                target_day_end = target_day_start + timedelta(days=1)
-
-                data = await self.warm_db.fetch_history(symbol, target_day_start, target_day_end)
-                
-                if not data:
-                    continue
-
-                # تحويل الكائنات إلى قواميس (للمعالجة في Archiver)
-                # ملاحظة: نفترض أن data هي قائمة كائنات MarketTick
-                data_dicts = [tick.__dict__ for tick in data] 
-
-                # 2. النقل (Transfer)
-                # الكتابة للأرشيف البارد
-                file_path = self.cold_archiver.archive_batch(
-                    data=data_dicts,
-                    symbol=symbol,
-                    date_str=target_day_start.strftime("%Y-%m-%d")
-                )
-
-                if file_path:
-                    # 3. التحقق والحذف (Verify & Purge)
-                    # هذه الخطوة حرجة: لا نحذف من DB إلا إذا تأكدنا أن الملف كتب بنجاح
-                    self.logger.info(f"ARCHIVE_SUCCESS: تم حفظ {len(data)} سجل لـ {symbol}. جاري التنظيف من DB...")
-                    
-                    # في بيئة الإنتاج، نستخدم دالة حذف مخصصة في TSDBManager
-                    # await self.warm_db.delete_range(symbol, target_day_start, target_day_end)
-                    total_archived += len(data)
-                else:
-                    self.logger.error(f"ARCHIVE_FAIL: فشل أرشفة {symbol}. لن يتم الحذف من DB.")
-
-            except Exception as e:
-                self.logger.error(f"ARCHIVE_ERROR: خطأ أثناء معالجة {symbol}: {e}")
+        while day < end:
+            for symbol in symbol_list:
+                try:
+                    total_archived += await self._archive_day(symbol, day)
+                except Exception as e:
+                    self.logger.error(f"ARCHIVE_ERROR: خطأ أثناء معالجة {symbol}: {e}")
+                    failed.append(symbol)
+            day += timedelta(days=1)
 
         self.logger.info(f"ARCHIVE_COMPLETE: تم ترحيل {total_archived} سجل بنجاح.")
 
+        # تجسيد الشموع من النبضات المؤرشفة حديثاً (تراكمي عبر العلامة المائية)
+        if self.rollup_builder and total_archived:
+            await asyncio.to_thread(self.rollup_builder.run_cycle, symbol_list)
+
+        if strict and failed:
+            raise RuntimeError(f"Archive failed for: {sorted(set(failed))}")
+        return total_archived
+
+    def window_handler(self, symbol_list: List[str]):
+        """معالج انتقال 'warm->cold' لـ TierPolicyEngine (نوافذ بتوقيت Unix)."""
+        async def _handler(start_ts: Optional[float], end_ts: float) -> int:
+            start = datetime.utcfromtimestamp(start_ts) if start_ts is not None else None
+            return await self.archive_window(symbol_list, start, datetime.utcfromtimestamp(end_ts), strict=True)
+        return _handler
+
+    async def _archive_day(self, symbol: str, day_start: datetime) -> int:
+        """ترحيل يوم واحد لرمز واحد. يعيد عدد السجلات المرحلة."""
+        day_end = day_start + timedelta(days=1)
+
+        # 1. الاستخراج (Extract)
+        # fetch_history يشمل الحد الأعلى؛ نقصره على [day_start, day_end) كي يطابق نافذة الحذف
+        data = [t for t in await self.warm_db.fetch_history(symbol, day_start, day_end) if t.time < day_end]
+        
+        if not data:
+            return 0
+
+        # تحويل الكائنات إلى قواميس (للمعالجة في Archiver)
+        # ملاحظة: نفترض أن data هي قائمة كائنات MarketTick
+        data_dicts = [tick.__dict__ for tick in data] 
+
+        # 2. النقل (Transfer)
+        # الكتابة للأرشيف البارد
+        file_path = self.cold_archiver.archive_batch(
+            data=data_dicts,
+            symbol=symbol,
+            date_str=day_start.strftime("%Y-%m-%d")
+        )
+
+        if not file_path:
+            raise IOError(f"فشل أرشفة {symbol}. لن يتم الحذف من DB.")
+
+        # 3. التحقق والحذف (Verify & Purge)
+        # هذه الخطوة حرجة: لا نحذف من DB إلا إذا تأكدنا أن الملف كتب بنجاح
+        self.logger.info(f"ARCHIVE_SUCCESS: تم حفظ {len(data)} سجل لـ {symbol}. جاري التنظيف من DB...")
+        
+        purged = await self.warm_db.delete_range(symbol, day_start, day_end)
+        self.logger.info(f"ARCHIVE_PURGED: {symbol} {day_start.date()} | {purged} سجل حذف من DB.")
+        return len(data)
+
     async def force_vacuum(self):
         """
         تنظيف المساحة الفارغة في قاعدة البيانات (Vacuum).
@@ -47,11 +47,9 @@ class DBCompactor:
             # استعادة المساحة المهدورة من الصفوف المحذوفة.
             await self._vacuum_tables(conn)
 
-            # 3. ضغط التايم-سكيل (TimescaleDB Compression)
-            # التأكد من أن السياسات تعمل، وضغط أي قطع (Chunks) فوتتها السياسة التلقائية.
-            await self._enforce_compression_policies(conn)
-
-            # 4. إعادة الفهرسة (Reindex) - عملية ثقيلة
+            # 3. إعادة الفهرسة (Reindex) - عملية ثقيلة
+            # (ضغط القطع الزمنية ليس هنا: هو انتقال 'hot->warm' يجدوله TierPolicyEngine،
+            #  انظر compress_window_handler)
             # نقوم بها فقط للجداول الحيوية التي تتعرض لكتابة كثيفة
             await self._reindex_critical_indices(conn)
 
@@ -83,40 +81,37 @@ class DBCompactor:
             # تنظيف جدول السجلات لأنه يمتلئ بسرعة
             await conn.execute("VACUUM api_access_logs;")
             await conn.execute("VACUUM trade_orders;")
+            # النبضات تحذف بعد أرشفتها (ArchiveManager) فتترك صفوفاً ميتة
+            await conn.execute("VACUUM market_ticks;")
         except Exception as e:
             self.logger.warning(f"VACUUM_ERROR: {e}")
 
-    async def _enforce_compression_policies(self, conn):
-        """
-        إجبار ضغط البيانات القديمة.
-        TimescaleDB لديها سياسات تلقائية، لكن هذا "تدخل يدوي" لضمان التنفيذ.
+    def compress_window_handler(self, table: str = "market_ticks"):
         """
-        self.logger.info("STEP 3: التحقق من ضغط القطع الزمنية (Chunks)...")
-        
-        # استعلام لمعرفة القطع غير المضغوطة التي يجب أن تضغط (أقدم من 7 أيام مثلاً)
-        query = """
-            SELECT show_chunks('market_ticks', older_than => INTERVAL '7 days')
-            EXCEPT
-            SELECT show_chunks('market_ticks', older_than => INTERVAL '7 days') 
-            FROM timescaledb_information.chunks WHERE is_compressed = True;
+        معالج انتقال 'hot->warm' لـ TierPolicyEngine.
+        الطبقة الحارة = قطع TimescaleDB غير المضغوطة؛ عند تجاوزها عمر السياسة تضغط
+        كل قطعة انتهى مداها قبل end_ts (عمر الضغط يأتي من السياسة لا من هذا الملف).
         """
-        # (هذا الاستعلام تبسيطي، التنفيذ الفعلي يتطلب التعامل مع مخرجات الوظائف)
-        
-        # بدلاً من التعقيد، نطلب من Timescale تنفيذ السياسات فوراً
-        try:
-            # تشغيل وظيفة الضغط يدوياً
-            await conn.execute("SELECT run_job(job_id) FROM timescaledb_information.jobs WHERE proc_name = 'policy_compression';")
-            self.logger.info("COMPRESSION_TRIGGERED: تم تفعيل وظائف الضغط الخلفية.")
-        except Exception as e:
-            # قد لا توجد وظائف معلقة
-            pass
+        async def _handler(start_ts: Optional[float], end_ts: float) -> int:
+            conn = await asyncpg.connect(self.db_url)
+            try:
+                rows = await conn.fetch(
+                    "SELECT compress_chunk(c, if_not_compressed => true) "
+                    "FROM show_chunks($1::regclass, older_than => to_timestamp($2)) c;",
+                    table, end_ts,
+                )
+            finally:
+                await conn.close()
+            self.logger.info(f"COMPRESSION_APPLIED: {table} | {len(rows)} قطعة أقدم من {end_ts}.")
+            return len(rows)
+        return _handler
 
     async def _reindex_critical_indices(self, conn):
         """
         إصلاح الفهارس المتضخمة.
         تحذير: هذا قد يسبب قفلاً (Lock) للجداول للحظات.
         """
-        self.logger.info("STEP 4: صيانة الفهارس (REINDEX CONCURRENTLY)...")
+        self.logger.info("STEP 3: صيانة الفهارس (REINDEX CONCURRENTLY)...")
         # نستخدم CONCURRENTLY لعدم إيقاف النظام أثناء العمل
         indices = ['idx_orders_status', 'idx_market_ticks_symbol']
         
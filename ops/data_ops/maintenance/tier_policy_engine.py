@@ -0,0 +1,226 @@
+# Tiered Retention Scheduler
+
+# -*- coding: utf-8 -*-
+# ALPHA SOVEREIGN - TIERED RETENTION & DOWNSAMPLING POLICY ENGINE
+# =================================================================
+# Component Name: data/maintenance/tier_policy_engine.py
+# Core Responsibility: تنفيذ سياسة احتفاظ تصريحية واحدة لكل فئة بيانات عبر الطبقات (Storage Pillar).
+# Design Pattern: Policy Engine / Scheduled Job / Incremental (Watermark)
+# Forensic Impact: كل انتقال (ترحيل، تجميع، حذف) يتقدم بعلامة مائية محفوظة على القرص؛
+#                  لا تتقدم العلامة إلا بعد نجاح المعالج، فلا تضيع نافذة زمنية بصمت.
+# =================================================================
+
+import asyncio
+import json
+import logging
+import os
+import re
+import shutil
+import time
+import yaml
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+TIER_ORDER = ["hot", "warm", "cold"]
+
+_DURATION_PATTERN = re.compile(r"^(\d+(?:\.\d+)?)\s*([mhdy])$")
+_UNIT_SECONDS = {"m": 60, "h": 3600, "d": 86400, "y": 365 * 86400}
+
+# المعالج يستلم نافذة [start_ts, end_ts) بتوقيت Unix ويعيد عدد العناصر المعالجة.
+# النوافذ محاذاة لحدود max_window (أيام UTC كاملة افتراضياً) فلا تعالج فترة ناقصة مرتين.
+# start_ts = None في أول تشغيل (لا توجد علامة مائية بعد).
+TransitionHandler = Callable[[Optional[float], float], Union[int, Awaitable[int]]]
+
+
+def parse_duration(value: Any) -> Optional[float]:
+    """
+    تحويل نص المدة إلى ثوانٍ. 'forever' تعني None (بلا حد).
+    Example: '3d' -> 259200, '1y' -> 31536000
+    """
+    if value is None:
+        return None
+    text = str(value).strip().lower()
+    if text == "forever":
+        return None
+    match = _DURATION_PATTERN.match(text)
+    if not match:
+        raise ValueError(f"Invalid duration: {value}")
+    return float(match.group(1)) * _UNIT_SECONDS[match.group(2)]
+
+
+@dataclass(frozen=True)
+class Transition:
+    """انتقال واحد مستنتج من السياسة: مثل ticks 'warm->cold' عند عمر 30 يوماً."""
+    data_class: str
+    name: str            # 'hot->warm' / 'warm->cold' / 'cold:expire' / 'cold:downsample'
+    age_s: float         # العمر الذي يصبح عنده الانتقال مستحقاً
+    params: Dict[str, Any]
+
+    @property
+    def key(self) -> str:
+        return f"{self.data_class}.{self.name}"
+
+
+class TierPolicyEngine:
+    """
+    محرك سياسات الطبقات.
+    يقرأ السياسة التصريحية، يستنتج الانتقالات لكل فئة بيانات، وينفذها تراكمياً
+    عبر معالجات يسجلها كل مكون مسؤول (ArchiveManager, OHLCVRollupBuilder, ...).
+    """
+
+    def __init__(self,
+                 policy: Dict[str, Any],
+                 state_file: str = "data/lake/_tier_watermarks.json"):
+        """
+        Args:
+            policy: محتوى القسم 'tier_policy' من ملف السياسة.
+            state_file: مكان حفظ العلامات المائية لكل انتقال.
+        """
+        self.logger = logging.getLogger("Alpha.Maintenance.TierPolicy")
+        self.max_window_s = parse_duration(policy.get("max_window", "1d"))
+        self.max_steps = int(policy.get("max_steps_per_cycle", 7))
+
+        self.transitions: Dict[str, Transition] = {}
+        for data_class, tiers in (policy.get("data_classes") or {}).items():
+            for t in self._derive_transitions(data_class, tiers or {}):
+                self.transitions[t.key] = t
+
+        self.handlers: Dict[str, TransitionHandler] = {}
+        self.state_path = Path(state_file)
+        self.watermarks: Dict[str, float] = self._load_state()
+
+    @classmethod
+    def from_yaml(cls, path: str = "config/data/tier_policy.yaml", **kwargs) -> "TierPolicyEngine":
+        with open(path, "r", encoding="utf-8") as f:
+            doc = yaml.safe_load(f) or {}
+        return cls(doc.get("tier_policy", {}), **kwargs)
+
+    @staticmethod
+    def _derive_transitions(data_class: str, tiers: Dict[str, Any]) -> List[Transition]:
+        """تحويل تعريف الطبقات إلى قائمة انتقالات مرتبة حسب العمر."""
+        present = [t for t in TIER_ORDER if t in tiers]
+        out = []
+        for i, tier in enumerate(present):
+            spec = tiers[tier] or {}
+
+            until = parse_duration(spec.get("until", "forever"))
+            if until is not None:
+                name = f"{tier}->{present[i + 1]}" if i + 1 < len(present) else f"{tier}:expire"
+                out.append(Transition(data_class, name, until, {}))
+
+            after = parse_duration(spec.get("downsample_after"))
+            if after is not None:
+                out.append(Transition(data_class, f"{tier}:downsample", after,
+                                      {"resolution": spec.get("downsample_to")}))
+
+        return sorted(out, key=lambda t: t.age_s)
+
+    def register(self, data_class: str, transition: str, handler: TransitionHandler):
+        """
+        ربط معالج بانتقال معرف في السياسة.
+        Example: engine.register("ticks", "warm->cold", archive_mgr.archive_window_handler(symbols))
+        """
+        key = f"{data_class}.{transition}"
+        if key not in self.transitions:
+            raise KeyError(f"Transition not declared in policy: {key}")
+        self.handlers[key] = handler
+
+    def tier_ttl(self, data_class: str, tier: str) -> Optional[float]:
+        """
+        عمر مغادرة الطبقة بالثواني (None = بلا حد).
+        يستخدم للمخازن التي تدير انتهاءها ذاتياً (TTL أصلي) بدلاً من معالج مسجل.
+        """
+        for t in self.transitions.values():
+            if t.data_class != data_class:
+                continue
+            if t.name.startswith(f"{tier}->") or t.name == f"{tier}:expire":
+                return t.age_s
+        return None
+
+    async def run_cycle(self, now: Optional[float] = None) -> Dict[str, int]:
+        """
+        تشغيل دورة واحدة: كل انتقال مستحق يعالج من علامته المائية حتى (الآن - العمر)،
+        على نوافذ لا تتجاوز max_window، وبحد أقصى max_steps خطوة لكل انتقال.
+
+        Returns:
+            عدد العناصر المعالجة لكل انتقال.
+        """
+        now = time.time() if now is None else now
+        report: Dict[str, int] = {}
+
+        for key, transition in self.transitions.items():
+            handler = self.handlers.get(key)
+            if handler is None:
+                self.logger.debug(f"TIER_NO_HANDLER: {key} (مصرح به في السياسة لكن بلا منفذ مسجل)")
+                continue
+
+            due_until = now - transition.age_s
+            processed = 0
+
+            for _ in range(self.max_steps):
+                start = self.watermarks.get(key)
+                end = due_until if start is None else min(due_until, start + self.max_window_s)
+                end = (end // self.max_window_s) * self.max_window_s
+                if start is not None and end <= start:
+                    break
+
+                try:
+                    result = handler(start, end)
+                    if asyncio.iscoroutine(result) or isinstance(result, asyncio.Future):
+                        result = await result
+                except Exception as e:
+                    # العلامة المائية لا تتقدم: نعيد المحاولة في الدورة القادمة
+                    self.logger.error(f"TIER_STEP_FAIL: {key} [{start} -> {end}]: {e}")
+                    break
+
+                processed += int(result or 0)
+                self.watermarks[key] = end
+                self._save_state()
+
+            if processed:
+                self.logger.info(f"TIER_MOVED: {key} | {processed} عنصر.")
+            report[key] = processed
+
+        return report
+
+    # --- Persistence ---
+
+    def _load_state(self) -> Dict[str, float]:
+        if not self.state_path.exists():
+            return {}
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return {k: float(v) for k, v in json.load(f).items()}
+        except Exception as e:
+            self.logger.error(f"TIER_STATE_CORRUPT: {e}. البدء بدون علامات مائية.")
+            return {}
+
+    def _save_state(self):
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.state_path.with_suffix(".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.watermarks, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        shutil.move(str(temp_path), str(self.state_path))
+
+
+def expire_files_handler(root: str, pattern: str = "*") -> TransitionHandler:
+    """
+    معالج عام لانتقالات الحذف على الملفات (مثل السجلات):
+    يحذف الملفات التي آخر تعديل لها أقدم من نهاية النافذة.
+    """
+    base = Path(root)
+
+    def _expire(start_ts: Optional[float], end_ts: float) -> int:
+        removed = 0
+        if not base.exists():
+            return 0
+        for f in base.rglob(pattern):
+            if f.is_file() and f.stat().st_mtime < end_ts:
+                f.unlink()
+                removed += 1
+        return removed
+
+    return _expire
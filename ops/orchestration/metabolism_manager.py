@@ -25,6 +25,7 @@ from data.hot.cache_provider import CacheProvider
 # تأكد من بناء ملف Rust لاحقاً باستخدام maturin ليصبح مكتبة بايثون قابلة للاستيراد
 from data.warm.ts_db_manager import TSDBManager, MarketTick 
 from data.cold.parquet_archiver import ParquetArchiver
+from data.cold.rollup_builder import OHLCVRollupBuilder
 
 # 4. الذاكرة المتجهية (تم تحديث الاسم والمكان)
 from data.vector_db_wrapper import AlphaQdrantClient
@@ -32,6 +33,7 @@ from data.vector_db_wrapper import AlphaQdrantClient
 # --- استيراد طاقم الصيانة (Validation & Maintenance) ---
 from data.maintenance.archive_manager import ArchiveManager
 from data.maintenance.db_compactor import DBCompactor
+from data.maintenance.tier_policy_engine import TierPolicyEngine, expire_files_handler
 from data.validation.integrity_checker import IntegrityChecker  # تم نقله من governance
 
 class MetabolismManager:
@@ -40,9 +42,11 @@ class MetabolismManager:
     يدير تدفق البيانات من لحظة دخولها (Ingestion) حتى دفنها في الأرشيف (Archival).
     """
 
-    def __init__(self, db_url: str, redis_host: str = "127.0.0.1"):
+    def __init__(self, db_url: str, redis_host: str = "127.0.0.1",
+                 tracked_symbols: List[str] = None):
         self.logger = logging.getLogger("Alpha.Core.Metabolism")
         self.is_running = False
+        self.tracked_symbols = tracked_symbols or ['BTCUSDT', 'ETHUSDT']
         
         # 1. طبقة المعالجة الأولية
         self.normalizer = NormalizerService()
@@ -59,6 +63,7 @@ class MetabolismManager:
         self.hot_cache = CacheProvider(host=redis_host)
         self.warm_db = None # سيتم تهيئته لاحقاً لأن اتصاله async
         self.cold_archiver = ParquetArchiver()
+        self.rollup_builder = OHLCVRollupBuilder()
         self.vector_memory = AlphaQdrantClient()
         
         # 4. إعدادات الاتصال (Connection Configs)
@@ -69,6 +74,9 @@ class MetabolismManager:
         self.compactor_service = None
         self.integrity_auditor = IntegrityChecker()
 
+        # 6. سياسة الطبقات الموحدة (بدلاً من منطق احتفاظ مكرر في كل مكون)
+        self.tier_engine = TierPolicyEngine.from_yaml()
+
     async def ignite(self):
         """
         تشغيل النظام (System Boot Sequence).
@@ -94,8 +102,19 @@ class MetabolismManager:
             self.logger.info("   [OK] Stream Buffer Active")
 
             # D. تهيئة خدمات الصيانة
-            self.archiver_service = ArchiveManager(self.warm_db, self.cold_archiver)
+            self.archiver_service = ArchiveManager(self.warm_db, self.cold_archiver,
+                                                   rollup_builder=self.rollup_builder)
             self.compactor_service = DBCompactor(self._db_url)
+
+            # ربط منفذي الانتقالات بسياسة الطبقات: كل النوافذ والأعمار تأتي من المحرك
+            # hot->warm: ضغط قطع Timescale / warm->cold: أرشفة Parquet ثم الحذف من DB
+            self.tier_engine.register("ticks", "hot->warm",
+                                      self.compactor_service.compress_window_handler("market_ticks"))
+            self.tier_engine.register("ticks", "warm->cold",
+                                      self.archiver_service.window_handler(self.tracked_symbols))
+            self.tier_engine.register("ticks", "cold:downsample",
+                                      self.rollup_builder.downsample_raw_ticks)
+            self.tier_engine.register("logs", "warm:expire", expire_files_handler("logs", "*.log*"))
             
             # E. فحص النزاهة الأولي (Sanity Check)
             audit_report = self.integrity_auditor.run_full_audit()
@@ -127,6 +146,7 @@ class MetabolismManager:
 
         # 2. التوزيع السريع (Hot Path) -> Redis
         # لتستخدمها الواجهة الرسومية والاستراتيجيات اللحظية
+        # (هذا كاش "آخر قيمة" يستبدل نفسه، وليس طبقة احتفاظ؛ الطبقة الحارة هي قطع DB غير المضغوطة)
         symbol = normalized_tick['symbol']
         await self.hot_cache.set(f"LATEST_TICK:{symbol}", normalized_tick)
 
@@ -168,13 +188,15 @@ class MetabolismManager:
         حلقة الصيانة الدورية (The Circadian Rhythm).
         """
         while self.is_running:
-            # هنا نضع منطق الجدولة (مثلاً التحقق من الساعة)
             # للتبسيط، ننتظر ساعة ثم نقوم بالفحص
             await asyncio.sleep(3600) 
             
-            # (في التطبيق الحقيقي، نتحقق من الوقت قبل التشغيل)
-            # if self.archiver_service:
-            #     await self.archiver_service.run_daily_cycle(['BTCUSDT', 'ETHUSDT'])
+            # كل الانتقالات (ترحيل، تجميع، حذف) تنفذ تراكمياً بعلاماتها المائية،
+            # فالدورة الفائتة لا تضيع بل تعالج في الدورة التالية
+            try:
+                await self.tier_engine.run_cycle()
+            except Exception as e:
+                self.logger.error(f"TIER_CYCLE_FAIL: {e}")
 
     async def shutdown(self):
         """
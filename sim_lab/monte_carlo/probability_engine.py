@@ -12,7 +12,7 @@ Forensic Impact: يوفر "مبرراً رياضياً" لكل قرار. إذا
 import numpy as np
 import logging
 from dataclasses import dataclass
-from typing import Tuple, List
+from typing import Tuple, List, Optional
 
 # إعداد التسجيل
 logger = logging.getLogger("alpha.sim.monte_carlo")
@@ -119,6 +119,26 @@ class ProbabilityEngine:
         
         return price_paths
 
+    def generate_correlated_returns(self, cov: np.ndarray, steps: int = 1,
+                                    seed: Optional[int] = None) -> np.ndarray:
+        """
+        عوائد بسيطة مترابطة لعدة أصول على مدى `steps` شمعة (نفس فرضيات GBM أعلاه: انجراف صفري).
+        cov: مصفوفة تغاير العوائد اللوغاريتمية لكل شمعة (N × N).
+
+        Returns:
+            مصفوفة (num_sims × N): العائد البسيط لكل أصل في نهاية المدى لكل مسار.
+        """
+        cov = np.asarray(cov, dtype=np.float64)
+        # جذر طيفي (يتحمل مصفوفات التغاير شبه الموجبة الناتجة عن EWMA أو الانكماش)
+        eigval, eigvec = np.linalg.eigh(cov)
+        root = eigvec * np.sqrt(np.clip(eigval, 0.0, None))
+
+        # مجموع `steps` صدمة مستقلة = صدمة واحدة بتباين مضروب في steps
+        rng = np.random.default_rng(seed)
+        z = rng.standard_normal((self.num_sims, cov.shape[0]))
+        log_returns = np.sqrt(steps) * (z @ root.T) - 0.5 * steps * np.diag(cov)
+        return np.expm1(log_returns)
+
     def _analyze_paths(self, paths: np.ndarray, setup: TradeSetup) -> Tuple[int, int, int]:
         """
         فحص كل مسار لمعرفة مصيره (Win/Loss/TimeOut).